@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from typing import Literal, get_args
+
+from client.latency_recorder import LatencyRecorder
+from client.totp_generator import TOTPGenerator
+from register_ticket_api.entities import AttendanceLog, Ticket
+from register_ticket_api.infraestructure import PostgreSQLDbContext
+from register_ticket_api.repositories import TicketRepository, UserRepository
+from register_ticket_api.services import TicketService
+
+Scenario = Literal["register", "attend"]
+
+# ticket ids in rejection messages would give every loser its own outcome
+UUID_PATTERN: re.Pattern[str] = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+GATE: str = "BENCH"
+
+
+async def contend(callers: list[Callable[[], Awaitable[object]]]) -> dict:
+    # every caller is parked on the same event and released at once, so they race for the
+    # ticket's row lock instead of arriving one after another
+    start = asyncio.Event()
+    recorder = LatencyRecorder()
+    succeeded: int = 0
+
+    async def call(operation: Callable[[], Awaitable[object]]) -> None:
+        nonlocal succeeded
+        await start.wait()
+        started_at: float = time.perf_counter()
+        try:
+            await operation()
+            outcome: str = "succeeded"
+            succeeded += 1
+        except Exception as err:
+            outcome = f"{type(err).__name__}: {UUID_PATTERN.sub('<id>', str(err))}"
+        recorder.record(started_at, started_at, time.perf_counter(), outcome)
+
+    tasks: list[asyncio.Task] = [asyncio.create_task(call(caller)) for caller in callers]
+    await asyncio.sleep(0)  # let every task reach the event
+    started_at: float = time.perf_counter()
+    start.set()
+    await asyncio.gather(*tasks)
+    elapsed: float = time.perf_counter() - started_at
+    summary: dict = recorder.summary()
+    return {
+        "callers": len(callers),
+        "succeeded": succeeded,
+        "outcomes": summary["outcomes"],
+        "elapsed_seconds": round(elapsed, 4),
+        "calls_per_second": round(len(callers) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": summary["response_time_ms"],
+    }
+
+
+class ContendedTicket:
+    # a throwaway ticket and its would-be owners, removed again after the run
+    def __init__(self, db_context: PostgreSQLDbContext, owners: int) -> None:
+        self.__db_context = db_context
+        self.__owners = owners
+        run_id: str = uuid.uuid4().hex[:8]
+        self.seat: str = f"CT{run_id}"
+        self.usernames: list[str] = [f"contention_{run_id}_{i}" for i in range(owners)]
+
+    async def __aenter__(self) -> "ContendedTicket":
+        conn = await self.__db_context.get_connection()
+        try:
+            await conn.execute(
+                """
+                INSERT INTO tickets (seat, gate, seed, status)
+                VALUES ($1, $2, gen_random_bytes(20), 'valid');
+                """,
+                self.seat,
+                GATE,
+            )
+            await conn.execute(
+                "INSERT INTO users (username, password_hash) SELECT unnest($1::text[]), '-';",
+                self.usernames,
+            )
+        finally:
+            await self.__db_context.release_connection(conn)
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        conn = await self.__db_context.get_connection()
+        try:
+            await conn.execute(
+                "DELETE FROM tickets WHERE seat = $1 AND gate = $2;", self.seat, GATE
+            )
+            await conn.execute(
+                "DELETE FROM users WHERE username = ANY($1::text[]);", self.usernames
+            )
+        finally:
+            await self.__db_context.release_connection(conn)
+
+
+async def run_scenario(
+    ticket_service: TicketService, db_context: PostgreSQLDbContext, scenario: Scenario, callers: int
+) -> dict:
+    # the harness only talks to TicketService, whatever path it takes to the row (stored
+    # procedures today, a single atomic statement later) is what gets measured
+    async with ContendedTicket(db_context, owners=callers) as ticket:
+        if scenario == "register":
+            # every caller is a different user claiming the same seat
+            return await contend(
+                [
+                    partial(
+                        ticket_service.register_ticket,
+                        username,
+                        Ticket(seat=ticket.seat, gate=GATE),
+                    )
+                    for username in ticket.usernames
+                ]
+            )
+        # one owner, then the same code scanned from every lane (a shared screenshot)
+        registered: Ticket = await ticket_service.register_ticket(
+            ticket.usernames[0], Ticket(seat=ticket.seat, gate=GATE)
+        )
+        code: str = TOTPGenerator(registered.seed or "").generate_code()
+        return await contend(
+            [
+                partial(
+                    ticket_service.log_attendance,
+                    AttendanceLog(
+                        seat=ticket.seat, gate=GATE, totp_code=code, device_id=f"lane-{lane}"
+                    ),
+                )
+                for lane in range(callers)
+            ]
+        )
+
+
+async def open_ticket_service(
+    host: str | None = None,
+) -> tuple[PostgreSQLDbContext, TicketService]:
+    # host overrides DB_HOST, which names the database inside the compose network
+    db_context = PostgreSQLDbContext(host=host)
+    await db_context.open_pool()
+    ticket_service = TicketService(
+        user_repo=UserRepository(db_context), ticket_repo=TicketRepository(db_context)
+    )
+    return db_context, ticket_service
+
+
+async def main() -> None:
+    parser = ArgumentParser(
+        description="Races concurrent registrations and scans of one ticket on a local Postgres"
+    )
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5, help="fresh ticket per round")
+    parser.add_argument("--scenario", choices=get_args(Scenario), action="append")
+    parser.add_argument("--report", type=Path, default=None, help="JSON report path")
+    parser.add_argument(
+        "--host", default=os.getenv("POSTGRES_HOST", "localhost"), help="Postgres host"
+    )
+    args = parser.parse_args()
+
+    db_context, ticket_service = await open_ticket_service(host=args.host)
+    report: dict[str, list[dict]] = {}
+    try:
+        for scenario in args.scenario or list(get_args(Scenario)):
+            report[scenario] = []
+            for _ in range(args.rounds):
+                result: dict = await run_scenario(
+                    ticket_service, db_context, scenario, args.callers
+                )
+                report[scenario].append(result)
+                print(
+                    f"{scenario:<9} {result['callers']} callers, {result['succeeded']} succeeded, "
+                    f"{result['calls_per_second']:>8.1f} calls/s, "
+                    f"p50 {result['latency_ms']['p50']:>7.2f} ms "
+                    f"p99 {result['latency_ms']['p99']:>7.2f} ms "
+                    f"max {result['latency_ms']['max']:>7.2f} ms"
+                )
+                if result["succeeded"] != 1:
+                    print(f"  NOT EXACTLY ONCE: {result['outcomes']}")
+    finally:
+        await db_context.close_pool()
+    if args.report is not None:
+        args.report.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+import os
+import time
+from argparse import ArgumentParser
+from base64 import b32encode, b64decode, b64encode
+from collections.abc import Callable
+from uuid import uuid4
+
+from pyotp import TOTP
+
+from register_ticket_api.entities import Ticket
+from register_ticket_api.infraestructure import TicketTokenCodec
+
+TOTP_INTERVAL_SECONDS: int = 60
+
+
+def measure(name: str, operation: Callable[[], object], iterations: int) -> float:
+    for _ in range(min(iterations, 1000)):  # warm up
+        operation()
+    started_at: float = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    per_call_us: float = (time.perf_counter() - started_at) / iterations * 1_000_000
+    print(f"{name:<32} {per_call_us:8.2f} us/op {1_000_000 / per_call_us:12,.0f} ops/s")
+    return per_call_us
+
+
+def verify_totp(seed_base64: str, code: str) -> bool:
+    seed_base32: str = b32encode(b64decode(seed_base64)).decode("utf-8")
+    return TOTP(seed_base32, interval=TOTP_INTERVAL_SECONDS).verify(code, valid_window=0)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Measures the CPU cost of verifying a ticket token")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # the same shape as a registered ticket, a 20 bytes seed and short seat and gate
+    ticket = Ticket(
+        id=uuid4(), user_id=uuid4(), seat="A12", gate="G3", seed=b64encode(os.urandom(20)).decode()
+    )
+    codec = TicketTokenCodec({"k1": os.urandom(32), "k2": os.urandom(32)}, active_kid="k2")
+    token: str = codec.issue(ticket)
+    assert ticket.seed is not None
+    code: str = TOTP(
+        b32encode(b64decode(ticket.seed)).decode(), interval=TOTP_INTERVAL_SECONDS
+    ).now()
+    print(f"token length: {len(token)} chars")
+
+    measure("issue", lambda: codec.issue(ticket), args.iterations)
+    verify_us = measure("verify token", lambda: codec.verify(token), args.iterations)
+    totp_us = measure("verify totp", lambda: verify_totp(ticket.seed or "", code), args.iterations)
+    measure(
+        "verify token + totp (per scan)",
+        lambda: verify_totp(codec.verify(token).seed, code),
+        args.iterations,
+    )
+    print(f"token verification adds {verify_us / totp_us:.0%} of the TOTP check cost")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
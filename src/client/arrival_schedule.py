@@ -0,0 +1,53 @@
+import math
+import random
+from collections.abc import Callable
+from typing import Literal
+
+ArrivalPattern = Literal["constant", "poisson", "surge"]
+RateFunction = Callable[[float], float]
+
+
+def build_arrival_schedule(  # noqa: PLR0913
+    pattern: ArrivalPattern,
+    rate: float,
+    duration_seconds: float,
+    *,
+    peak_rate: float | None = None,
+    peak_at_seconds: float | None = None,
+    peak_width_seconds: float | None = None,
+    rng: random.Random | None = None,
+) -> list[float]:
+    # offsets in seconds from the start of the run at which each request must be sent,
+    # decided up front so a slow server can't slow down the arrivals (open loop)
+    if rate <= 0 or duration_seconds <= 0:
+        raise ValueError("Rate and duration must be positive")
+    rng = rng or random.Random()  # noqa: S311
+    if pattern == "constant":
+        return [i / rate for i in range(int(rate * duration_seconds))]
+    if pattern == "poisson":
+        return _poisson_arrivals(lambda _: rate, rate, duration_seconds, rng)
+    # a gate surge: the base rate with a bell shaped peak, doors opening or a show ending
+    peak: float = peak_rate if peak_rate is not None else rate * 5
+    center: float = peak_at_seconds if peak_at_seconds is not None else duration_seconds / 2
+    width: float = peak_width_seconds if peak_width_seconds is not None else duration_seconds / 10
+    if peak < rate or width <= 0:
+        raise ValueError("Peak rate must be at least the base rate and its width positive")
+
+    def surge_rate(offset: float) -> float:
+        return rate + (peak - rate) * math.exp(-(((offset - center) / width) ** 2) / 2)
+
+    return _poisson_arrivals(surge_rate, peak, duration_seconds, rng)
+
+
+def _poisson_arrivals(
+    rate_at: RateFunction, max_rate: float, duration_seconds: float, rng: random.Random
+) -> list[float]:
+    # thinning: draw a Poisson process at the highest rate and keep each arrival with
+    # probability rate_at(offset) / max_rate
+    arrivals: list[float] = []
+    offset: float = rng.expovariate(max_rate)
+    while offset < duration_seconds:
+        if rng.random() * max_rate < rate_at(offset):
+            arrivals.append(offset)
+        offset += rng.expovariate(max_rate)
+    return arrivals
@@ -0,0 +1,310 @@
+import asyncio
+import contextlib
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import ClassVar
+
+import httpx
+
+from client.totp_generator import TOTPGenerator
+
+
+class GateBackpressureError(Exception):
+    # the outbound queue is full, the lane should slow down instead of piling up scans
+    pass
+
+
+@dataclass(frozen=True)
+class GateScan:
+    seat: str
+    gate: str
+    totp_code: str
+    token: str | None = None  # signed ticket token, when the ticket carries one
+    device_id: str | None = None  # defaults to the client's device
+
+    @classmethod
+    def from_seed(cls, seat: str, gate: str, seed: str, **fields: str | None) -> "GateScan":
+        # the code the ticket shows right now, for lanes that hold the seeds themselves
+        return cls(seat=seat, gate=gate, totp_code=TOTPGenerator(seed).generate_code(), **fields)
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    scan: GateScan
+    status_code: int | None  # None when no response came back after every attempt
+    ticket: dict | None = None
+    detail: str | None = None
+    attempts: int = 1
+    replayed: bool = False  # answered from the idempotency record of an earlier attempt
+    latency_ms: float = 0.0  # from submit, queueing and retries included
+
+    @property
+    def accepted(self) -> bool:
+        return self.status_code == GateClient.ACCEPTED
+
+
+@dataclass
+class _PendingScan:
+    scan: GateScan
+    idempotency_key: str
+    result: asyncio.Future
+    submitted_at: float
+
+
+class GateClient:
+    # one per lane: scans queue up in a bounded outbound queue, whatever is queued goes out
+    # together as a micro-batch and every scan of it is sent at once over a few keep-alive
+    # connections. A retry sends the same Idempotency-Key, the API answers it with the
+    # outcome of the first attempt instead of scanning the ticket twice
+    ATTENDANCE_PATH: ClassVar[str] = "/api/users/attendance"
+    ACCEPTED: ClassVar[int] = 202
+    # throttled, or the API or its database briefly unavailable
+    RETRY_STATUS_CODES: ClassVar[frozenset[int]] = frozenset({429, 502, 503, 504})
+
+    def __init__(  # noqa: PLR0913
+        self,
+        base_url: str,
+        *,
+        gate_token: str | None = None,
+        device_id: str | None = None,
+        max_connections: int = 4,
+        max_in_flight: int = 32,
+        queue_size: int = 256,
+        batch_size: int = 16,
+        linger_seconds: float = 0.002,
+        max_attempts: int = 4,
+        backoff_seconds: float = 0.05,
+        max_backoff_seconds: float = 2.0,
+        timeout_seconds: float = 5.0,
+        seed: int | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if min(max_connections, max_in_flight, queue_size, batch_size, max_attempts) < 1:
+            raise ValueError("Connections, in flight, queue, batch size and attempts must be >= 1")
+        self.__base_url = base_url
+        # gate routes (revocation feeds) are closed without it, scans don't need it
+        self.__headers: dict[str, str] = {"X-Gate-Token": gate_token} if gate_token else {}
+        self.__device_id = device_id
+        self.__max_connections = max_connections
+        self.__batch_size = batch_size
+        self.__linger_seconds = linger_seconds
+        self.__max_attempts = max_attempts
+        self.__backoff_seconds = backoff_seconds
+        self.__max_backoff_seconds = max_backoff_seconds
+        self.__timeout_seconds = timeout_seconds
+        self.__transport = transport
+        self.__rng = random.Random(seed)  # noqa: S311
+        self.__queue: asyncio.Queue[_PendingScan] = asyncio.Queue(maxsize=queue_size)
+        # more requests than connections keep each connection busy while a response is on
+        # its way back, the dispatcher stops taking batches when all of them are in flight
+        self.__in_flight = asyncio.Semaphore(max_in_flight)
+        self.__in_flight_count: int = 0
+        self.__sending: set[asyncio.Task] = set()
+        self.__http: httpx.AsyncClient | None = None
+        self.__dispatcher: asyncio.Task | None = None
+        self.__generators: dict[str, TOTPGenerator] = {}
+
+    async def __aenter__(self) -> "GateClient":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    @property
+    def queued(self) -> int:
+        return self.__queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight_count
+
+    @property
+    def saturated(self) -> bool:
+        return self.__queue.full()
+
+    def start(self) -> None:
+        if self.__http is None:
+            self.__http = httpx.AsyncClient(
+                base_url=self.__base_url,
+                headers=self.__headers,
+                timeout=self.__timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.__max_connections,
+                    max_keepalive_connections=self.__max_connections,
+                ),
+                transport=self.__transport,
+            )
+            self.__dispatcher = asyncio.create_task(self.__dispatch())
+
+    async def close(self) -> None:
+        # scans already submitted are still sent
+        if self.__http is None:
+            return
+        await self.__queue.join()
+        if self.__dispatcher is not None:
+            self.__dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__dispatcher
+            self.__dispatcher = None
+        await self.__http.aclose()
+        self.__http = None
+
+    def submit_nowait(self, scan: GateScan) -> "asyncio.Future[ScanResult]":
+        pending: _PendingScan = self.__pending(scan)
+        try:
+            self.__queue.put_nowait(pending)
+        except asyncio.QueueFull as err:
+            raise GateBackpressureError(f"{self.queued} scans already waiting to be sent") from err
+        return pending.result
+
+    async def submit(self, scan: GateScan) -> "asyncio.Future[ScanResult]":
+        # waits for room in the queue, the lane slows down to what the API takes
+        pending: _PendingScan = self.__pending(scan)
+        await self.__queue.put(pending)
+        return pending.result
+
+    async def scan(self, scan: GateScan) -> ScanResult:
+        result: ScanResult = await (await self.submit(scan))
+        return result
+
+    async def revoked_tickets(self, gate: str) -> dict:
+        # the full revocation list of a gate, to resync the lane (needs the gate token)
+        if self.__http is None:
+            raise RuntimeError("The gate client is not started")
+        response: httpx.Response = await self.__http.get(f"/api/gates/{gate}/revoked-tickets")
+        response.raise_for_status()
+        page: dict = response.json()
+        return page
+
+    def generate_code(self, seed: str) -> str:
+        code: str = self.__generator(seed).generate_code()
+        return code
+
+    def verify_code(self, seed: str, totp_code: str) -> bool:
+        # the API's own rule, so a lane holding the seeds can turn a wrong code away offline
+        valid: bool = self.__generator(seed).verify_code(totp_code)
+        return valid
+
+    def __generator(self, seed: str) -> TOTPGenerator:
+        generator: TOTPGenerator | None = self.__generators.get(seed)
+        if generator is None:
+            generator = self.__generators[seed] = TOTPGenerator(seed)
+        return generator
+
+    def __pending(self, scan: GateScan) -> _PendingScan:
+        if self.__http is None:
+            raise RuntimeError("The gate client is not started")
+        return _PendingScan(
+            scan=scan,
+            idempotency_key=str(uuid.uuid4()),
+            result=asyncio.get_running_loop().create_future(),
+            submitted_at=time.perf_counter(),
+        )
+
+    async def __dispatch(self) -> None:
+        while True:
+            batch: list[_PendingScan] = [await self.__queue.get()]
+            # a short linger lets the scans of a burst leave together
+            if self.__linger_seconds > 0 and self.__queue.qsize() < self.__batch_size - 1:
+                await asyncio.sleep(self.__linger_seconds)
+            while len(batch) < self.__batch_size and not self.__queue.empty():
+                batch.append(self.__queue.get_nowait())
+            for pending in batch:
+                await self.__in_flight.acquire()
+                self.__in_flight_count += 1
+                task: asyncio.Task = asyncio.create_task(self.__send(pending))
+                self.__sending.add(task)
+                task.add_done_callback(self.__sending.discard)
+
+    async def __send(self, pending: _PendingScan) -> None:
+        try:
+            result: ScanResult = await self.__send_with_retries(pending)
+            if not pending.result.done():
+                pending.result.set_result(result)
+        except Exception as err:
+            if not pending.result.done():
+                pending.result.set_exception(err)
+        finally:
+            self.__in_flight_count -= 1
+            self.__in_flight.release()
+            self.__queue.task_done()
+
+    async def __send_with_retries(self, pending: _PendingScan) -> ScanResult:
+        assert self.__http is not None
+        scan: GateScan = pending.scan
+        body: dict[str, str] = {
+            "seat": scan.seat,
+            "gate": scan.gate,
+            "totp_code": scan.totp_code,
+        }
+        device_id: str | None = scan.device_id or self.__device_id
+        if device_id is not None:
+            body["device_id"] = device_id
+        if scan.token is not None:
+            body["token"] = scan.token
+        headers: dict[str, str] = {"Idempotency-Key": pending.idempotency_key}
+        attempt: int = 0
+        while True:
+            attempt += 1
+            retry_after: float = 0.0
+            try:
+                response: httpx.Response = await self.__http.post(
+                    self.ATTENDANCE_PATH, json=body, headers=headers
+                )
+            except httpx.TransportError as err:
+                if attempt >= self.__max_attempts:
+                    return self.__result(pending, None, attempt, detail=type(err).__name__)
+            else:
+                retry_after = self.__retry_after(response)
+                # a throttled device waits longer than a lane should hold a person
+                if (
+                    response.status_code not in self.RETRY_STATUS_CODES
+                    or attempt >= self.__max_attempts
+                    or retry_after > self.__max_backoff_seconds
+                ):
+                    return self.__result(pending, response, attempt)
+            await asyncio.sleep(max(retry_after, self.__backoff(attempt)))
+
+    def __backoff(self, attempt: int) -> float:
+        # full jitter, lanes that failed together don't all come back together
+        ceiling: float = min(
+            self.__max_backoff_seconds, self.__backoff_seconds * 2 ** (attempt - 1)
+        )
+        return self.__rng.uniform(0, ceiling)
+
+    def __retry_after(self, response: httpx.Response) -> float:
+        try:
+            return float(response.headers.get("Retry-After", 0))
+        except ValueError:
+            return 0.0
+
+    def __result(
+        self,
+        pending: _PendingScan,
+        response: httpx.Response | None,
+        attempts: int,
+        detail: str | None = None,
+    ) -> ScanResult:
+        latency_ms: float = (time.perf_counter() - pending.submitted_at) * 1000
+        if response is None:
+            return ScanResult(
+                pending.scan, None, detail=detail, attempts=attempts, latency_ms=latency_ms
+            )
+        payload: object = None
+        with contextlib.suppress(ValueError):
+            payload = response.json()
+        accepted: bool = response.status_code == self.ACCEPTED and isinstance(payload, dict)
+        return ScanResult(
+            pending.scan,
+            response.status_code,
+            ticket=payload if accepted and isinstance(payload, dict) else None,
+            detail=(
+                str(payload.get("detail")) if not accepted and isinstance(payload, dict) else None
+            ),
+            attempts=attempts,
+            replayed=response.headers.get("Idempotent-Replayed") == "true",
+            latency_ms=latency_ms,
+        )
@@ -0,0 +1,48 @@
+import math
+from collections import Counter
+
+PERCENTILES: tuple[float, ...] = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyRecorder:
+    # response time runs from the moment the request was due, not from when it was sent:
+    # a request stuck behind a stalled server or a saturated client is charged for the
+    # whole wait, which is what a person at the gate sees (no coordinated omission).
+    # Service time, from the send, is kept next to it to tell the two apart
+    def __init__(self) -> None:
+        self.__response_times_ms: list[float] = []
+        self.__service_times_ms: list[float] = []
+        self.__outcomes: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self.__response_times_ms)
+
+    def record(self, due_at: float, sent_at: float, completed_at: float, outcome: str) -> None:
+        # outcome is the status code, or the exception name when there was no response
+        self.__response_times_ms.append((completed_at - due_at) * 1000)
+        self.__service_times_ms.append((completed_at - sent_at) * 1000)
+        self.__outcomes[outcome] += 1
+
+    def summary(self) -> dict:
+        return {
+            "count": len(self.__response_times_ms),
+            "outcomes": dict(sorted(self.__outcomes.items())),
+            "response_time_ms": self.__distribution(self.__response_times_ms),
+            "service_time_ms": self.__distribution(self.__service_times_ms),
+        }
+
+    def __distribution(self, latencies_ms: list[float]) -> dict[str, float]:
+        if not latencies_ms:
+            return {}
+        ordered: list[float] = sorted(latencies_ms)
+        distribution: dict[str, float] = {
+            f"p{percentile:g}": round(self.__nearest_rank(ordered, percentile), 3)
+            for percentile in PERCENTILES
+        }
+        distribution["max"] = round(ordered[-1], 3)
+        distribution["mean"] = round(sum(ordered) / len(ordered), 3)
+        return distribution
+
+    def __nearest_rank(self, ordered: list[float], percentile: float) -> float:
+        rank: int = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
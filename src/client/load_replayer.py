@@ -0,0 +1,218 @@
+import asyncio
+import json
+import random
+import time
+from argparse import ArgumentParser, Namespace
+from datetime import UTC, datetime
+from itertools import cycle
+from pathlib import Path
+from typing import ClassVar, Literal, get_args
+
+import httpx
+
+from client.arrival_schedule import ArrivalPattern, build_arrival_schedule
+from client.latency_recorder import LatencyRecorder
+from client.ticket_export import ExportedTicket, load_ticket_export
+from client.totp_generator import TOTPGenerator
+
+Operation = Literal["register", "attend_valid", "attend_invalid"]
+
+DEFAULT_MIX: str = "attend_valid=0.85,attend_invalid=0.10,register=0.05"
+
+
+def parse_mix(mix: str) -> dict[Operation, float]:
+    weights: dict[Operation, float] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in get_args(Operation):
+            raise ValueError(f"Unknown operation {name!r}, use {', '.join(get_args(Operation))}")
+        weights[name.strip()] = float(weight)  # type: ignore[index]
+    if sum(weights.values()) <= 0:
+        raise ValueError("The operation mix needs a positive weight")
+    return weights
+
+
+class LoadReplayer:
+    # open loop: every request is sent when the schedule says so, whether or not the earlier
+    # ones came back, the way gates keep scanning while the API is slow
+    ATTENDANCE_PATH: ClassVar[str] = "/api/users/attendance"
+    TOTP_MODULUS: ClassVar[int] = 1_000_000
+
+    def __init__(  # noqa: PLR0913
+        self,
+        base_url: str,
+        tickets: list[ExportedTicket],
+        mix: dict[Operation, float],
+        *,
+        username: str = "loadtest",
+        timeout_seconds: float = 10.0,
+        max_connections: int = 100,
+        seed: int | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        if not tickets:
+            raise ValueError("The load needs at least one exported ticket")
+        registered: list[ExportedTicket] = [ticket for ticket in tickets if ticket.registered]
+        unregistered: list[ExportedTicket] = [ticket for ticket in tickets if not ticket.registered]
+        if mix.get("attend_valid", 0) > 0 and not registered:
+            raise ValueError("Valid attendances need registered tickets in the export")
+        if mix.get("register", 0) > 0 and not unregistered:
+            raise ValueError("Registrations need unregistered tickets in the export")
+        self.__base_url = base_url
+        self.__tickets = tickets
+        self.__mix = mix
+        self.__username = username
+        self.__timeout_seconds = timeout_seconds
+        self.__max_connections = max_connections
+        self.__transport = transport
+        self.__rng = random.Random(seed)  # noqa: S311
+        # each ticket is attended or registered once in export order, a second pass is
+        # rejected as used or already registered
+        self.__attendees = cycle(registered)
+        self.__registrations = cycle(unregistered)
+        self.__generators: dict[str, TOTPGenerator] = {}
+
+    async def run(self, schedule: list[float]) -> dict:
+        operations: list[Operation] = self.__rng.choices(
+            list(self.__mix), weights=list(self.__mix.values()), k=len(schedule)
+        )
+        recorders: dict[Operation, LatencyRecorder] = {
+            operation: LatencyRecorder() for operation in self.__mix
+        }
+        max_dispatch_lag: float = 0.0
+        async with httpx.AsyncClient(
+            base_url=self.__base_url,
+            timeout=self.__timeout_seconds,
+            limits=httpx.Limits(max_connections=self.__max_connections),
+            transport=self.__transport,
+        ) as client:
+            pending: list[asyncio.Task] = []
+            started_at: float = time.perf_counter()
+            for offset, operation in zip(schedule, operations, strict=True):
+                due_at: float = started_at + offset
+                delay: float = due_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # a lagging generator would hide latency, the report says by how much
+                max_dispatch_lag = max(max_dispatch_lag, time.perf_counter() - due_at)
+                pending.append(
+                    asyncio.create_task(
+                        self.__send(client, operation, due_at, recorders[operation])
+                    )
+                )
+            await asyncio.gather(*pending)
+            elapsed: float = time.perf_counter() - started_at
+        return {
+            "scheduled": len(schedule),
+            "elapsed_seconds": round(elapsed, 3),
+            "achieved_rate": round(len(schedule) / elapsed, 3) if elapsed else 0.0,
+            "max_dispatch_lag_ms": round(max_dispatch_lag * 1000, 3),
+            "operations": {
+                operation: recorder.summary() for operation, recorder in recorders.items()
+            },
+        }
+
+    async def __send(
+        self,
+        client: httpx.AsyncClient,
+        operation: Operation,
+        due_at: float,
+        recorder: LatencyRecorder,
+    ) -> None:
+        path, body = self.__build_request(operation)
+        sent_at: float = time.perf_counter()
+        try:
+            response: httpx.Response = await client.post(path, json=body)
+            outcome: str = str(response.status_code)
+        except httpx.HTTPError as err:
+            outcome = type(err).__name__
+        recorder.record(due_at, sent_at, time.perf_counter(), outcome)
+
+    def __build_request(self, operation: Operation) -> tuple[str, dict[str, str]]:
+        if operation == "register":
+            # tickets exist before anyone registers them, only the unowned ones can be taken
+            ticket: ExportedTicket = next(self.__registrations)
+            return f"/api/users/{ticket.username or self.__username}/tickets", {
+                "seat": ticket.seat,
+                "gate": ticket.gate,
+            }
+        if operation == "attend_valid":
+            ticket = next(self.__attendees)
+            code: str = self.__generator(ticket).generate_code()
+        else:
+            # the next code in the sequence is as wrong as a guess and never the valid one
+            ticket = self.__rng.choice(self.__tickets)
+            valid_code: int = int(self.__generator(ticket).generate_code())
+            code = f"{(valid_code + 1) % self.TOTP_MODULUS:06d}"
+        return self.ATTENDANCE_PATH, {"seat": ticket.seat, "gate": ticket.gate, "totp_code": code}
+
+    def __generator(self, ticket: ExportedTicket) -> TOTPGenerator:
+        generator: TOTPGenerator | None = self.__generators.get(ticket.seed)
+        if generator is None:
+            generator = self.__generators[ticket.seed] = TOTPGenerator(ticket.seed)
+        return generator
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Replays ticket traffic against the API at a set rate")
+    parser.add_argument("export", type=Path, help="CSV with seat,gate,seed[,username][,registered]")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--pattern", choices=get_args(ArrivalPattern), default="poisson")
+    parser.add_argument("--rate", type=float, default=50.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--peak-rate", type=float, default=None, help="surge peak, 5x rate")
+    parser.add_argument("--peak-at", type=float, default=None, help="surge center, mid run")
+    parser.add_argument("--peak-width", type=float, default=None, help="surge width, 10%%")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    parser.add_argument("--username", default="loadtest", help="owner of new registrations")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per request")
+    parser.add_argument("--seed", type=int, default=None, help="repeatable schedule and mix")
+    parser.add_argument("--report", type=Path, default=Path("load_report.json"))
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args: Namespace = parse_args()
+    rng = random.Random(args.seed)  # noqa: S311
+    schedule: list[float] = build_arrival_schedule(
+        args.pattern,
+        args.rate,
+        args.duration,
+        peak_rate=args.peak_rate,
+        peak_at_seconds=args.peak_at,
+        peak_width_seconds=args.peak_width,
+        rng=rng,
+    )
+    replayer = LoadReplayer(
+        args.base_url,
+        load_ticket_export(args.export),
+        parse_mix(args.mix),
+        username=args.username,
+        timeout_seconds=args.timeout,
+        max_connections=args.connections,
+        seed=args.seed,
+    )
+    started_at: datetime = datetime.now(UTC)
+    results: dict = await replayer.run(schedule)
+    report: dict = {
+        "started_at": started_at.isoformat(),
+        "settings": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+        },
+        **results,
+    }
+    args.report.write_text(json.dumps(report, indent=2, sort_keys=True))
+    for operation, summary in results["operations"].items():
+        response_times: dict[str, float] = summary["response_time_ms"]
+        print(
+            f"{operation:<15} {summary['count']:>8} requests "
+            f"p50 {response_times.get('p50', 0):>9.2f} ms "
+            f"p99 {response_times.get('p99', 0):>9.2f} ms {summary['outcomes']}"
+        )
+    print(f"report written to {args.report}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    asyncio.run(main())
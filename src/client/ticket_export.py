@@ -0,0 +1,45 @@
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+
+# how a boolean column looks in a CSV written by psql's \copy, or by hand
+TRUE_VALUES: frozenset[str] = frozenset({"t", "true", "1", "yes"})
+FALSE_VALUES: frozenset[str] = frozenset({"f", "false", "0", "no"})
+
+
+@dataclass(frozen=True)
+class ExportedTicket:
+    seat: str
+    gate: str
+    seed: str  # base64, as stored in tickets.seed
+    username: str | None = None
+    registered: bool = True  # owned by a user, only those can be attended
+
+
+def load_ticket_export(path: str | Path) -> list[ExportedTicket]:
+    # CSV with a seat,gate,seed header and optional username and registered columns, e.g. from
+    # \copy (SELECT t.seat, t.gate, encode(t.seed, 'base64') AS seed, u.username,
+    # t.user_id IS NOT NULL AS registered FROM tickets t LEFT JOIN users u ON u.id = t.user_id)
+    # TO ... CSV HEADER. Without the registered column every ticket counts as registered
+    with Path(path).open(newline="", encoding="utf-8") as export_file:
+        rows: list[dict[str, str]] = list(csv.DictReader(export_file))
+    tickets: list[ExportedTicket] = []
+    for line, row in enumerate(rows, start=2):
+        seat, gate, seed = row.get("seat"), row.get("gate"), row.get("seed")
+        if not seat or not gate or not seed:
+            raise ValueError(f"Line {line} of {path} needs seat, gate and seed")
+        registered: str = (row.get("registered") or "true").strip().lower()
+        if registered not in TRUE_VALUES | FALSE_VALUES:
+            raise ValueError(f"Line {line} of {path} has registered={registered!r}, use t or f")
+        tickets.append(
+            ExportedTicket(
+                seat=seat,
+                gate=gate,
+                seed=seed,
+                username=row.get("username") or None,
+                registered=registered in TRUE_VALUES,
+            )
+        )
+    if not tickets:
+        raise ValueError(f"{path} has no tickets")
+    return tickets
@@ -18,6 +18,10 @@ class TOTPGenerator:
     def generate_code(self) -> str:
         return str(self.__totp.now())
 
+    def verify_code(self, code: str) -> bool:
+        # same rule as the API: only the code of the current interval
+        return bool(self.__totp.verify(code, valid_window=0))
+
 
 if __name__ == "__main__":  # pragma: no cover
     parser = ArgumentParser(description="Genera un código TOTP desde una semilla hexadecimal")
@@ -0,0 +1,12 @@
+#!/bin/sh
+# local sharding: every database named in DB_SHARD_DATABASES is created on this instance
+# with the tickets schema, the API migrates it like the primary when DB_SHARDS lists it
+set -e
+for shard_database in $DB_SHARD_DATABASES; do
+    psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname postgres \
+        -c "CREATE DATABASE \"$shard_database\""
+    for script in 01_create_tables.sql 02_create_ticket_stored_procedures.sql; do
+        psql -v ON_ERROR_STOP=1 -v DB_NAME="$shard_database" --username "$POSTGRES_USER" \
+            --dbname postgres -f "/docker-entrypoint-initdb.d/$script"
+    done
+done
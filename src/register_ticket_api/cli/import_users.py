@@ -0,0 +1,69 @@
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser, FileType, Namespace
+from collections.abc import AsyncIterator
+from typing import BinaryIO
+
+from loguru import logger
+
+from register_ticket_api.entities import UserImportResult
+from register_ticket_api.infraestructure import (
+    PasswordHasher,
+    PostgreSQLDbContext,
+    iter_csv_rows,
+)
+from register_ticket_api.repositories import UserRepository
+from register_ticket_api.services import UserService
+
+READ_CHUNK_BYTES: int = 1 << 20
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(description="Creates or updates users from a username,password CSV")
+    parser.add_argument(
+        "csv_file", type=FileType("rb"), help="CSV file with the users, - reads stdin"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=int(os.getenv("USER_IMPORT_BATCH_SIZE") or "5000")
+    )
+    parser.add_argument("--hash-workers", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+async def read_chunks(csv_file: BinaryIO) -> AsyncIterator[bytes]:
+    while chunk := await asyncio.to_thread(csv_file.read, READ_CHUNK_BYTES):
+        yield chunk
+
+
+async def run(args: Namespace) -> int:
+    db_context = PostgreSQLDbContext()
+    password_hasher = PasswordHasher(max_workers=args.hash_workers)
+    user_service = UserService(
+        user_repo=UserRepository(db_context),
+        password_hasher=password_hasher,
+        import_batch_size=args.batch_size,
+    )
+    await db_context.open_pool()
+    try:
+        result: UserImportResult = await user_service.import_users(
+            iter_csv_rows(read_chunks(args.csv_file))
+        )
+    finally:
+        await db_context.close_pool()
+        password_hasher.shutdown()
+    for error in result.errors:
+        logger.warning(f"Rejected {error}")
+    logger.info(
+        f"{result.received} users received, {result.created} created, "
+        f"{result.updated} updated, {result.rejected} rejected"
+    )
+    return 1 if result.rejected else 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
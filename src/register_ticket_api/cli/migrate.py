@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from loguru import logger
+
+from register_ticket_api.entities import Migration
+from register_ticket_api.infraestructure import (
+    DEFAULT_MIGRATIONS_DIR,
+    MigrationRunner,
+    PostgreSQLDbContext,
+    ShardedDbContext,
+)
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(description="Applies the versioned schema migrations")
+    parser.add_argument("command", choices=["status", "apply"])
+    parser.add_argument(
+        "--migrations-dir",
+        type=Path,
+        default=Path(os.getenv("MIGRATIONS_DIR") or DEFAULT_MIGRATIONS_DIR),
+    )
+    return parser.parse_args(argv)
+
+
+async def run(args: Namespace) -> int:
+    # the primary database first, then every ticket shard of DB_SHARDS
+    primary = PostgreSQLDbContext()
+    contexts: list[PostgreSQLDbContext] = [primary]
+    if os.getenv("DB_SHARDS"):
+        shards = ShardedDbContext.from_config(os.environ["DB_SHARDS"], primary)
+        contexts.extend(context for context in shards.contexts() if context is not primary)
+    pending_total: int = 0
+    for context in contexts:
+        runner = MigrationRunner(context, migrations_dir=args.migrations_dir)
+        if args.command == "status":
+            pending: list[Migration] = await runner.pending_migrations()
+            for migration in pending:
+                logger.info(
+                    f"{runner.database}: pending migration "
+                    f"V{migration.version:04d} {migration.name}"
+                )
+            logger.info(f"{runner.database}: {len(pending)} pending migrations")
+            pending_total += len(pending)
+            continue
+        applied: list[Migration] = await runner.apply()
+        logger.info(f"{runner.database}: applied {len(applied)} migrations")
+    return 1 if pending_total else 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
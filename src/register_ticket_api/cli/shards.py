@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+
+from loguru import logger
+
+from register_ticket_api.infraestructure import PostgreSQLDbContext, ShardedDbContext
+from register_ticket_api.repositories import ShardMapRepository
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(description="Shows and rebalances the ticket shards of DB_SHARDS")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="shard map and tickets per gate on every shard")
+    move = commands.add_parser("move", help="moves the tickets of a gate to another shard")
+    move.add_argument("gate")
+    move.add_argument("shard")
+    return parser.parse_args(argv)
+
+
+async def run(args: Namespace) -> int:
+    if not os.getenv("DB_SHARDS"):
+        logger.error("DB_SHARDS is not set, tickets are not sharded")
+        return 1
+    primary = PostgreSQLDbContext()
+    shards = ShardedDbContext.from_config(
+        os.environ["DB_SHARDS"], primary, default_shard=os.getenv("DB_DEFAULT_SHARD")
+    )
+    repository = ShardMapRepository(db_context=primary, shards=shards)
+    await shards.open_pool()
+    await primary.open_pool()
+    try:
+        shards.apply_assignments(await repository.load())
+        if args.command == "move":
+            moved: int = await repository.move_gate(args.gate, args.shard)
+            logger.info(f"Gate {args.gate} now lives on {args.shard}, {moved} tickets moved")
+            return 0
+        assignments: dict[str, str] = shards.shard_map.assignments
+        for shard, gates in (await repository.count_tickets()).items():
+            for gate, tickets in sorted(gates.items()):
+                owner: str = shards.shard_map.shard_for(gate)
+                note: str = "" if owner == shard else f" (leftover, lives on {owner})"
+                logger.info(f"{shard}: gate {gate} {tickets} tickets{note}")
+        logger.info(
+            f"Default shard {shards.shard_map.default_shard}, "
+            f"{len(assignments)} gates in the shard map"
+        )
+        return 0
+    finally:
+        await shards.close_pool()
+        await primary.close_pool()
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run(parse_args())))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
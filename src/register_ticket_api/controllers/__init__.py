@@ -1,3 +1,21 @@
+from register_ticket_api.controllers.admin_token_guard import AdminTokenGuard
+from register_ticket_api.controllers.gate_token_guard import GateTokenGuard
+from register_ticket_api.controllers.jobs_controller import JobsController
+from register_ticket_api.controllers.profiling_controller import ProfilingController
+from register_ticket_api.controllers.stats_controller import StatsController
+from register_ticket_api.controllers.ticket_revocations_controller import (
+    TicketRevocationsController,
+)
 from register_ticket_api.controllers.tickets_controller import TicketsController
+from register_ticket_api.controllers.users_controller import UsersController
 
-__all__ = ["TicketsController"]
+__all__ = [
+    "AdminTokenGuard",
+    "GateTokenGuard",
+    "JobsController",
+    "ProfilingController",
+    "StatsController",
+    "TicketRevocationsController",
+    "TicketsController",
+    "UsersController",
+]
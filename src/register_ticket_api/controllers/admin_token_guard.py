@@ -0,0 +1,20 @@
+import hmac
+import os
+
+from fastapi import Header, HTTPException, status
+
+
+class AdminTokenGuard:
+    def __init__(self, admin_token: str | None = None) -> None:
+        self.__admin_token = (
+            admin_token if admin_token is not None else os.getenv("ADMIN_API_TOKEN")
+        )
+
+    async def __call__(
+        self, admin_token: str | None = Header(default=None, alias="X-Admin-Token")
+    ) -> None:
+        # admin routes stay closed until a token is configured
+        if not self.__admin_token or admin_token is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+        if not hmac.compare_digest(admin_token.encode(), self.__admin_token.encode()):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
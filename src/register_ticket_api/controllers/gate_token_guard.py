@@ -0,0 +1,20 @@
+import hmac
+import os
+
+from fastapi import Header, HTTPException, status
+
+
+class GateTokenGuard:
+    # gate devices read the revocation feeds with their own token, they never hold the
+    # admin token that can revoke tickets
+    def __init__(self, gate_token: str | None = None) -> None:
+        self.__gate_token = gate_token if gate_token is not None else os.getenv("GATE_API_TOKEN")
+
+    async def __call__(
+        self, gate_token: str | None = Header(default=None, alias="X-Gate-Token")
+    ) -> None:
+        # gate routes stay closed until a token is configured
+        if not self.__gate_token or gate_token is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+        if not hmac.compare_digest(gate_token.encode(), self.__gate_token.encode()):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from register_ticket_api.controllers.admin_token_guard import AdminTokenGuard
+from register_ticket_api.entities import ScheduledJobStats
+from register_ticket_api.exceptions import AppValidationException
+from register_ticket_api.infraestructure import JobScheduler
+from register_ticket_api.instrumentation import TimedJSONResponse
+
+
+class JobsController:
+    # every worker has its own scheduler, the numbers are those of the worker that answers
+    def __init__(self, job_scheduler: JobScheduler, admin_guard: AdminTokenGuard) -> None:
+        self.__job_scheduler = job_scheduler
+        self.router = APIRouter(
+            prefix="/api/admin/jobs",
+            default_response_class=TimedJSONResponse,
+            dependencies=[Depends(admin_guard)],
+        )
+        self.__setup_routes()
+
+    def __setup_routes(self) -> None:
+        self.router.add_api_route(
+            "",
+            self.get_jobs,
+            methods=["GET"],
+            response_model=list[ScheduledJobStats],
+            summary="Scheduled jobs with their runs, failures and durations",
+        )
+        self.router.add_api_route(
+            "/{name}/runs",
+            self.run_job,
+            methods=["POST"],
+            response_model=ScheduledJobStats,
+            summary="Runs a scheduled job now, exclusive jobs only on the worker holding them",
+        )
+
+    async def get_jobs(self) -> list[ScheduledJobStats]:
+        jobs: list[ScheduledJobStats] = self.__job_scheduler.stats()
+        return jobs
+
+    async def run_job(self, name: str) -> ScheduledJobStats:
+        try:
+            job_stats: ScheduledJobStats = await self.__job_scheduler.run_now(name)
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err)) from err
+        return job_stats
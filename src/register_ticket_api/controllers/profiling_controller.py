@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from register_ticket_api.controllers.admin_token_guard import AdminTokenGuard
+from register_ticket_api.entities import AllocationGrowth
+from register_ticket_api.exceptions import AppValidationException, ProfilingInProgressException
+from register_ticket_api.instrumentation import ProfileMode, RuntimeProfiler, TimedJSONResponse
+
+
+class ProfilingController:
+    # every worker has its own profiler, a window covers the worker that got the request
+    def __init__(self, profiler: RuntimeProfiler, admin_guard: AdminTokenGuard) -> None:
+        self.__profiler = profiler
+        self.router = APIRouter(
+            prefix="/api/admin/profiling",
+            default_response_class=TimedJSONResponse,
+            dependencies=[Depends(admin_guard)],
+        )
+        self.__setup_routes()
+
+    def __setup_routes(self) -> None:
+        self.router.add_api_route(
+            "/cpu",
+            self.profile_cpu,
+            methods=["POST"],
+            response_class=PlainTextResponse,
+            summary="Profiles this worker for some seconds, collapsed stacks or pstats",
+        )
+        self.router.add_api_route(
+            "/memory",
+            self.start_memory_tracing,
+            methods=["POST"],
+            status_code=status.HTTP_204_NO_CONTENT,
+            summary="Starts tracing allocations and takes the baseline snapshot",
+        )
+        self.router.add_api_route(
+            "/memory",
+            self.get_memory_growth,
+            methods=["GET"],
+            response_model=list[AllocationGrowth],
+            summary="Allocation growth since the baseline snapshot, largest first",
+        )
+        self.router.add_api_route(
+            "/memory",
+            self.stop_memory_tracing,
+            methods=["DELETE"],
+            status_code=status.HTTP_204_NO_CONTENT,
+            summary="Stops tracing allocations",
+        )
+
+    async def profile_cpu(
+        self,
+        seconds: float = Query(default=10, gt=0),
+        mode: ProfileMode = "sample",
+        focus: str | None = Query(default=None),
+        top: int = Query(default=50, ge=1),
+    ) -> Response:
+        try:
+            report: str = await self.__profiler.profile_cpu(seconds, mode, focus, top)
+        except ProfilingInProgressException as err:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err)) from err
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        return PlainTextResponse(report)
+
+    async def start_memory_tracing(self, frames: int = Query(default=1, ge=1, le=64)) -> None:
+        self.__profiler.start_memory_tracing(frames)
+
+    async def get_memory_growth(
+        self, limit: int = Query(default=25, ge=1, le=500)
+    ) -> list[AllocationGrowth]:
+        try:
+            growth: list[AllocationGrowth] = self.__profiler.memory_growth(limit)
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        return growth
+
+    async def stop_memory_tracing(self) -> None:
+        self.__profiler.stop_memory_tracing()
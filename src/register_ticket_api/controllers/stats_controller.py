@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Query, status
+
+from register_ticket_api.entities import GateStats
+from register_ticket_api.exceptions import AppValidationException, DeadlineExceededException
+from register_ticket_api.instrumentation import TimedJSONResponse
+from register_ticket_api.services import StatsService
+
+
+class StatsController:
+    def __init__(self, stats_service: StatsService) -> None:
+        self.__stats_service = stats_service
+        self.router = APIRouter(prefix="/api/stats", default_response_class=TimedJSONResponse)
+        self.__setup_routes()
+
+    def __setup_routes(self) -> None:
+        self.router.add_api_route(
+            "/gates",
+            self.get_gate_stats,
+            methods=["GET"],
+            response_model=list[GateStats],
+            summary="Entries per minute and occupancy per gate",
+        )
+
+    async def get_gate_stats(self, minutes: int = Query(default=15)) -> list[GateStats]:
+        try:
+            gate_stats: list[GateStats] = await self.__stats_service.get_gate_stats(minutes)
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+        return gate_stats
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from register_ticket_api.controllers.admin_token_guard import AdminTokenGuard
+from register_ticket_api.controllers.gate_token_guard import GateTokenGuard
+from register_ticket_api.entities import (
+    TicketChange,
+    TicketChangeFeedPage,
+    TicketRevocationRequest,
+    TicketRevocationResult,
+)
+from register_ticket_api.exceptions import AppValidationException, DeadlineExceededException
+from register_ticket_api.infraestructure import TicketChangeFeed
+from register_ticket_api.instrumentation import TimedJSONResponse
+from register_ticket_api.services import TicketService
+
+
+class TicketRevocationsController:
+    MAX_WAIT_SECONDS: float = 30.0
+
+    def __init__(
+        self,
+        ticket_service: TicketService,
+        change_feed: TicketChangeFeed,
+        admin_guard: AdminTokenGuard,
+        gate_guard: GateTokenGuard,
+    ) -> None:
+        self.__ticket_service = ticket_service
+        self.__change_feed = change_feed
+        self.__admin_guard = admin_guard
+        self.__gate_guard = gate_guard
+        self.router = APIRouter(prefix="/api", default_response_class=TimedJSONResponse)
+        self.__setup_routes()
+
+    def __setup_routes(self) -> None:
+        self.router.add_api_route(
+            "/tickets/revocations",
+            self.revoke_tickets,
+            methods=["POST"],
+            response_model=TicketRevocationResult,
+            dependencies=[Depends(self.__admin_guard)],
+            summary="Revokes a batch of tickets and notifies the gate devices",
+        )
+        self.router.add_api_route(
+            "/gates/{gate}/ticket-changes",
+            self.get_ticket_changes,
+            methods=["GET"],
+            response_model=TicketChangeFeedPage,
+            dependencies=[Depends(self.__gate_guard)],
+            summary="Long-polls the ticket changes of a gate after a cursor",
+        )
+        self.router.add_api_route(
+            "/gates/{gate}/revoked-tickets",
+            self.get_revoked_tickets,
+            methods=["GET"],
+            response_model=TicketChangeFeedPage,
+            dependencies=[Depends(self.__gate_guard)],
+            summary="Full list of revoked tickets of a gate, used to resync a device",
+        )
+
+    async def revoke_tickets(self, revocation: TicketRevocationRequest) -> TicketRevocationResult:
+        try:
+            result: TicketRevocationResult = await self.__ticket_service.revoke_tickets(
+                revocation.ticket_ids
+            )
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+        return result
+
+    async def get_ticket_changes(
+        self,
+        gate: str,
+        cursor: str | None = Query(default=None),
+        wait: float = Query(default=20.0, ge=0),
+    ) -> TicketChangeFeedPage:
+        page: TicketChangeFeedPage = await self.__change_feed.wait_for_changes(
+            gate=gate, cursor=cursor, timeout_seconds=min(wait, self.MAX_WAIT_SECONDS)
+        )
+        return page
+
+    async def get_revoked_tickets(self, gate: str) -> TicketChangeFeedPage:
+        # take the cursor first so changes committed during the read are replayed, not lost
+        cursor: str = self.__change_feed.current_cursor()
+        try:
+            revoked: list[TicketChange] = await self.__ticket_service.get_revoked_tickets(gate)
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+        return TicketChangeFeedPage(changes=revoked, cursor=cursor, reset=True)
@@ -1,15 +1,40 @@
-from fastapi import APIRouter, HTTPException, status
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Annotated, Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from loguru import logger
 
-from register_ticket_api.entities import AttendanceLog, Ticket
-from register_ticket_api.exceptions import AppValidationException
-from register_ticket_api.services import TicketService
+from register_ticket_api.entities import AttendanceLog, IdempotencyRecord, Ticket, TicketPage
+from register_ticket_api.exceptions import (
+    AppValidationException,
+    DeadlineExceededException,
+    InvalidCredentialsException,
+    TooManyAttemptsException,
+)
+from register_ticket_api.infraestructure import TicketStatusSubscription
+from register_ticket_api.instrumentation import TimedJSONResponse
+from register_ticket_api.services import IdempotencyService, TicketService
+
+BASIC_AUTH = HTTPBasic(realm="tickets")
 
 
 class TicketsController:
-    def __init__(self, ticket_service: TicketService):
+    # polling screens ask every second at kickoff, a proxy in front answers most of them
+    TICKET_CACHE_CONTROL: str = "public, max-age=2, stale-while-revalidate=5"
+    EVENTS_RETRY_MS: int = 5000
+
+    def __init__(
+        self,
+        ticket_service: TicketService,
+        idempotency_service: IdempotencyService | None = None,
+    ):
         self.__ticket_service = ticket_service
-        self.router = APIRouter(prefix="/api/users")
+        self.__idempotency_service = idempotency_service
+        self.router = APIRouter(prefix="/api/users", default_response_class=TimedJSONResponse)
         self.__setup_routes()
 
     def __setup_routes(self) -> None:
@@ -21,6 +46,29 @@ class TicketsController:
             status_code=status.HTTP_202_ACCEPTED,
             summary="Registers a ticket to a user",
         )
+        self.router.add_api_route(
+            "/{username}/tickets",
+            self.list_user_tickets,
+            methods=["GET"],
+            response_model=TicketPage,
+            summary="Lists the tickets of a user, newest first",
+        )
+        # before /{ticket_id}, "events" is not a ticket id
+        self.router.add_api_route(
+            "/{username}/tickets/events",
+            self.stream_ticket_events,
+            methods=["GET"],
+            response_class=StreamingResponse,
+            summary="Streams the status changes of the tickets of a user as server-sent events",
+        )
+        self.router.add_api_route(
+            "/{username}/tickets/{ticket_id}",
+            self.get_ticket,
+            methods=["GET"],
+            response_model=Ticket,
+            responses={status.HTTP_304_NOT_MODIFIED: {"description": "Ticket not modified"}},
+            summary="Gets a ticket of a user, conditional on its ETag",
+        )
         self.router.add_api_route(
             "/attendance",
             self.log_attendance,
@@ -31,28 +79,234 @@ class TicketsController:
         )
 
     async def register_ticket(
-        self, username: str, ticket: Ticket
-    ) -> Ticket:  # TODO: Change for user_id
+        self,
+        username: str,
+        ticket: Ticket,
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    ) -> Ticket | Response:  # TODO: Change for user_id
         logger.info(
             f"Request received at /tickets for username={username}, "
             f"seat={ticket.seat}, gate={ticket.gate}"
         )
+        if idempotency_key is None or self.__idempotency_service is None:
+            return await self.__register_ticket(username, ticket)
+        return await self.__run_idempotent(
+            key=f"register:{username.lower()}:{idempotency_key}",
+            request_fingerprint=IdempotencyService.fingerprint(
+                username.lower(), ticket.model_dump_json()
+            ),
+            operation=lambda: self.__register_ticket(username, ticket),
+        )
+
+    async def list_user_tickets(
+        self,
+        username: str,
+        limit: int = Query(default=20, ge=1, le=TicketService.MAX_PAGE_SIZE),
+        cursor: str | None = Query(default=None),
+        status_filter: Literal["valid", "used", "revoked"] | None = Query(
+            default=None, alias="status"
+        ),
+    ) -> TicketPage:
         try:
-            return await self.__ticket_service.register_ticket(username, ticket)
+            return await self.__ticket_service.list_user_tickets(
+                username, limit, cursor=cursor, status=status_filter
+            )
         except AppValidationException as err:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
         except Exception as err:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Internal error: {err!s}",
             ) from err
 
-    async def log_attendance(self, attendance: AttendanceLog) -> Ticket:
+    async def get_ticket(
+        self,
+        username: str,
+        ticket_id: UUID,
+        if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    ) -> Response:
+        try:
+            if if_none_match is not None:
+                # revalidation reads the version alone, an unchanged ticket is never loaded
+                version: int | None = await self.__ticket_service.get_user_ticket_version(
+                    username, ticket_id
+                )
+                if version is not None and self.__is_not_modified(version, if_none_match):
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=self.__cache_headers(version),
+                    )
+            ticket: Ticket | None = await self.__ticket_service.get_user_ticket(username, ticket_id)
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+        if ticket is None or ticket.version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+        response: Response = TimedJSONResponse(
+            jsonable_encoder(ticket, exclude={"seed", "token"}),
+            headers=self.__cache_headers(ticket.version),
+        )
+        return response
+
+    async def stream_ticket_events(
+        self, username: str, credentials: Annotated[HTTPBasicCredentials, Depends(BASIC_AUTH)]
+    ) -> StreamingResponse:
+        # a user follows its own tickets only, the password is checked by the service
+        password: str = (
+            credentials.password if credentials.username.lower() == username.lower() else ""
+        )
+        try:
+            subscription: TicketStatusSubscription = (
+                await self.__ticket_service.subscribe_to_ticket_changes(username, password)
+            )
+        except InvalidCredentialsException as err:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=str(err),
+                headers={"WWW-Authenticate": 'Basic realm="tickets"'},
+            ) from err
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+        return StreamingResponse(
+            self.__ticket_events(subscription),
+            media_type="text/event-stream",
+            # proxies must neither cache nor buffer the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def log_attendance(
+        self,
+        attendance: AttendanceLog,
+        request: Request,
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    ) -> Ticket | Response:
         logger.info(
             f"Request received at /tickets for seat={attendance.seat}, "
             f"gate={attendance.gate}, totp={attendance.totp_code}"
         )
+        client_id: str | None = request.client.host if request.client else None
+        if idempotency_key is None or self.__idempotency_service is None:
+            return await self.__log_attendance(attendance, client_id)
+        return await self.__run_idempotent(
+            key=f"attendance:{idempotency_key}",
+            request_fingerprint=IdempotencyService.fingerprint(attendance.model_dump_json()),
+            operation=lambda: self.__log_attendance(attendance, client_id),
+        )
+
+    async def __ticket_events(self, subscription: TicketStatusSubscription) -> AsyncIterator[str]:
+        try:
+            yield f"retry: {self.EVENTS_RETRY_MS}\n\n"
+            while True:
+                changes, overflowed = await subscription.next_batch()
+                if overflowed:
+                    # changes were dropped, the app reloads its tickets
+                    yield "event: resync\ndata: {}\n\n"
+                if not changes and not overflowed:
+                    yield ": heartbeat\n\n"
+                for change in changes:
+                    event: str = "registered" if change.status == "valid" else change.status
+                    yield f"event: {event}\ndata: {change.model_dump_json()}\n\n"
+        finally:
+            subscription.close()
+
+    def __etag(self, version: int) -> str:
+        return f'"{version}"'
+
+    def __is_not_modified(self, version: int, if_none_match: str) -> bool:
+        # If-None-Match compares weakly, W/"3" matches "3"
+        etags: set[str] = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in etags or self.__etag(version) in etags
+
+    def __cache_headers(self, version: int) -> dict[str, str]:
+        return {"ETag": self.__etag(version), "Cache-Control": self.TICKET_CACHE_CONTROL}
+
+    async def __register_ticket(self, username: str, ticket: Ticket) -> Ticket:
+        try:
+            return await self.__ticket_service.register_ticket(username, ticket)
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+
+    async def __log_attendance(self, attendance: AttendanceLog, client_id: str | None) -> Ticket:
         try:
-            return await self.__ticket_service.log_attendance(attendance)
+            return await self.__ticket_service.log_attendance(attendance, client_id=client_id)
+        except TooManyAttemptsException as err:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(err),
+                headers={"Retry-After": str(int(err.retry_after_seconds))},
+            ) from err
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as e:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e)) from e
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e)) from e
+
+    async def __run_idempotent(
+        self, key: str, request_fingerprint: str, operation: Callable[[], Awaitable[Ticket]]
+    ) -> Response:
+        async def capture_outcome() -> IdempotencyRecord:
+            try:
+                ticket: Ticket = await operation()
+            except HTTPException as err:
+                # a throttled scan is not an outcome, the retry after Retry-After must run
+                # again instead of replaying the 429 without that header
+                if err.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                    raise
+                return IdempotencyRecord(
+                    request_fingerprint=request_fingerprint,
+                    status_code=err.status_code,
+                    body={"detail": err.detail},
+                )
+            return IdempotencyRecord(
+                request_fingerprint=request_fingerprint,
+                status_code=status.HTTP_202_ACCEPTED,
+                body=jsonable_encoder(ticket),
+            )
+
+        assert self.__idempotency_service is not None
+        try:
+            record, replayed = await self.__idempotency_service.execute(
+                key, request_fingerprint, capture_outcome
+            )
+        except AppValidationException as err:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
+            ) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        headers: dict[str, str] = {"Idempotent-Replayed": "true"} if replayed else {}
+        response: Response = TimedJSONResponse(
+            record.body, status_code=record.status_code, headers=headers
+        )
+        return response
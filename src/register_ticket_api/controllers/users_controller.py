@@ -1,20 +1,66 @@
-from fastapi import APIRouter, HTTPException, status
-from services import UserService
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
-from register_ticket_api.entities import User
+from register_ticket_api.controllers.admin_token_guard import AdminTokenGuard
+from register_ticket_api.entities import User, UserImportResult
+from register_ticket_api.exceptions import AppValidationException, DeadlineExceededException
+from register_ticket_api.infraestructure import iter_csv_rows
+from register_ticket_api.instrumentation import TimedJSONResponse
+from register_ticket_api.services import UserService
 
 
 class UsersController:
-    def __init__(self, user_service: UserService) -> None:
+    def __init__(self, user_service: UserService, admin_guard: AdminTokenGuard) -> None:
         self.__user_service = user_service
-        self.router = APIRouter(prefix="/api/users")
+        self.__admin_guard = admin_guard
+        self.router = APIRouter(prefix="/api/users", default_response_class=TimedJSONResponse)
         self.__setup_routes()
 
-    def __setup_routes(self) -> None: ...
+    def __setup_routes(self) -> None:
+        self.router.add_api_route(
+            "",
+            self.create_user,
+            methods=["POST"],
+            response_model=User,
+            response_model_exclude={"password"},
+            status_code=status.HTTP_201_CREATED,
+            summary="Creates a user",
+        )
+        self.router.add_api_route(
+            "/imports",
+            self.import_users,
+            methods=["POST"],
+            response_model=UserImportResult,
+            dependencies=[Depends(self.__admin_guard)],
+            summary="Creates or updates the users of a username,password CSV body",
+        )
 
     async def create_user(self, user: User) -> User:
         try:
             return await self.__user_service.create_user(user)
+        except AppValidationException as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
+        except Exception as err:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal error: {err!s}",
+            ) from err
+
+    async def import_users(self, request: Request) -> UserImportResult:
+        # the body is parsed while it is received, partner lists don't fit in a request buffer
+        try:
+            return await self.__user_service.import_users(iter_csv_rows(request.stream()))
+        except UnicodeDecodeError as err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV body: {err!s}"
+            ) from err
+        except DeadlineExceededException as err:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(err)
+            ) from err
         except Exception as err:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
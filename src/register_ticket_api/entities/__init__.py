@@ -1,5 +1,45 @@
+from register_ticket_api.entities.allocation_growth import AllocationGrowth
 from register_ticket_api.entities.attedance_log import AttendanceLog
+from register_ticket_api.entities.attendance_event import AttendanceEvent
+from register_ticket_api.entities.gate_stats import GateMinuteEntries, GateStats
+from register_ticket_api.entities.idempotency_record import IdempotencyRecord
+from register_ticket_api.entities.journaled_attendance import (
+    AttendanceConflict,
+    JournaledAttendance,
+)
+from register_ticket_api.entities.migration import Migration
+from register_ticket_api.entities.scheduled_job_stats import JobOutcome, ScheduledJobStats
 from register_ticket_api.entities.ticket import Ticket
+from register_ticket_api.entities.ticket_change import TicketChange
+from register_ticket_api.entities.ticket_change_feed_page import TicketChangeFeedPage
+from register_ticket_api.entities.ticket_page import TicketPage
+from register_ticket_api.entities.ticket_revocation import (
+    TicketRevocationRequest,
+    TicketRevocationResult,
+)
+from register_ticket_api.entities.ticket_token_claims import TicketTokenClaims
 from register_ticket_api.entities.user import User
+from register_ticket_api.entities.user_import_result import UserImportResult
 
-__all__ = ["AttendanceLog", "Ticket", "User"]
+__all__ = [
+    "AllocationGrowth",
+    "AttendanceConflict",
+    "AttendanceEvent",
+    "AttendanceLog",
+    "GateMinuteEntries",
+    "GateStats",
+    "IdempotencyRecord",
+    "JobOutcome",
+    "JournaledAttendance",
+    "Migration",
+    "ScheduledJobStats",
+    "Ticket",
+    "TicketChange",
+    "TicketChangeFeedPage",
+    "TicketPage",
+    "TicketRevocationRequest",
+    "TicketRevocationResult",
+    "TicketTokenClaims",
+    "User",
+    "UserImportResult",
+]
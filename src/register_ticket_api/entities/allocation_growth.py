@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class AllocationGrowth(BaseModel):
+    location: str  # "file:line" of the allocating code
+    size_bytes: int
+    size_diff_bytes: int  # growth since the baseline snapshot, negative when it shrank
+    count: int
+    count_diff: int
@@ -6,3 +6,5 @@ class AttendanceLog(BaseModel):
     seat: str
     gate: str
     totp_code: str
+    device_id: str | None = None  # scanning device, kept in the attendance history
+    token: str | None = None  # signed ticket token, skips the ticket lookup when present
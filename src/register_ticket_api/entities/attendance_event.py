@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+
+
+class AttendanceEvent(BaseModel):
+    event_id: UUID = Field(default_factory=uuid4)  # document id, resending is idempotent
+    timestamp: datetime
+    seat: str
+    gate: str
+    device_id: str | None = None
+    ticket_id: UUID | None = None
+    outcome: Literal["accepted", "rejected", "error"]
+    reason: str | None = None
+    latency_ms: float
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class GateMinuteEntries(BaseModel):
+    minute: datetime
+    entries: int
+
+
+class GateStats(BaseModel):
+    gate: str
+    issued: int
+    revoked: int
+    used: int
+    percent_used: float
+    entries_per_minute: list[GateMinuteEntries] = []
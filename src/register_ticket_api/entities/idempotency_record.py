@@ -0,0 +1,9 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class IdempotencyRecord(BaseModel):
+    request_fingerprint: str
+    status_code: int
+    body: Any = None
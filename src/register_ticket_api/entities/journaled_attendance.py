@@ -0,0 +1,20 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class JournaledAttendance(BaseModel):
+    ticket_id: UUID
+    seat: str
+    gate: str
+    used_at: datetime
+
+
+class AttendanceConflict(BaseModel):
+    ticket_id: UUID
+    seat: str
+    gate: str
+    journaled_used_at: datetime
+    status: str | None = None  # None when the ticket no longer exists
+    used_at: datetime | None = None
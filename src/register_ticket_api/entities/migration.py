@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class Migration(BaseModel):
+    version: int
+    name: str
+    sql: str
+    checksum: str  # sha256 of the file, applied migrations must not be edited
+    transactional: bool = True
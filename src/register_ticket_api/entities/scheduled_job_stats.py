@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+JobOutcome = Literal["succeeded", "failed", "timed_out", "skipped"]
+
+
+class ScheduledJobStats(BaseModel):
+    name: str
+    trigger: str  # "every 300s" or the cron expression
+    exclusive: bool  # runs on the single worker holding its advisory lock
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0  # ticks left to the worker holding the lock
+    last_outcome: JobOutcome | None = None
+    last_started_at: datetime | None = None
+    last_duration_ms: float | None = None
+    mean_duration_ms: float | None = None
+    max_duration_ms: float | None = None
+    next_run_at: datetime | None = None
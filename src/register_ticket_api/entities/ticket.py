@@ -14,3 +14,6 @@ class Ticket(BaseModel):
     status: Literal["valid", "used", "revoked"] = "valid"
     created_at: datetime | None = None
     used_at: datetime | None = None
+    token: str | None = None  # signed ticket token, only returned on registration
+    updated_at: datetime | None = None
+    version: int | None = None  # bumped by trigger on every update, the ETag of the ticket
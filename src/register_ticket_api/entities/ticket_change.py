@@ -0,0 +1,12 @@
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class TicketChange(BaseModel):
+    ticket_id: UUID
+    user_id: UUID | None = None
+    seat: str
+    gate: str
+    status: Literal["valid", "used", "revoked"]
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+from register_ticket_api.entities.ticket_change import TicketChange
+
+
+class TicketChangeFeedPage(BaseModel):
+    changes: list[TicketChange]
+    cursor: str
+    reset: bool = False  # cursor no longer valid, the device must resync its revoked list
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+from register_ticket_api.entities.ticket import Ticket
+
+
+class TicketPage(BaseModel):
+    tickets: list[Ticket]
+    next_cursor: str | None = None  # None on the last page
@@ -0,0 +1,12 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class TicketRevocationRequest(BaseModel):
+    ticket_ids: list[UUID]
+
+
+class TicketRevocationResult(BaseModel):
+    revoked: list[UUID]
+    not_revoked: list[UUID]  # unknown or already revoked
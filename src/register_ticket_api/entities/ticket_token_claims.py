@@ -0,0 +1,14 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class TicketTokenClaims(BaseModel):
+    ticket_id: UUID
+    user_id: UUID
+    seat: str
+    gate: str
+    seed: str  # base64, same encoding as Ticket.seed
+    issued_at: datetime
+    kid: str  # key that signed the token
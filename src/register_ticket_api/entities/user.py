@@ -4,6 +4,6 @@ from pydantic import BaseModel
 
 
 class User(BaseModel):
-    id: UUID | None
+    id: UUID | None = None
     username: str
     password: str
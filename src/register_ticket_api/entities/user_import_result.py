@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class UserImportResult(BaseModel):
+    received: int = 0
+    created: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: list[str] = []  # first rejected rows, "line N: reason"
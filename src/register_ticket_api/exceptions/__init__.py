@@ -1,4 +1,23 @@
 from register_ticket_api.exceptions.app_validation_exception import AppValidationException
+from register_ticket_api.exceptions.circuit_open_exception import CircuitOpenException
 from register_ticket_api.exceptions.db_operation_exception import DbOperationException
+from register_ticket_api.exceptions.deadline_exceeded_exception import DeadlineExceededException
+from register_ticket_api.exceptions.invalid_credentials_exception import (
+    InvalidCredentialsException,
+)
+from register_ticket_api.exceptions.invalid_totp_code_exception import InvalidTotpCodeException
+from register_ticket_api.exceptions.profiling_in_progress_exception import (
+    ProfilingInProgressException,
+)
+from register_ticket_api.exceptions.too_many_attempts_exception import TooManyAttemptsException
 
-__all__ = ["AppValidationException", "DbOperationException"]
+__all__ = [
+    "AppValidationException",
+    "CircuitOpenException",
+    "DbOperationException",
+    "DeadlineExceededException",
+    "InvalidCredentialsException",
+    "InvalidTotpCodeException",
+    "ProfilingInProgressException",
+    "TooManyAttemptsException",
+]
@@ -0,0 +1,4 @@
+class CircuitOpenException(Exception):
+    def __init__(self, retry_after_seconds: float):
+        self.retry_after_seconds = retry_after_seconds
+        super().__init__(f"Database circuit is open, retry in {retry_after_seconds:.1f}s")
@@ -0,0 +1,3 @@
+class DeadlineExceededException(Exception):
+    def __init__(self) -> None:
+        super().__init__("Request deadline exceeded")
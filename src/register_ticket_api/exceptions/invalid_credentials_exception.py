@@ -0,0 +1,3 @@
+class InvalidCredentialsException(Exception):
+    def __init__(self) -> None:
+        super().__init__("Invalid credentials")
@@ -0,0 +1,6 @@
+from register_ticket_api.exceptions.app_validation_exception import AppValidationException
+
+
+class InvalidTotpCodeException(AppValidationException):
+    def __init__(self) -> None:
+        super().__init__("Invalid TOTP ticket code.")
@@ -0,0 +1,3 @@
+class ProfilingInProgressException(Exception):
+    def __init__(self) -> None:
+        super().__init__("A CPU profiling window is already open on this worker")
@@ -0,0 +1,4 @@
+class TooManyAttemptsException(Exception):
+    def __init__(self, retry_after_seconds: float):
+        self.retry_after_seconds = retry_after_seconds
+        super().__init__(f"Too many failed attempts, retry in {retry_after_seconds:.0f}s")
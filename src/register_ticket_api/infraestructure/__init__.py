@@ -1,3 +1,84 @@
+from register_ticket_api.infraestructure.attendance_journal import AttendanceJournal
+from register_ticket_api.infraestructure.attendance_log_writer import AttendanceLogWriter
+from register_ticket_api.infraestructure.attendance_rollup_buffer import AttendanceRollupBuffer
+from register_ticket_api.infraestructure.circuit_breaker import CircuitBreaker
+from register_ticket_api.infraestructure.cron_schedule import CronSchedule
+from register_ticket_api.infraestructure.csv_rows import iter_csv_rows
+from register_ticket_api.infraestructure.elasticsearch_event_sink import ElasticsearchEventSink
+from register_ticket_api.infraestructure.fan_out_event_sink import FanOutEventSink
+from register_ticket_api.infraestructure.gate_snapshot import GateSnapshot, write_gate_snapshot
+from register_ticket_api.infraestructure.in_memory_idempotency_store import (
+    InMemoryIdempotencyStore,
+)
+from register_ticket_api.infraestructure.job_scheduler import JobScheduler
+from register_ticket_api.infraestructure.migration_runner import (
+    DEFAULT_MIGRATIONS_DIR,
+    MigrationRunner,
+)
+from register_ticket_api.infraestructure.password_hasher import PasswordHasher
 from register_ticket_api.infraestructure.postgresql_db_context import PostgreSQLDbContext
+from register_ticket_api.infraestructure.recent_scan_cache import RecentScanCache
+from register_ticket_api.infraestructure.request_deadline import (
+    query_timeout,
+    remaining_seconds,
+    start_request_deadline,
+    stop_request_deadline,
+)
+from register_ticket_api.infraestructure.request_deadline_middleware import (
+    RequestDeadlineMiddleware,
+)
+from register_ticket_api.infraestructure.shard_map import ShardMap
+from register_ticket_api.infraestructure.sharded_db_context import ShardedDbContext
+from register_ticket_api.infraestructure.sqlite_recent_scan_store import SqliteRecentScanStore
+from register_ticket_api.infraestructure.ticket_cache import TicketCache
+from register_ticket_api.infraestructure.ticket_change_bus import TicketChangeBus
+from register_ticket_api.infraestructure.ticket_change_feed import TicketChangeFeed
+from register_ticket_api.infraestructure.ticket_change_listener import (
+    TICKET_CHANGES_CHANNEL,
+    TICKET_STATUS_CHANNEL,
+    TicketChangeListener,
+)
+from register_ticket_api.infraestructure.ticket_status_hub import (
+    TicketStatusHub,
+    TicketStatusSubscription,
+)
+from register_ticket_api.infraestructure.ticket_token_codec import TicketTokenCodec
+from register_ticket_api.infraestructure.totp_attempt_throttle import TotpAttemptThrottle
 
-__all__ = ["PostgreSQLDbContext"]
+__all__ = [
+    "DEFAULT_MIGRATIONS_DIR",
+    "TICKET_CHANGES_CHANNEL",
+    "TICKET_STATUS_CHANNEL",
+    "AttendanceJournal",
+    "AttendanceLogWriter",
+    "AttendanceRollupBuffer",
+    "CircuitBreaker",
+    "CronSchedule",
+    "ElasticsearchEventSink",
+    "FanOutEventSink",
+    "GateSnapshot",
+    "InMemoryIdempotencyStore",
+    "JobScheduler",
+    "MigrationRunner",
+    "PasswordHasher",
+    "PostgreSQLDbContext",
+    "RecentScanCache",
+    "RequestDeadlineMiddleware",
+    "ShardMap",
+    "ShardedDbContext",
+    "SqliteRecentScanStore",
+    "TicketCache",
+    "TicketChangeBus",
+    "TicketChangeFeed",
+    "TicketChangeListener",
+    "TicketStatusHub",
+    "TicketStatusSubscription",
+    "TicketTokenCodec",
+    "TotpAttemptThrottle",
+    "iter_csv_rows",
+    "query_timeout",
+    "remaining_seconds",
+    "start_request_deadline",
+    "stop_request_deadline",
+    "write_gate_snapshot",
+]
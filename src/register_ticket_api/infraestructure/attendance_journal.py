@@ -0,0 +1,120 @@
+import asyncio
+import fcntl
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+from loguru import logger
+from pydantic import ValidationError
+
+from register_ticket_api.entities import AttendanceConflict, JournaledAttendance
+
+
+class AttendanceJournal:
+    SEGMENT_GLOB: str = "attendance-*.jsonl"
+    CONFLICTS_FILE: str = "conflicts.jsonl"
+
+    def __init__(self, directory: str) -> None:
+        self.__directory = Path(directory)
+        self.__lock = threading.Lock()
+        self.__active_path: Path | None = None
+        self.__active_file: IO[str] | None = None
+        self.__active_entries: int = 0
+
+    async def append(self, attendance: JournaledAttendance) -> None:
+        # the scan is only acknowledged once the entry is on disk
+        await asyncio.to_thread(self.__append_sync, attendance)
+
+    def has_pending(self) -> bool:
+        return self.__active_entries > 0 or any(
+            path != self.__active_path for path in self.__directory.glob(self.SEGMENT_GLOB)
+        )
+
+    @contextmanager
+    def claim_pending(self) -> Iterator[list[JournaledAttendance]]:
+        # seals the own segment and locks every segment nobody else is writing or replaying,
+        # segments are deleted only when the caller finishes without raising
+        with self.__lock:
+            self.__seal_active_segment()
+        claimed: list[tuple[Path, IO[str]]] = []
+        try:
+            for path in sorted(self.__directory.glob(self.SEGMENT_GLOB)):
+                segment: IO[str] | None = self.__try_lock(path)
+                if segment is not None:
+                    claimed.append((path, segment))
+            yield [attendance for _, segment in claimed for attendance in self.__read(segment)]
+            for path, _ in claimed:
+                path.unlink(missing_ok=True)
+        finally:
+            for _, segment in claimed:
+                segment.close()
+
+    async def record_conflicts(self, conflicts: list[AttendanceConflict]) -> None:
+        await asyncio.to_thread(self.__record_conflicts_sync, conflicts)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__active_file is not None:
+                self.__active_file.close()
+                self.__active_file = None
+
+    def __append_sync(self, attendance: JournaledAttendance) -> None:
+        with self.__lock:
+            if self.__active_file is None:
+                self.__open_active_segment()
+            assert self.__active_file is not None
+            self.__active_file.write(attendance.model_dump_json() + "\n")
+            self.__active_file.flush()
+            os.fsync(self.__active_file.fileno())
+            self.__active_entries += 1
+
+    def __open_active_segment(self) -> None:
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        path: Path = self.__directory / f"attendance-{os.getpid()}-{time.time_ns()}.jsonl"
+        active_file: IO[str] = path.open("a", encoding="utf-8")
+        # held for the whole life of the segment, replayers skip locked segments
+        fcntl.flock(active_file.fileno(), fcntl.LOCK_EX)
+        self.__active_path, self.__active_file = path, active_file
+        self.__active_entries = 0
+
+    def __seal_active_segment(self) -> None:
+        if self.__active_file is not None:
+            self.__active_file.close()
+        self.__active_path, self.__active_file = None, None
+        self.__active_entries = 0
+
+    def __try_lock(self, path: Path) -> IO[str] | None:
+        try:
+            segment: IO[str] = path.open("r", encoding="utf-8")
+        except FileNotFoundError:
+            return None  # replayed by another worker meanwhile
+        try:
+            fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            segment.close()
+            return None
+        if not path.exists():
+            segment.close()
+            return None
+        return segment
+
+    def __read(self, segment: IO[str]) -> list[JournaledAttendance]:
+        attendances: list[JournaledAttendance] = []
+        for line in segment:
+            try:
+                attendances.append(JournaledAttendance.model_validate_json(line))
+            except ValidationError:
+                # a crash mid-write leaves at most one torn line at the end of a segment
+                logger.warning(f"Skipping unreadable journal line in {segment.name}")
+        return attendances
+
+    def __record_conflicts_sync(self, conflicts: list[AttendanceConflict]) -> None:
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        with (self.__directory / self.CONFLICTS_FILE).open("a", encoding="utf-8") as conflicts_file:
+            conflicts_file.writelines(conflict.model_dump_json() + "\n" for conflict in conflicts)
+            conflicts_file.flush()
+            os.fsync(conflicts_file.fileno())
@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+from collections import deque
+from datetime import date, timedelta
+
+from loguru import logger
+
+from register_ticket_api.entities import AttendanceEvent
+from register_ticket_api.exceptions import DbOperationException
+from register_ticket_api.interfaces import IAttendanceEventSink, IAttendanceLogRepository
+
+
+class AttendanceLogWriter(IAttendanceEventSink):
+    PARTITIONS_AHEAD_DAYS: int = 7
+
+    def __init__(
+        self,
+        attendance_log_repo: IAttendanceLogRepository,
+        *,
+        max_queue_size: int = 10_000,
+        batch_size: int = 1_000,
+        flush_interval_seconds: float = 1.0,
+        retention_days: int | None = None,
+    ) -> None:
+        self.__attendance_log_repo = attendance_log_repo
+        self.__max_queue_size = max_queue_size
+        self.__batch_size = batch_size
+        self.__flush_interval_seconds = flush_interval_seconds
+        self.__retention_days = retention_days
+        self.__queue: deque[AttendanceEvent] = deque()
+        self.__batch_ready = asyncio.Event()
+        self.__maintained_on: date | None = None
+        self.__dropped: int = 0
+        self.__flush_task: asyncio.Task | None = None
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    def pending(self) -> int:
+        return len(self.__queue)
+
+    def emit(self, event: AttendanceEvent) -> None:
+        # the scan only appends here, COPY runs later in the background task
+        if len(self.__queue) >= self.__max_queue_size:
+            self.__dropped += 1
+            return
+        self.__queue.append(event)
+        if len(self.__queue) >= self.__batch_size:
+            self.__batch_ready.set()
+
+    async def flush(self) -> None:
+        await self.__maintain_partitions()
+        while self.__queue:
+            batch: list[AttendanceEvent] = [
+                self.__queue.popleft() for _ in range(min(self.__batch_size, len(self.__queue)))
+            ]
+            try:
+                await self.__attendance_log_repo.add_events(batch)
+            except DbOperationException as err:
+                logger.warning(
+                    f"Could not write {len(batch)} attendance log rows, will retry: {err}"
+                )
+                self.__requeue(batch)
+                return
+
+    def start(self) -> None:
+        if self.__flush_task is None:
+            self.__flush_task = asyncio.create_task(self.__flush_periodically())
+
+    async def stop(self) -> None:
+        if self.__flush_task is not None:
+            self.__flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__flush_task
+            self.__flush_task = None
+        await self.flush()
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self.__batch_ready.wait(), timeout=self.__flush_interval_seconds
+                )
+            self.__batch_ready.clear()
+            await self.flush()
+
+    async def __maintain_partitions(self) -> None:
+        # once a day: partitions exist ahead of the rows, expired days are dropped whole
+        today: date = date.today()
+        if self.__maintained_on == today:
+            return
+        try:
+            created: int = await self.__attendance_log_repo.ensure_partitions(
+                today - timedelta(days=1), self.PARTITIONS_AHEAD_DAYS + 1
+            )
+            dropped: int = 0
+            if self.__retention_days is not None:
+                dropped = await self.__attendance_log_repo.drop_partitions_before(
+                    today - timedelta(days=self.__retention_days)
+                )
+        except DbOperationException as err:
+            logger.warning(f"Could not maintain attendance log partitions: {err}")
+            return
+        self.__maintained_on = today
+        if created or dropped:
+            logger.info(f"Attendance log partitions: {created} created, {dropped} dropped")
+
+    def __requeue(self, batch: list[AttendanceEvent]) -> None:
+        for event in reversed(batch):
+            if len(self.__queue) < self.__max_queue_size:
+                self.__queue.appendleft(event)
+            else:
+                self.__dropped += 1
@@ -0,0 +1,52 @@
+import asyncio
+import contextlib
+from datetime import datetime
+
+from loguru import logger
+
+from register_ticket_api.exceptions import DbOperationException
+from register_ticket_api.interfaces import IStatsRepository
+
+
+class AttendanceRollupBuffer:
+    def __init__(self, stats_repo: IStatsRepository, flush_interval_seconds: float) -> None:
+        self.__stats_repo = stats_repo
+        self.__flush_interval_seconds = flush_interval_seconds
+        self.__pending: dict[tuple[str, datetime], int] = {}
+        self.__flush_task: asyncio.Task | None = None
+
+    def record_entry(self, gate: str, used_at: datetime) -> None:
+        # scan path only touches this dict, the database sees one upsert per flush
+        key: tuple[str, datetime] = (gate, used_at.replace(second=0, microsecond=0))
+        self.__pending[key] = self.__pending.get(key, 0) + 1
+
+    def pending_entries(self) -> dict[tuple[str, datetime], int]:
+        return dict(self.__pending)
+
+    async def flush(self) -> None:
+        if not self.__pending:
+            return
+        pending, self.__pending = self.__pending, {}
+        try:
+            await self.__stats_repo.add_gate_minute_entries(pending)
+        except DbOperationException as err:
+            logger.warning(f"Could not flush {len(pending)} gate rollups, will retry: {err}")
+            for key, entries in pending.items():
+                self.__pending[key] = self.__pending.get(key, 0) + entries
+
+    def start(self) -> None:
+        if self.__flush_task is None:
+            self.__flush_task = asyncio.create_task(self.__flush_periodically())
+
+    async def stop(self) -> None:
+        if self.__flush_task is not None:
+            self.__flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__flush_task
+            self.__flush_task = None
+        await self.flush()
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.__flush_interval_seconds)
+            await self.flush()
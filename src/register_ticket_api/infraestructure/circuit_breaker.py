@@ -0,0 +1,76 @@
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Literal
+
+from loguru import logger
+
+from register_ticket_api.exceptions import CircuitOpenException
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_size: int = 50,
+        open_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.__failure_rate_threshold = failure_rate_threshold
+        self.__minimum_calls = minimum_calls
+        self.__open_seconds = open_seconds
+        self.__clock = clock
+        self.__outcomes: deque[bool] = deque(maxlen=window_size)  # True = failure
+        self.__state: CircuitState = "closed"
+        self.__opened_at: float = 0.0
+        self.__probe_in_flight: bool = False
+
+    @property
+    def state(self) -> CircuitState:
+        return self.__state
+
+    def before_call(self) -> None:
+        if self.__state == "closed":
+            return
+        retry_after: float = self.__opened_at + self.__open_seconds - self.__clock()
+        if self.__state == "open" and retry_after <= 0:
+            self.__state = "half_open"
+        # half open lets a single probe through, everybody else fails fast
+        if self.__state == "half_open" and not self.__probe_in_flight:
+            self.__probe_in_flight = True
+            return
+        raise CircuitOpenException(max(retry_after, 0.0))
+
+    def record_success(self) -> None:
+        if self.__state == "half_open":
+            logger.info("Database circuit closed after a successful probe")
+            self.__state = "closed"
+            self.__probe_in_flight = False
+            self.__outcomes.clear()
+            return
+        self.__outcomes.append(False)
+
+    def record_failure(self) -> None:
+        if self.__state == "half_open":
+            self.__open("probe failed")
+            return
+        self.__outcomes.append(True)
+        if len(self.__outcomes) < self.__minimum_calls:
+            return
+        failure_rate: float = sum(self.__outcomes) / len(self.__outcomes)
+        if failure_rate >= self.__failure_rate_threshold:
+            self.__open(f"failure rate {failure_rate:.0%}")
+
+    def abandon_call(self) -> None:
+        # a cancelled probe proved nothing, let the next caller probe instead
+        self.__probe_in_flight = False
+
+    def __open(self, reason: str) -> None:
+        logger.warning(f"Database circuit opened for {self.__open_seconds}s: {reason}")
+        self.__state = "open"
+        self.__opened_at = self.__clock()
+        self.__probe_in_flight = False
+        self.__outcomes.clear()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# minute, hour, day of month, month, day of week (0 and 7 are Sunday)
+FIELD_RANGES: tuple[tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# an expression that never matches (February 30th) gives up instead of looping forever
+MAX_SEARCH_DAYS: int = 5 * 366
+
+
+def _parse_field(field: str, low: int, high: int) -> frozenset[int]:
+    # "*", "5", "1-5", "*/15", "10-50/10" and comma separated lists of them
+    values: set[int] = set()
+    for part in field.split(","):
+        expression, _, step_text = part.partition("/")
+        try:
+            step: int = int(step_text) if step_text else 1
+            if expression == "*":
+                start, end = low, high
+            elif "-" in expression:
+                start_text, _, end_text = expression.partition("-")
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(expression)
+                end = high if step_text else start
+        except ValueError:
+            step = 0
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron field {field!r}, expected values in {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    # five field cron expressions evaluated in one timezone, a wall time skipped by a DST
+    # change fires at the same wall time after the change
+    def __init__(self, expression: str, timezone: str = "UTC") -> None:
+        fields: list[str] = expression.split()
+        if len(fields) != len(FIELD_RANGES):
+            raise ValueError(f"Invalid cron expression {expression!r}, expected 5 fields")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(field, low, high)
+            for field, (low, high) in zip(fields, FIELD_RANGES, strict=True)
+        )
+        self.expression = expression
+        self.__timezone = ZoneInfo(timezone)
+        self.__minutes = minutes
+        self.__hours = hours
+        self.__days = days
+        self.__months = months
+        self.__weekdays = frozenset(day % 7 for day in weekdays)
+        # as in cron, restricting both days matches either of them
+        self.__any_day = fields[2] == "*"
+        self.__any_weekday = fields[4] == "*"
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate: datetime = moment.astimezone(self.__timezone).replace(
+            second=0, microsecond=0
+        ) + timedelta(minutes=1)
+        give_up_at: datetime = candidate + timedelta(days=MAX_SEARCH_DAYS)
+        while candidate < give_up_at:
+            if candidate.month not in self.__months:
+                candidate = (candidate.replace(day=1) + timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0
+                )
+            elif not self.__matches_day(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.__hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.__minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __matches_day(self, candidate: datetime) -> bool:
+        day_matches: bool = candidate.day in self.__days
+        # isoweekday is 1 for Monday and 7 for Sunday, cron counts from Sunday as 0
+        weekday_matches: bool = candidate.isoweekday() % 7 in self.__weekdays
+        if self.__any_day or self.__any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
@@ -0,0 +1,24 @@
+import codecs
+import csv
+from collections.abc import AsyncIterable, AsyncIterator
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterable[bytes], encoding: str = "utf-8"
+) -> AsyncIterator[list[str]]:
+    # only the current partial line is kept in memory, quoted values spanning several
+    # lines aren't supported, usernames and passwords can't contain line breaks anyway
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    pending: str = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines: list[str] = pending.splitlines(keepends=True)
+        # the last line may still be incomplete (or a \r waiting for its \n), it waits for
+        # the next chunk
+        pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        for row in csv.reader(lines):
+            yield row
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        for row in csv.reader([pending]):
+            yield row
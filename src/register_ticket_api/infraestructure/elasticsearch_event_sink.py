@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import fcntl
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Any
+
+from elasticsearch import Elasticsearch
+from loguru import logger
+from pydantic import ValidationError
+
+from register_ticket_api.entities import AttendanceEvent
+from register_ticket_api.interfaces import IAttendanceEventSink
+
+
+class ElasticsearchEventSink(IAttendanceEventSink):
+    SPILL_GLOB: str = "attendance-events-*.jsonl"
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: Elasticsearch,
+        index: str,
+        *,
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        spill_dir: str | None = None,
+    ) -> None:
+        self.__client = client
+        self.__index = index
+        self.__max_queue_size = max_queue_size
+        self.__batch_size = batch_size
+        self.__flush_interval_seconds = flush_interval_seconds
+        self.__spill_dir = Path(spill_dir) if spill_dir else None
+        self.__queue: deque[AttendanceEvent] = deque()
+        self.__batch_ready = asyncio.Event()
+        self.__spill_file: IO[str] | None = None
+        self.__dropped: int = 0
+        self.__flush_task: asyncio.Task | None = None
+
+    @property
+    def dropped(self) -> int:
+        return self.__dropped
+
+    def pending(self) -> int:
+        return len(self.__queue)
+
+    def emit(self, event: AttendanceEvent) -> None:
+        # called on the scan path, never waits on Elasticsearch
+        if len(self.__queue) >= self.__max_queue_size:
+            self.__overflow(event)
+            return
+        self.__queue.append(event)
+        if len(self.__queue) >= self.__batch_size:
+            self.__batch_ready.set()
+
+    async def flush(self) -> None:
+        while self.__queue:
+            batch: list[AttendanceEvent] = [
+                self.__queue.popleft() for _ in range(min(self.__batch_size, len(self.__queue)))
+            ]
+            if not await self.__send(batch):
+                self.__requeue(batch)
+                return
+        await self.__send_spilled()
+
+    def start(self) -> None:
+        if self.__flush_task is None:
+            self.__flush_task = asyncio.create_task(self.__flush_periodically())
+
+    async def stop(self) -> None:
+        if self.__flush_task is not None:
+            self.__flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__flush_task
+            self.__flush_task = None
+        await self.flush()
+        self.__seal_spill_file()
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self.__batch_ready.wait(), timeout=self.__flush_interval_seconds
+                )
+            self.__batch_ready.clear()
+            await self.flush()
+
+    async def __send(self, batch: list[AttendanceEvent]) -> bool:
+        operations: list[dict[str, Any]] = []
+        for event in batch:
+            operations.extend(
+                ({"create": {"_id": str(event.event_id)}}, event.model_dump(mode="json"))
+            )
+        try:
+            response = await asyncio.to_thread(
+                self.__client.bulk, operations=operations, index=self.__index
+            )
+        except Exception as err:
+            logger.warning(f"Could not ship {len(batch)} attendance events: {err}")
+            return False
+        if response.get("errors"):
+            # 409 means the event was shipped by an earlier, partially failed flush
+            rejected: int = sum(
+                1
+                for item in response["items"]
+                if next(iter(item.values())).get("status", 200) not in {200, 201, 409}
+            )
+            if rejected:
+                self.__dropped += rejected
+                logger.warning(f"Elasticsearch rejected {rejected} attendance events")
+        return True
+
+    def __requeue(self, batch: list[AttendanceEvent]) -> None:
+        for event in reversed(batch):
+            if len(self.__queue) < self.__max_queue_size:
+                self.__queue.appendleft(event)
+            else:
+                self.__overflow(event)
+
+    def __overflow(self, event: AttendanceEvent) -> None:
+        if self.__spill_dir is None:
+            self.__dropped += 1
+            return
+        try:
+            if self.__spill_file is None:
+                self.__spill_file = self.__open_spill_file(self.__spill_dir)
+            # buffered write, the page cache absorbs it without blocking the scan
+            self.__spill_file.write(event.model_dump_json() + "\n")
+        except OSError as err:
+            self.__dropped += 1
+            logger.warning(f"Could not spill attendance event to disk: {err}")
+
+    def __open_spill_file(self, spill_dir: Path) -> IO[str]:
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        path: Path = spill_dir / f"attendance-events-{os.getpid()}-{time.time_ns()}.jsonl"
+        spill_file: IO[str] = path.open("a", encoding="utf-8")
+        # locked while written, other workers only ship sealed or orphaned files
+        fcntl.flock(spill_file.fileno(), fcntl.LOCK_EX)
+        return spill_file
+
+    def __seal_spill_file(self) -> None:
+        if self.__spill_file is not None:
+            self.__spill_file.close()
+            self.__spill_file = None
+
+    async def __send_spilled(self) -> None:
+        if self.__spill_dir is None:
+            return
+        self.__seal_spill_file()
+        for path in sorted(self.__spill_dir.glob(self.SPILL_GLOB)):
+            try:
+                spilled = path.open("r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with spilled:
+                try:
+                    fcntl.flock(spilled.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                if not path.exists():
+                    continue
+                events: list[AttendanceEvent] = self.__read_spilled(spilled)
+                for start in range(0, len(events), self.__batch_size):
+                    if not await self.__send(events[start : start + self.__batch_size]):
+                        return  # kept on disk for the next flush
+                path.unlink(missing_ok=True)
+
+    def __read_spilled(self, spilled: IO[str]) -> list[AttendanceEvent]:
+        events: list[AttendanceEvent] = []
+        for line in spilled:
+            try:
+                events.append(AttendanceEvent.model_validate_json(line))
+            except ValidationError:
+                self.__dropped += 1
+        return events
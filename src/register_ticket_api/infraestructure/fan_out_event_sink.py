@@ -0,0 +1,16 @@
+from loguru import logger
+
+from register_ticket_api.entities import AttendanceEvent
+from register_ticket_api.interfaces import IAttendanceEventSink
+
+
+class FanOutEventSink(IAttendanceEventSink):
+    def __init__(self, sinks: list[IAttendanceEventSink]) -> None:
+        self.__sinks = sinks
+
+    def emit(self, event: AttendanceEvent) -> None:
+        for sink in self.__sinks:
+            try:
+                sink.emit(event)
+            except Exception as err:  # a broken sink must not fail the scan
+                logger.exception(f"Attendance event sink {sink!r} failed: {err}")
@@ -0,0 +1,156 @@
+import mmap
+import os
+import struct
+from base64 import b64decode, b64encode
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from uuid import UUID
+
+from loguru import logger
+
+from register_ticket_api.entities import Ticket
+
+MAGIC: bytes = b"TKSN"
+FORMAT_VERSION: int = 1
+# magic, format version, record size, generation, record count
+HEADER = struct.Struct("<4sHHQI4x")
+# gate and seat are VARCHAR(10), NUL padded. Keys are sorted so gate + seat is found by
+# binary search, record i belongs to key i
+FIELD_SIZE: int = 10
+KEY_SIZE: int = 2 * FIELD_SIZE
+SEED_SIZE: int = 20  # gen_random_bytes(20)
+# ticket id, user id, status, TOTP seed
+RECORD = struct.Struct("<16s16sB20s3x")
+STATUSES: tuple[str, ...] = ("valid", "used", "revoked")
+
+
+def _key(seat: str, gate: str) -> bytes | None:
+    seat_bytes, gate_bytes = seat.encode(), gate.encode()
+    if len(seat_bytes) > FIELD_SIZE or len(gate_bytes) > FIELD_SIZE:
+        return None
+    return gate_bytes.ljust(FIELD_SIZE, b"\0") + seat_bytes.ljust(FIELD_SIZE, b"\0")
+
+
+def _record(ticket: Ticket) -> bytes | None:
+    if ticket.id is None or ticket.user_id is None or ticket.seed is None:
+        return None
+    seed: bytes = b64decode(ticket.seed)
+    if len(seed) != SEED_SIZE:
+        return None
+    return RECORD.pack(ticket.id.bytes, ticket.user_id.bytes, STATUSES.index(ticket.status), seed)
+
+
+class GateSnapshot:
+    # a read-only mapping of the file, every worker of the host shares the same pages and a
+    # lookup reads a key and a record in place, no object exists per ticket
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as snapshot_file:
+            self.__mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__inode: int = os.fstat(snapshot_file.fileno()).st_ino
+        if len(self.__mmap) < HEADER.size:
+            self.__mmap.close()
+            raise ValueError(f"{path} is too short for a gate snapshot")
+        magic, version, record_size, generation, count = HEADER.unpack_from(self.__mmap)
+        self.__generation: int = generation
+        self.__count: int = count
+        expected_size: int = HEADER.size + self.__count * (KEY_SIZE + RECORD.size)
+        if (
+            magic != MAGIC
+            or version != FORMAT_VERSION
+            or record_size != RECORD.size
+            or len(self.__mmap) != expected_size
+        ):
+            self.__mmap.close()
+            raise ValueError(f"{path} is not a gate snapshot of version {FORMAT_VERSION}")
+        self.__records_offset: int = HEADER.size + self.__count * KEY_SIZE
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def inode(self) -> int:
+        return self.__inode
+
+    def get(self, seat: str, gate: str) -> Ticket | None:
+        key: bytes | None = _key(seat, gate)
+        position: int | None = self.__find(key) if key is not None else None
+        if position is None:
+            return None
+        ticket_id, user_id, status, seed = RECORD.unpack_from(
+            self.__mmap, self.__records_offset + position * RECORD.size
+        )
+        return Ticket(
+            id=UUID(bytes=ticket_id),
+            user_id=UUID(bytes=user_id),
+            seat=seat,
+            gate=gate,
+            seed=b64encode(seed).decode("ascii"),
+            status=STATUSES[status],
+        )
+
+    def contains(self, seat: str, gate: str) -> bool:
+        key: bytes | None = _key(seat, gate)
+        return key is not None and self.__find(key) is not None
+
+    def raw_entries(self) -> Iterator[tuple[bytes, bytes]]:
+        # (key, record) as stored, the writer merges changes into them without decoding
+        for position in range(self.__count):
+            key_offset: int = HEADER.size + position * KEY_SIZE
+            record_offset: int = self.__records_offset + position * RECORD.size
+            yield (
+                self.__mmap[key_offset : key_offset + KEY_SIZE],
+                self.__mmap[record_offset : record_offset + RECORD.size],
+            )
+
+    def close(self) -> None:
+        self.__mmap.close()
+
+    def __find(self, key: bytes) -> int | None:
+        low, high = 0, self.__count
+        while low < high:
+            middle: int = (low + high) // 2
+            offset: int = HEADER.size + middle * KEY_SIZE
+            probe: bytes = self.__mmap[offset : offset + KEY_SIZE]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+
+def write_gate_snapshot(
+    path: Path, tickets: Iterable[Ticket], base: GateSnapshot | None = None
+) -> int:
+    # scannable tickets replace their entry, any other status removes it. The file is
+    # written aside and renamed over the old one, readers see one generation or the next
+    entries: dict[bytes, bytes] = dict(base.raw_entries()) if base is not None else {}
+    skipped: int = 0
+    for ticket in tickets:
+        key: bytes | None = _key(ticket.seat, ticket.gate)
+        record: bytes | None = _record(ticket) if ticket.status == "valid" else None
+        if key is None or (record is None and ticket.status == "valid"):
+            skipped += 1
+        elif record is None:
+            entries.pop(key, None)
+        else:
+            entries[key] = record
+    if skipped:
+        logger.warning(f"{skipped} tickets don't fit the gate snapshot and were left out")
+    generation: int = base.generation + 1 if base is not None else 1
+    keys: list[bytes] = sorted(entries)
+    content = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, generation, len(keys)))
+    content += b"".join(keys)
+    content += b"".join(entries[key] for key in keys)
+    temporary: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temporary.open("wb") as snapshot_file:
+        snapshot_file.write(content)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    temporary.replace(path)
+    return generation
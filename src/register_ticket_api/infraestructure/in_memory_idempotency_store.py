@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+
+from register_ticket_api.entities import IdempotencyRecord
+from register_ticket_api.interfaces import IIdempotencyStore
+
+
+class InMemoryIdempotencyStore(IIdempotencyStore):
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        shared_store: IIdempotencyStore | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("Max entries must be at least 1")
+        self.__max_entries = max_entries
+        self.__ttl_seconds = ttl_seconds
+        self.__shared_store = shared_store  # optional backend shared between workers
+        self.__entries: OrderedDict[str, tuple[float, IdempotencyRecord]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    async def get(self, key: str) -> IdempotencyRecord | None:
+        entry = self.__entries.get(key)
+        if entry is not None:
+            expires_at, record = entry
+            if expires_at > time.monotonic():
+                return record
+            del self.__entries[key]
+        if self.__shared_store is None:
+            return None
+        shared_record: IdempotencyRecord | None = await self.__shared_store.get(key)
+        if shared_record is not None:
+            self.__store_locally(key, shared_record)
+        return shared_record
+
+    async def save(self, key: str, record: IdempotencyRecord) -> None:
+        self.__store_locally(key, record)
+        if self.__shared_store is not None:
+            await self.__shared_store.save(key, record)
+
+    async def purge_expired(self) -> int:
+        now: float = time.monotonic()
+        purged: int = 0
+        # every entry shares the same ttl, so insertion order is also expiration order
+        while self.__entries:
+            key, (expires_at, _) = next(iter(self.__entries.items()))
+            if expires_at > now:
+                break
+            del self.__entries[key]
+            purged += 1
+        # the shared store is purged once for every worker, by an exclusive scheduled job
+        return purged
+
+    def __store_locally(self, key: str, record: IdempotencyRecord) -> None:
+        self.__entries.pop(key, None)
+        self.__entries[key] = (time.monotonic() + self.__ttl_seconds, record)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
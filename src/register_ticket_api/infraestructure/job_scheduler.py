@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+
+import asyncpg
+from loguru import logger
+
+from register_ticket_api.entities import JobOutcome, ScheduledJobStats
+from register_ticket_api.exceptions import AppValidationException
+from register_ticket_api.infraestructure.cron_schedule import CronSchedule
+from register_ticket_api.infraestructure.postgresql_db_context import PostgreSQLDbContext
+
+# advisory lock keys are hashtext('<namespace>:<job name>'), away from the migration lock
+LOCK_NAMESPACE: str = "job_scheduler"
+
+
+class ScheduledJob:
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        job: Callable[[], Awaitable[object]],
+        next_run: Callable[[datetime], datetime],
+        *,
+        trigger: str,
+        jitter_seconds: float,
+        exclusive: bool,
+        timeout_seconds: float | None,
+    ) -> None:
+        self.name = name
+        self.job = job
+        self.next_run = next_run
+        self.jitter_seconds = jitter_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stats = ScheduledJobStats(name=name, trigger=trigger, exclusive=exclusive)
+        self.total_duration_ms: float = 0.0
+
+    def record(self, outcome: JobOutcome, started_at: datetime, duration_ms: float) -> None:
+        stats: ScheduledJobStats = self.stats
+        stats.runs += 1
+        stats.failures += outcome == "failed"
+        stats.timeouts += outcome == "timed_out"
+        stats.last_outcome = outcome
+        stats.last_started_at = started_at
+        stats.last_duration_ms = round(duration_ms, 3)
+        self.total_duration_ms += duration_ms
+        stats.mean_duration_ms = round(self.total_duration_ms / stats.runs, 3)
+        stats.max_duration_ms = max(stats.max_duration_ms or 0.0, stats.last_duration_ms)
+
+
+class JobScheduler:
+    # one task per job, started from the lifespan. A failed or timed out run is logged and
+    # the job runs again on its next tick. Jobs run on every worker unless exclusive
+    def __init__(self, db_context: PostgreSQLDbContext | None = None, timezone: str = "UTC"):
+        self.__db_context = db_context
+        self.__timezone = timezone
+        self.__jobs: dict[str, ScheduledJob] = {}
+        self.__tasks: list[asyncio.Task] = []
+        # exclusive jobs belong to the worker whose lock connection holds their advisory
+        # lock, it keeps them until it dies and the connection with it. Taking the lock
+        # per run instead would let a slower worker run the same tick again right after
+        self.__lock_conn: asyncpg.Connection | None = None
+        self.__lock_guard = asyncio.Lock()
+        self.__held_locks: set[str] = set()
+
+    def every(  # noqa: PLR0913
+        self,
+        name: str,
+        job: Callable[[], Awaitable[object]],
+        interval_seconds: float,
+        *,
+        jitter_seconds: float = 0.0,
+        exclusive: bool = False,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        interval = timedelta(seconds=interval_seconds)
+        self.__add(
+            ScheduledJob(
+                name,
+                job,
+                lambda now: now + interval,
+                trigger=f"every {interval_seconds:g}s",
+                jitter_seconds=jitter_seconds,
+                exclusive=exclusive,
+                timeout_seconds=timeout_seconds,
+            )
+        )
+
+    def cron(  # noqa: PLR0913
+        self,
+        name: str,
+        job: Callable[[], Awaitable[object]],
+        expression: str,
+        *,
+        jitter_seconds: float = 0.0,
+        exclusive: bool = False,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        schedule = CronSchedule(expression, timezone=self.__timezone)
+        self.__add(
+            ScheduledJob(
+                name,
+                job,
+                schedule.next_after,
+                trigger=expression,
+                jitter_seconds=jitter_seconds,
+                exclusive=exclusive,
+                timeout_seconds=timeout_seconds,
+            )
+        )
+
+    def stats(self) -> list[ScheduledJobStats]:
+        return [job.stats.model_copy() for job in self.__jobs.values()]
+
+    def start(self) -> None:
+        if not self.__tasks:
+            self.__tasks = [
+                asyncio.create_task(self.__run_forever(job)) for job in self.__jobs.values()
+            ]
+
+    async def stop(self) -> None:
+        for task in self.__tasks:
+            task.cancel()
+        for task in self.__tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self.__tasks = []
+        await self.__drop_locks()
+
+    async def run_now(self, name: str) -> ScheduledJobStats:
+        job: ScheduledJob | None = self.__jobs.get(name)
+        if job is None:
+            raise AppValidationException(f"Unknown scheduled job {name}")
+        await self.__run(job)
+        return job.stats.model_copy()
+
+    def __add(self, job: ScheduledJob) -> None:
+        if job.name in self.__jobs:
+            raise ValueError(f"Scheduled job {job.name} already exists")
+        if job.stats.exclusive and self.__db_context is None:
+            raise ValueError(f"Exclusive job {job.name} needs a database to lock on")
+        self.__jobs[job.name] = job
+
+    async def __run_forever(self, job: ScheduledJob) -> None:
+        while True:
+            run_at: datetime = job.next_run(datetime.now(UTC))
+            job.stats.next_run_at = run_at
+            # jitter keeps every worker from hitting the database in the same instant
+            jitter: float = random.uniform(0, job.jitter_seconds)  # noqa: S311
+            delay: float = (run_at - datetime.now(UTC)).total_seconds() + jitter
+            await asyncio.sleep(max(delay, 0.0))
+            await self.__run(job)
+
+    async def __run(self, job: ScheduledJob) -> None:
+        if job.stats.exclusive and not await self.__holds_lock(job.name):
+            job.stats.skipped += 1
+            job.stats.last_outcome = "skipped"
+            return
+        started_at: datetime = datetime.now(UTC)
+        started: float = time.perf_counter()
+        try:
+            await asyncio.wait_for(job.job(), timeout=job.timeout_seconds)
+            outcome: JobOutcome = "succeeded"
+        except TimeoutError:
+            outcome = "timed_out"
+            logger.warning(f"Scheduled job {job.name} timed out after {job.timeout_seconds}s")
+        except Exception as err:
+            outcome = "failed"
+            logger.warning(f"Scheduled job {job.name} failed, retrying next run: {err}")
+        duration_ms: float = (time.perf_counter() - started) * 1000
+        job.record(outcome, started_at, duration_ms)
+        logger.debug(f"Scheduled job {job.name} {outcome} in {duration_ms:.1f} ms")
+
+    async def __holds_lock(self, name: str) -> bool:
+        if self.__db_context is None:
+            return False
+        # an asyncpg connection runs one query at a time, exclusive jobs take turns on it
+        async with self.__lock_guard:
+            try:
+                if self.__lock_conn is None or self.__lock_conn.is_closed():
+                    self.__held_locks.clear()
+                    self.__lock_conn = await self.__db_context.create_dedicated_connection()
+                if name in self.__held_locks:
+                    # the lock lives as long as the session, make sure it still does
+                    await self.__lock_conn.execute("SELECT 1")
+                else:
+                    acquired: bool = await self.__lock_conn.fetchval(
+                        "SELECT pg_try_advisory_lock(hashtext($1))", f"{LOCK_NAMESPACE}:{name}"
+                    )
+                    if acquired:
+                        self.__held_locks.add(name)
+                        logger.info(f"This worker now runs scheduled job {name}")
+            except Exception as err:
+                logger.warning(f"Could not check the lock of scheduled job {name}: {err}")
+                await self.__drop_locks()
+                return False
+            return name in self.__held_locks
+
+    async def __drop_locks(self) -> None:
+        # closing the session releases every advisory lock it holds
+        self.__held_locks.clear()
+        if self.__lock_conn is not None:
+            conn, self.__lock_conn = self.__lock_conn, None
+            with contextlib.suppress(Exception):
+                await conn.close()
@@ -0,0 +1,146 @@
+import hashlib
+import re
+import time
+from pathlib import Path
+
+import asyncpg
+from loguru import logger
+
+from register_ticket_api.entities import Migration
+from register_ticket_api.infraestructure.postgresql_db_context import PostgreSQLDbContext
+
+DEFAULT_MIGRATIONS_DIR: Path = Path(__file__).resolve().parent.parent / "migrations"
+
+
+class MigrationRunner:
+    FILE_PATTERN: re.Pattern[str] = re.compile(r"^V(\d+)__(\w+)\.sql$")
+    NO_TRANSACTION_DIRECTIVE: str = "-- migrate:no-transaction"
+    ADVISORY_LOCK_KEY: int = 7_340_001  # shared by every worker and the CLI
+
+    def __init__(
+        self, db_context: PostgreSQLDbContext, migrations_dir: Path = DEFAULT_MIGRATIONS_DIR
+    ) -> None:
+        self.__db_context = db_context
+        self.__migrations_dir = migrations_dir
+
+    @property
+    def database(self) -> str | None:
+        database: str | None = self.__db_context.database
+        return database
+
+    def load_migrations(self) -> list[Migration]:
+        migrations: dict[int, Migration] = {}
+        for path in sorted(self.__migrations_dir.glob("*.sql")):
+            match: re.Match[str] | None = self.FILE_PATTERN.match(path.name)
+            if match is None:
+                raise ValueError(f"Migration file {path.name} must be named V<version>__<name>.sql")
+            version: int = int(match.group(1))
+            if version in migrations:
+                raise ValueError(f"Duplicated migration version {version}")
+            sql: str = path.read_text(encoding="utf-8")
+            migrations[version] = Migration(
+                version=version,
+                name=match.group(2),
+                sql=sql,
+                checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+                transactional=not sql.lstrip().startswith(self.NO_TRANSACTION_DIRECTIVE),
+            )
+        return [migrations[version] for version in sorted(migrations)]
+
+    async def pending_migrations(self) -> list[Migration]:
+        conn: asyncpg.Connection = await self.__db_context.create_dedicated_connection()
+        try:
+            return self.__pending(self.load_migrations(), await self.__applied_checksums(conn))
+        finally:
+            await conn.close()
+
+    async def apply(self) -> list[Migration]:
+        migrations: list[Migration] = self.load_migrations()
+        # session level lock, it also covers the steps that run outside a transaction
+        conn: asyncpg.Connection = await self.__db_context.create_dedicated_connection()
+        try:
+            await conn.execute("SELECT pg_advisory_lock($1)", self.ADVISORY_LOCK_KEY)
+            try:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        checksum CHAR(64) NOT NULL,
+                        execution_ms INTEGER NOT NULL,
+                        applied_at TIMESTAMP NOT NULL DEFAULT now()
+                    );
+                    """
+                )
+                pending: list[Migration] = self.__pending(
+                    migrations, await self.__applied_checksums(conn)
+                )
+                for migration in pending:
+                    await self.__apply_one(conn, migration)
+                return pending
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", self.ADVISORY_LOCK_KEY)
+        finally:
+            await conn.close()
+
+    async def __apply_one(self, conn: asyncpg.Connection, migration: Migration) -> None:
+        logger.info(f"Applying migration V{migration.version:04d} {migration.name}")
+        started_at: float = time.perf_counter()
+        if migration.transactional:
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await self.__record(conn, migration, started_at)
+            return
+        # CONCURRENTLY refuses to run in a transaction block, and so does a multi statement
+        # simple query, so each statement goes on its own; these files hold plain DDL and
+        # DO blocks that COMMIT between batches
+        for statement in self.__split_statements(migration.sql):
+            await conn.execute(statement)
+        await self.__record(conn, migration, started_at)
+
+    async def __record(
+        self, conn: asyncpg.Connection, migration: Migration, started_at: float
+    ) -> None:
+        await conn.execute(
+            """
+            INSERT INTO schema_migrations (version, name, checksum, execution_ms)
+            VALUES ($1, $2, $3, $4);
+            """,
+            migration.version,
+            migration.name,
+            migration.checksum,
+            int((time.perf_counter() - started_at) * 1000),
+        )
+
+    async def __applied_checksums(self, conn: asyncpg.Connection) -> dict[int, str]:
+        exists: bool = await conn.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not exists:
+            return {}
+        rows = await conn.fetch("SELECT version, checksum FROM schema_migrations")
+        return {row["version"]: row["checksum"] for row in rows}
+
+    def __pending(self, migrations: list[Migration], applied: dict[int, str]) -> list[Migration]:
+        for migration in migrations:
+            checksum: str | None = applied.get(migration.version)
+            if checksum is not None and checksum != migration.checksum:
+                raise ValueError(
+                    f"Migration V{migration.version:04d} {migration.name} changed after being "
+                    "applied, add a new migration instead"
+                )
+        return [migration for migration in migrations if migration.version not in applied]
+
+    def __split_statements(self, sql: str) -> list[str]:
+        statements: list[str] = []
+        current: list[str] = []
+        in_dollar_quote: bool = False
+        for line in sql.splitlines():
+            current.append(line)
+            # a DO body is one statement, its inner semicolons don't end it
+            if line.count("$$") % 2:
+                in_dollar_quote = not in_dollar_quote
+            if not in_dollar_quote and line.rstrip().endswith(";"):
+                statements.append("\n".join(current))
+                current = []
+        if "\n".join(current).strip():
+            statements.append("\n".join(current))
+        return statements
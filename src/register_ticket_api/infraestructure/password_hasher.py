@@ -0,0 +1,113 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+SCRYPT_N: int = 2**14
+SCRYPT_R: int = 8
+SCRYPT_P: int = 1
+SALT_BYTES: int = 16
+KEY_BYTES: int = 32
+
+
+def hash_password(password: str) -> str:
+    salt: bytes = os.urandom(SALT_BYTES)
+    key: bytes = hashlib.scrypt(
+        password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=KEY_BYTES
+    )
+    return "$".join(
+        (
+            "scrypt",
+            str(SCRYPT_N),
+            str(SCRYPT_R),
+            str(SCRYPT_P),
+            base64.b64encode(salt).decode(),
+            base64.b64encode(key).decode(),
+        )
+    )
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    return [hash_password(password) for password in passwords]
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    try:
+        algorithm, n, r, p, salt, key = password_hash.split("$")
+    except ValueError:
+        return False
+    if algorithm != "scrypt":
+        return False
+    expected: bytes = base64.b64decode(key)
+    actual: bytes = hashlib.scrypt(
+        password.encode(),
+        salt=base64.b64decode(salt),
+        n=int(n),
+        r=int(r),
+        p=int(p),
+        dklen=len(expected),
+    )
+    return hmac.compare_digest(actual, expected)
+
+
+def default_max_workers() -> int:
+    # every uvicorn worker owns one of these pools, together they get one process per core
+    web_workers: int = max(int(os.getenv("WEB_CONCURRENCY") or 1), 1)
+    return max((os.cpu_count() or 1) // web_workers, 1)
+
+
+# scrypt is deliberately slow and holds the GIL, hashed on the event loop a bulk import
+# would stall every request of the worker
+class PasswordHasher:
+    def __init__(self, max_workers: int | None = None, chunk_size: int = 250) -> None:
+        self.__max_workers: int = max_workers if max_workers is not None else default_max_workers()
+        self.__chunk_size = max(chunk_size, 1)
+        self.__executor: ProcessPoolExecutor | None = None
+
+    @property
+    def max_workers(self) -> int:
+        return self.__max_workers
+
+    async def hash(self, password: str) -> str:
+        return (await self.hash_many([password]))[0]
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        chunks: list[list[str]] = [
+            passwords[i : i + self.__chunk_size]
+            for i in range(0, len(passwords), self.__chunk_size)
+        ]
+        hashed: list[list[str]] = await asyncio.gather(
+            *(loop.run_in_executor(self.__get_executor(), hash_passwords, c) for c in chunks)
+        )
+        return [password_hash for chunk in hashed for password_hash in chunk]
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__get_executor(), verify_password, password, password_hash
+        )
+
+    def shutdown(self) -> None:
+        if self.__executor is None:
+            return
+        executor, self.__executor = self.__executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        # created on first use, importing the app must not fork worker processes; forking a
+        # worker that already runs an event loop and threads can copy held locks, so the
+        # processes start from a clean interpreter instead
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__max_workers,
+                mp_context=multiprocessing.get_context(
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                ),
+            )
+        return self.__executor
@@ -1,21 +1,123 @@
+import asyncio
 import os
+import random
 
 import asyncpg
 from dotenv import load_dotenv
 
+from register_ticket_api.exceptions import DeadlineExceededException
+from register_ticket_api.infraestructure.circuit_breaker import CircuitBreaker
+from register_ticket_api.infraestructure.request_deadline import query_timeout
+from register_ticket_api.instrumentation import timed_span
+
 load_dotenv()  # load env variables from .env file
 
 
 class PostgreSQLDbContext:
+    def __init__(
+        self,
+        circuit_breaker: CircuitBreaker | None = None,
+        database: str | None = None,
+        host: str | None = None,
+    ) -> None:
+        self.__pool: asyncpg.Pool | None = None
+        # ticket shards are other databases on the same credentials, DB_NAME is the primary
+        self.__database = database
+        # DB_HOST is the name the API sees, tools outside its network reach the server elsewhere
+        self.__host = host
+        self.__circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.__acquire_timeout_seconds: float = float(
+            os.getenv("DB_ACQUIRE_TIMEOUT_SECONDS") or "2"
+        )
+        self.__retry_attempts: int = max(int(os.getenv("DB_RETRY_ATTEMPTS") or "2"), 1)
+        self.__retry_base_delay_seconds: float = (
+            float(os.getenv("DB_RETRY_BASE_DELAY_MS") or "50") / 1000
+        )
+
+    @property
+    def database(self) -> str | None:
+        return self.__database or os.getenv("DB_NAME")
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return self.__circuit_breaker
+
     def __parse_env_vars(self) -> dict:
         return {
-            "host": os.getenv("DB_HOST"),
+            "host": self.__host or os.getenv("DB_HOST"),
             "port": int(os.getenv("DB_PORT") or "5432"),
             "user": os.getenv("DB_USER"),
             "password": os.getenv("DB_PASSWORD"),
-            "database": os.getenv("DB_NAME"),
+            "database": self.__database or os.getenv("DB_NAME"),
+        }
+
+    def __parse_pool_env_vars(self) -> dict:
+        # each worker process owns its pool, the launcher divides the connection budget
+        max_size: int = int(os.getenv("DB_POOL_MAX_SIZE") or "10")
+        min_size: int = min(int(os.getenv("DB_POOL_MIN_SIZE") or "1"), max_size)
+        # a stalled server must surface as an error instead of a scan waiting forever
+        command_timeout: float = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS") or "5")
+        # the server gives up on its own too, a query whose client vanished can't pin a backend
+        statement_timeout_ms: int = int(
+            os.getenv("DB_STATEMENT_TIMEOUT_MS") or str(int(command_timeout * 1000))
+        )
+        return {
+            "min_size": min_size,
+            "max_size": max_size,
+            "command_timeout": command_timeout,
+            "server_settings": {"statement_timeout": str(statement_timeout_ms)},
         }
 
+    async def open_pool(self) -> None:
+        if self.__pool is not None:
+            return
+        self.__pool = await asyncpg.create_pool(
+            **self.__parse_env_vars(), **self.__parse_pool_env_vars()
+        )
+
+    async def close_pool(self) -> None:
+        if self.__pool is None:
+            return
+        pool, self.__pool = self.__pool, None
+        await pool.close()
+
     async def get_connection(self) -> asyncpg.Connection:
+        with timed_span("db_acquire"):
+            attempt: int = 1
+            while True:
+                self.__circuit_breaker.before_call()
+                try:
+                    conn: asyncpg.Connection = await self.__acquire()
+                except (asyncio.CancelledError, DeadlineExceededException):
+                    # running out of request time says nothing about the database, it is
+                    # neither a failure for the breaker nor worth a retry
+                    self.__circuit_breaker.abandon_call()
+                    raise
+                except Exception:
+                    self.__circuit_breaker.record_failure()
+                    if attempt >= self.__retry_attempts:
+                        raise
+                    # full jitter, workers retrying together must not hit the server in sync
+                    max_delay: float = self.__retry_base_delay_seconds * 2**attempt
+                    await asyncio.sleep(random.uniform(0, max_delay))  # noqa: S311
+                    attempt += 1
+                else:
+                    self.__circuit_breaker.record_success()
+                    return conn
+
+    async def create_dedicated_connection(self) -> asyncpg.Connection:
+        return await asyncpg.connect(**self.__parse_env_vars())
+
+    async def release_connection(self, conn: asyncpg.Connection) -> None:
+        if self.__pool is not None:
+            await self.__pool.release(conn)
+        else:
+            await conn.close()
+
+    async def __acquire(self) -> asyncpg.Connection:
+        # never wait for a connection longer than the request has left
+        timeout: float | None = query_timeout(self.__acquire_timeout_seconds)
+        if self.__pool is not None:
+            return await self.__pool.acquire(timeout=timeout)
         conn_params: dict = self.__parse_env_vars()
-        return await asyncpg.connect(**conn_params)
+        return await asyncpg.connect(**conn_params, timeout=timeout)
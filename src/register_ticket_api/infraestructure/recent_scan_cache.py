@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from register_ticket_api.interfaces import IRecentScanStore
+
+
+class RecentScanCache:
+    # answers double taps and passbacks before the ticket lookup and the TOTP check, only
+    # final outcomes are remembered: a used or revoked ticket never becomes valid again
+    USED_TICKET_REASON: str = "Invalid ticket"
+    REJECTED_CODE_REASON: str = "Invalid TOTP ticket code."
+
+    def __init__(
+        self,
+        max_entries: int,
+        used_ttl_seconds: float = 600.0,
+        rejected_code_ttl_seconds: float = 60.0,
+        shared_store: IRecentScanStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("Max entries must be at least 1")
+        self.__max_entries = max_entries
+        self.__used_ttl_seconds = used_ttl_seconds
+        self.__rejected_code_ttl_seconds = rejected_code_ttl_seconds
+        self.__shared_store = shared_store  # optional store shared between workers
+        self.__clock = clock
+        self.__entries: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    async def get_rejection(self, seat: str, gate: str, totp_code: str) -> str | None:
+        used_key: str = self.__used_key(seat, gate)
+        code_key: str = self.__code_key(seat, gate, totp_code)
+        now: float = self.__clock()
+        for key in (used_key, code_key):
+            expires_at: float | None = self.__entries.get(key)
+            if expires_at is None:
+                continue
+            if expires_at > now:
+                return self.__reason(key, used_key)
+            del self.__entries[key]
+        if self.__shared_store is None:
+            return None
+        shared_key: str | None = await self.__shared_store.find([used_key, code_key])
+        if shared_key is None:
+            return None
+        # shared hits keep their local copy for the shortest window, it may be a recent code
+        self.__store_locally(shared_key, self.__rejected_code_ttl_seconds)
+        return self.__reason(shared_key, used_key)
+
+    async def remember_used_ticket(self, seat: str, gate: str) -> None:
+        await self.__remember(self.__used_key(seat, gate), self.__used_ttl_seconds)
+
+    async def remember_rejected_code(self, seat: str, gate: str, totp_code: str) -> None:
+        await self.__remember(
+            self.__code_key(seat, gate, totp_code), self.__rejected_code_ttl_seconds
+        )
+
+    async def purge_expired(self) -> int:
+        now: float = self.__clock()
+        expired: list[str] = [
+            key for key, expires_at in self.__entries.items() if expires_at <= now
+        ]
+        for key in expired:
+            del self.__entries[key]
+        purged: int = len(expired)
+        if self.__shared_store is not None:
+            purged += await self.__shared_store.purge_expired()
+        return purged
+
+    async def __remember(self, key: str, ttl_seconds: float) -> None:
+        self.__store_locally(key, ttl_seconds)
+        if self.__shared_store is not None:
+            await self.__shared_store.add(key, ttl_seconds)
+
+    def __store_locally(self, key: str, ttl_seconds: float) -> None:
+        self.__entries.pop(key, None)
+        self.__entries[key] = self.__clock() + ttl_seconds
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+    def __reason(self, key: str, used_key: str) -> str:
+        return self.USED_TICKET_REASON if key == used_key else self.REJECTED_CODE_REASON
+
+    def __used_key(self, seat: str, gate: str) -> str:
+        return f"used:{gate}:{seat}"
+
+    def __code_key(self, seat: str, gate: str, totp_code: str) -> str:
+        return f"code:{gate}:{seat}:{totp_code}"
@@ -0,0 +1,35 @@
+import time
+from contextvars import ContextVar, Token
+
+from register_ticket_api.exceptions import DeadlineExceededException
+
+# queries get a little more than what is left, the request deadline fires first and answers
+# 504 instead of the query timeout surfacing as a database error
+QUERY_TIMEOUT_GRACE_SECONDS: float = 0.05
+
+_current_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def start_request_deadline(timeout_seconds: float) -> Token:
+    return _current_deadline.set(time.monotonic() + timeout_seconds)
+
+
+def stop_request_deadline(token: Token) -> None:
+    _current_deadline.reset(token)
+
+
+def remaining_seconds() -> float | None:
+    deadline: float | None = _current_deadline.get()
+    if deadline is None:  # outside of a request, background jobs use the pool timeouts
+        return None
+    return deadline - time.monotonic()
+
+
+def query_timeout(default: float | None = None) -> float | None:
+    remaining: float | None = remaining_seconds()
+    if remaining is None:
+        return default
+    if remaining <= 0:
+        raise DeadlineExceededException()
+    timeout: float = remaining + QUERY_TIMEOUT_GRACE_SECONDS
+    return timeout if default is None else min(timeout, default)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import re
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from register_ticket_api.infraestructure.request_deadline import (
+    start_request_deadline,
+    stop_request_deadline,
+)
+
+TIMEOUT_HEADER: bytes = b"x-request-timeout-ms"
+# "{name}" in a route matches one path segment
+PATH_PARAM_PATTERN: re.Pattern[str] = re.compile(r"\{[^/{}]+\}")
+
+
+class _RequestChannel:
+    # receive() is handed to the app until the body has been read, from then on it is only
+    # read by the watcher, so the app and the watcher never wait on it at the same time
+    def __init__(self, receive: Receive, send: Send, has_body: bool) -> None:
+        self.__receive = receive
+        self.__send = send
+        self.__has_body = has_body
+        self.__body_delivered: bool = False
+        self.__body_received = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self.response_started: bool = False
+        if not has_body:
+            self.__body_received.set()
+
+    async def receive(self) -> Message:
+        if self.__body_delivered:
+            await self.disconnected.wait()
+            return {"type": "http.disconnect"}
+        if not self.__has_body:
+            self.__body_delivered = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        message: Message = await self.__receive()
+        if message["type"] == "http.disconnect":
+            self.disconnected.set()
+        elif not message.get("more_body", False):
+            self.__body_delivered = True
+            self.__body_received.set()
+        return message
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.response_started = True
+        await self.__send(message)
+
+    async def watch_disconnect(self, app_task: asyncio.Task) -> None:
+        await self.__body_received.wait()
+        while not app_task.done():
+            message: Message = await self.__receive()
+            if message["type"] == "http.disconnect":
+                self.disconnected.set()
+                app_task.cancel()
+                return
+
+
+class RequestDeadlineMiddleware:
+    # every request runs under a deadline, taken from X-Request-Timeout-Ms (capped) or from
+    # the longest matching route prefix, and is cancelled as soon as the client goes away.
+    # Routes are matched on the path only, a client can shorten its deadline but never drop it
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_timeout_ms: float = 10_000,
+        max_timeout_ms: float = 30_000,
+        route_timeouts_ms: dict[str, float] | None = None,
+    ) -> None:
+        self.app = app
+        self.__default_timeout_ms = default_timeout_ms
+        self.__max_timeout_ms = max_timeout_ms
+        # longest prefix first, a timeout of 0 disables the deadline of the route
+        self.__route_timeouts_ms: list[tuple[re.Pattern[str], float]] = [
+            (self.__compile_route(route), timeout_ms)
+            for route, timeout_ms in sorted(
+                (route_timeouts_ms or {}).items(), key=lambda item: len(item[0]), reverse=True
+            )
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timeout_ms: float = self.__timeout_ms(scope)
+        token = start_request_deadline(timeout_ms / 1000) if timeout_ms > 0 else None
+        try:
+            await self.__run(
+                scope, _RequestChannel(receive, send, self.__has_body(scope)), timeout_ms
+            )
+        finally:
+            if token is not None:
+                stop_request_deadline(token)
+
+    async def __run(self, scope: Scope, channel: _RequestChannel, timeout_ms: float) -> None:
+        async def run_app() -> None:
+            await self.app(scope, channel.receive, channel.send)
+
+        app_task: asyncio.Task = asyncio.create_task(run_app())
+        watcher: asyncio.Task = asyncio.create_task(channel.watch_disconnect(app_task))
+        try:
+            async with asyncio.timeout(timeout_ms / 1000 if timeout_ms > 0 else None):
+                await asyncio.shield(app_task)
+        except TimeoutError:
+            app_task.cancel()
+            logger.warning(f"{scope['method']} {scope['path']} exceeded {timeout_ms:.0f}ms")
+            if not channel.response_started:
+                await self.__send_timeout(channel)
+            # queries are cancelled and their connections back in the pool before returning
+            await asyncio.gather(app_task, return_exceptions=True)
+        except asyncio.CancelledError:
+            if not channel.disconnected.is_set() or self.__is_cancelled_from_outside():
+                app_task.cancel()
+                raise
+            logger.info(f"{scope['method']} {scope['path']} cancelled, the client disconnected")
+        finally:
+            watcher.cancel()
+
+    def __is_cancelled_from_outside(self) -> bool:
+        current = asyncio.current_task()
+        return current is not None and current.cancelling() > 0
+
+    def __compile_route(self, route: str) -> re.Pattern[str]:
+        parts: list[str] = PATH_PARAM_PATTERN.split(route)
+        return re.compile("[^/]+".join(re.escape(part) for part in parts))
+
+    def __has_body(self, scope: Scope) -> bool:
+        headers: dict[bytes, bytes] = dict(scope.get("headers", []))
+        return b"transfer-encoding" in headers or headers.get(b"content-length", b"0") != b"0"
+
+    def __timeout_ms(self, scope: Scope) -> float:
+        for name, value in scope.get("headers", []):
+            if name == TIMEOUT_HEADER:
+                try:
+                    return min(max(float(value), 1.0), self.__max_timeout_ms)
+                except ValueError:
+                    break
+        path: str = scope.get("path", "")
+        for route, timeout_ms in self.__route_timeouts_ms:
+            if route.match(path):
+                return timeout_ms
+        return self.__default_timeout_ms
+
+    async def __send_timeout(self, channel: _RequestChannel) -> None:
+        body: bytes = json.dumps({"detail": "Request deadline exceeded"}).encode()
+        await channel.send(
+            {
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await channel.send({"type": "http.response.body", "body": body})
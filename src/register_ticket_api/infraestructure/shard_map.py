@@ -0,0 +1,20 @@
+class ShardMap:
+    # gate -> shard, a gate nobody assigned lives on the default shard. The assignments are
+    # swapped whole, a lookup never sees half of a refresh
+    def __init__(self, default_shard: str, assignments: dict[str, str] | None = None) -> None:
+        self.__default_shard = default_shard
+        self.__assignments: dict[str, str] = dict(assignments or {})
+
+    @property
+    def default_shard(self) -> str:
+        return self.__default_shard
+
+    @property
+    def assignments(self) -> dict[str, str]:
+        return dict(self.__assignments)
+
+    def shard_for(self, gate: str) -> str:
+        return self.__assignments.get(gate, self.__default_shard)
+
+    def replace(self, assignments: dict[str, str]) -> None:
+        self.__assignments = dict(assignments)
@@ -0,0 +1,84 @@
+import asyncio
+from collections.abc import Callable
+
+from register_ticket_api.infraestructure.circuit_breaker import CircuitBreaker
+from register_ticket_api.infraestructure.postgresql_db_context import PostgreSQLDbContext
+from register_ticket_api.infraestructure.shard_map import ShardMap
+
+
+def _parse_shards_config(shards_config: str) -> dict[str, str]:
+    # "east=event_access_east,west=event_access_west", shard name to database name
+    shards: dict[str, str] = {}
+    for entry in filter(None, (item.strip() for item in shards_config.split(","))):
+        name, _, database = entry.partition("=")
+        if not name.strip() or not database.strip():
+            raise ValueError(f"Invalid shard {entry!r}, expected <name>=<database>")
+        shards[name.strip()] = database.strip()
+    return shards
+
+
+class ShardedDbContext:
+    # one context per shard database, each with its own pool, retries and circuit breaker,
+    # so a shard that is down only fails the gates that live on it
+    def __init__(self, shards: dict[str, PostgreSQLDbContext], shard_map: ShardMap) -> None:
+        if shard_map.default_shard not in shards:
+            raise ValueError(f"Unknown default shard {shard_map.default_shard}")
+        self.__shards = shards
+        self.__shard_map = shard_map
+
+    @classmethod
+    def from_config(
+        cls,
+        shards_config: str,
+        primary: PostgreSQLDbContext,
+        default_shard: str | None = None,
+        circuit_breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+    ) -> "ShardedDbContext":
+        # the shard on the primary database reuses its pool, gates nobody assigned go to the
+        # first shard unless told otherwise
+        databases: dict[str, str] = _parse_shards_config(shards_config)
+        if not databases:
+            raise ValueError("At least one shard is required")
+        shards: dict[str, PostgreSQLDbContext] = {
+            name: (
+                primary
+                if database == primary.database
+                else PostgreSQLDbContext(
+                    circuit_breaker=circuit_breaker_factory(), database=database
+                )
+            )
+            for name, database in databases.items()
+        }
+        return cls(shards, ShardMap(default_shard or next(iter(databases))))
+
+    @property
+    def shard_map(self) -> ShardMap:
+        return self.__shard_map
+
+    @property
+    def shard_names(self) -> list[str]:
+        return list(self.__shards)
+
+    def context(self, shard: str) -> PostgreSQLDbContext:
+        if shard not in self.__shards:
+            raise ValueError(f"Unknown shard {shard}")
+        return self.__shards[shard]
+
+    def for_gate(self, gate: str) -> PostgreSQLDbContext:
+        return self.__shards[self.__shard_map.shard_for(gate)]
+
+    def contexts(self) -> list[PostgreSQLDbContext]:
+        # a context shared by two shard names is queried once
+        return list({id(context): context for context in self.__shards.values()}.values())
+
+    def apply_assignments(self, assignments: dict[str, str]) -> None:
+        unknown: set[str] = set(assignments.values()) - set(self.__shards)
+        if unknown:
+            raise ValueError(f"Shard map points to unknown shards {', '.join(sorted(unknown))}")
+        self.__shard_map.replace(assignments)
+
+    async def open_pool(self) -> None:
+        await asyncio.gather(*(context.open_pool() for context in self.contexts()))
+
+    async def close_pool(self) -> None:
+        await asyncio.gather(*(context.close_pool() for context in self.contexts()))
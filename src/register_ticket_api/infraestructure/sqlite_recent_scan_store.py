@@ -0,0 +1,81 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from register_ticket_api.interfaces import IRecentScanStore
+
+
+class SqliteRecentScanStore(IRecentScanStore):
+    # local stand-in for a shared cache: every worker of the host opens the same file, WAL
+    # lets them read while one of them writes; the store is only an accelerator, when the
+    # file is locked past the busy timeout or unusable each worker falls back to its own
+    # in-memory entries instead of failing the scan
+    def __init__(self, path: str | Path, busy_timeout_ms: int = 200) -> None:
+        self.__path = Path(path)
+        self.__busy_timeout_ms = busy_timeout_ms
+        self.__lock = threading.Lock()
+        self.__conn: sqlite3.Connection | None = None
+
+    async def add(self, key: str, ttl_seconds: float) -> None:
+        try:
+            await asyncio.to_thread(
+                self.__execute,
+                "INSERT OR REPLACE INTO recent_scans (key, expires_at) VALUES (?, ?)",
+                (key, time.time() + ttl_seconds),
+            )
+        except sqlite3.OperationalError as err:
+            logger.warning(f"Recent scan not shared, SQLite store unavailable: {err}")
+
+    async def find(self, keys: list[str]) -> str | None:
+        if not keys:
+            return None
+        placeholders: str = ", ".join("?" for _ in keys)
+        try:
+            rows: list[tuple] = await asyncio.to_thread(
+                self.__execute,
+                f"SELECT key FROM recent_scans WHERE key IN ({placeholders}) AND expires_at > ?",  # noqa: S608
+                (*keys, time.time()),
+            )
+        except sqlite3.OperationalError as err:
+            logger.warning(f"Recent scans not checked, SQLite store unavailable: {err}")
+            return None
+        found: set[str] = {row[0] for row in rows}
+        return next((key for key in keys if key in found), None)
+
+    async def purge_expired(self) -> int:
+        return await asyncio.to_thread(self.__purge_expired)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__conn is not None:
+                self.__conn.close()
+                self.__conn = None
+
+    def __purge_expired(self) -> int:
+        with self.__lock:
+            cursor = self.__connect().execute(
+                "DELETE FROM recent_scans WHERE expires_at <= ?", (time.time(),)
+            )
+            return cursor.rowcount
+
+    def __execute(self, query: str, params: tuple) -> list[tuple]:
+        with self.__lock:
+            return self.__connect().execute(query, params).fetchall()
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__conn is None:
+            self.__path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.__path, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.__busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS recent_scans "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self.__conn = conn
+        return self.__conn
@@ -0,0 +1,133 @@
+import contextlib
+import fcntl
+from datetime import datetime
+from pathlib import Path
+from typing import IO
+
+from loguru import logger
+
+from register_ticket_api.entities import Ticket, TicketChange
+from register_ticket_api.infraestructure.gate_snapshot import GateSnapshot, write_gate_snapshot
+
+
+class TicketCache:
+    # with a snapshot path the workers of a host share one memory mapped snapshot, published
+    # by the worker holding its lock file, and each one keeps only its own changes in memory
+    def __init__(self, snapshot_path: str | None = None) -> None:
+        # (seat, gate) -> ticket with its seed, enough to validate a scan without the
+        # database. With a snapshot it only holds what changed here since it was published
+        self.__tickets: dict[tuple[str, str], Ticket] = {}
+        self.__snapshot_path: Path | None = Path(snapshot_path) if snapshot_path else None
+        self.__snapshot: GateSnapshot | None = None
+        self.__writer_lock: IO[str] | None = None
+
+    def __len__(self) -> int:
+        if self.__snapshot is None:
+            return len(self.__tickets)
+        snapshot: GateSnapshot = self.__snapshot
+        return len(snapshot) + sum(
+            not snapshot.contains(seat, gate) for seat, gate in self.__tickets
+        )
+
+    @property
+    def snapshot_generation(self) -> int | None:
+        return self.__snapshot.generation if self.__snapshot is not None else None
+
+    def get(self, seat: str, gate: str) -> Ticket | None:
+        ticket: Ticket | None = self.__tickets.get((seat, gate))
+        if ticket is None and self.__snapshot is not None:
+            return self.__snapshot.get(seat, gate)
+        return ticket
+
+    def put(self, ticket: Ticket) -> None:
+        self.__tickets[(ticket.seat, ticket.gate)] = ticket
+
+    def replace_all(self, tickets: list[Ticket]) -> None:
+        if self.__snapshot_path is None:
+            self.__tickets = {(ticket.seat, ticket.gate): ticket for ticket in tickets}
+            return
+        write_gate_snapshot(self.__snapshot_path, tickets)
+        self.__tickets = {}
+        self.reload_snapshot()
+
+    def merge(self, tickets: list[Ticket]) -> None:
+        # incremental refresh, tickets that can no longer be scanned are dropped
+        if self.__snapshot_path is not None:
+            if tickets or self.__snapshot is None:
+                write_gate_snapshot(self.__snapshot_path, tickets, base=self.__snapshot)
+            for ticket in tickets:
+                self.__tickets.pop((ticket.seat, ticket.gate), None)
+            self.reload_snapshot()
+            return
+        for ticket in tickets:
+            if ticket.status == "valid" and ticket.user_id is not None:
+                self.__tickets[(ticket.seat, ticket.gate)] = ticket
+            else:
+                self.__tickets.pop((ticket.seat, ticket.gate), None)
+
+    def mark_used(self, seat: str, gate: str, used_at: datetime) -> None:
+        ticket: Ticket | None = self.get(seat, gate)
+        if ticket is not None:
+            self.__tickets[(seat, gate)] = ticket.model_copy(
+                update={"status": "used", "used_at": used_at}
+            )
+
+    def apply_changes(self, changes: list[TicketChange]) -> None:
+        for change in changes:
+            ticket: Ticket | None = self.get(change.seat, change.gate)
+            if ticket is not None and ticket.id == change.ticket_id:
+                self.__tickets[(change.seat, change.gate)] = ticket.model_copy(
+                    update={"status": change.status}
+                )
+
+    def owns_snapshot(self) -> bool:
+        # only one worker per host refreshes from the database and publishes the snapshot,
+        # the lock file is released with its process and another worker takes over
+        if self.__snapshot_path is None or self.__writer_lock is not None:
+            return True
+        self.__snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file: IO[str] = self.__snapshot_path.with_name(
+            f"{self.__snapshot_path.name}.lock"
+        ).open("a", encoding="utf-8")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self.__writer_lock = lock_file
+        logger.info(f"This worker now publishes the gate snapshot {self.__snapshot_path}")
+        return True
+
+    def reload_snapshot(self) -> None:
+        # maps the published generation if it is not the one mapped already, a lookup runs
+        # to completion between awaits so the old mapping can be closed right away
+        if self.__snapshot_path is None:
+            return
+        try:
+            inode: int = self.__snapshot_path.stat().st_ino
+        except FileNotFoundError:
+            return  # nothing published yet
+        if self.__snapshot is not None and self.__snapshot.inode == inode:
+            return
+        try:
+            snapshot = GateSnapshot(self.__snapshot_path)
+        except (FileNotFoundError, ValueError) as err:
+            logger.warning(f"Gate snapshot not loaded, keeping the previous one: {err}")
+            return
+        previous, self.__snapshot = self.__snapshot, snapshot
+        if previous is not None:
+            previous.close()
+        # the snapshot is at least as recent as what was registered here, scans and
+        # revocations seen by this worker stay until the database reflects them
+        self.__tickets = {
+            key: ticket for key, ticket in self.__tickets.items() if ticket.status != "valid"
+        }
+
+    def close(self) -> None:
+        if self.__snapshot is not None:
+            self.__snapshot.close()
+            self.__snapshot = None
+        if self.__writer_lock is not None:
+            with contextlib.suppress(OSError):
+                self.__writer_lock.close()
+            self.__writer_lock = None
@@ -0,0 +1,23 @@
+from collections.abc import Callable
+
+from loguru import logger
+
+from register_ticket_api.entities import TicketChange
+
+TicketChangeHandler = Callable[[list[TicketChange]], None]
+
+
+class TicketChangeBus:
+    def __init__(self) -> None:
+        self.__handlers: list[TicketChangeHandler] = []
+
+    def subscribe(self, handler: TicketChangeHandler) -> Callable[[], None]:
+        self.__handlers.append(handler)
+        return lambda: self.__handlers.remove(handler)
+
+    def publish(self, changes: list[TicketChange]) -> None:
+        for handler in list(self.__handlers):
+            try:
+                handler(changes)
+            except Exception as err:  # a broken cache must not stop the others
+                logger.exception(f"Ticket change handler {handler!r} failed: {err}")
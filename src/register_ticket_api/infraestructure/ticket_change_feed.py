@@ -0,0 +1,63 @@
+import asyncio
+import contextlib
+import uuid
+from collections import deque
+
+from register_ticket_api.entities import TicketChange, TicketChangeFeedPage
+
+
+class TicketChangeFeed:
+    def __init__(self, max_changes: int) -> None:
+        # cursors are only valid inside this process, the epoch tells devices to resync
+        self.__epoch: str = uuid.uuid4().hex[:12]
+        self.__changes: deque[tuple[int, TicketChange]] = deque(maxlen=max_changes)
+        self.__last_sequence: int = 0
+        self.__new_changes = asyncio.Event()
+
+    def append(self, changes: list[TicketChange]) -> None:
+        for change in changes:
+            self.__last_sequence += 1
+            self.__changes.append((self.__last_sequence, change))
+        # wake every waiting device and arm a fresh event for the next batch
+        new_changes, self.__new_changes = self.__new_changes, asyncio.Event()
+        new_changes.set()
+
+    def current_cursor(self) -> str:
+        return self.__cursor(self.__last_sequence)
+
+    async def wait_for_changes(
+        self, gate: str, cursor: str | None, timeout_seconds: float
+    ) -> TicketChangeFeedPage:
+        after_sequence: int | None = self.__parse_cursor(cursor)
+        if after_sequence is None:
+            return TicketChangeFeedPage(changes=[], cursor=self.current_cursor(), reset=True)
+
+        loop = asyncio.get_running_loop()
+        deadline: float = loop.time() + timeout_seconds
+        while True:
+            changes: list[TicketChange] = [
+                change
+                for sequence, change in self.__changes
+                if sequence > after_sequence and change.gate == gate
+            ]
+            remaining: float = deadline - loop.time()
+            if changes or remaining <= 0:
+                return TicketChangeFeedPage(changes=changes, cursor=self.current_cursor())
+            after_sequence = self.__last_sequence
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self.__new_changes.wait(), timeout=remaining)
+
+    def __cursor(self, sequence: int) -> str:
+        return f"{self.__epoch}:{sequence}"
+
+    def __parse_cursor(self, cursor: str | None) -> int | None:
+        if not cursor:
+            return None
+        epoch, _, sequence = cursor.partition(":")
+        if epoch != self.__epoch or not sequence.isdigit():
+            return None
+        after_sequence: int = int(sequence)
+        oldest_sequence: int = self.__changes[0][0] if self.__changes else 1
+        if after_sequence > self.__last_sequence or after_sequence < oldest_sequence - 1:
+            return None  # changes after the cursor were already evicted
+        return after_sequence
@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+import json
+
+import asyncpg
+from loguru import logger
+from pydantic import ValidationError
+
+from register_ticket_api.entities import TicketChange
+from register_ticket_api.infraestructure.postgresql_db_context import PostgreSQLDbContext
+from register_ticket_api.infraestructure.ticket_change_bus import TicketChangeBus
+
+TICKET_CHANGES_CHANNEL: str = "ticket_changes"
+# registrations and scans, notified by the trg_tickets_status_notify trigger
+TICKET_STATUS_CHANNEL: str = "ticket_status"
+
+
+class TicketChangeListener:
+    def __init__(
+        self,
+        db_context: PostgreSQLDbContext,
+        bus: TicketChangeBus,
+        status_bus: TicketChangeBus | None = None,
+        reconnect_delay_seconds: float = 1.0,
+    ) -> None:
+        self.__db_context = db_context
+        self.__buses: dict[str, TicketChangeBus] = {TICKET_CHANGES_CHANNEL: bus}
+        if status_bus is not None:
+            self.__buses[TICKET_STATUS_CHANNEL] = status_bus
+        self.__reconnect_delay_seconds = reconnect_delay_seconds
+        self.__listen_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.__listen_task is None:
+            self.__listen_task = asyncio.create_task(self.__listen_forever())
+
+    async def stop(self) -> None:
+        if self.__listen_task is not None:
+            self.__listen_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__listen_task
+            self.__listen_task = None
+
+    def handle_notification(self, payload: str, channel: str = TICKET_CHANGES_CHANNEL) -> None:
+        try:
+            changes: list[TicketChange] = [
+                TicketChange(**change) for change in json.loads(payload)["changes"]
+            ]
+        except (ValueError, KeyError, TypeError, ValidationError) as err:
+            logger.warning(f"Ignoring malformed ticket change notification: {err}")
+            return
+        self.__buses[channel].publish(changes)
+
+    async def __listen_forever(self) -> None:
+        # one dedicated connection per worker, never taken from the request pool
+        while True:
+            conn: asyncpg.Connection | None = None
+            try:
+                conn = await self.__db_context.create_dedicated_connection()
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn, closed=closed: closed.set())
+                # every channel shares the connection, subscribers never cost a pool slot
+                for channel in self.__buses:
+                    await conn.add_listener(
+                        channel,
+                        lambda _conn, _pid, channel, payload: self.handle_notification(
+                            payload, channel
+                        ),
+                    )
+                logger.info(f"Listening for ticket changes on {', '.join(self.__buses)}")
+                await closed.wait()
+                logger.warning("Ticket change listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.warning(f"Ticket change listener failed, retrying: {err}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(self.__reconnect_delay_seconds)
@@ -0,0 +1,109 @@
+import asyncio
+import contextlib
+from uuid import UUID
+
+from loguru import logger
+
+from register_ticket_api.entities import TicketChange
+
+
+class TicketStatusSubscription:
+    # an idle subscriber is this object and at most one future, there is no task, queue or
+    # timer per subscriber, heartbeats come from the hub
+    __slots__ = ("__hub", "__overflowed", "__pending", "__waiter", "user_id")
+
+    def __init__(self, hub: "TicketStatusHub", user_id: UUID) -> None:
+        self.__hub = hub
+        self.user_id = user_id
+        self.__pending: list[TicketChange] = []
+        self.__overflowed: bool = False
+        self.__waiter: asyncio.Future[None] | None = None
+
+    def push(self, change: TicketChange, max_pending: int) -> None:
+        # a slow reader loses the oldest changes and is told to resync, it never grows
+        if len(self.__pending) >= max_pending:
+            del self.__pending[0]
+            self.__overflowed = True
+        self.__pending.append(change)
+        self.wake()
+
+    def wake(self) -> None:
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(None)
+
+    async def next_batch(self) -> tuple[list[TicketChange], bool]:
+        # (changes, overflowed), nothing of both means the hub asked for a heartbeat
+        if not self.__pending and not self.__overflowed:
+            self.__waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.__waiter
+            finally:
+                self.__waiter = None
+        batch, overflowed = self.__pending, self.__overflowed
+        self.__pending, self.__overflowed = [], False
+        return batch, overflowed
+
+    def close(self) -> None:
+        self.__hub.unsubscribe(self)
+
+
+class TicketStatusHub:
+    def __init__(self, max_pending_per_subscriber: int = 16, heartbeat_seconds: float = 15.0):
+        self.__max_pending = max_pending_per_subscriber
+        self.__heartbeat_seconds = heartbeat_seconds
+        self.__subscribers: dict[UUID, set[TicketStatusSubscription]] = {}
+        self.__subscriber_count: int = 0
+        self.__heartbeat_task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self.__subscriber_count
+
+    def start(self) -> None:
+        if self.__heartbeat_task is None:
+            self.__heartbeat_task = asyncio.create_task(self.__heartbeat_forever())
+
+    async def stop(self) -> None:
+        if self.__heartbeat_task is not None:
+            self.__heartbeat_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__heartbeat_task
+            self.__heartbeat_task = None
+
+    def subscribe(self, user_id: UUID) -> TicketStatusSubscription:
+        subscription = TicketStatusSubscription(self, user_id)
+        self.__subscribers.setdefault(user_id, set()).add(subscription)
+        self.__subscriber_count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: TicketStatusSubscription) -> None:
+        subscriptions: set[TicketStatusSubscription] | None = self.__subscribers.get(
+            subscription.user_id
+        )
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.remove(subscription)
+        self.__subscriber_count -= 1
+        if not subscriptions:
+            del self.__subscribers[subscription.user_id]
+
+    def publish(self, changes: list[TicketChange]) -> None:
+        # TicketChangeBus handler, runs on the listener connection callback
+        for change in changes:
+            if change.user_id is None:
+                continue
+            for subscription in self.__subscribers.get(change.user_id, ()):
+                subscription.push(change, self.__max_pending)
+
+    def heartbeat(self) -> None:
+        for subscriptions in self.__subscribers.values():
+            for subscription in subscriptions:
+                subscription.wake()
+
+    async def __heartbeat_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.__heartbeat_seconds)
+            try:
+                self.heartbeat()
+            except Exception as err:
+                logger.exception(f"Ticket status heartbeat failed: {err}")
@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+import struct
+from base64 import b64decode, b64encode, urlsafe_b64decode, urlsafe_b64encode
+from datetime import UTC, datetime
+from uuid import UUID
+
+from register_ticket_api.entities import Ticket, TicketTokenClaims
+from register_ticket_api.exceptions import AppValidationException
+
+TOKEN_VERSION: int = 1
+# version, ticket id, user id, issued at (unix seconds), seat length, gate length
+HEADER_FORMAT: str = "!B16s16sIBB"
+HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+
+
+def _b64url(data: bytes) -> str:
+    return urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _from_b64url(data: str) -> bytes:
+    return urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+# tokens are "<kid>.<payload>.<signature>", a gate checks them without reading the ticket,
+# the payload carries the TOTP seed encrypted so a leaked token doesn't reveal it. Keys
+# rotate by adding a kid, making it active and dropping the old one after its events
+class TicketTokenCodec:
+    def __init__(self, keys: dict[str, bytes], active_kid: str | None = None) -> None:
+        if not keys:
+            raise ValueError("At least one ticket token key is required")
+        self.__active_kid: str = active_kid or next(iter(keys))
+        if self.__active_kid not in keys:
+            raise ValueError(f"Unknown active ticket token key {self.__active_kid}")
+        # one key per purpose, the signature and the seed encryption never share a key
+        self.__sign_keys: dict[str, bytes] = {
+            kid: hmac.digest(key, b"ticket-token-sign", hashlib.sha256) for kid, key in keys.items()
+        }
+        self.__seed_keys: dict[str, bytes] = {
+            kid: hmac.digest(key, b"ticket-token-seed", hashlib.sha256) for kid, key in keys.items()
+        }
+
+    @classmethod
+    def from_config(cls, keys_config: str, active_kid: str | None = None) -> "TicketTokenCodec":
+        # "kid1:<base64 key>,kid2:<base64 key>"
+        keys: dict[str, bytes] = {}
+        for entry in filter(None, (item.strip() for item in keys_config.split(","))):
+            kid, _, key = entry.partition(":")
+            keys[kid.strip()] = b64decode(key.strip())
+        return cls(keys, active_kid=active_kid)
+
+    @property
+    def active_kid(self) -> str:
+        return self.__active_kid
+
+    def issue(self, ticket: Ticket) -> str:
+        if ticket.id is None or ticket.user_id is None or ticket.seed is None:
+            raise AppValidationException("Only registered tickets get a token")
+        seat, gate = ticket.seat.encode(), ticket.gate.encode()
+        payload: bytes = (
+            struct.pack(
+                HEADER_FORMAT,
+                TOKEN_VERSION,
+                ticket.id.bytes,
+                ticket.user_id.bytes,
+                int(datetime.now(UTC).timestamp()),
+                len(seat),
+                len(gate),
+            )
+            + seat
+            + gate
+            + self.__xor_seed(self.__active_kid, ticket.id.bytes, b64decode(ticket.seed))
+        )
+        signed: str = f"{self.__active_kid}.{_b64url(payload)}"
+        return f"{signed}.{_b64url(self.__sign(self.__active_kid, signed))}"
+
+    def verify(self, token: str) -> TicketTokenClaims:
+        try:
+            signed, _, signature = token.rpartition(".")
+            kid, _, encoded_payload = signed.partition(".")
+            if kid not in self.__sign_keys or not hmac.compare_digest(
+                _from_b64url(signature), self.__sign(kid, signed)
+            ):
+                raise AppValidationException("Invalid ticket token")
+            payload: bytes = _from_b64url(encoded_payload)
+            version, ticket_id, user_id, issued_at, seat_len, gate_len = struct.unpack_from(
+                HEADER_FORMAT, payload
+            )
+        except (ValueError, struct.error) as err:
+            raise AppValidationException("Invalid ticket token") from err
+        if version != TOKEN_VERSION:
+            raise AppValidationException("Unsupported ticket token version")
+        gate_start: int = HEADER_SIZE + seat_len
+        seed_start: int = gate_start + gate_len
+        return TicketTokenClaims(
+            ticket_id=UUID(bytes=ticket_id),
+            user_id=UUID(bytes=user_id),
+            seat=payload[HEADER_SIZE:gate_start].decode(),
+            gate=payload[gate_start:seed_start].decode(),
+            seed=b64encode(self.__xor_seed(kid, ticket_id, payload[seed_start:])).decode(),
+            issued_at=datetime.fromtimestamp(issued_at, UTC),
+            kid=kid,
+        )
+
+    def __sign(self, kid: str, signed: str) -> bytes:
+        return hmac.digest(self.__sign_keys[kid], signed.encode("ascii"), hashlib.sha256)
+
+    def __xor_seed(self, kid: str, ticket_id: bytes, data: bytes) -> bytes:
+        # HMAC in counter mode as keystream, the ticket id is the nonce (one seed per ticket)
+        keystream: bytes = b"".join(
+            hmac.digest(self.__seed_keys[kid], ticket_id + counter.to_bytes(4), hashlib.sha256)
+            for counter in range((len(data) + 31) // 32)
+        )
+        return bytes(a ^ b for a, b in zip(data, keystream, strict=False))
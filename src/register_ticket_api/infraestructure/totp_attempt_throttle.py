@@ -0,0 +1,83 @@
+import hashlib
+import math
+import os
+import time
+from array import array
+from collections.abc import Callable
+
+from register_ticket_api.exceptions import TooManyAttemptsException
+
+
+class TotpAttemptThrottle:
+    # failed attempts are counted in count-min sketches, one per window, so memory stays
+    # at 2 * width * depth counters however many seats, devices or addresses an attacker
+    # cycles through. Collisions can only overestimate, a key is never under-counted.
+    # The sketch lives in the worker process, with N workers a key gets up to
+    # N * max_failures attempts before every worker has seen enough of them
+    def __init__(
+        self,
+        max_failures: int = 10,
+        window_seconds: float = 300.0,
+        width: int = 1 << 16,
+        depth: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_failures < 1 or width < 1 or depth < 1:
+            raise ValueError("Max failures, width and depth must be at least 1")
+        self.__max_failures = max_failures
+        self.__window_seconds = window_seconds
+        self.__width = width
+        self.__depth = depth
+        self.__clock = clock
+        # keyed hash, attackers can't precompute keys colliding with a victim's ticket
+        self.__hash_key: bytes = os.urandom(16)
+        self.__current: array = self.__new_sketch()
+        self.__previous: array = self.__new_sketch()
+        self.__window_started_at: float = clock()
+
+    @property
+    def max_failures(self) -> int:
+        return self.__max_failures
+
+    def check(self, keys: list[str], max_failures: int | None = None) -> None:
+        limit: int = max_failures if max_failures is not None else self.__max_failures
+        self.__rotate()
+        elapsed_fraction: float = (
+            self.__clock() - self.__window_started_at
+        ) / self.__window_seconds
+        for key in keys:
+            if self.__estimate(key, elapsed_fraction) >= limit:
+                retry_after: float = (1 - elapsed_fraction) * self.__window_seconds
+                raise TooManyAttemptsException(max(math.ceil(retry_after), 1))
+
+    def record_failure(self, keys: list[str]) -> None:
+        self.__rotate()
+        for key in keys:
+            for index in self.__indexes(key):
+                self.__current[index] += 1
+
+    def __estimate(self, key: str, elapsed_fraction: float) -> float:
+        indexes: list[int] = self.__indexes(key)
+        current: int = min(self.__current[index] for index in indexes)
+        previous: int = min(self.__previous[index] for index in indexes)
+        # sliding window, the previous window weighs what is left of it in the current one
+        return current + previous * (1 - elapsed_fraction)
+
+    def __indexes(self, key: str) -> list[int]:
+        digest: bytes = hashlib.blake2b(key.encode(), digest_size=16, key=self.__hash_key).digest()
+        h1: int = int.from_bytes(digest[:8])
+        h2: int = int.from_bytes(digest[8:]) | 1
+        return [row * self.__width + (h1 + row * h2) % self.__width for row in range(self.__depth)]
+
+    def __rotate(self) -> None:
+        windows_passed: int = int(
+            (self.__clock() - self.__window_started_at) // self.__window_seconds
+        )
+        if windows_passed < 1:
+            return
+        self.__previous = self.__current if windows_passed == 1 else self.__new_sketch()
+        self.__current = self.__new_sketch()
+        self.__window_started_at += windows_passed * self.__window_seconds
+
+    def __new_sketch(self) -> array:
+        return array("I", [0]) * (self.__width * self.__depth)
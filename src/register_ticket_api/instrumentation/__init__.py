@@ -0,0 +1,32 @@
+from register_ticket_api.instrumentation.query_timer import (
+    DEFAULT_SLOW_QUERY_THRESHOLD_MS,
+    configure_slow_query_log,
+    describe_param_shapes,
+    timed_query,
+)
+from register_ticket_api.instrumentation.request_timings import (
+    RequestTimings,
+    current_timings,
+    start_request_timings,
+    stop_request_timings,
+    timed_span,
+)
+from register_ticket_api.instrumentation.runtime_profiler import ProfileMode, RuntimeProfiler
+from register_ticket_api.instrumentation.server_timing_middleware import ServerTimingMiddleware
+from register_ticket_api.instrumentation.timed_json_response import TimedJSONResponse
+
+__all__ = [
+    "DEFAULT_SLOW_QUERY_THRESHOLD_MS",
+    "ProfileMode",
+    "RequestTimings",
+    "RuntimeProfiler",
+    "ServerTimingMiddleware",
+    "TimedJSONResponse",
+    "configure_slow_query_log",
+    "current_timings",
+    "describe_param_shapes",
+    "start_request_timings",
+    "stop_request_timings",
+    "timed_query",
+    "timed_span",
+]
@@ -0,0 +1,50 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from loguru import logger
+
+from register_ticket_api.instrumentation.request_timings import current_timings
+
+DEFAULT_SLOW_QUERY_THRESHOLD_MS: float = 200
+
+slow_query_logger = logger.bind(slow_query=True)
+_slow_query_threshold_ms: float = DEFAULT_SLOW_QUERY_THRESHOLD_MS
+
+
+def configure_slow_query_log(threshold_ms: float, log_path: str | None = None) -> None:
+    global _slow_query_threshold_ms  # noqa: PLW0603
+    _slow_query_threshold_ms = threshold_ms
+    if log_path:
+        logger.add(log_path, filter=lambda record: record["extra"].get("slow_query", False))
+
+
+def describe_param_shapes(params: tuple) -> list[str]:
+    # only types and sizes are logged, values may hold seeds, passwords or user data
+    shapes: list[str] = []
+    for param in params:
+        type_name: str = type(param).__name__
+        if isinstance(param, str | bytes | bytearray):
+            shapes.append(f"{type_name}(len={len(param)})")
+        elif isinstance(param, list | tuple | set):
+            shapes.append(f"{type_name}[{len(param)}]")
+        else:
+            shapes.append(type_name)
+    return shapes
+
+
+@contextmanager
+def timed_query(statement_name: str, params: tuple = ()) -> Iterator[None]:
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms: float = (time.perf_counter() - start) * 1000
+        timings = current_timings()
+        if timings is not None:
+            timings.add(f"db_{statement_name}", elapsed_ms)
+        if elapsed_ms >= _slow_query_threshold_ms:
+            slow_query_logger.warning(
+                f"Slow query {statement_name} took {elapsed_ms:.1f}ms "
+                f"params={describe_param_shapes(params)}"
+            )
@@ -0,0 +1,54 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        self.__spans: dict[str, tuple[float, int]] = {}  # name -> (total ms, count)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        total_ms, count = self.__spans.get(name, (0.0, 0))
+        self.__spans[name] = (total_ms + duration_ms, count + 1)
+
+    def spans(self) -> dict[str, tuple[float, int]]:
+        return dict(self.__spans)
+
+    def to_header(self) -> str:
+        metrics: list[str] = []
+        for name, (total_ms, count) in self.__spans.items():
+            metric: str = f"{name};dur={total_ms:.2f}"
+            if count > 1:
+                metric += f';desc="x{count}"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+_current_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current_timings.get()
+
+
+def start_request_timings() -> tuple[RequestTimings, Token]:
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+
+def stop_request_timings(token: Token) -> None:
+    _current_timings.reset(token)
+
+
+@contextmanager
+def timed_span(name: str) -> Iterator[None]:
+    timings: RequestTimings | None = _current_timings.get()
+    if timings is None:  # timing disabled or outside of a request
+        yield
+        return
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,144 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Literal
+
+from register_ticket_api.entities import AllocationGrowth
+from register_ticket_api.exceptions import AppValidationException, ProfilingInProgressException
+
+ProfileMode = Literal["sample", "cprofile"]
+
+# tracemalloc's own bookkeeping and module imports are not growth of the worker
+IGNORED_ALLOCATIONS: tuple[tracemalloc.Filter, ...] = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+)
+
+
+class RuntimeProfiler:
+    # admins open a short window on the worker that answers them; outside a window there
+    # is no profile hook, sampler thread or allocation tracing, the worker pays nothing
+    def __init__(
+        self,
+        max_seconds: float = 60.0,
+        sample_interval_seconds: float = 0.005,
+        max_stack_depth: int = 128,
+    ) -> None:
+        self.__max_seconds = max_seconds
+        self.__sample_interval_seconds = sample_interval_seconds
+        self.__max_stack_depth = max_stack_depth
+        self.__cpu_window_open: bool = False
+        self.__memory_baseline: tracemalloc.Snapshot | None = None
+
+    @property
+    def memory_tracing(self) -> bool:
+        return self.__memory_baseline is not None
+
+    async def profile_cpu(
+        self,
+        seconds: float,
+        mode: ProfileMode = "sample",
+        focus: str | None = None,
+        top: int = 50,
+    ) -> str:
+        if not 0 < seconds <= self.__max_seconds:
+            raise AppValidationException(
+                f"Profiling window must last between 0 and {self.__max_seconds:g} seconds"
+            )
+        # one window per worker, two profilers on the same thread would overwrite each other
+        if self.__cpu_window_open:
+            raise ProfilingInProgressException()
+        self.__cpu_window_open = True
+        try:
+            if mode == "cprofile":
+                return await self.__run_cprofile(seconds, focus, top)
+            return await self.__run_sampler(seconds, focus)
+        finally:
+            self.__cpu_window_open = False
+
+    def start_memory_tracing(self, frames: int = 1) -> None:
+        # every allocation is hooked while tracing, so it only runs between start and stop
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.__memory_baseline = tracemalloc.take_snapshot().filter_traces(IGNORED_ALLOCATIONS)
+
+    def memory_growth(self, limit: int = 25) -> list[AllocationGrowth]:
+        if self.__memory_baseline is None:
+            raise AppValidationException("Memory tracing is not started")
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot().filter_traces(
+            IGNORED_ALLOCATIONS
+        )
+        return [
+            AllocationGrowth(
+                location=str(stat.traceback),
+                size_bytes=stat.size,
+                size_diff_bytes=stat.size_diff,
+                count=stat.count,
+                count_diff=stat.count_diff,
+            )
+            for stat in snapshot.compare_to(self.__memory_baseline, "lineno")[:limit]
+        ]
+
+    def stop_memory_tracing(self) -> None:
+        self.__memory_baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    async def __run_cprofile(self, seconds: float, focus: str | None, top: int) -> str:
+        # deterministic and exact, but every call on the event loop pays for the hook while
+        # the window is open; under real gate load the sampler is the one to use
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        output = io.StringIO()
+        stats = pstats.Stats(profile, stream=output).sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(*([focus] if focus else []), top)
+        return output.getvalue()
+
+    async def __run_sampler(self, seconds: float, focus: str | None) -> str:
+        # a side thread reads the event loop's stack every interval, the loop itself runs
+        # unhooked so the window barely moves the latencies it is meant to explain
+        loop_thread_id: int = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self.__sample,
+            args=(loop_thread_id, stacks, stop),
+            name="cpu-profile-sampler",
+            daemon=True,
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+        # collapsed stacks, one "root;...;leaf count" line each, ready for flamegraph tools
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in stacks.most_common()
+            if focus is None or focus in stack
+        )
+
+    def __sample(self, thread_id: int, stacks: Counter[str], stop: threading.Event) -> None:
+        while not stop.wait(self.__sample_interval_seconds):
+            frame: FrameType | None = sys._current_frames().get(thread_id)
+            if frame is not None:
+                stacks[self.__collapse(frame)] += 1
+
+    def __collapse(self, frame: FrameType | None) -> str:
+        names: list[str] = []
+        while frame is not None and len(names) < self.__max_stack_depth:
+            names.append(f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_qualname}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
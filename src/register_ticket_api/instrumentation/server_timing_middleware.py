@@ -0,0 +1,34 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from register_ticket_api.instrumentation.request_timings import (
+    start_request_timings,
+    stop_request_timings,
+)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings, token = start_request_timings()
+        start: float = time.perf_counter()
+
+        async def send_with_timings(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings.add("app", (time.perf_counter() - start) * 1000)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.to_header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            stop_request_timings(token)
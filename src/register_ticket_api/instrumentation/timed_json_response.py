@@ -0,0 +1,11 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from register_ticket_api.instrumentation.request_timings import timed_span
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with timed_span("encode"):
+            return super().render(content)
@@ -1,4 +1,19 @@
+from register_ticket_api.interfaces.i_attendance_event_sink import IAttendanceEventSink
+from register_ticket_api.interfaces.i_attendance_log_repository import IAttendanceLogRepository
+from register_ticket_api.interfaces.i_idempotency_store import IIdempotencyStore
+from register_ticket_api.interfaces.i_recent_scan_store import IRecentScanStore
+from register_ticket_api.interfaces.i_shard_map_repository import IShardMapRepository
+from register_ticket_api.interfaces.i_stats_repository import IStatsRepository
 from register_ticket_api.interfaces.i_ticket_repository import ITicketRepository
 from register_ticket_api.interfaces.i_user_repository import IUserRepository
 
-__all__ = ["ITicketRepository", "IUserRepository"]
+__all__ = [
+    "IAttendanceEventSink",
+    "IAttendanceLogRepository",
+    "IIdempotencyStore",
+    "IRecentScanStore",
+    "IShardMapRepository",
+    "IStatsRepository",
+    "ITicketRepository",
+    "IUserRepository",
+]
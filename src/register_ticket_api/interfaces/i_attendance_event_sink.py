@@ -0,0 +1,9 @@
+from abc import ABC, abstractmethod
+
+from register_ticket_api.entities import AttendanceEvent
+
+
+class IAttendanceEventSink(ABC):
+    @abstractmethod
+    def emit(self, event: AttendanceEvent) -> None:
+        pass
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from datetime import date
+
+from register_ticket_api.entities import AttendanceEvent
+
+
+class IAttendanceLogRepository(ABC):
+    @abstractmethod
+    async def add_events(self, events: list[AttendanceEvent]) -> None:
+        pass
+
+    @abstractmethod
+    async def ensure_partitions(self, from_day: date, days: int) -> int:
+        pass
+
+    @abstractmethod
+    async def drop_partitions_before(self, day: date) -> int:
+        pass
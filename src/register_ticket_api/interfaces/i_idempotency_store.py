@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+
+from register_ticket_api.entities import IdempotencyRecord
+
+
+class IIdempotencyStore(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> IdempotencyRecord | None:
+        pass
+
+    @abstractmethod
+    async def save(self, key: str, record: IdempotencyRecord) -> None:
+        pass
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        pass
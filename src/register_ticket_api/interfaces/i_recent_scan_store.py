@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class IRecentScanStore(ABC):
+    @abstractmethod
+    async def add(self, key: str, ttl_seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    async def find(self, keys: list[str]) -> str | None:
+        pass
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        pass
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class IShardMapRepository(ABC):
+    @abstractmethod
+    async def load(self) -> dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def move_gate(self, gate: str, to_shard: str) -> int:
+        pass
+
+    @abstractmethod
+    async def count_tickets(self) -> dict[str, dict[str, int]]:
+        pass
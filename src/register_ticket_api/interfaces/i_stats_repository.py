@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from register_ticket_api.entities import GateStats
+
+
+class IStatsRepository(ABC):
+    @abstractmethod
+    async def add_gate_minute_entries(self, entries: dict[tuple[str, datetime], int]) -> None:
+        pass
+
+    @abstractmethod
+    async def get_gate_stats(self, since_minute: datetime) -> list[GateStats]:
+        pass
@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 from uuid import UUID
 
-from register_ticket_api.entities import Ticket, User
+from register_ticket_api.entities import (
+    AttendanceConflict,
+    JournaledAttendance,
+    Ticket,
+    TicketChange,
+    User,
+)
 
 
 class ITicketRepository(ABC):
@@ -15,5 +22,41 @@ class ITicketRepository(ABC):
         pass
 
     @abstractmethod
-    async def mark_ticket_as_used(self, ticket_id: UUID) -> bool:
+    async def get_user_ticket(self, ticket_id: UUID, username: str) -> Ticket | None:
+        pass
+
+    @abstractmethod
+    async def get_user_ticket_version(self, ticket_id: UUID, username: str) -> int | None:
+        pass
+
+    @abstractmethod
+    async def mark_ticket_as_used(self, ticket_id: UUID, gate: str | None = None) -> bool:
+        pass
+
+    @abstractmethod
+    async def revoke_tickets(self, ticket_ids: list[UUID]) -> list[TicketChange]:
+        pass
+
+    @abstractmethod
+    async def get_revoked_tickets(self, gate: str) -> list[TicketChange]:
+        pass
+
+    @abstractmethod
+    async def list_by_user(
+        self,
+        user_id: UUID,
+        limit: int,
+        after: tuple[datetime, UUID] | None = None,
+        status: str | None = None,
+    ) -> list[Ticket]:
+        pass
+
+    @abstractmethod
+    async def list_scannable_tickets(self, changed_since: datetime | None = None) -> list[Ticket]:
+        pass
+
+    @abstractmethod
+    async def replay_attendance(
+        self, attendances: list[JournaledAttendance]
+    ) -> list[AttendanceConflict]:
         pass
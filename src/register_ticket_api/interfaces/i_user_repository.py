@@ -11,3 +11,7 @@ class IUserRepository(ABC):
     @abstractmethod
     async def get_by_username(self, username: str) -> User | None:
         pass
+
+    @abstractmethod
+    async def upsert_users(self, users: list[tuple[str, str]]) -> tuple[int, int]:
+        pass
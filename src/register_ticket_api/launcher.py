@@ -0,0 +1,84 @@
+import os
+from argparse import ArgumentParser, Namespace
+
+import uvicorn
+from loguru import logger
+
+APP_IMPORT_PATH: str = "register_ticket_api.main:app"
+DEFAULT_DB_MAX_CONNECTIONS: int = 100
+DEFAULT_DB_RESERVED_CONNECTIONS: int = 10  # superuser, migrations, psql sessions...
+DEFAULT_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+# opened outside the pool: the LISTEN connection of TicketChangeListener in every worker,
+# and the connection of the startup migration check of a (re)starting worker
+DEDICATED_CONNECTIONS_PER_WORKER: int = 1
+MIGRATION_CONNECTIONS: int = 1
+
+
+def compute_pool_max_size(max_connections: int, reserved_connections: int, workers: int) -> int:
+    if workers < 1:
+        raise ValueError("Workers must be at least 1")
+    available: int = (
+        max_connections
+        - reserved_connections
+        - MIGRATION_CONNECTIONS
+        - workers * DEDICATED_CONNECTIONS_PER_WORKER
+    )
+    if available < workers:
+        raise ValueError(
+            f"Not enough database connections ({available}) for {workers} workers, "
+            "lower the number of workers or raise DB_MAX_CONNECTIONS"
+        )
+    return available // workers
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Runs the register ticket API with several workers")
+    parser.add_argument("--host", type=str, default=os.getenv("HOST", "0.0.0.0"))  # noqa: S104
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+    )
+    parser.add_argument(
+        "--db-max-connections",
+        type=int,
+        default=int(os.getenv("DB_MAX_CONNECTIONS") or DEFAULT_DB_MAX_CONNECTIONS),
+        help="Postgres max_connections shared by every worker",
+    )
+    parser.add_argument(
+        "--db-reserved-connections",
+        type=int,
+        default=int(os.getenv("DB_RESERVED_CONNECTIONS") or DEFAULT_DB_RESERVED_CONNECTIONS),
+    )
+    parser.add_argument(
+        "--graceful-shutdown-seconds",
+        type=int,
+        default=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS") or DEFAULT_GRACEFUL_SHUTDOWN_SECONDS),
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args: Namespace = parse_args()
+    pool_max_size: int = compute_pool_max_size(
+        args.db_max_connections, args.db_reserved_connections, args.workers
+    )
+    # workers are spawned after this point and inherit the environment
+    os.environ["DB_POOL_MAX_SIZE"] = str(pool_max_size)
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    logger.info(
+        f"Starting {args.workers} workers on {args.host}:{args.port} "
+        f"with a pool of up to {pool_max_size} DB connections each"
+    )
+    # uvicorn binds the socket once and pre-forks the workers on it, its supervisor
+    # replaces crashed workers and forwards SIGTERM so in-flight requests are drained
+    uvicorn.run(
+        APP_IMPORT_PATH,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_shutdown_seconds,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -1,21 +1,409 @@
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
+from elasticsearch import Elasticsearch
 from fastapi import FastAPI
 
-from register_ticket_api.controllers import TicketsController
-from register_ticket_api.infraestructure import PostgreSQLDbContext
-from register_ticket_api.repositories import TicketRepository, UserRepository
-from register_ticket_api.services import TicketService
+from register_ticket_api.controllers import (
+    AdminTokenGuard,
+    GateTokenGuard,
+    JobsController,
+    ProfilingController,
+    StatsController,
+    TicketRevocationsController,
+    TicketsController,
+    UsersController,
+)
+from register_ticket_api.infraestructure import (
+    AttendanceJournal,
+    AttendanceLogWriter,
+    AttendanceRollupBuffer,
+    CircuitBreaker,
+    ElasticsearchEventSink,
+    FanOutEventSink,
+    InMemoryIdempotencyStore,
+    JobScheduler,
+    MigrationRunner,
+    PasswordHasher,
+    PostgreSQLDbContext,
+    RecentScanCache,
+    RequestDeadlineMiddleware,
+    ShardedDbContext,
+    SqliteRecentScanStore,
+    TicketCache,
+    TicketChangeBus,
+    TicketChangeFeed,
+    TicketChangeListener,
+    TicketStatusHub,
+    TicketTokenCodec,
+    TotpAttemptThrottle,
+)
+from register_ticket_api.instrumentation import (
+    RuntimeProfiler,
+    ServerTimingMiddleware,
+    configure_slow_query_log,
+)
+from register_ticket_api.repositories import (
+    AttendanceLogRepository,
+    IdempotencyRepository,
+    ShardMapRepository,
+    StatsRepository,
+    TicketRepository,
+    UserRepository,
+)
+from register_ticket_api.services import (
+    DegradedAttendanceService,
+    IdempotencyService,
+    StatsService,
+    TicketService,
+    UserService,
+)
 
-app = FastAPI()
+IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
 
-psql_context = PostgreSQLDbContext()
+configure_slow_query_log(
+    threshold_ms=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200")),
+    log_path=os.getenv("SLOW_QUERY_LOG_PATH"),
+)
+
+
+def db_circuit_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_rate_threshold=float(os.getenv("DB_BREAKER_FAILURE_RATE", "0.5")),
+        minimum_calls=int(os.getenv("DB_BREAKER_MINIMUM_CALLS", "10")),
+        window_size=int(os.getenv("DB_BREAKER_WINDOW_SIZE", "50")),
+        open_seconds=float(os.getenv("DB_BREAKER_OPEN_SECONDS", "5")),
+    )
+
+
+psql_context = PostgreSQLDbContext(circuit_breaker=db_circuit_breaker())
+# tickets of the largest venues spread over several databases by gate, users stay here
+ticket_shards = (
+    ShardedDbContext.from_config(
+        os.environ["DB_SHARDS"],
+        primary=psql_context,
+        default_shard=os.getenv("DB_DEFAULT_SHARD"),
+        circuit_breaker_factory=db_circuit_breaker,
+    )
+    if os.getenv("DB_SHARDS")
+    else None
+)
+shard_map_repo = (
+    ShardMapRepository(db_context=psql_context, shards=ticket_shards)
+    if ticket_shards is not None
+    else None
+)
 user_repo = UserRepository(psql_context)
-ticket_repo = TicketRepository(db_context=psql_context)
-ticket_service = TicketService(user_repo=user_repo, ticket_repo=ticket_repo)
-tickets_controller = TicketsController(ticket_service=ticket_service)
+ticket_repo = TicketRepository(db_context=psql_context, shards=ticket_shards)
+stats_repo = StatsRepository(db_context=psql_context, shards=ticket_shards)
+rollup_buffer = AttendanceRollupBuffer(
+    stats_repo=stats_repo,
+    flush_interval_seconds=float(os.getenv("ROLLUP_FLUSH_INTERVAL_SECONDS", "1")),
+)
+# workers of one host share a memory mapped snapshot of the cache instead of a copy each
+ticket_cache = TicketCache(snapshot_path=os.getenv("TICKET_SNAPSHOT_PATH"))
+degraded_attendance = (
+    DegradedAttendanceService(
+        ticket_repo=ticket_repo,
+        ticket_cache=ticket_cache,
+        journal=AttendanceJournal(os.getenv("ATTENDANCE_JOURNAL_DIR", "attendance_journal")),
+        rollup_buffer=rollup_buffer,
+        replay_interval_seconds=float(os.getenv("ATTENDANCE_REPLAY_INTERVAL_SECONDS", "1")),
+        replay_batch_size=int(os.getenv("ATTENDANCE_REPLAY_BATCH_SIZE", "500")),
+        cache_refresh_seconds=float(os.getenv("TICKET_CACHE_REFRESH_SECONDS", "300")),
+    )
+    if os.getenv("DEGRADED_MODE_ENABLED", "true").lower() == "true"
+    else None
+)
+# analysts query scan history here instead of the primary database
+elasticsearch_sink = (
+    ElasticsearchEventSink(
+        client=Elasticsearch(
+            os.environ["ELASTICSEARCH_URL"],
+            api_key=os.getenv("ELASTICSEARCH_API_KEY"),
+            request_timeout=float(os.getenv("ELASTICSEARCH_TIMEOUT_SECONDS", "5")),
+        ),
+        index=os.getenv("ATTENDANCE_EVENTS_INDEX", "attendance-events"),
+        max_queue_size=int(os.getenv("ATTENDANCE_EVENTS_QUEUE_SIZE", "10000")),
+        batch_size=int(os.getenv("ATTENDANCE_EVENTS_BATCH_SIZE", "500")),
+        flush_interval_seconds=float(os.getenv("ATTENDANCE_EVENTS_FLUSH_SECONDS", "1")),
+        spill_dir=os.getenv("ATTENDANCE_EVENTS_SPILL_DIR"),
+    )
+    if os.getenv("ELASTICSEARCH_URL")
+    else None
+)
+attendance_log_writer = AttendanceLogWriter(
+    attendance_log_repo=AttendanceLogRepository(db_context=psql_context),
+    max_queue_size=int(os.getenv("ATTENDANCE_LOG_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("ATTENDANCE_LOG_BATCH_SIZE", "1000")),
+    flush_interval_seconds=float(os.getenv("ATTENDANCE_LOG_FLUSH_SECONDS", "1")),
+    retention_days=(
+        int(os.environ["ATTENDANCE_LOG_RETENTION_DAYS"])
+        if os.getenv("ATTENDANCE_LOG_RETENTION_DAYS")
+        else None
+    ),
+)
+attendance_event_sink = FanOutEventSink(
+    [attendance_log_writer, *([elasticsearch_sink] if elasticsearch_sink else [])]
+)
+# gates verify signed ticket tokens in memory, see TicketTokenCodec for key rotation
+ticket_token_codec = (
+    TicketTokenCodec.from_config(
+        os.environ["TICKET_TOKEN_KEYS"], active_kid=os.getenv("TICKET_TOKEN_ACTIVE_KID")
+    )
+    if os.getenv("TICKET_TOKEN_KEYS")
+    else None
+)
+# rescans of a ticket are rejected before the lookup, workers of a host share them via SQLite
+recent_scan_store = (
+    SqliteRecentScanStore(os.environ["RECENT_SCANS_SHARED_PATH"])
+    if os.getenv("RECENT_SCANS_SHARED_PATH")
+    else None
+)
+recent_scans = RecentScanCache(
+    max_entries=int(os.getenv("RECENT_SCANS_MAX_ENTRIES", "100000")),
+    used_ttl_seconds=float(os.getenv("RECENT_SCANS_USED_TTL_SECONDS", "600")),
+    rejected_code_ttl_seconds=float(os.getenv("RECENT_SCANS_REJECTED_CODE_TTL_SECONDS", "60")),
+    shared_store=recent_scan_store,
+)
+password_hasher = PasswordHasher(
+    max_workers=(
+        int(os.environ["PASSWORD_HASH_WORKERS"]) if os.getenv("PASSWORD_HASH_WORKERS") else None
+    )
+)
+# phones get their ticket changes pushed over SSE instead of polling
+ticket_status_hub = TicketStatusHub(
+    max_pending_per_subscriber=int(os.getenv("TICKET_EVENTS_MAX_PENDING", "16")),
+    heartbeat_seconds=float(os.getenv("TICKET_EVENTS_HEARTBEAT_SECONDS", "15")),
+)
+ticket_service = TicketService(
+    user_repo=user_repo,
+    ticket_repo=ticket_repo,
+    rollup_buffer=rollup_buffer,
+    degraded_attendance=degraded_attendance,
+    event_sink=attendance_event_sink,
+    ticket_token_codec=ticket_token_codec,
+    recent_scans=recent_scans,
+    attempt_throttle=TotpAttemptThrottle(
+        max_failures=int(os.getenv("TOTP_MAX_FAILURES", "10")),
+        window_seconds=float(os.getenv("TOTP_FAILURE_WINDOW_SECONDS", "300")),
+        width=int(os.getenv("TOTP_THROTTLE_SKETCH_WIDTH", "65536")),
+    ),
+    status_hub=ticket_status_hub,
+    password_hasher=password_hasher,
+)
+user_service = UserService(
+    user_repo=user_repo,
+    password_hasher=password_hasher,
+    import_batch_size=int(os.getenv("USER_IMPORT_BATCH_SIZE", "5000")),
+)
+stats_service = StatsService(
+    stats_repo=stats_repo, cache_ttl_seconds=float(os.getenv("STATS_CACHE_TTL_SECONDS", "1"))
+)
+idempotency_shared_store = (
+    IdempotencyRepository(db_context=psql_context, ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+    if os.getenv("IDEMPOTENCY_SHARED_STORE", "false").lower() == "true"
+    else None
+)
+idempotency_store = InMemoryIdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000")),
+    ttl_seconds=IDEMPOTENCY_TTL_SECONDS,
+    shared_store=idempotency_shared_store,
+)
+idempotency_service = IdempotencyService(store=idempotency_store)
+# timetabled work of the worker, exclusive jobs run on one worker of the whole deployment
+job_scheduler = JobScheduler(
+    db_context=psql_context, timezone=os.getenv("SCHEDULER_TIMEZONE", "UTC")
+)
+SCHEDULER_JITTER_SECONDS: float = float(os.getenv("SCHEDULER_JITTER_SECONDS", "5"))
+# expired keys are otherwise only overwritten when a client reuses them
+job_scheduler.every(
+    "purge_idempotency_keys",
+    idempotency_store.purge_expired,
+    interval_seconds=float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "300")),
+    jitter_seconds=SCHEDULER_JITTER_SECONDS,
+)
+if idempotency_shared_store is not None:
+    job_scheduler.every(
+        "purge_shared_idempotency_keys",
+        idempotency_shared_store.purge_expired,
+        interval_seconds=float(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "300")),
+        jitter_seconds=SCHEDULER_JITTER_SECONDS,
+        exclusive=True,
+    )
+# expired rescans are otherwise only evicted locally, the shared SQLite file would keep them
+job_scheduler.every(
+    "purge_recent_scans",
+    recent_scans.purge_expired,
+    interval_seconds=float(os.getenv("RECENT_SCANS_PURGE_INTERVAL_SECONDS", "60")),
+    jitter_seconds=SCHEDULER_JITTER_SECONDS,
+)
+
+
+async def refresh_shard_map() -> int:
+    if ticket_shards is None or shard_map_repo is None:
+        return 0
+    assignments: dict[str, str] = await shard_map_repo.load()
+    ticket_shards.apply_assignments(assignments)
+    return len(assignments)
+
+
+# gates moved by the shards CLI are routed to their new shard after the next refresh
+if ticket_shards is not None:
+    job_scheduler.every(
+        "refresh_shard_map",
+        refresh_shard_map,
+        interval_seconds=float(os.getenv("SHARD_MAP_REFRESH_SECONDS", "5")),
+    )
+# every worker reloads its offline ticket cache before doors open, e.g. "30 17 * * *"
+if degraded_attendance is not None and os.getenv("TICKET_PRELOAD_CRON"):
+    job_scheduler.cron(
+        "preload_ticket_cache",
+        degraded_attendance.refresh_cache,
+        os.environ["TICKET_PRELOAD_CRON"],
+        jitter_seconds=SCHEDULER_JITTER_SECONDS,
+    )
+tickets_controller = TicketsController(
+    ticket_service=ticket_service, idempotency_service=idempotency_service
+)
+stats_controller = StatsController(stats_service=stats_service)
+admin_guard = AdminTokenGuard()
+users_controller = UsersController(user_service=user_service, admin_guard=admin_guard)
+jobs_controller = JobsController(job_scheduler=job_scheduler, admin_guard=admin_guard)
+# revocations reach every worker through LISTEN, each worker fans them out to its caches
+ticket_change_bus = TicketChangeBus()
+ticket_change_feed = TicketChangeFeed(
+    max_changes=int(os.getenv("TICKET_CHANGE_FEED_SIZE", "50000"))
+)
+ticket_change_bus.subscribe(ticket_change_feed.append)
+ticket_change_bus.subscribe(ticket_cache.apply_changes)
+ticket_change_bus.subscribe(ticket_status_hub.publish)
+ticket_status_bus = TicketChangeBus()
+ticket_status_bus.subscribe(ticket_status_hub.publish)
+ticket_change_listener = TicketChangeListener(
+    db_context=psql_context, bus=ticket_change_bus, status_bus=ticket_status_bus
+)
+# every shard notifies the changes of its own tickets
+shard_change_listeners: list[TicketChangeListener] = [
+    TicketChangeListener(db_context=context, bus=ticket_change_bus, status_bus=ticket_status_bus)
+    for context in (ticket_shards.contexts() if ticket_shards is not None else [])
+    if context is not psql_context
+]
+ticket_revocations_controller = TicketRevocationsController(
+    ticket_service=ticket_service,
+    change_feed=ticket_change_feed,
+    admin_guard=admin_guard,
+    gate_guard=GateTokenGuard(),
+)
+
+
+# shards carry the same schema as the primary
+migration_runners: list[MigrationRunner] = [
+    MigrationRunner(db_context=psql_context),
+    *(
+        MigrationRunner(db_context=context)
+        for context in (ticket_shards.contexts() if ticket_shards is not None else [])
+        if context is not psql_context
+    ),
+]
+
+
+async def check_migrations(mode: str) -> None:
+    if mode == "apply":
+        for migration_runner in migration_runners:
+            await migration_runner.apply()
+        return
+    if mode == "check":
+        pending: list[str] = [
+            f"{migration_runner.database} V{migration.version:04d} {migration.name}"
+            for migration_runner in migration_runners
+            for migration in await migration_runner.pending_migrations()
+        ]
+        if pending:
+            raise RuntimeError(
+                f"Pending schema migrations: {', '.join(pending)}, "
+                "run python -m register_ticket_api.cli.migrate apply"
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await check_migrations(os.getenv("MIGRATIONS_ON_STARTUP", "check").lower())
+    await psql_context.open_pool()
+    if ticket_shards is not None:
+        await ticket_shards.open_pool()
+        await refresh_shard_map()  # no scan is routed before the map is known
+    rollup_buffer.start()
+    ticket_change_listener.start()
+    for shard_change_listener in shard_change_listeners:
+        shard_change_listener.start()
+    ticket_status_hub.start()
+    if degraded_attendance is not None:
+        degraded_attendance.start()
+    attendance_log_writer.start()
+    job_scheduler.start()
+    if elasticsearch_sink is not None:
+        elasticsearch_sink.start()
+    try:
+        yield
+    finally:
+        if elasticsearch_sink is not None:
+            await elasticsearch_sink.stop()
+        await job_scheduler.stop()
+        await attendance_log_writer.stop()
+        if degraded_attendance is not None:
+            await degraded_attendance.stop()
+        await ticket_status_hub.stop()
+        for shard_change_listener in shard_change_listeners:
+            await shard_change_listener.stop()
+        await ticket_change_listener.stop()
+        await rollup_buffer.stop()
+        if ticket_shards is not None:
+            await ticket_shards.close_pool()
+        await psql_context.close_pool()
+        password_hasher.shutdown()
+        if recent_scan_store is not None:
+            recent_scan_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
+# a gate gives up on a scan after a couple of seconds, the server should too
+app.add_middleware(
+    RequestDeadlineMiddleware,
+    default_timeout_ms=float(os.getenv("REQUEST_TIMEOUT_MS", "10000")),
+    max_timeout_ms=float(os.getenv("REQUEST_MAX_TIMEOUT_MS", "30000")),
+    route_timeouts_ms={
+        "/api/users/attendance": float(os.getenv("ATTENDANCE_TIMEOUT_MS", "2000")),
+        # long polls wait up to MAX_WAIT_SECONDS, bulk imports take as long as the file
+        "/api/gates/": 35_000,
+        "/api/users/imports": 0,
+        # server-sent events stay open until the phone leaves, heartbeats keep proxies happy
+        "/api/users/{username}/tickets/events": 0,
+        # a manual job run is bounded by the job's own timeout
+        "/api/admin/jobs/": 0,
+        # a profiling window lasts as long as the admin asked for
+        "/api/admin/profiling/": 0,
+    },
+)
+if os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true":
+    app.add_middleware(ServerTimingMiddleware)
 
 app.include_router(tickets_controller.router)
+app.include_router(stats_controller.router)
+app.include_router(ticket_revocations_controller.router)
+app.include_router(users_controller.router)
+app.include_router(jobs_controller.router)
+# the routes don't even exist unless asked for, and a worker only hooks a profiler while an
+# admin keeps a window open
+if os.getenv("PROFILING_ENABLED", "false").lower() == "true":
+    profiling_controller = ProfilingController(
+        profiler=RuntimeProfiler(
+            max_seconds=float(os.getenv("PROFILING_MAX_SECONDS", "60")),
+        ),
+        admin_guard=admin_guard,
+    )
+    app.include_router(profiling_controller.router)
 
 if __name__ == "__main__":  # pragma: no cover
     import uvicorn
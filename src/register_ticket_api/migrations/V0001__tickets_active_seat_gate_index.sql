@@ -0,0 +1,7 @@
+-- migrate:no-transaction
+-- get_by_ticket_details filters on seat, gate and status <> 'revoked' on every scan,
+-- revoked rows are left out so fraud sweeps don't grow the index the scan path walks
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_active_seat_gate;
+CREATE INDEX CONCURRENTLY idx_tickets_active_seat_gate
+    ON tickets (seat, gate)
+    WHERE status <> 'revoked';
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- user_id lookups and the keyset pages of "my tickets" both use this index
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_user_created;
+CREATE INDEX CONCURRENTLY idx_tickets_user_created
+    ON tickets (user_id, created_at DESC, ticket_id DESC);
@@ -0,0 +1,24 @@
+-- migrate:no-transaction
+-- keyset pagination needs a total order, created_at can no longer be null; the backfill
+-- commits every batch and NOT NULL is proven by a validated check first, so no step holds
+-- ACCESS EXCLUSIVE on tickets while scanning it
+DO $$
+DECLARE
+    updated_rows INTEGER;
+BEGIN
+    LOOP
+        UPDATE tickets SET created_at = now()
+        WHERE ctid IN (SELECT ctid FROM tickets WHERE created_at IS NULL LIMIT 10000);
+        GET DIAGNOSTICS updated_rows = ROW_COUNT;
+        EXIT WHEN updated_rows = 0;
+        COMMIT;
+    END LOOP;
+END
+$$;
+ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_created_at_not_null;
+ALTER TABLE tickets ADD CONSTRAINT tickets_created_at_not_null
+    CHECK (created_at IS NOT NULL) NOT VALID;
+ALTER TABLE tickets VALIDATE CONSTRAINT tickets_created_at_not_null;
+-- the validated check lets SET NOT NULL skip the full table scan
+ALTER TABLE tickets ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE tickets DROP CONSTRAINT tickets_created_at_not_null;
@@ -0,0 +1,11 @@
+-- shared store for the responses replayed on Idempotency-Key retries
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    request_fingerprint CHAR(64) NOT NULL,  -- sha256 of the request
+    status_code SMALLINT NOT NULL,
+    body JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
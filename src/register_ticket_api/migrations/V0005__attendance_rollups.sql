@@ -0,0 +1,90 @@
+-- ===============================================
+-- Rollups read by the stats endpoint, dashboards never scan tickets
+-- ===============================================
+
+-- entries per gate and minute, incremented in batches by the API workers
+CREATE TABLE IF NOT EXISTS gate_minute_entries (
+    gate VARCHAR(10) NOT NULL,
+    minute TIMESTAMP NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (gate, minute)
+);
+
+CREATE INDEX IF NOT EXISTS idx_gate_minute_entries_minute ON gate_minute_entries (minute);
+
+-- occupancy counters per gate, kept by trigger except scans which the API workers add
+CREATE TABLE IF NOT EXISTS gate_ticket_totals (
+    gate VARCHAR(10) PRIMARY KEY,
+    issued INTEGER NOT NULL DEFAULT 0,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION fn_track_gate_ticket_totals()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE gate_ticket_totals
+        SET issued = issued - 1,
+            revoked = revoked - (OLD.status = 'revoked')::INTEGER,
+            used = used - (OLD.used_at IS NOT NULL)::INTEGER
+        WHERE gate = OLD.gate;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO gate_ticket_totals (gate, issued, revoked, used)
+        VALUES (
+            NEW.gate,
+            1,
+            (NEW.status = 'revoked')::INTEGER,
+            (NEW.used_at IS NOT NULL)::INTEGER
+        )
+        ON CONFLICT (gate) DO UPDATE
+        SET issued = gate_ticket_totals.issued + 1,
+            revoked = gate_ticket_totals.revoked + EXCLUDED.revoked,
+            used = gate_ticket_totals.used + EXCLUDED.used;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_tickets_totals_insert_delete ON tickets;
+CREATE TRIGGER trg_tickets_totals_insert_delete
+AFTER INSERT OR DELETE ON tickets
+FOR EACH ROW EXECUTE FUNCTION fn_track_gate_ticket_totals();
+
+-- scans (valid -> used) don't match the WHEN clause, the scan path never runs this trigger
+DROP TRIGGER IF EXISTS trg_tickets_totals_update ON tickets;
+CREATE TRIGGER trg_tickets_totals_update
+AFTER UPDATE OF status, gate ON tickets
+FOR EACH ROW
+WHEN (
+    OLD.gate IS DISTINCT FROM NEW.gate
+    OR (OLD.status = 'revoked') IS DISTINCT FROM (NEW.status = 'revoked')
+)
+EXECUTE FUNCTION fn_track_gate_ticket_totals();
+
+-- backfill from the tickets already loaded
+INSERT INTO gate_ticket_totals (gate, issued, revoked, used)
+SELECT
+    gate,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE status = 'revoked'),
+    COUNT(*) FILTER (WHERE used_at IS NOT NULL)
+FROM tickets
+GROUP BY gate
+ON CONFLICT (gate) DO UPDATE
+SET issued = EXCLUDED.issued,
+    revoked = EXCLUDED.revoked,
+    used = EXCLUDED.used;
+
+INSERT INTO gate_minute_entries (gate, minute, entries)
+SELECT gate, date_trunc('minute', used_at), COUNT(*)
+FROM tickets
+WHERE used_at IS NOT NULL
+GROUP BY gate, date_trunc('minute', used_at)
+ON CONFLICT (gate, minute) DO UPDATE
+SET entries = EXCLUDED.entries;
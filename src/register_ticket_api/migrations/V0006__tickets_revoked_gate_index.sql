@@ -0,0 +1,6 @@
+-- migrate:no-transaction
+-- gate devices resync their revoked list with this, only revoked rows are indexed
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_gate_revoked;
+CREATE INDEX CONCURRENTLY idx_tickets_gate_revoked
+    ON tickets (gate)
+    WHERE status = 'revoked';
@@ -0,0 +1,72 @@
+-- ===============================================
+-- Append-only history of every scan attempt, one partition per day
+-- ===============================================
+
+CREATE TABLE IF NOT EXISTS attendance_log (
+    attempted_at TIMESTAMP NOT NULL,
+    event_id UUID NOT NULL,
+    ticket_id UUID NULL,                 -- unknown when the scan was rejected early
+    seat VARCHAR(10) NOT NULL,
+    gate VARCHAR(10) NOT NULL,
+    device_id TEXT NULL,
+    outcome VARCHAR(10) NOT NULL,        -- accepted, rejected, error
+    reason TEXT NULL,
+    latency_ms REAL NOT NULL
+) PARTITION BY RANGE (attempted_at);
+
+-- rows arrive in time order, a BRIN index stays tiny and still prunes blocks per range
+CREATE INDEX IF NOT EXISTS idx_attendance_log_attempted_at
+    ON attendance_log USING BRIN (attempted_at);
+
+CREATE OR REPLACE FUNCTION fn_ensure_attendance_log_partitions(p_from DATE, p_days INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_day DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- every worker calls this, only one creates each partition
+    PERFORM pg_advisory_xact_lock(hashtext('attendance_log_partitions'));
+    FOR i IN 0 .. p_days - 1 LOOP
+        partition_day := p_from + i;
+        partition_name := format('attendance_log_%s', to_char(partition_day, 'YYYYMMDD'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF attendance_log FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_day, partition_day + 1
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- retention drops whole partitions, no DELETE and no vacuum debt
+CREATE OR REPLACE FUNCTION fn_drop_attendance_log_partitions(p_before DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    partition_name TEXT;
+    dropped INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('attendance_log_partitions'));
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'attendance_log'::regclass
+            AND c.relname ~ '^attendance_log_[0-9]{8}$'
+            AND to_date(right(c.relname, 8), 'YYYYMMDD') < p_before
+    LOOP
+        EXECUTE format('DROP TABLE %I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$;
+
+SELECT fn_ensure_attendance_log_partitions(CURRENT_DATE, 7);
@@ -0,0 +1,19 @@
+-- ===============================================
+-- User creation, called by UserRepository.create_user with an already hashed password
+-- ===============================================
+
+CREATE OR REPLACE PROCEDURE sp_insert_user(
+    p_username VARCHAR,
+    p_password_hash TEXT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM users WHERE LOWER(username) = LOWER(p_username)) THEN
+        RAISE EXCEPTION 'Username % is already taken', p_username;
+    END IF;
+
+    INSERT INTO users (username, password_hash)
+    VALUES (p_username, p_password_hash);
+END;
+$$;
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- logins and bulk imports match usernames case-insensitively, without it both scan users
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_lower_username;
+CREATE INDEX CONCURRENTLY idx_users_lower_username
+    ON users (LOWER(username));
@@ -0,0 +1,24 @@
+-- ===============================================
+-- Row version of every ticket, the ETag of GET /api/users/{username}/tickets/{ticket_id}
+-- ===============================================
+
+-- a constant default only touches the catalog, existing rows are not rewritten
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
+
+-- bumped by the database so no code path (procedures, replays, revocations) can forget it
+CREATE OR REPLACE FUNCTION fn_bump_ticket_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_tickets_version ON tickets;
+CREATE TRIGGER trg_tickets_version
+    BEFORE UPDATE ON tickets
+    FOR EACH ROW
+    WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION fn_bump_ticket_version();
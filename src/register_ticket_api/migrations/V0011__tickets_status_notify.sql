@@ -0,0 +1,40 @@
+-- ===============================================
+-- Registrations and scans are pushed to the owners of the tickets over ticket_status,
+-- revocations keep going out in batches on ticket_changes from revoke_tickets
+-- ===============================================
+
+CREATE OR REPLACE FUNCTION fn_notify_ticket_status()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- same payload as ticket_changes, TicketChangeListener parses both
+    PERFORM pg_notify(
+        'ticket_status',
+        json_build_object(
+            'changes',
+            json_build_array(
+                json_build_object(
+                    'ticket_id', NEW.ticket_id,
+                    'user_id', NEW.user_id,
+                    'seat', NEW.seat,
+                    'gate', NEW.gate,
+                    'status', NEW.status
+                )
+            )
+        )::text
+    );
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_tickets_status_notify ON tickets;
+CREATE TRIGGER trg_tickets_status_notify
+    AFTER UPDATE OF status, user_id ON tickets
+    FOR EACH ROW
+    WHEN (
+        NEW.user_id IS NOT NULL
+        AND NEW.status <> 'revoked'
+        AND (OLD.status IS DISTINCT FROM NEW.status OR OLD.user_id IS DISTINCT FROM NEW.user_id)
+    )
+    EXECUTE FUNCTION fn_notify_ticket_status();
@@ -0,0 +1,18 @@
+-- ===============================================
+-- Last update of every ticket, the degraded mode cache reloads only what changed
+-- ===============================================
+
+-- now() is stable, PostgreSQL stores it once in the catalog instead of rewriting the table
+ALTER TABLE tickets ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now();
+
+-- same trigger as V0010, it now stamps the update as well
+CREATE OR REPLACE FUNCTION fn_bump_ticket_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$;
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- incremental cache refreshes read a short range of updated_at instead of the whole table
+DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_updated_at;
+CREATE INDEX CONCURRENTLY idx_tickets_updated_at
+    ON tickets (updated_at);
@@ -0,0 +1,3 @@
+-- a sharded ticket lives in another database than its user, so the reference can't be a
+-- foreign key. Registration already looks the user up before assigning the ticket
+ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_user_id_fkey;
@@ -0,0 +1,7 @@
+-- gates living outside the default shard, only read on the primary database. Workers
+-- reload it periodically, the shards CLI changes it when it moves a gate
+CREATE TABLE IF NOT EXISTS ticket_shard_map (
+    gate VARCHAR(10) PRIMARY KEY,
+    shard TEXT NOT NULL,
+    assigned_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -1,4 +1,15 @@
+from register_ticket_api.repositories.attendance_log_repository import AttendanceLogRepository
+from register_ticket_api.repositories.idempotency_repository import IdempotencyRepository
+from register_ticket_api.repositories.shard_map_repository import ShardMapRepository
+from register_ticket_api.repositories.stats_repository import StatsRepository
 from register_ticket_api.repositories.ticket_repository import TicketRepository
 from register_ticket_api.repositories.user_repository import UserRepository
 
-__all__ = ["TicketRepository", "UserRepository"]
+__all__ = [
+    "AttendanceLogRepository",
+    "IdempotencyRepository",
+    "ShardMapRepository",
+    "StatsRepository",
+    "TicketRepository",
+    "UserRepository",
+]
@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from datetime import date
+
+from register_ticket_api.entities import AttendanceEvent
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import PostgreSQLDbContext, query_timeout
+from register_ticket_api.instrumentation import timed_query
+from register_ticket_api.interfaces import IAttendanceLogRepository
+
+
+@dataclass
+class AttendanceLogRepository(IAttendanceLogRepository):
+    db_context: PostgreSQLDbContext
+
+    async def add_events(self, events: list[AttendanceEvent]) -> None:
+        # COPY streams the whole batch in one round trip, routed to the daily partitions
+        TABLE_NAME: str = "attendance_log"
+        COLUMNS: tuple[str, ...] = (
+            "attempted_at",
+            "event_id",
+            "ticket_id",
+            "seat",
+            "gate",
+            "device_id",
+            "outcome",
+            "reason",
+            "latency_ms",
+        )
+        if not events:
+            return
+        records: list[tuple] = [
+            (
+                event.timestamp,
+                event.event_id,
+                event.ticket_id,
+                event.seat,
+                event.gate,
+                event.device_id,
+                event.outcome,
+                event.reason,
+                event.latency_ms,
+            )
+            for event in events
+        ]
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("copy_attendance_log", (len(records),)):
+                    await db_conn.copy_records_to_table(
+                        TABLE_NAME, records=records, columns=COLUMNS, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+
+    async def ensure_partitions(self, from_day: date, days: int) -> int:
+        FN_NAME: str = "fn_ensure_attendance_log_partitions"
+        return await self.__call_partition_function(FN_NAME, from_day, days)
+
+    async def drop_partitions_before(self, day: date) -> int:
+        FN_NAME: str = "fn_drop_attendance_log_partitions"
+        return await self.__call_partition_function(FN_NAME, day)
+
+    async def __call_partition_function(self, fn_name: str, *params: date | int) -> int:
+        placeholders: str = ", ".join(f"${i}" for i in range(1, len(params) + 1))
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query(fn_name, params):
+                    result: int = await db_conn.fetchval(
+                        f"SELECT {fn_name}({placeholders})", *params, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return result
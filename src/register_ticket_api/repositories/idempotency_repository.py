@@ -0,0 +1,91 @@
+import json
+from dataclasses import dataclass
+
+from register_ticket_api.entities import IdempotencyRecord
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import PostgreSQLDbContext, query_timeout
+from register_ticket_api.instrumentation import timed_query
+from register_ticket_api.interfaces import IIdempotencyStore
+
+
+@dataclass
+class IdempotencyRepository(IIdempotencyStore):
+    db_context: PostgreSQLDbContext
+    ttl_seconds: float
+
+    async def get(self, key: str) -> IdempotencyRecord | None:
+        DB_QUERY: str = """
+        SELECT
+            request_fingerprint,
+            status_code,
+            body
+        FROM idempotency_keys
+        WHERE idempotency_key = $1
+            AND expires_at > now();
+        """
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("get_idempotency_record", (key,)):
+                    row = await db_conn.fetchrow(DB_QUERY, key, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        if row:
+            return IdempotencyRecord(
+                request_fingerprint=row["request_fingerprint"],
+                status_code=row["status_code"],
+                body=json.loads(row["body"]),
+            )
+        return None
+
+    async def save(self, key: str, record: IdempotencyRecord) -> None:
+        # first writer wins, a concurrent retry on another worker must not overwrite it
+        DB_QUERY: str = """
+        INSERT INTO idempotency_keys (
+            idempotency_key, request_fingerprint, status_code, body, expires_at
+        )
+        VALUES ($1, $2, $3, $4::jsonb, now() + make_interval(secs => $5))
+        ON CONFLICT (idempotency_key) DO UPDATE
+        SET request_fingerprint = EXCLUDED.request_fingerprint,
+            status_code = EXCLUDED.status_code,
+            body = EXCLUDED.body,
+            expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at <= now();
+        """
+        params: tuple = (
+            key,
+            record.request_fingerprint,
+            record.status_code,
+            json.dumps(record.body),
+            float(self.ttl_seconds),
+        )
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("save_idempotency_record", params):
+                    await db_conn.execute(DB_QUERY, *params, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+
+    async def purge_expired(self) -> int:
+        DB_QUERY: str = "DELETE FROM idempotency_keys WHERE expires_at <= now();"
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("purge_idempotency_records"):
+                    status: str = await db_conn.execute(DB_QUERY, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return int(status.rsplit(maxsplit=1)[-1])  # "DELETE <rows>"
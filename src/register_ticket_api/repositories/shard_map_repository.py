@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+
+import asyncpg
+
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import (
+    PostgreSQLDbContext,
+    ShardedDbContext,
+    query_timeout,
+)
+from register_ticket_api.instrumentation import timed_query
+from register_ticket_api.interfaces import IShardMapRepository
+
+
+@dataclass
+class ShardMapRepository(IShardMapRepository):
+    # the map lives on the primary database, the tickets on the shards
+    db_context: PostgreSQLDbContext
+    shards: ShardedDbContext
+
+    async def load(self) -> dict[str, str]:
+        DB_QUERY: str = "SELECT gate, shard FROM ticket_shard_map;"
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("load_ticket_shard_map"):
+                    rows = await db_conn.fetch(DB_QUERY, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return {row["gate"]: row["shard"] for row in rows}
+
+    async def move_gate(self, gate: str, to_shard: str) -> int:
+        # the rows are locked on the source while they are copied, scans of the gate wait and
+        # then find nothing there, gates retry and reach the target once workers reload the
+        # map. A move cut short leaves the rows on both shards, running it again finishes it
+        target: PostgreSQLDbContext = self.shards.context(to_shard)
+        from_shard: str = self.shards.shard_map.shard_for(gate)
+        try:
+            if from_shard == to_shard:
+                return await self.__purge_leftovers(gate, to_shard)
+            source_conn = await self.shards.context(from_shard).create_dedicated_connection()
+            target_conn = await target.create_dedicated_connection()
+            try:
+                async with source_conn.transaction():
+                    moved: int = await self.__copy_gate(gate, source_conn, target_conn)
+                    await self.__assign(gate, to_shard)
+                    await source_conn.execute("DELETE FROM tickets WHERE gate = $1;", gate)
+            finally:
+                await source_conn.close()
+                await target_conn.close()
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        self.shards.shard_map.replace({**self.shards.shard_map.assignments, gate: to_shard})
+        return moved
+
+    async def count_tickets(self) -> dict[str, dict[str, int]]:
+        # shard -> gate -> tickets, leftovers of an interrupted move show up on two shards
+        DB_QUERY: str = "SELECT gate, COUNT(*) AS tickets FROM tickets GROUP BY gate;"
+        counts: dict[str, dict[str, int]] = {}
+        for shard in self.shards.shard_names:
+            db_context: PostgreSQLDbContext = self.shards.context(shard)
+            try:
+                db_conn = await db_context.get_connection()
+                try:
+                    with timed_query("count_tickets_by_gate"):
+                        rows = await db_conn.fetch(DB_QUERY, timeout=query_timeout())
+                finally:
+                    await db_context.release_connection(db_conn)
+            except DeadlineExceededException:
+                raise
+            except Exception as e:
+                raise DbOperationException(e) from e
+            counts[shard] = {row["gate"]: row["tickets"] for row in rows}
+        return counts
+
+    async def __copy_gate(
+        self, gate: str, source_conn: asyncpg.Connection, target_conn: asyncpg.Connection
+    ) -> int:
+        rows = await source_conn.fetch(
+            "SELECT * FROM tickets WHERE gate = $1 ORDER BY ticket_id FOR UPDATE;", gate
+        )
+        async with target_conn.transaction():
+            # copies left by an interrupted move are stale, the source is authoritative
+            await target_conn.execute("DELETE FROM tickets WHERE gate = $1;", gate)
+            if rows:
+                await target_conn.copy_records_to_table(
+                    "tickets",
+                    records=[tuple(row.values()) for row in rows],
+                    columns=list(rows[0].keys()),
+                )
+        return len(rows)
+
+    async def __assign(self, gate: str, shard: str) -> None:
+        DB_QUERY: str = """
+        INSERT INTO ticket_shard_map (gate, shard)
+        VALUES ($1, $2)
+        ON CONFLICT (gate) DO UPDATE
+        SET shard = EXCLUDED.shard,
+            assigned_at = now();
+        """
+        db_conn = await self.db_context.get_connection()
+        try:
+            with timed_query("assign_ticket_shard", (gate, shard)):
+                await db_conn.execute(DB_QUERY, gate, shard, timeout=query_timeout())
+        finally:
+            await self.db_context.release_connection(db_conn)
+
+    async def __purge_leftovers(self, gate: str, shard: str) -> int:
+        await self.__assign(gate, shard)
+        purged: int = 0
+        live: PostgreSQLDbContext = self.shards.context(shard)
+        for context in self.shards.contexts():
+            if context is live:
+                continue
+            db_conn = await context.get_connection()
+            try:
+                status: str = await db_conn.execute("DELETE FROM tickets WHERE gate = $1;", gate)
+            finally:
+                await context.release_connection(db_conn)
+            purged += int(status.rsplit(maxsplit=1)[-1])  # "DELETE <rows>"
+        return purged
@@ -0,0 +1,146 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from register_ticket_api.entities import GateMinuteEntries, GateStats
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import (
+    PostgreSQLDbContext,
+    ShardedDbContext,
+    query_timeout,
+)
+from register_ticket_api.instrumentation import timed_query
+from register_ticket_api.interfaces import IStatsRepository
+
+
+@dataclass
+class StatsRepository(IStatsRepository):
+    # minute entries are written to the primary, ticket totals are kept by a trigger on
+    # whichever shard holds the tickets
+    db_context: PostgreSQLDbContext
+    shards: ShardedDbContext | None = None
+
+    async def add_gate_minute_entries(self, entries: dict[tuple[str, datetime], int]) -> None:
+        # rows are locked in (gate, minute) order so concurrent workers can't deadlock
+        DB_QUERY: str = """
+        WITH deltas AS (
+            SELECT gate, minute, entries
+            FROM unnest($1::varchar[], $2::timestamp[], $3::integer[]) AS d(gate, minute, entries)
+        ),
+        minute_entries AS (
+            INSERT INTO gate_minute_entries (gate, minute, entries)
+            SELECT gate, minute, entries FROM deltas ORDER BY gate, minute
+            ON CONFLICT (gate, minute) DO UPDATE
+            SET entries = gate_minute_entries.entries + EXCLUDED.entries
+        )
+        INSERT INTO gate_ticket_totals (gate, used)
+        SELECT gate, SUM(entries) FROM deltas GROUP BY gate ORDER BY gate
+        ON CONFLICT (gate) DO UPDATE
+        SET used = gate_ticket_totals.used + EXCLUDED.used;
+        """
+        if not entries:
+            return
+        keys: list[tuple[str, datetime]] = sorted(entries)
+        params: tuple = (
+            [gate for gate, _ in keys],
+            [minute for _, minute in keys],
+            [entries[key] for key in keys],
+        )
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("add_gate_minute_entries", params):
+                    await db_conn.execute(DB_QUERY, *params, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+
+    async def get_gate_stats(self, since_minute: datetime) -> list[GateStats]:
+        TOTALS_QUERY: str = """
+        SELECT gate, issued, revoked, used
+        FROM gate_ticket_totals
+        ORDER BY gate;
+        """
+        MINUTES_QUERY: str = """
+        SELECT gate, minute, entries
+        FROM gate_minute_entries
+        WHERE minute >= $1
+        ORDER BY gate, minute;
+        """
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("get_gate_totals"):
+                    totals = await db_conn.fetch(TOTALS_QUERY, timeout=query_timeout())
+                with timed_query("get_gate_minute_entries", (since_minute,)):
+                    minutes = await db_conn.fetch(
+                        MINUTES_QUERY, since_minute, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        if self.shards is not None:
+            totals = await self.__sum_shard_totals(totals, TOTALS_QUERY)
+
+        entries_by_gate: dict[str, list[GateMinuteEntries]] = {}
+        for row in minutes:
+            entries_by_gate.setdefault(row["gate"], []).append(
+                GateMinuteEntries(minute=row["minute"], entries=row["entries"])
+            )
+        stats: list[GateStats] = []
+        for row in totals:
+            admissible: int = row["issued"] - row["revoked"]
+            stats.append(
+                GateStats(
+                    gate=row["gate"],
+                    issued=row["issued"],
+                    revoked=row["revoked"],
+                    used=row["used"],
+                    percent_used=round(100 * row["used"] / admissible, 2) if admissible else 0.0,
+                    entries_per_minute=entries_by_gate.get(row["gate"], []),
+                )
+            )
+        return stats
+
+    async def __sum_shard_totals(self, primary_totals: list[Any], query: str) -> list[Any]:
+        shards: list[PostgreSQLDbContext] = [
+            context
+            for context in (self.shards.contexts() if self.shards is not None else [])
+            if context is not self.db_context
+        ]
+        results: list[list[Any] | BaseException] = await asyncio.gather(
+            *(self.__fetch_totals(context, query) for context in shards),
+            return_exceptions=True,
+        )
+        summed: dict[str, dict[str, Any]] = {}
+        for rows in [primary_totals, *results]:
+            if isinstance(rows, BaseException):
+                raise rows
+            for row in rows:
+                gate_totals: dict[str, Any] = summed.setdefault(
+                    row["gate"], {"gate": row["gate"], "issued": 0, "revoked": 0, "used": 0}
+                )
+                for column in ("issued", "revoked", "used"):
+                    gate_totals[column] += row[column]
+        return [summed[gate] for gate in sorted(summed)]
+
+    async def __fetch_totals(self, db_context: PostgreSQLDbContext, query: str) -> list[Any]:
+        try:
+            db_conn = await db_context.get_connection()
+            try:
+                with timed_query("get_gate_totals"):
+                    rows: list[Any] = await db_conn.fetch(query, timeout=query_timeout())
+            finally:
+                await db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return rows
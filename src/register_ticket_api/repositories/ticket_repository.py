@@ -1,29 +1,60 @@
+import asyncio
+from collections.abc import Awaitable, Iterable
 from dataclasses import dataclass
-from typing import Any
+from datetime import datetime
+from typing import Any, TypeVar
 from uuid import UUID
 
-from register_ticket_api.entities import Ticket, User
-from register_ticket_api.exceptions import DbOperationException
-from register_ticket_api.infraestructure import PostgreSQLDbContext
+import asyncpg
+
+from register_ticket_api.entities import (
+    AttendanceConflict,
+    JournaledAttendance,
+    Ticket,
+    TicketChange,
+    User,
+)
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import (
+    TICKET_CHANGES_CHANNEL,
+    PostgreSQLDbContext,
+    ShardedDbContext,
+    query_timeout,
+)
+from register_ticket_api.instrumentation import timed_query
 from register_ticket_api.interfaces import ITicketRepository
 
+T = TypeVar("T")
+
 
 @dataclass
 class TicketRepository(ITicketRepository):
+    # db_context is the primary database, with shards a ticket lives on the shard of its
+    # gate and whatever isn't keyed by gate is asked to every shard at once
     db_context: PostgreSQLDbContext
+    shards: ShardedDbContext | None = None
 
     async def register_ticket(self, user: User, ticket: Ticket) -> bool:
         SP_NAME: str = "sp_register_ticket_to_user"
         registered: bool = False
+        db_context: PostgreSQLDbContext = self.__context_for(ticket.gate)
         try:
-            db_conn = await self.db_context.get_connection()
-            params: tuple = (
-                ticket.id,  # p_ticket_id
-                user.id,  # p_user_id
-            )
-            rows_affected = await db_conn.execute(f"CALL {SP_NAME}($1, $2)", *params)
+            db_conn = await db_context.get_connection()
+            try:
+                params: tuple = (
+                    ticket.id,  # p_ticket_id
+                    user.id,  # p_user_id
+                )
+                with timed_query(SP_NAME, params):
+                    rows_affected = await db_conn.execute(
+                        f"CALL {SP_NAME}($1, $2)", *params, timeout=query_timeout()
+                    )
+            finally:
+                await db_context.release_connection(db_conn)
             if rows_affected != 0:
                 registered = True
+        except DeadlineExceededException:
+            raise
         except Exception as e:
             raise DbOperationException(e) from e
         return registered
@@ -44,21 +75,365 @@ class TicketRepository(ITicketRepository):
             AND t.gate = $2
             AND t.status != 'revoked';
         """
+        db_context: PostgreSQLDbContext = self.__context_for(gate)
+        try:
+            db_conn = await db_context.get_connection()
+            try:
+                with timed_query("get_by_ticket_details", (seat, gate)):
+                    row = await db_conn.fetchrow(DB_QUERY, seat, gate, timeout=query_timeout())
+            finally:
+                await db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        if row:
+            return Ticket(**row)
+        return None
+
+    async def get_user_ticket(self, ticket_id: UUID, username: str) -> Ticket | None:
+        # the seed never leaves through a read endpoint
+        DB_QUERY: str = """
+        SELECT
+            t.ticket_id AS id,
+            t.user_id,
+            t.seat,
+            t.gate,
+            t.status,
+            t.created_at,
+            t.used_at,
+            t.version
+        FROM tickets t
+        JOIN users u ON u.user_id = t.user_id
+        WHERE t.ticket_id = $1
+            AND LOWER(u.username) = LOWER($2);
+        """
+        if self.shards is not None:
+            row = await self.__find_user_ticket_on_shards(
+                ticket_id, username, "t.status, t.created_at, t.used_at, t.version"
+            )
+            return Ticket(**row) if row else None
         try:
             db_conn = await self.db_context.get_connection()
-            row = await db_conn.fetchrow(DB_QUERY, seat, gate)
+            try:
+                with timed_query("get_user_ticket", (ticket_id, username)):
+                    row = await db_conn.fetchrow(
+                        DB_QUERY, ticket_id, username, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
         except Exception as e:
             raise DbOperationException(e) from e
         if row:
             return Ticket(**row)
         return None
 
-    async def mark_ticket_as_used(self, ticket_id: UUID) -> Any:  # bool
-        FN_NAME: str = "fn_mark_ticket_as_used"
+    async def get_user_ticket_version(self, ticket_id: UUID, username: str) -> int | None:
+        # conditional GETs only need the version, the row itself is never decoded
+        DB_QUERY: str = """
+        SELECT t.version
+        FROM tickets t
+        JOIN users u ON u.user_id = t.user_id
+        WHERE t.ticket_id = $1
+            AND LOWER(u.username) = LOWER($2);
+        """
+        if self.shards is not None:
+            row = await self.__find_user_ticket_on_shards(ticket_id, username, "t.version")
+            return row["version"] if row else None
         try:
             db_conn = await self.db_context.get_connection()
-            rows_affected = await db_conn.fetchval(f"SELECT {FN_NAME}($1)", ticket_id)
+            try:
+                with timed_query("get_user_ticket_version", (ticket_id, username)):
+                    version: int | None = await db_conn.fetchval(
+                        DB_QUERY, ticket_id, username, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return version
+
+    async def mark_ticket_as_used(self, ticket_id: UUID, gate: str | None = None) -> Any:  # bool
+        FN_NAME: str = "fn_mark_ticket_as_used"
+        db_context: PostgreSQLDbContext = self.__context_for(gate)
+        try:
+            db_conn = await db_context.get_connection()
+            try:
+                with timed_query(FN_NAME, (ticket_id,)):
+                    rows_affected = await db_conn.fetchval(
+                        f"SELECT {FN_NAME}($1)", ticket_id, timeout=query_timeout()
+                    )
+            finally:
+                await db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except asyncpg.exceptions.RaiseError:
+            # the function raises when the ticket doesn't exist, is used or is revoked, that
+            # is a rejected scan and not a database failure
+            return False
         except Exception as e:
             raise DbOperationException(e) from e
         else:
             return rows_affected
+
+    async def revoke_tickets(self, ticket_ids: list[UUID]) -> list[TicketChange]:
+        # one set-based update, listeners get the changes in chunks that fit a NOTIFY payload
+        DB_QUERY: str = """
+        WITH revoked AS (
+            UPDATE tickets
+            SET status = 'revoked'
+            WHERE ticket_id = ANY($1::uuid[])
+                AND status <> 'revoked'
+            RETURNING ticket_id, user_id, seat, gate, status
+        ),
+        notified AS (
+            SELECT pg_notify(
+                $2,
+                json_build_object(
+                    'changes',
+                    json_agg(
+                        json_build_object(
+                            'ticket_id', c.ticket_id,
+                            'user_id', c.user_id,
+                            'seat', c.seat,
+                            'gate', c.gate,
+                            'status', c.status
+                        )
+                    )
+                )::text
+            )
+            FROM (
+                SELECT r.*, (row_number() OVER () - 1) / $3 AS chunk
+                FROM revoked r
+            ) c
+            GROUP BY c.chunk
+        )
+        SELECT ticket_id, user_id, seat, gate, status, (SELECT COUNT(*) FROM notified) AS notified
+        FROM revoked;
+        """
+        NOTIFY_CHUNK_SIZE: int = 40  # ~150 bytes per change, payloads must stay under 8000 bytes
+        params: tuple = (ticket_ids, TICKET_CHANGES_CHANNEL, NOTIFY_CHUNK_SIZE)
+        # each shard revokes the ids it has and notifies its own listeners
+        shard_rows: list[list[Any]] = await self.__fan_out(
+            self.__fetch(db_context, "revoke_tickets", DB_QUERY, params)
+            for db_context in self.__every_context()
+        )
+        return [self.__to_ticket_change(row) for rows in shard_rows for row in rows]
+
+    async def get_revoked_tickets(self, gate: str) -> list[TicketChange]:
+        DB_QUERY: str = """
+        SELECT ticket_id, user_id, seat, gate, status
+        FROM tickets
+        WHERE gate = $1
+            AND status = 'revoked';
+        """
+        db_context: PostgreSQLDbContext = self.__context_for(gate)
+        try:
+            db_conn = await db_context.get_connection()
+            try:
+                with timed_query("get_revoked_tickets", (gate,)):
+                    rows = await db_conn.fetch(DB_QUERY, gate, timeout=query_timeout())
+            finally:
+                await db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return [self.__to_ticket_change(row) for row in rows]
+
+    async def list_by_user(
+        self,
+        user_id: UUID,
+        limit: int,
+        after: tuple[datetime, UUID] | None = None,
+        status: str | None = None,
+    ) -> list[Ticket]:
+        # keyset over idx_tickets_user_created, every page is one bounded index range scan
+        conditions: list[str] = ["t.user_id = $1"]
+        params: list[Any] = [user_id]
+        if after is not None:
+            params.extend(after)
+            conditions.append(f"(t.created_at, t.ticket_id) < (${len(params) - 1}, ${len(params)})")
+        if status is not None:
+            params.append(status)
+            conditions.append(f"t.status = ${len(params)}")
+        params.append(limit)
+        # only placeholders are interpolated, values always travel as parameters
+        DB_QUERY: str = f"""
+        SELECT
+            t.ticket_id AS id,
+            t.user_id,
+            t.seat,
+            t.gate,
+            t.status,
+            t.created_at,
+            t.used_at
+        FROM tickets t
+        WHERE {" AND ".join(conditions)}
+        ORDER BY t.created_at DESC, t.ticket_id DESC
+        LIMIT ${len(params)};
+        """  # noqa: S608
+        # every shard returns its own first page, the first page overall is among them
+        shard_rows: list[list[Any]] = await self.__fan_out(
+            self.__fetch(db_context, "list_by_user", DB_QUERY, tuple(params))
+            for db_context in self.__every_context()
+        )
+        tickets: list[Ticket] = [Ticket(**row) for rows in shard_rows for row in rows]
+        if len(shard_rows) > 1:
+            tickets.sort(key=lambda ticket: (ticket.created_at, ticket.id), reverse=True)
+        return tickets[:limit]
+
+    async def list_scannable_tickets(self, changed_since: datetime | None = None) -> list[Ticket]:
+        # warms the degraded mode cache, seeds never leave the worker. The first load reads
+        # every scannable ticket, later ones only the rows updated since, whatever their status,
+        # so used and revoked tickets leave the cache
+        condition: str = "t.status = 'valid'" if changed_since is None else "t.updated_at > $1"
+        DB_QUERY: str = f"""
+        SELECT
+            t.ticket_id AS id,
+            t.user_id,
+            t.seat,
+            t.gate,
+            encode(t.seed, 'base64') AS seed,
+            t.status,
+            t.created_at,
+            t.used_at,
+            t.updated_at
+        FROM tickets t
+        WHERE t.user_id IS NOT NULL
+            AND {condition};
+        """  # noqa: S608
+        params: tuple = () if changed_since is None else (changed_since,)
+        shard_rows: list[list[Any]] = await self.__fan_out(
+            self.__fetch(db_context, "list_scannable_tickets", DB_QUERY, params)
+            for db_context in self.__every_context()
+        )
+        return [Ticket(**row) for rows in shard_rows for row in rows]
+
+    async def replay_attendance(
+        self, attendances: list[JournaledAttendance]
+    ) -> list[AttendanceConflict]:
+        # the final SELECT sees tickets as they were before the UPDATE, so an entry that was
+        # already replayed (same used_at) is not reported as a double use
+        DB_QUERY: str = """
+        WITH journal AS (
+            SELECT *
+            FROM unnest($1::uuid[], $2::timestamp[]) AS j(ticket_id, used_at)
+        ),
+        applied AS (
+            UPDATE tickets t
+            SET status = 'used',
+                used_at = j.used_at
+            FROM journal j
+            WHERE t.ticket_id = j.ticket_id
+                AND t.status = 'valid'
+            RETURNING t.ticket_id
+        )
+        SELECT j.ticket_id, t.status, t.used_at
+        FROM journal j
+        LEFT JOIN tickets t ON t.ticket_id = j.ticket_id
+        WHERE j.ticket_id NOT IN (SELECT ticket_id FROM applied)
+            AND (t.status IS DISTINCT FROM 'used' OR t.used_at IS DISTINCT FROM j.used_at);
+        """
+        # a shard would report the tickets it doesn't have as conflicts, each one only gets
+        # the attendances of its own gates
+        by_context: dict[int, tuple[PostgreSQLDbContext, list[JournaledAttendance]]] = {}
+        for attendance in attendances:
+            db_context: PostgreSQLDbContext = self.__context_for(attendance.gate)
+            by_context.setdefault(id(db_context), (db_context, []))[1].append(attendance)
+        shard_rows: list[list[Any]] = await self.__fan_out(
+            self.__fetch(
+                db_context,
+                "replay_attendance",
+                DB_QUERY,
+                (
+                    [attendance.ticket_id for attendance in shard_attendances],
+                    [attendance.used_at for attendance in shard_attendances],
+                ),
+            )
+            for db_context, shard_attendances in by_context.values()
+        )
+        rows: list[Any] = [row for shard in shard_rows for row in shard]
+        by_ticket_id: dict[UUID, JournaledAttendance] = {
+            attendance.ticket_id: attendance for attendance in attendances
+        }
+        return [
+            AttendanceConflict(
+                ticket_id=row["ticket_id"],
+                seat=by_ticket_id[row["ticket_id"]].seat,
+                gate=by_ticket_id[row["ticket_id"]].gate,
+                journaled_used_at=by_ticket_id[row["ticket_id"]].used_at,
+                status=row["status"],
+                used_at=row["used_at"],
+            )
+            for row in rows
+        ]
+
+    def __context_for(self, gate: str | None) -> PostgreSQLDbContext:
+        # without a gate there is nothing to route on, the primary keeps the unsharded tickets
+        if self.shards is None or gate is None:
+            return self.db_context
+        return self.shards.for_gate(gate)
+
+    def __every_context(self) -> list[PostgreSQLDbContext]:
+        return self.shards.contexts() if self.shards is not None else [self.db_context]
+
+    async def __fan_out(self, calls: Iterable[Awaitable[T]]) -> list[T]:
+        # all shards at once, a failing shard fails the call only after every one answered
+        results: list[T | BaseException] = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results  # type: ignore[return-value]
+
+    async def __fetch(
+        self, db_context: PostgreSQLDbContext, name: str, query: str, params: tuple
+    ) -> list[Any]:
+        try:
+            db_conn = await db_context.get_connection()
+            try:
+                with timed_query(name, params):
+                    rows: list[Any] = await db_conn.fetch(query, *params, timeout=query_timeout())
+            finally:
+                await db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return rows
+
+    async def __find_user_ticket_on_shards(
+        self, ticket_id: UUID, username: str, columns: str
+    ) -> Any:
+        # users stay on the primary, the ticket is on whichever shard has its id
+        USER_QUERY: str = "SELECT user_id FROM users WHERE LOWER(username) = LOWER($1);"
+        users: list[Any] = await self.__fetch(
+            self.db_context, "get_user_id", USER_QUERY, (username,)
+        )
+        if not users:
+            return None
+        # only constant column lists are interpolated, values travel as parameters
+        DB_QUERY: str = f"""
+        SELECT t.ticket_id AS id, t.user_id, t.seat, t.gate, {columns}
+        FROM tickets t
+        WHERE t.ticket_id = $1
+            AND t.user_id = $2;
+        """  # noqa: S608
+        shard_rows: list[list[Any]] = await self.__fan_out(
+            self.__fetch(db_context, "get_user_ticket", DB_QUERY, (ticket_id, users[0]["user_id"]))
+            for db_context in self.__every_context()
+        )
+        return next((row for rows in shard_rows for row in rows), None)
+
+    def __to_ticket_change(self, row: Any) -> TicketChange:
+        return TicketChange(
+            ticket_id=row["ticket_id"],
+            user_id=row["user_id"],
+            seat=row["seat"],
+            gate=row["gate"],
+            status=row["status"],
+        )
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 
 from register_ticket_api.entities import User
-from register_ticket_api.exceptions import DbOperationException
-from register_ticket_api.infraestructure import PostgreSQLDbContext
+from register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from register_ticket_api.infraestructure import PostgreSQLDbContext, query_timeout
+from register_ticket_api.instrumentation import timed_query
 from register_ticket_api.interfaces import IUserRepository
 
 
@@ -20,7 +21,11 @@ class UserRepository(IUserRepository):
         WHERE LOWER(username) = LOWER($1)
         """
         db_conn = await self.db_context.get_connection()
-        row = await db_conn.fetchrow(DB_QUERY, username)
+        try:
+            with timed_query("get_by_username", (username,)):
+                row = await db_conn.fetchrow(DB_QUERY, username, timeout=query_timeout())
+        finally:
+            await self.db_context.release_connection(db_conn)
         if row:
             return User(**row)
         return None
@@ -30,15 +35,81 @@ class UserRepository(IUserRepository):
         created: bool = False
         try:
             db_conn = await self.db_context.get_connection()
-            params: tuple = (
-                new_user.username,  # p_username
-                new_user.password,  # p_password
-            )
-            rows_affected: int = await db_conn.execute(f"CALL {SP_NAME}($1, $2)", *params)
+            try:
+                params: tuple = (
+                    new_user.username,  # p_username
+                    new_user.password,  # p_password
+                )
+                with timed_query(SP_NAME, params):
+                    rows_affected: int = await db_conn.execute(
+                        f"CALL {SP_NAME}($1, $2)", *params, timeout=query_timeout()
+                    )
+            finally:
+                await self.db_context.release_connection(db_conn)
 
             if rows_affected != 0:
                 created = True
+        except DeadlineExceededException:
+            raise
         except Exception as e:
             raise DbOperationException(e) from e
 
         return created
+
+    async def upsert_users(self, users: list[tuple[str, str]]) -> tuple[int, int]:
+        # COPY into a staging table streams the batch in one round trip, then a single
+        # statement updates the known usernames (case-insensitively) and inserts the rest
+        STAGING_TABLE: str = "users_import"
+        CREATE_STAGING_TABLE: str = """
+        CREATE TEMP TABLE users_import (
+            username VARCHAR(50) NOT NULL,
+            password_hash TEXT NOT NULL
+        ) ON COMMIT DROP
+        """
+        UPSERT_QUERY: str = """
+        WITH staged AS (
+            SELECT DISTINCT ON (LOWER(username)) username, password_hash
+            FROM users_import
+            ORDER BY LOWER(username)
+        ),
+        updated AS (
+            UPDATE users u
+            SET password_hash = s.password_hash
+            FROM staged s
+            WHERE LOWER(u.username) = LOWER(s.username)
+            RETURNING LOWER(u.username) AS username_key
+        ),
+        created AS (
+            INSERT INTO users (username, password_hash)
+            SELECT s.username, s.password_hash
+            FROM staged s
+            WHERE LOWER(s.username) NOT IN (SELECT username_key FROM updated)
+            ON CONFLICT (username) DO NOTHING
+            RETURNING user_id
+        )
+        SELECT
+            (SELECT COUNT(*) FROM created) AS created,
+            (SELECT COUNT(DISTINCT username_key) FROM updated) AS updated
+        """
+        if not users:
+            return (0, 0)
+        try:
+            db_conn = await self.db_context.get_connection()
+            try:
+                with timed_query("upsert_users", (len(users),)):
+                    async with db_conn.transaction():
+                        await db_conn.execute(CREATE_STAGING_TABLE, timeout=query_timeout())
+                        await db_conn.copy_records_to_table(
+                            STAGING_TABLE,
+                            records=users,
+                            columns=("username", "password_hash"),
+                            timeout=query_timeout(),
+                        )
+                        row = await db_conn.fetchrow(UPSERT_QUERY, timeout=query_timeout())
+            finally:
+                await self.db_context.release_connection(db_conn)
+        except DeadlineExceededException:
+            raise
+        except Exception as e:
+            raise DbOperationException(e) from e
+        return (row["created"], row["updated"])
@@ -1,4 +1,13 @@
+from register_ticket_api.services.degraded_attendance_service import DegradedAttendanceService
+from register_ticket_api.services.idempotency_service import IdempotencyService
+from register_ticket_api.services.stats_service import StatsService
 from register_ticket_api.services.ticket_service import TicketService
 from register_ticket_api.services.user_service import UserService
 
-__all__ = ["TicketService", "UserService"]
+__all__ = [
+    "DegradedAttendanceService",
+    "IdempotencyService",
+    "StatsService",
+    "TicketService",
+    "UserService",
+]
@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from loguru import logger
+
+from register_ticket_api.entities import AttendanceConflict, JournaledAttendance, Ticket
+from register_ticket_api.exceptions import AppValidationException, DbOperationException
+from register_ticket_api.infraestructure import (
+    AttendanceJournal,
+    AttendanceRollupBuffer,
+    TicketCache,
+)
+from register_ticket_api.interfaces import ITicketRepository
+
+
+@dataclass
+class DegradedAttendanceService:
+    ticket_repo: ITicketRepository
+    ticket_cache: TicketCache
+    journal: AttendanceJournal
+    rollup_buffer: AttendanceRollupBuffer | None = None
+    replay_interval_seconds: float = 1.0
+    replay_batch_size: int = 500
+    cache_refresh_seconds: float = 300.0
+    # transactions commit after they stamp updated_at, rows that far back are read again
+    cache_refresh_overlap_seconds: float = 60.0
+    __refreshed_until: datetime | None = field(default=None, init=False, repr=False)
+    __task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def remember(self, ticket: Ticket) -> None:
+        self.ticket_cache.put(ticket)
+
+    def get_cached_ticket(self, seat: str, gate: str) -> Ticket | None:
+        return self.ticket_cache.get(seat, gate)
+
+    async def journal_attendance(self, ticket: Ticket) -> Ticket:
+        if ticket.id is None:
+            raise AppValidationException("Only stored tickets can be journaled")
+        used_at: datetime = datetime.now()
+        # marked before the write so a second scan of the same ticket is already rejected
+        self.ticket_cache.mark_used(ticket.seat, ticket.gate, used_at)
+        try:
+            await self.journal.append(
+                JournaledAttendance(
+                    ticket_id=ticket.id, seat=ticket.seat, gate=ticket.gate, used_at=used_at
+                )
+            )
+        except Exception:
+            self.ticket_cache.put(ticket)
+            raise
+        logger.warning(f"Attendance journaled offline: ticket {ticket.id} marked as used")
+        if self.rollup_buffer is not None:
+            self.rollup_buffer.record_entry(ticket.gate, used_at)
+        return ticket.model_copy(update={"status": "used", "used_at": used_at})
+
+    async def replay(self) -> list[AttendanceConflict]:
+        if not self.journal.has_pending():
+            return []
+        conflicts: list[AttendanceConflict] = []
+        with self.journal.claim_pending() as attendances:
+            if not attendances:
+                return []
+            # the same ticket journaled twice (two workers) is a double use already
+            first_uses: dict[UUID, JournaledAttendance] = {}
+            for attendance in attendances:
+                first_use: JournaledAttendance | None = first_uses.get(attendance.ticket_id)
+                if first_use is None:
+                    first_uses[attendance.ticket_id] = attendance
+                    continue
+                conflicts.append(
+                    AttendanceConflict(
+                        ticket_id=attendance.ticket_id,
+                        seat=attendance.seat,
+                        gate=attendance.gate,
+                        journaled_used_at=attendance.used_at,
+                        status="used",
+                        used_at=first_use.used_at,
+                    )
+                )
+            unique_attendances: list[JournaledAttendance] = list(first_uses.values())
+            for start in range(0, len(unique_attendances), self.replay_batch_size):
+                batch = unique_attendances[start : start + self.replay_batch_size]
+                conflicts.extend(await self.ticket_repo.replay_attendance(batch))
+            logger.info(
+                f"Replayed {len(attendances)} journaled attendances, {len(conflicts)} conflicts"
+            )
+            if conflicts:
+                await self.journal.record_conflicts(conflicts)
+        for conflict in conflicts:
+            logger.warning(
+                f"Double use detected on replay: ticket {conflict.ticket_id} "
+                f"seat={conflict.seat}, gate={conflict.gate} journaled at "
+                f"{conflict.journaled_used_at}, database has status={conflict.status} "
+                f"used_at={conflict.used_at}"
+            )
+        return conflicts
+
+    async def refresh_cache(self) -> None:
+        if self.journal.has_pending():
+            return  # the database does not know these scans yet
+        if not self.ticket_cache.owns_snapshot():
+            # another worker of this host refreshes the shared snapshot, this one maps it
+            self.ticket_cache.reload_snapshot()
+            return
+        changed_since: datetime | None = (
+            self.__refreshed_until - timedelta(seconds=self.cache_refresh_overlap_seconds)
+            if self.__refreshed_until is not None
+            else None
+        )
+        tickets: list[Ticket] = await self.ticket_repo.list_scannable_tickets(changed_since)
+        if self.journal.has_pending():
+            return
+        if changed_since is None:
+            self.ticket_cache.replace_all(tickets)
+        else:
+            self.ticket_cache.merge(tickets)
+        self.__refreshed_until = max(
+            (ticket.updated_at for ticket in tickets if ticket.updated_at is not None),
+            default=self.__refreshed_until,
+        )
+        logger.info(
+            f"Degraded mode cache refreshed with {len(tickets)} tickets "
+            f"({'full' if changed_since is None else 'incremental'})"
+        )
+
+    def start(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run_periodically())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.__task
+            self.__task = None
+        self.journal.close()
+        self.ticket_cache.close()
+
+    async def __run_periodically(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_refresh: float = loop.time()
+        while True:
+            try:
+                await self.replay()
+                if loop.time() >= next_refresh:
+                    await self.refresh_cache()
+                    next_refresh = loop.time() + self.cache_refresh_seconds
+            except DbOperationException as err:
+                logger.warning(f"Database still unavailable for replay: {err}")
+            await asyncio.sleep(self.replay_interval_seconds)
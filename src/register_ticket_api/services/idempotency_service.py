@@ -0,0 +1,87 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from hashlib import sha256
+from typing import ClassVar
+
+from loguru import logger
+
+from register_ticket_api.entities import IdempotencyRecord
+from register_ticket_api.exceptions import (
+    AppValidationException,
+    DbOperationException,
+    DeadlineExceededException,
+)
+from register_ticket_api.interfaces import IIdempotencyStore
+
+
+@dataclass
+class IdempotencyService:
+    store: IIdempotencyStore
+    __in_flight: dict[str, asyncio.Future] = field(default_factory=dict, init=False, repr=False)
+
+    MAX_KEY_LENGTH: ClassVar[int] = 255
+    FIRST_NON_REPLAYABLE_STATUS: ClassVar[int] = 500  # server errors are worth retrying
+
+    @staticmethod
+    def fingerprint(*parts: str) -> str:
+        return sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    async def execute(
+        self,
+        key: str,
+        request_fingerprint: str,
+        operation: Callable[[], Awaitable[IdempotencyRecord]],
+    ) -> tuple[IdempotencyRecord, bool]:
+        if not key or len(key) > self.MAX_KEY_LENGTH:
+            raise AppValidationException(
+                f"Idempotency key must have between 1 and {self.MAX_KEY_LENGTH} characters"
+            )
+
+        # same key retried while the first attempt still runs, wait for its outcome
+        while (in_flight := self.__in_flight.get(key)) is not None:
+            await asyncio.wait({in_flight})
+            if not in_flight.cancelled():
+                return self.__check_fingerprint(in_flight.result(), request_fingerprint), True
+
+        stored: IdempotencyRecord | None = await self.__get_stored(key)
+        if stored is not None:
+            logger.info(f"Replaying stored response for idempotency key {key}")
+            return self.__check_fingerprint(stored, request_fingerprint), True
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.__in_flight[key] = future
+        try:
+            record: IdempotencyRecord = await operation()
+            if record.status_code < self.FIRST_NON_REPLAYABLE_STATUS:
+                await self.__save(key, record)
+        except BaseException:
+            future.cancel()  # waiters run the operation again themselves
+            raise
+        else:
+            future.set_result(record)
+        finally:
+            del self.__in_flight[key]
+        return record, False
+
+    def __check_fingerprint(
+        self, record: IdempotencyRecord, request_fingerprint: str
+    ) -> IdempotencyRecord:
+        if record.request_fingerprint != request_fingerprint:
+            raise AppValidationException("Idempotency key was already used for another request")
+        return record
+
+    async def __get_stored(self, key: str) -> IdempotencyRecord | None:
+        try:
+            return await self.store.get(key)
+        except DbOperationException as err:
+            # a broken shared store must not block scans, it only loses the replay
+            logger.warning(f"Idempotency store lookup failed for key {key}: {err}")
+            return None
+
+    async def __save(self, key: str, record: IdempotencyRecord) -> None:
+        try:
+            await self.store.save(key, record)
+        except (DbOperationException, DeadlineExceededException) as err:
+            # the operation already happened, its response must still reach the client
+            logger.warning(f"Idempotency store save failed for key {key}: {err}")
@@ -0,0 +1,36 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import ClassVar
+
+from register_ticket_api.entities import GateStats
+from register_ticket_api.exceptions import AppValidationException
+from register_ticket_api.interfaces import IStatsRepository
+
+
+@dataclass
+class StatsService:
+    stats_repo: IStatsRepository
+    cache_ttl_seconds: float = 1.0
+    # window minutes -> (expires at, stats), dashboards polling every second share one read
+    __cache: dict[int, tuple[float, list[GateStats]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    MAX_WINDOW_MINUTES: ClassVar[int] = 24 * 60
+
+    async def get_gate_stats(self, window_minutes: int) -> list[GateStats]:
+        if not 1 <= window_minutes <= self.MAX_WINDOW_MINUTES:
+            raise AppValidationException(
+                f"Window must be between 1 and {self.MAX_WINDOW_MINUTES} minutes"
+            )
+        cached = self.__cache.get(window_minutes)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        since_minute: datetime = datetime.now().replace(second=0, microsecond=0) - timedelta(
+            minutes=window_minutes - 1
+        )
+        stats: list[GateStats] = await self.stats_repo.get_gate_stats(since_minute)
+        self.__cache[window_minutes] = (time.monotonic() + self.cache_ttl_seconds, stats)
+        return stats
@@ -1,21 +1,74 @@
-from base64 import b32encode, b64decode
+import time
+from base64 import b32encode, b64decode, urlsafe_b64decode, urlsafe_b64encode
 from dataclasses import dataclass
-from typing import ClassVar
+from datetime import datetime
+from typing import ClassVar, Literal
+from uuid import UUID
 
 import pyotp
 from loguru import logger
 
-from register_ticket_api.entities import AttendanceLog, Ticket, User
-from register_ticket_api.exceptions import AppValidationException, DbOperationException
-from register_ticket_api.interfaces import ITicketRepository, IUserRepository
+from register_ticket_api.entities import (
+    AttendanceEvent,
+    AttendanceLog,
+    Ticket,
+    TicketChange,
+    TicketPage,
+    TicketRevocationResult,
+    TicketTokenClaims,
+    User,
+)
+from register_ticket_api.exceptions import (
+    AppValidationException,
+    CircuitOpenException,
+    DbOperationException,
+    InvalidCredentialsException,
+    InvalidTotpCodeException,
+    TooManyAttemptsException,
+)
+from register_ticket_api.infraestructure import (
+    AttendanceRollupBuffer,
+    PasswordHasher,
+    RecentScanCache,
+    TicketStatusHub,
+    TicketStatusSubscription,
+    TicketTokenCodec,
+    TotpAttemptThrottle,
+)
+from register_ticket_api.instrumentation import timed_span
+from register_ticket_api.interfaces import (
+    IAttendanceEventSink,
+    ITicketRepository,
+    IUserRepository,
+)
+from register_ticket_api.services.degraded_attendance_service import DegradedAttendanceService
 
 
 @dataclass
 class TicketService:
     user_repo: IUserRepository
     ticket_repo: ITicketRepository
+    rollup_buffer: AttendanceRollupBuffer | None = None
+    degraded_attendance: DegradedAttendanceService | None = None
+    event_sink: IAttendanceEventSink | None = None
+    ticket_token_codec: TicketTokenCodec | None = None
+    recent_scans: RecentScanCache | None = None
+    attempt_throttle: TotpAttemptThrottle | None = None
+    status_hub: TicketStatusHub | None = None
+    password_hasher: PasswordHasher | None = None
 
     TOTP_INTERVAL_SECONDS: ClassVar[int] = 60
+    MAX_REVOCATION_BATCH: ClassVar[int] = 10_000
+    MAX_PAGE_SIZE: ClassVar[int] = 100
+    # gates of a venue share a NAT address, an address only counts for scans sent without a
+    # device_id and with a much higher limit than a ticket or a device
+    ANONYMOUS_CLIENT_FAILURE_FACTOR: ClassVar[int] = 10
+    # the breaker is open, or a connection couldn't be opened or acquired in time
+    UNAVAILABLE_DB_ERRORS: ClassVar[tuple[type[Exception], ...]] = (
+        CircuitOpenException,
+        OSError,
+        TimeoutError,
+    )
 
     async def register_ticket(self, username: str, ticket: Ticket) -> Ticket:
         logger.info(
@@ -67,6 +120,12 @@ class TicketService:
                 f"Ticket {existent_ticket.id} successfully registered for user={username}, "
                 f"seed={existent_ticket.seed}"
             )
+            if self.degraded_attendance is not None:
+                self.degraded_attendance.remember(registered_ticket)
+            if self.ticket_token_codec is not None:
+                registered_ticket = registered_ticket.model_copy(
+                    update={"token": self.ticket_token_codec.issue(registered_ticket)}
+                )
         except DbOperationException as err:
             logger.exception(
                 f"Database error while registering ticket "
@@ -75,14 +134,48 @@ class TicketService:
             raise AppValidationException(f"Error registering ticket: {err}") from err
         return registered_ticket
 
-    async def log_attendance(self, attendance: AttendanceLog) -> Ticket:
+    async def log_attendance(
+        self, attendance: AttendanceLog, client_id: str | None = None
+    ) -> Ticket:
+        started_at: float = time.perf_counter()
+        # checked before any lookup or TOTP work, a guessing client gets nothing more from us
+        throttle_keys: list[str] = self.__throttle_keys(attendance)
+        client_key: str | None = self.__anonymous_client_key(attendance, client_id)
+        try:
+            self.__check_throttle(throttle_keys, client_key)
+            attended_ticket: Ticket = await self.__attend(attendance)
+        except TooManyAttemptsException as err:
+            logger.warning(
+                f"Attendance throttled: seat={attendance.seat}, gate={attendance.gate}, "
+                f"device={attendance.device_id}, client={client_id} (possible brute force)"
+            )
+            self.__emit_attendance_event(attendance, started_at, "rejected", reason=str(err))
+            raise
+        except InvalidTotpCodeException as err:
+            if self.attempt_throttle is not None:
+                self.attempt_throttle.record_failure(
+                    [*throttle_keys, client_key] if client_key else throttle_keys
+                )
+            self.__emit_attendance_event(attendance, started_at, "rejected", reason=err.message)
+            raise
+        except AppValidationException as err:
+            self.__emit_attendance_event(attendance, started_at, "rejected", reason=err.message)
+            raise
+        except Exception as err:
+            self.__emit_attendance_event(attendance, started_at, "error", reason=str(err))
+            raise
+        self.__emit_attendance_event(
+            attendance, started_at, "accepted", ticket_id=attended_ticket.id
+        )
+        return attended_ticket
+
+    async def __attend(self, attendance: AttendanceLog) -> Ticket:
         logger.info(
             f"Attendance attempt: seat={attendance.seat}, "
             f"gate={attendance.gate}, totp={attendance.totp_code}"
         )
-        existent_ticket: Ticket | None = await self.ticket_repo.get_by_ticket_details(
-            seat=attendance.seat, gate=attendance.gate
-        )
+        await self.__reject_recent_scan(attendance)
+        existent_ticket, source = await self.__get_ticket_to_attend(attendance)
         if not existent_ticket:
             logger.warning(
                 f"Attendance failed: no ticket found for "
@@ -105,26 +198,22 @@ class TicketService:
                 f"Attendance failed: ticket {existent_ticket.id} "
                 f"has invalid status={existent_ticket.status}"
             )
+            await self.__remember_used_ticket(existent_ticket)
             raise AppValidationException("Invalid ticket")
         elif existent_ticket.seed is None:
             logger.error(f"Attendance failed: ticket {existent_ticket.id} has no seed")
             raise AppValidationException("Ticket has no seed")
 
-        seed_bytes: bytes = b64decode(existent_ticket.seed)
-        seed_base32: str = b32encode(seed_bytes).decode("utf-8")
-        totp = pyotp.TOTP(
-            seed_base32, interval=self.TOTP_INTERVAL_SECONDS
-        )  # after specified seconds token expires
-        if not totp.verify(attendance.totp_code, valid_window=0):
-            logger.warning(
-                f"Attendance rejected: invalid TOTP code={attendance.totp_code} "
-                f"for ticket {existent_ticket.id} "
-                "(possible fraud attempt)"
-            )
-            raise AppValidationException("Invalid TOTP ticket code.")
+        await self.__verify_totp(existent_ticket, existent_ticket.seed, attendance)
+        if source == "cache":
+            return await self.__journal_cached_attendance(existent_ticket)
+        if source == "token":
+            return await self.__mark_token_ticket_as_used(existent_ticket)
 
         try:
-            updated: bool = await self.ticket_repo.mark_ticket_as_used(existent_ticket.id)
+            updated: bool = await self.ticket_repo.mark_ticket_as_used(
+                existent_ticket.id, gate=existent_ticket.gate
+            )
             updated_ticket: Ticket | None = await self.ticket_repo.get_by_ticket_details(
                 seat=attendance.seat, gate=attendance.gate
             )
@@ -134,6 +223,7 @@ class TicketService:
                 f"Attendance success: ticket {updated_ticket.id} "
                 f"marked as used for user {updated_ticket.user_id}"
             )
+            await self.__track_attended_ticket(updated_ticket)
         except DbOperationException as err:
             logger.exception(
                 f"Database error while marking attendance for ticket {existent_ticket.id}: {err}"
@@ -141,6 +231,257 @@ class TicketService:
             raise AppValidationException(f"Error creating user: {err}") from err
         return updated_ticket
 
+    async def __verify_totp(self, ticket: Ticket, seed: str, attendance: AttendanceLog) -> None:
+        totp_code: str = attendance.totp_code
+        with timed_span("totp_verify"):
+            seed_bytes: bytes = b64decode(seed)
+            seed_base32: str = b32encode(seed_bytes).decode("utf-8")
+            totp = pyotp.TOTP(
+                seed_base32, interval=self.TOTP_INTERVAL_SECONDS
+            )  # after specified seconds token expires
+            valid_totp: bool = totp.verify(totp_code, valid_window=0)
+        if not valid_totp:
+            logger.warning(
+                f"Attendance rejected: invalid TOTP code={totp_code} "
+                f"for ticket {ticket.id} "
+                "(possible fraud attempt)"
+            )
+            if self.recent_scans is not None:
+                await self.recent_scans.remember_rejected_code(
+                    attendance.seat, attendance.gate, totp_code
+                )
+            raise InvalidTotpCodeException()
+
+    async def revoke_tickets(self, ticket_ids: list[UUID]) -> TicketRevocationResult:
+        unique_ids: list[UUID] = list(dict.fromkeys(ticket_ids))
+        if not unique_ids:
+            raise AppValidationException("No tickets to revoke")
+        if len(unique_ids) > self.MAX_REVOCATION_BATCH:
+            raise AppValidationException(
+                f"At most {self.MAX_REVOCATION_BATCH} tickets can be revoked at once"
+            )
+        logger.info(f"Revoking {len(unique_ids)} tickets")
+        changes: list[TicketChange] = await self.ticket_repo.revoke_tickets(unique_ids)
+        revoked_ids: set[UUID] = {change.ticket_id for change in changes}
+        logger.info(f"Revoked {len(revoked_ids)} of {len(unique_ids)} tickets")
+        return TicketRevocationResult(
+            revoked=[ticket_id for ticket_id in unique_ids if ticket_id in revoked_ids],
+            not_revoked=[ticket_id for ticket_id in unique_ids if ticket_id not in revoked_ids],
+        )
+
+    async def get_revoked_tickets(self, gate: str) -> list[TicketChange]:
+        revoked: list[TicketChange] = await self.ticket_repo.get_revoked_tickets(gate)
+        return revoked
+
+    async def list_user_tickets(
+        self, username: str, limit: int, cursor: str | None = None, status: str | None = None
+    ) -> TicketPage:
+        if not 1 <= limit <= self.MAX_PAGE_SIZE:
+            raise AppValidationException(f"Limit must be between 1 and {self.MAX_PAGE_SIZE}")
+        after: tuple[datetime, UUID] | None = self.__decode_cursor(cursor) if cursor else None
+        existent_user: User | None = await self.user_repo.get_by_username(username)
+        if not existent_user or not existent_user.id:
+            raise AppValidationException(f"User {username} does not exist.")
+
+        # one extra row tells whether another page exists without a count query
+        tickets: list[Ticket] = await self.ticket_repo.list_by_user(
+            existent_user.id, limit + 1, after=after, status=status
+        )
+        next_cursor: str | None = None
+        if len(tickets) > limit:
+            tickets = tickets[:limit]
+            next_cursor = self.__encode_cursor(tickets[-1])
+        return TicketPage(tickets=tickets, next_cursor=next_cursor)
+
+    async def get_user_ticket(self, username: str, ticket_id: UUID) -> Ticket | None:
+        ticket: Ticket | None = await self.ticket_repo.get_user_ticket(ticket_id, username)
+        return ticket
+
+    async def get_user_ticket_version(self, username: str, ticket_id: UUID) -> int | None:
+        version: int | None = await self.ticket_repo.get_user_ticket_version(ticket_id, username)
+        return version
+
+    async def subscribe_to_ticket_changes(
+        self, username: str, password: str
+    ) -> TicketStatusSubscription:
+        # changes carry seat, gate and user id, only the owner of the tickets may follow them
+        if self.status_hub is None or self.password_hasher is None:
+            raise AppValidationException("Ticket change events are disabled")
+        existent_user: User | None = await self.user_repo.get_by_username(username)
+        if (
+            not existent_user
+            or not existent_user.id
+            or not await self.password_hasher.verify(password, existent_user.password)
+        ):
+            raise InvalidCredentialsException()
+        return self.status_hub.subscribe(existent_user.id)
+
+    def __encode_cursor(self, ticket: Ticket) -> str:
+        if ticket.created_at is None or ticket.id is None:
+            raise AppValidationException("Ticket cannot be paginated")
+        raw: str = f"{ticket.created_at.isoformat()}|{ticket.id}"
+        return urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def __decode_cursor(self, cursor: str) -> tuple[datetime, UUID]:
+        try:
+            raw: str = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+            created_at, ticket_id = raw.split("|")
+            return datetime.fromisoformat(created_at), UUID(ticket_id)
+        except ValueError as err:
+            raise AppValidationException("Invalid cursor") from err
+
+    async def __get_ticket_to_attend(
+        self, attendance: AttendanceLog
+    ) -> tuple[Ticket | None, Literal["database", "cache", "token"]]:
+        if attendance.token is not None and self.ticket_token_codec is not None:
+            return self.__get_token_ticket(attendance), "token"
+        try:
+            existent_ticket: Ticket | None = await self.ticket_repo.get_by_ticket_details(
+                seat=attendance.seat, gate=attendance.gate
+            )
+        except DbOperationException as err:
+            if self.degraded_attendance is None:
+                raise
+            # the gate keeps admitting people, the scan is replayed once the database is back
+            logger.warning(
+                f"Database unavailable, validating seat={attendance.seat}, "
+                f"gate={attendance.gate} against the local cache: {err}"
+            )
+            return self.degraded_attendance.get_cached_ticket(
+                attendance.seat, attendance.gate
+            ), "cache"
+        return existent_ticket, "database"
+
+    async def __journal_cached_attendance(self, ticket: Ticket) -> Ticket:
+        if self.degraded_attendance is None:
+            raise AppValidationException("Degraded mode is disabled")
+        journaled_ticket: Ticket = await self.degraded_attendance.journal_attendance(ticket)
+        await self.__remember_used_ticket(journaled_ticket)
+        return journaled_ticket
+
+    def __get_token_ticket(self, attendance: AttendanceLog) -> Ticket:
+        if attendance.token is None or self.ticket_token_codec is None:
+            raise AppValidationException("Ticket tokens are disabled")
+        with timed_span("ticket_token_verify"):
+            claims: TicketTokenClaims = self.ticket_token_codec.verify(attendance.token)
+        if claims.seat != attendance.seat or claims.gate != attendance.gate:
+            raise AppValidationException("Ticket token does not match the scanned seat and gate")
+        if self.degraded_attendance is not None:
+            # revocations and scans already seen by this worker are rejected without the DB
+            cached: Ticket | None = self.degraded_attendance.get_cached_ticket(
+                claims.seat, claims.gate
+            )
+            if cached is not None and cached.id == claims.ticket_id and cached.status != "valid":
+                return cached
+        return Ticket(
+            id=claims.ticket_id,
+            user_id=claims.user_id,
+            seat=claims.seat,
+            gate=claims.gate,
+            seed=claims.seed,
+        )
+
+    async def __mark_token_ticket_as_used(self, ticket: Ticket) -> Ticket:
+        # the only database round trip of a token scan, the function rejects used or
+        # revoked tickets atomically
+        if ticket.id is None:
+            raise AppValidationException("Invalid ticket token")
+        try:
+            updated: bool = await self.ticket_repo.mark_ticket_as_used(ticket.id, gate=ticket.gate)
+        except DbOperationException as err:
+            # only a database out of reach is journaled, any other failure says nothing
+            # about the ticket still being valid and must not let it in
+            if self.degraded_attendance is None or not isinstance(
+                err.original_exception, self.UNAVAILABLE_DB_ERRORS
+            ):
+                raise AppValidationException(f"Error marking attendance: {err}") from err
+            logger.warning(f"Database unavailable, journaling token scan of {ticket.id}: {err}")
+            return await self.degraded_attendance.journal_attendance(ticket)
+        if not updated:
+            logger.warning(f"Attendance failed: ticket {ticket.id} is already used or revoked")
+            await self.__remember_used_ticket(ticket)
+            raise AppValidationException("Invalid ticket")
+        used_ticket: Ticket = ticket.model_copy(
+            update={"status": "used", "used_at": datetime.now()}
+        )
+        logger.info(f"Attendance success: ticket {ticket.id} marked as used from its token")
+        await self.__track_attended_ticket(used_ticket)
+        return used_ticket
+
+    def __emit_attendance_event(
+        self,
+        attendance: AttendanceLog,
+        started_at: float,
+        outcome: Literal["accepted", "rejected", "error"],
+        ticket_id: UUID | None = None,
+        reason: str | None = None,
+    ) -> None:
+        if self.event_sink is None:
+            return
+        self.event_sink.emit(
+            AttendanceEvent(
+                timestamp=datetime.now(),
+                seat=attendance.seat,
+                gate=attendance.gate,
+                device_id=attendance.device_id,
+                ticket_id=ticket_id,
+                outcome=outcome,
+                reason=reason,
+                latency_ms=(time.perf_counter() - started_at) * 1000,
+            )
+        )
+
+    def __check_throttle(self, throttle_keys: list[str], client_key: str | None) -> None:
+        if self.attempt_throttle is None:
+            return
+        self.attempt_throttle.check(throttle_keys)
+        if client_key:
+            self.attempt_throttle.check(
+                [client_key],
+                max_failures=(
+                    self.attempt_throttle.max_failures * self.ANONYMOUS_CLIENT_FAILURE_FACTOR
+                ),
+            )
+
+    def __throttle_keys(self, attendance: AttendanceLog) -> list[str]:
+        keys: list[str] = [f"ticket:{attendance.gate}:{attendance.seat}"]
+        if attendance.device_id:
+            keys.append(f"device:{attendance.device_id}")
+        return keys
+
+    def __anonymous_client_key(
+        self, attendance: AttendanceLog, client_id: str | None
+    ) -> str | None:
+        if attendance.device_id or not client_id:
+            return None
+        return f"client:{client_id}"
+
+    async def __reject_recent_scan(self, attendance: AttendanceLog) -> None:
+        if self.recent_scans is None:
+            return
+        with timed_span("recent_scan_lookup"):
+            rejection: str | None = await self.recent_scans.get_rejection(
+                attendance.seat, attendance.gate, attendance.totp_code
+            )
+        if rejection is not None:
+            logger.warning(
+                f"Attendance rejected: seat={attendance.seat}, gate={attendance.gate} "
+                f"was scanned moments ago -> {rejection}"
+            )
+            raise AppValidationException(rejection)
+
+    async def __remember_used_ticket(self, ticket: Ticket) -> None:
+        # revoked tickets are remembered too, like used ones they can't become valid again
+        if self.recent_scans is not None:
+            await self.recent_scans.remember_used_ticket(ticket.seat, ticket.gate)
+
+    async def __track_attended_ticket(self, ticket: Ticket) -> None:
+        await self.__remember_used_ticket(ticket)
+        if self.degraded_attendance is not None:
+            self.degraded_attendance.remember(ticket)
+        if self.rollup_buffer is not None:
+            self.rollup_buffer.record_entry(ticket.gate, ticket.used_at or datetime.now())
+
     def __is_valid_ticket_details(self, ticket: Ticket) -> tuple[bool, str]:
         # TODO: Here event validation logic
         return (True, "")
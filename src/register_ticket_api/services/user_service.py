@@ -1,14 +1,33 @@
 import re
+from collections.abc import AsyncIterable
 from dataclasses import dataclass
+from typing import ClassVar
 
-from register_ticket_api.entities import User
+from register_ticket_api.entities import User, UserImportResult
 from register_ticket_api.exceptions import AppValidationException, DbOperationException
+from register_ticket_api.infraestructure import PasswordHasher
 from register_ticket_api.interfaces import IUserRepository
 
 
 @dataclass
 class UserService:
     user_repo: IUserRepository
+    password_hasher: PasswordHasher
+    import_batch_size: int = 5000
+    # compiled once, bulk imports validate hundreds of thousands of rows
+    # letras, números, guion y guion bajo. De 3 a 10 caracteres
+    USERNAME_PATTERN: ClassVar[re.Pattern[str]] = re.compile(r"^[A-Za-z0-9_-]{3,10}$")
+    MIN_PASWORD_LENGTH: ClassVar[int] = 8
+    # al menos 8 caracteres, una mayúscula, una minúscula, un dígito y un caracter especial
+    PASSWORD_PATTERN: ClassVar[re.Pattern[str]] = re.compile(
+        r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&_\-])[A-Za-z\d@$!%*?&_\-]{8,}$"
+    )
+    LOWERCASE_PATTERN: ClassVar[re.Pattern[str]] = re.compile(r"[a-z]")
+    UPPERCASE_PATTERN: ClassVar[re.Pattern[str]] = re.compile(r"[A-Z]")
+    DIGIT_PATTERN: ClassVar[re.Pattern[str]] = re.compile(r"\d")
+    SPECIAL_CHAR_PATTERN: ClassVar[re.Pattern[str]] = re.compile(r"[@$!%*?&_\-]")
+    IMPORT_HEADER: ClassVar[list[str]] = ["username", "password"]
+    MAX_IMPORT_ERRORS: ClassVar[int] = 100
 
     async def create_user(self, new_user: User) -> User:
         valid_user_details, err_msg = self.__is_valid_user_details(new_user)
@@ -19,8 +38,11 @@ class UserService:
         if existent_user:
             raise AppValidationException("Can't create taken username")
 
+        password_hash: str = await self.password_hasher.hash(new_user.password)
         try:
-            created: bool = await self.user_repo.create_user(new_user)
+            created: bool = await self.user_repo.create_user(
+                new_user.model_copy(update={"password": password_hash})
+            )
             created_user: User | None = await self.user_repo.get_by_username(new_user.username)
             if not created or not created_user:
                 raise AppValidationException("Error creating user.")
@@ -28,21 +50,61 @@ class UserService:
             raise AppValidationException(f"Error creating user: {err}") from err
         return created_user
 
-    def __is_valid_user_details(self, user: User) -> tuple[bool, str]:
-        USERNAME_PATTERN: str = (
-            r"^[A-Za-z0-9_-]{3,10}$"  # letras, números, guion y guion bajo. De 3 a 10 caracteres
+    async def import_users(self, rows: AsyncIterable[list[str]]) -> UserImportResult:
+        result = UserImportResult()
+        batch: list[tuple[str, str]] = []
+        line: int = 0
+        async for row in rows:
+            line += 1
+            if not row or (line == 1 and [v.strip().lower() for v in row] == self.IMPORT_HEADER):
+                continue
+            result.received += 1
+            user: User | None = self.__parse_import_row(row, line, result)
+            if user is None:
+                continue
+            batch.append((user.username, user.password))
+            if len(batch) >= self.import_batch_size:
+                await self.__import_batch(batch, result)
+                batch = []
+        await self.__import_batch(batch, result)
+        return result
+
+    def __parse_import_row(
+        self, row: list[str], line: int, result: UserImportResult
+    ) -> User | None:
+        err_msg: str = "expected username,password"
+        if len(row) == len(self.IMPORT_HEADER):
+            user = User(username=row[0].strip(), password=row[1])
+            valid_user_details, err_msg = self.__is_valid_user_details(user)
+            if valid_user_details:
+                return user
+        result.rejected += 1
+        if len(result.errors) < self.MAX_IMPORT_ERRORS:
+            result.errors.append(f"line {line}: {err_msg}")
+        return None
+
+    async def __import_batch(self, batch: list[tuple[str, str]], result: UserImportResult) -> None:
+        if not batch:
+            return
+        password_hashes: list[str] = await self.password_hasher.hash_many(
+            [password for _, password in batch]
         )
-        MIN_PASWORD_LENGTH: int = 8
-        # al menos 8 caracteres, una mayúscula, una minúscula, un dígito y un caracter especial
-        PASSWORD_PATTERN: str = (
-            r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&_\-])[A-Za-z\d@$!%*?&_\-]{8,}$"  # noqa: S105
+        created, updated = await self.user_repo.upsert_users(
+            [
+                (username, password_hash)
+                for (username, _), password_hash in zip(batch, password_hashes, strict=True)
+            ]
         )
+        result.created += created
+        result.updated += updated
+
+    def __is_valid_user_details(self, user: User) -> tuple[bool, str]:
         is_valid, msg = True, "✅ Usuario y contraseña válidos."
         if not user.username:
             is_valid, msg = False, "Missing username."
         if not user.password:
             is_valid, msg = False, "Missing password."
-        if not re.match(USERNAME_PATTERN, user.username):
+        if not self.USERNAME_PATTERN.match(user.username):
             return (
                 False,
                 (
@@ -50,19 +112,20 @@ class UserService:
                     "guiones (-, _) y tener entre 3 y 20 caracteres."
                 ),
             )
-        if not re.match(PASSWORD_PATTERN, user.password):
-            if len(user.password) < MIN_PASWORD_LENGTH:
+        if not self.PASSWORD_PATTERN.match(user.password):
+            if len(user.password) < self.MIN_PASWORD_LENGTH:
                 is_valid, msg = False, "❌ La contraseña debe tener al menos 8 caracteres."
-            elif not re.search(r"[a-z]", user.password):
+            elif not self.LOWERCASE_PATTERN.search(user.password):
                 is_valid, msg = False, "❌ La contraseña debe incluir al menos una letra minúscula."
-            elif not re.search(r"[A-Z]", user.password):
+            elif not self.UPPERCASE_PATTERN.search(user.password):
                 is_valid, msg = False, "❌ La contraseña debe incluir al menos una letra mayúscula."
-            elif not re.search(r"\d", user.password):
+            elif not self.DIGIT_PATTERN.search(user.password):
                 is_valid, msg = False, "❌ La contraseña debe incluir al menos un número."
-            elif not re.search(r"[@$!%*?&_\-]", user.password):
+            elif not self.SPECIAL_CHAR_PATTERN.search(user.password):
                 is_valid, msg = (
                     False,
                     "❌ La contraseña debe incluir al menos un carácter especial (@$!%*?&_-).",
                 )
-            is_valid, msg = False, "❌ La contraseña no cumple con los requisitos de seguridad."
+            else:
+                is_valid, msg = False, "❌ La contraseña no cumple con los requisitos de seguridad."
         return (is_valid, msg)
@@ -0,0 +1,326 @@
+import heapq
+import itertools
+import json
+import random
+import time
+from argparse import ArgumentParser, Namespace
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import get_args
+
+from client.arrival_schedule import ArrivalPattern, build_arrival_schedule
+from client.latency_recorder import LatencyRecorder
+from simulation.service_time import ServiceProfile, ServiceTime
+
+DEFAULT_GATES: str = "north=20000,south=25000,east=15000"
+# a person at the lane: walking up, showing the code, the turnstile (the API call not included)
+DEFAULT_SCAN_MS: str = "p0=1500,p50=2500,p90=4000,p99=8000"
+DEFAULT_API_MS: str = "p0=0.5,p50=1.5,p90=3,p99=8"
+DEFAULT_DB_MS: str = "p0=0.3,p50=0.8,p90=1.5,p99=5"
+# get_by_ticket_details, then mark_ticket_as_used
+DEFAULT_DB_ROUND_TRIPS: float = 2.0
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    gates: dict[str, int]  # gate -> attendees
+    lanes_per_gate: int
+    workers: int  # WEB_CONCURRENCY
+    pool_size: int  # DB_POOL_MAX_SIZE, every worker has its own pool
+    scan_time: ServiceTime
+    profile: ServiceProfile
+    arrival_pattern: ArrivalPattern = "surge"
+    ingress_seconds: float = 3600.0
+
+
+class _Gate:
+    # one line per gate feeding all of its lanes
+    def __init__(self, name: str, lanes: int) -> None:
+        self.name = name
+        self.lanes = lanes
+        self.free_lanes = lanes
+        self.line: deque[float] = deque()
+        self.longest_line: int = 0
+        self.line_area: float = 0.0  # people x seconds, for the time averaged line length
+        self.line_changed_at: float = 0.0
+        self.lane_busy_seconds: float = 0.0
+        self.waits = LatencyRecorder()
+
+
+class _Scan:
+    __slots__ = ("api_at", "arrived_at", "gate", "lane_at", "round_trips", "worker")
+
+    def __init__(self, gate: _Gate, arrived_at: float, lane_at: float) -> None:
+        self.gate = gate
+        self.arrived_at = arrived_at
+        self.lane_at = lane_at
+        self.api_at: float = 0.0
+        self.worker: int = 0
+        self.round_trips: int = 0
+
+
+class GateSimulator:
+    # discrete events on a heap, no clock and no tasks: a 60k attendee ingress runs in a
+    # second or two, so whole grids of lanes, workers and pool sizes can be compared
+    def __init__(self, config: SimulationConfig, seed: int | None = None) -> None:
+        if config.lanes_per_gate < 1 or config.workers < 1 or config.pool_size < 1:
+            raise ValueError("Lanes, workers and pool size must be at least 1")
+        self.__config = config
+        self.__rng = random.Random(seed)  # noqa: S311
+        self.__events: list[tuple[float, int, Callable[[object], None], object]] = []
+        self.__sequence = itertools.count()
+        self.__now: float = 0.0
+        self.__gates: list[_Gate] = [_Gate(name, config.lanes_per_gate) for name in config.gates]
+        # a worker runs one request at a time on its event loop and waits for the database
+        # concurrently, its pool hands connections out in request order
+        self.__cpu_free_at: list[float] = [0.0] * config.workers
+        self.__cpu_busy_seconds: float = 0.0
+        self.__free_connections: list[int] = [config.pool_size] * config.workers
+        self.__connection_waiters: list[deque[tuple[_Scan, float]]] = [
+            deque() for _ in range(config.workers)
+        ]
+        self.__api_times = LatencyRecorder()
+        self.__pool_waits = LatencyRecorder()
+
+    def run(self) -> dict:
+        for gate in self.__gates:
+            for offset in self.__arrivals(self.__config.gates[gate.name]):
+                self.__schedule(offset, self.__arrive, gate)
+        while self.__events:
+            self.__now, _, handler, argument = heapq.heappop(self.__events)
+            handler(argument)
+        return self.__report()
+
+    def __arrivals(self, attendees: int) -> list[float]:
+        # the pattern gives the shape of the ingress, a random subset of it keeps the gate
+        # at exactly its number of attendees
+        if attendees < 1:
+            return []
+        duration: float = self.__config.ingress_seconds
+        rate: float = (attendees + 0.5) / duration
+        schedule: list[float] = build_arrival_schedule(
+            self.__config.arrival_pattern, rate, duration, rng=self.__rng
+        )
+        while len(schedule) < attendees:
+            rate *= 1.25
+            schedule = build_arrival_schedule(
+                self.__config.arrival_pattern, rate, duration, rng=self.__rng
+            )
+        if len(schedule) > attendees:
+            schedule = sorted(self.__rng.sample(schedule, attendees))
+        return schedule
+
+    def __schedule(self, at: float, handler: Callable, argument: object) -> None:
+        heapq.heappush(self.__events, (at, next(self.__sequence), handler, argument))
+
+    def __arrive(self, gate: _Gate) -> None:
+        self.__line_changes(gate)
+        gate.line.append(self.__now)
+        gate.longest_line = max(gate.longest_line, len(gate.line))
+        if gate.free_lanes:
+            self.__start_scan(gate)
+
+    def __start_scan(self, gate: _Gate) -> None:
+        self.__line_changes(gate)
+        arrived_at: float = gate.line.popleft()
+        gate.free_lanes -= 1
+        gate.waits.record(arrived_at, arrived_at, self.__now, gate.name)
+        scan = _Scan(gate, arrived_at, self.__now)
+        self.__schedule(
+            self.__now + self.__config.scan_time.sample(self.__rng), self.__call_api, scan
+        )
+
+    def __call_api(self, scan: _Scan) -> None:
+        profile: ServiceProfile = self.__config.profile
+        # the kernel spreads connections over the workers, not by their load
+        scan.worker = self.__rng.randrange(self.__config.workers)
+        scan.api_at = self.__now
+        whole_trips: int = int(profile.db_round_trips)
+        scan.round_trips = whole_trips + (
+            self.__rng.random() < profile.db_round_trips - whole_trips
+        )
+        cpu_seconds: float = profile.api.sample(self.__rng)
+        done_at: float = max(self.__now, self.__cpu_free_at[scan.worker]) + cpu_seconds
+        self.__cpu_free_at[scan.worker] = done_at
+        self.__cpu_busy_seconds += cpu_seconds
+        self.__schedule(done_at, self.__acquire, scan)
+
+    def __acquire(self, scan: _Scan) -> None:
+        if not scan.round_trips:
+            self.__finish(scan)
+        elif self.__free_connections[scan.worker]:
+            self.__free_connections[scan.worker] -= 1
+            self.__query(scan, self.__now)
+        else:
+            self.__connection_waiters[scan.worker].append((scan, self.__now))
+
+    def __query(self, scan: _Scan, requested_at: float) -> None:
+        self.__pool_waits.record(requested_at, requested_at, self.__now, "acquired")
+        self.__schedule(
+            self.__now + self.__config.profile.db_round_trip.sample(self.__rng),
+            self.__release,
+            scan,
+        )
+
+    def __release(self, scan: _Scan) -> None:
+        scan.round_trips -= 1
+        waiters: deque[tuple[_Scan, float]] = self.__connection_waiters[scan.worker]
+        if waiters:
+            self.__query(*waiters.popleft())
+        else:
+            self.__free_connections[scan.worker] += 1
+        self.__acquire(scan)
+
+    def __finish(self, scan: _Scan) -> None:
+        gate: _Gate = scan.gate
+        self.__api_times.record(scan.api_at, scan.api_at, self.__now, "ok")
+        gate.lane_busy_seconds += self.__now - scan.lane_at
+        gate.free_lanes += 1
+        if gate.line:
+            self.__start_scan(gate)
+
+    def __line_changes(self, gate: _Gate) -> None:
+        gate.line_area += len(gate.line) * (self.__now - gate.line_changed_at)
+        gate.line_changed_at = self.__now
+
+    def __report(self) -> dict:
+        ended_at: float = self.__now
+        gates: dict[str, dict] = {}
+        for gate in self.__gates:
+            summary: dict = gate.waits.summary()
+            gates[gate.name] = {
+                "attendees": summary["count"],
+                "lanes": gate.lanes,
+                "longest_line": gate.longest_line,
+                "mean_line": round(gate.line_area / ended_at, 1) if ended_at else 0.0,
+                "lane_utilization": round(gate.lane_busy_seconds / (gate.lanes * ended_at), 3)
+                if ended_at
+                else 0.0,
+                "wait_ms": summary["response_time_ms"],
+            }
+        config: SimulationConfig = self.__config
+        return {
+            "lanes_per_gate": config.lanes_per_gate,
+            "workers": config.workers,
+            "pool_size": config.pool_size,
+            "ingress_completed_seconds": round(ended_at, 1),
+            "gates": gates,
+            "api": {
+                "requests": len(self.__api_times),
+                "worker_utilization": round(
+                    self.__cpu_busy_seconds / (config.workers * ended_at), 3
+                )
+                if ended_at
+                else 0.0,
+                "response_time_ms": self.__api_times.summary()["response_time_ms"],
+                "pool_wait_ms": self.__pool_waits.summary()["response_time_ms"],
+            },
+        }
+
+
+def worst_wait_ms(result: dict, percentile: str = "p99") -> float:
+    return max(
+        (gate["wait_ms"].get(percentile, 0.0) for gate in result["gates"].values()),
+        default=0.0,
+    )
+
+
+def parse_counts(text: str) -> list[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def parse_gates(text: str) -> dict[str, int]:
+    gates: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, attendees = part.partition("=")
+        gates[name.strip()] = int(attendees)
+    return gates
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(
+        description="Simulates gate ingress to size lanes, API workers and pool per event"
+    )
+    parser.add_argument("--gates", type=parse_gates, default=DEFAULT_GATES, help="gate=attendees")
+    parser.add_argument("--lanes", type=parse_counts, default=[16, 24, 32], help="per gate, swept")
+    parser.add_argument("--workers", type=parse_counts, default=[2, 4], help="swept")
+    parser.add_argument("--pool-size", type=parse_counts, default=[5, 10], help="swept")
+    parser.add_argument("--pattern", choices=get_args(ArrivalPattern), default="surge")
+    parser.add_argument("--ingress-minutes", type=float, default=60.0)
+    parser.add_argument("--scan-ms", type=ServiceTime.parse, default=DEFAULT_SCAN_MS)
+    parser.add_argument(
+        "--api-ms", type=ServiceTime.parse, default=DEFAULT_API_MS, help="event loop time"
+    )
+    parser.add_argument(
+        "--db-ms", type=ServiceTime.parse, default=DEFAULT_DB_MS, help="per round trip"
+    )
+    parser.add_argument("--db-round-trips", type=float, default=DEFAULT_DB_ROUND_TRIPS)
+    parser.add_argument(
+        "--server-timing",
+        type=Path,
+        default=None,
+        help="file with one Server-Timing header per line, replaces the three above",
+    )
+    parser.add_argument("--target-wait-seconds", type=float, default=300.0, help="p99 in line")
+    parser.add_argument("--seed", type=int, default=None, help="same arrivals for every row")
+    parser.add_argument("--report", type=Path, default=None, help="JSON report path")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args: Namespace = parse_args()
+    profile = (
+        ServiceProfile.from_server_timing(args.server_timing.read_text().splitlines())
+        if args.server_timing is not None
+        else ServiceProfile(args.api_ms, args.db_ms, args.db_round_trips)
+    )
+    seed: int = args.seed if args.seed is not None else random.randrange(2**32)  # noqa: S311
+    results: list[dict] = []
+    # cheapest first, so the first row within target is the one to staff
+    for lanes, workers, pool_size in itertools.product(args.lanes, args.workers, args.pool_size):
+        config = SimulationConfig(
+            gates=args.gates,
+            lanes_per_gate=lanes,
+            workers=workers,
+            pool_size=pool_size,
+            scan_time=args.scan_ms,
+            profile=profile,
+            arrival_pattern=args.pattern,
+            ingress_seconds=args.ingress_minutes * 60,
+        )
+        started: float = time.perf_counter()
+        result: dict = GateSimulator(config, seed=seed).run()
+        results.append(result)
+        print(
+            f"lanes {lanes:>3} workers {workers:>3} pool {pool_size:>3}: "
+            f"p99 wait {worst_wait_ms(result) / 1000:>7.1f} s, "
+            f"longest line {max(gate['longest_line'] for gate in result['gates'].values()):>6}, "
+            f"api p99 {result['api']['response_time_ms'].get('p99', 0.0):>8.2f} ms, "
+            f"done at {result['ingress_completed_seconds'] / 60:>6.1f} min "
+            f"({time.perf_counter() - started:.1f} s to simulate)"
+        )
+    within_target: list[dict] = [
+        result for result in results if worst_wait_ms(result) <= args.target_wait_seconds * 1000
+    ]
+    if within_target:
+        best: dict = min(
+            within_target,
+            key=lambda result: (result["lanes_per_gate"], result["workers"], result["pool_size"]),
+        )
+        print(
+            f"smallest within {args.target_wait_seconds:g} s p99 wait: "
+            f"{best['lanes_per_gate']} lanes per gate, {best['workers']} workers, "
+            f"pool of {best['pool_size']}"
+        )
+    else:
+        print(f"no configuration keeps the p99 wait within {args.target_wait_seconds:g} s")
+    if args.report is not None:
+        args.report.write_text(
+            json.dumps({"seed": seed, "results": results}, indent=2, sort_keys=True)
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
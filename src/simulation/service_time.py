@@ -0,0 +1,131 @@
+import itertools
+import json
+import random
+import re
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+PERCENTILE_KEY: re.Pattern[str] = re.compile(r"p(\d+(?:\.\d+)?)")
+# Server-Timing entries as the API writes them, e.g. app;dur=4.10, db_mark_used;dur=1.20;desc="x2"
+SERVER_TIMING_METRIC: re.Pattern[str] = re.compile(
+    r'\s*([\w.-]+);dur=(\d+(?:\.\d+)?)(?:;desc="x(\d+)")?\s*'
+)
+MAX_PERCENTILE: float = 100.0
+
+
+class ServiceTime:
+    # a duration distribution known by some of its percentiles, sampled by inverse transform
+    # with linear interpolation between them. Below the lowest known percentile every call
+    # takes that long, which overstates the fastest calls instead of inventing them
+    def __init__(self, percentiles_ms: dict[float, float]) -> None:
+        points: list[tuple[float, float]] = sorted(percentiles_ms.items())
+        if not points or not all(
+            0 <= percentile <= MAX_PERCENTILE and duration >= 0 for percentile, duration in points
+        ):
+            raise ValueError(
+                "Service times need percentiles in 0-100 and durations of 0 ms or more"
+            )
+        if any(later[1] < earlier[1] for earlier, later in itertools.pairwise(points)):
+            raise ValueError("Service time percentiles must not decrease")
+        self.__quantiles: list[float] = [percentile / 100 for percentile, _ in points]
+        self.__seconds: list[float] = [duration / 1000 for _, duration in points]
+
+    @classmethod
+    def constant(cls, duration_ms: float) -> "ServiceTime":
+        return cls({MAX_PERCENTILE: duration_ms})
+
+    @classmethod
+    def from_samples(cls, samples_ms: Iterable[float]) -> "ServiceTime":
+        ordered: list[float] = sorted(samples_ms)
+        if not ordered:
+            raise ValueError("At least one sample is needed for a service time")
+        last: int = max(len(ordered) - 1, 1)
+        return cls({MAX_PERCENTILE * rank / last: sample for rank, sample in enumerate(ordered)})
+
+    @classmethod
+    def from_summary(cls, distribution: dict[str, float]) -> "ServiceTime":
+        # a LatencyRecorder distribution, e.g. the service_time_ms of a load replayer report
+        percentiles_ms: dict[float, float] = {}
+        for key, duration in distribution.items():
+            match: re.Match[str] | None = PERCENTILE_KEY.fullmatch(key)
+            if match is not None:
+                percentiles_ms[float(match.group(1))] = duration
+            elif key == "max":
+                percentiles_ms[MAX_PERCENTILE] = duration
+        return cls(percentiles_ms)
+
+    @classmethod
+    def parse(cls, spec: str) -> "ServiceTime":
+        # "2.5" for a constant, "p50=1.2,p99=4,max=9", or "<report.json>:<operation>" to take
+        # the service times a load replayer run measured for that operation
+        if "=" in spec:
+            distribution: dict[str, float] = {}
+            for part in spec.split(","):
+                key, _, duration = part.partition("=")
+                distribution[key.strip()] = float(duration)
+            return cls.from_summary(distribution)
+        path, separator, operation = spec.rpartition(":")
+        if not separator:
+            return cls.constant(float(spec))
+        try:
+            report: dict = json.loads(Path(path).read_text())
+            return cls.from_summary(report["operations"][operation]["service_time_ms"])
+        except (OSError, KeyError, json.JSONDecodeError) as err:
+            raise ValueError(f"No service times for {operation} in {path}: {err}") from err
+
+    def sample(self, rng: random.Random) -> float:
+        # seconds
+        quantile: float = rng.random()
+        index: int = bisect_left(self.__quantiles, quantile)
+        if index == 0:
+            return self.__seconds[0]
+        if index == len(self.__quantiles):
+            return self.__seconds[-1]
+        low, high = self.__quantiles[index - 1], self.__quantiles[index]
+        fastest, slowest = self.__seconds[index - 1], self.__seconds[index]
+        return fastest + (slowest - fastest) * (quantile - low) / (high - low)
+
+
+@dataclass(frozen=True)
+class ServiceProfile:
+    # what one log_attendance costs the API: time on its worker's event loop, and the
+    # database round trips, each holding a pool connection
+    api: ServiceTime
+    db_round_trip: ServiceTime
+    db_round_trips: float = 2.0
+
+    @classmethod
+    def from_server_timing(cls, headers: Iterable[str]) -> "ServiceProfile":
+        # one Server-Timing header per attendance response: "app" is the whole request, the
+        # db_<statement> spans are the round trips and db_acquire the wait for a connection
+        api_ms: list[float] = []
+        round_trip_ms: list[float] = []
+        round_trips: int = 0
+        for header in headers:
+            spans: dict[str, tuple[float, int]] = {}
+            for metric in header.split(","):
+                match: re.Match[str] | None = SERVER_TIMING_METRIC.fullmatch(metric)
+                if match is not None:
+                    spans[match.group(1)] = (float(match.group(2)), int(match.group(3) or 1))
+            if "app" not in spans:
+                continue
+            queries: list[tuple[float, int]] = [
+                span
+                for name, span in spans.items()
+                if name.startswith("db_") and name != "db_acquire"
+            ]
+            database_ms: float = sum(duration for duration, _ in queries)
+            acquire_ms: float = spans.get("db_acquire", (0.0, 0))[0]
+            api_ms.append(max(spans["app"][0] - database_ms - acquire_ms, 0.0))
+            for duration, count in queries:
+                round_trip_ms.extend([duration / count] * count)
+                round_trips += count
+        if not api_ms or not round_trip_ms:
+            raise ValueError("No Server-Timing header with app and db_ spans found")
+        return cls(
+            api=ServiceTime.from_samples(api_ms),
+            db_round_trip=ServiceTime.from_samples(round_trip_ms),
+            db_round_trips=round_trips / len(api_ms),
+        )
@@ -72,6 +72,10 @@ resource "google_cloud_run_service" "event-access-cloud-run" {  # deploy image t
             name  = "DB_NAME"
             value = google_sql_database.database.name
         }
+        env {
+            name  = "MIGRATIONS_ON_STARTUP"
+            value = "apply" # pending migrations run under an advisory lock before serving
+        }
       }
     }
   }
@@ -0,0 +1,26 @@
+"""
+Integration tests for concurrent registrations and scans of the same ticket.
+"""
+
+import os
+
+import pytest
+
+from src.benchmarks.ticket_contention import Scenario, open_ticket_service, run_scenario
+
+CALLERS: int = 20
+
+
+@pytest.mark.parametrize("scenario", ["register", "attend"])
+async def test_same_ticket_succeeds_exactly_once(scenario: Scenario) -> None:
+    """Test only one of many simultaneous callers wins the ticket."""
+    db_context, ticket_service = await open_ticket_service(
+        host=os.getenv("POSTGRES_HOST", "localhost")
+    )
+    try:
+        result: dict = await run_scenario(ticket_service, db_context, scenario, CALLERS)
+    finally:
+        await db_context.close_pool()
+
+    assert result["succeeded"] == 1
+    assert sum(result["outcomes"].values()) == CALLERS
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from src.client.arrival_schedule import build_arrival_schedule
+
+RATE: float = 200.0
+DURATION_SECONDS: float = 10.0
+EXPECTED_ARRIVALS: int = 2000
+TOLERANCE: float = 0.1
+PEAK_RATE: float = 1000.0
+
+
+def test_constant_schedule_is_evenly_spaced() -> None:
+    """Test that a constant rate sends at fixed intervals."""
+    schedule: list[float] = build_arrival_schedule("constant", RATE, DURATION_SECONDS)
+
+    assert len(schedule) == EXPECTED_ARRIVALS
+    assert schedule[1] - schedule[0] == pytest.approx(1 / RATE)
+
+
+def test_poisson_schedule_keeps_the_average_rate() -> None:
+    """Test that random arrivals average the requested rate and stay ordered."""
+    schedule: list[float] = build_arrival_schedule(
+        "poisson",
+        RATE,
+        DURATION_SECONDS,
+        rng=random.Random(7),  # noqa: S311
+    )
+
+    assert len(schedule) == pytest.approx(EXPECTED_ARRIVALS, rel=TOLERANCE)
+    assert schedule == sorted(schedule)
+    assert schedule[0] >= 0
+    assert schedule[-1] < DURATION_SECONDS
+
+
+def test_surge_concentrates_arrivals_around_the_peak() -> None:
+    """Test that a surge sends far more requests around its peak than at the edges."""
+    schedule: list[float] = build_arrival_schedule(
+        "surge",
+        RATE,
+        DURATION_SECONDS,
+        peak_rate=PEAK_RATE,
+        peak_at_seconds=DURATION_SECONDS / 2,
+        peak_width_seconds=0.5,
+        rng=random.Random(7),  # noqa: S311
+    )
+
+    at_peak: int = sum(1 for offset in schedule if 4.5 <= offset < 5.5)  # noqa: PLR2004
+    at_start: int = sum(1 for offset in schedule if offset < 1)
+    assert at_peak > 3 * at_start
+
+
+def test_schedule_rejects_a_non_positive_rate() -> None:
+    """Test that a zero rate is refused."""
+    with pytest.raises(ValueError, match="positive"):
+        build_arrival_schedule("constant", 0, DURATION_SECONDS)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+from base64 import b64encode
+
+import httpx
+import pytest
+
+from src.client.gate_client import GateBackpressureError, GateClient, GateScan
+from src.client.totp_generator import TOTPGenerator
+
+SEED_BASE64: str = b64encode(b"test_secret_key_").decode("utf-8")
+SCANS: int = 40
+MAX_IN_FLIGHT: int = 4
+ACCEPTED: int = 202
+REJECTED: int = 400
+THROTTLED: int = 429
+UNAVAILABLE: int = 503
+SERVICE_SECONDS: float = 0.01
+
+
+def scan(seat: str = "A1") -> GateScan:
+    return GateScan(seat=seat, gate="G1", totp_code="123456")
+
+
+def recording_server(seen: list[httpx.Request], statuses: list[int] | None = None):
+    # answers from the list of statuses first, then accepts everything
+    remaining: list[int] = list(statuses or [])
+    state: dict[str, int] = {"concurrent": 0, "max_concurrent": 0}
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        state["concurrent"] += 1
+        state["max_concurrent"] = max(state["max_concurrent"], state["concurrent"])
+        try:
+            await asyncio.sleep(SERVICE_SECONDS)
+        finally:
+            state["concurrent"] -= 1
+        status_code: int = remaining.pop(0) if remaining else ACCEPTED
+        body: dict = json.loads(request.content)
+        if status_code == ACCEPTED:
+            return httpx.Response(ACCEPTED, json={"seat": body["seat"], "status": "used"})
+        return httpx.Response(status_code, json={"detail": "Invalid TOTP code"})
+
+    return httpx.MockTransport(handle), state
+
+
+async def test_scans_go_out_concurrently_within_the_in_flight_limit() -> None:
+    """Test a burst of scans is sent at once but never beyond the in flight limit."""
+    seen: list[httpx.Request] = []
+    transport, state = recording_server(seen)
+
+    async with GateClient(
+        "http://api",
+        gate_token="gate-secret",  # noqa: S106
+        device_id="lane-1",
+        max_in_flight=MAX_IN_FLIGHT,
+        transport=transport,
+    ) as client:
+        results = await asyncio.gather(*(client.scan(scan(f"A{i}")) for i in range(SCANS)))
+
+    assert all(result.accepted for result in results)
+    assert [result.ticket["seat"] for result in results] == [f"A{i}" for i in range(SCANS)]
+    assert 1 < state["max_concurrent"] <= MAX_IN_FLIGHT
+    assert len({request.headers["Idempotency-Key"] for request in seen}) == SCANS
+    assert seen[0].headers["X-Gate-Token"] == "gate-secret"
+    assert json.loads(seen[0].content)["device_id"] == "lane-1"
+
+
+async def test_retry_reuses_the_idempotency_key() -> None:
+    """Test an unavailable API is retried with the same key, a rejection is not."""
+    seen: list[httpx.Request] = []
+    transport, _ = recording_server(seen, statuses=[UNAVAILABLE, ACCEPTED, REJECTED])
+
+    async with GateClient(
+        "http://api", backoff_seconds=0.001, seed=1, max_in_flight=1, transport=transport
+    ) as client:
+        retried = await client.scan(scan("A1"))
+        rejected = await client.scan(scan("A2"))
+
+    assert retried.accepted
+    assert retried.attempts == 2  # noqa: PLR2004
+    assert seen[0].headers["Idempotency-Key"] == seen[1].headers["Idempotency-Key"]
+    assert rejected.status_code == REJECTED
+    assert rejected.attempts == 1
+    assert rejected.detail == "Invalid TOTP code"
+
+
+def throttling_api(seen: list[httpx.Request], retry_after: list[int]) -> httpx.MockTransport:
+    # the API's own rules: outcomes are replayed by Idempotency-Key, a 429 is not stored
+    # so the retry after Retry-After runs again
+    outcomes: dict[str, httpx.Response] = {}
+    remaining: list[int] = list(retry_after)
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        key: str = request.headers["Idempotency-Key"]
+        if key in outcomes:
+            stored: httpx.Response = outcomes[key]
+            return httpx.Response(
+                stored.status_code, content=stored.content, headers={"Idempotent-Replayed": "true"}
+            )
+        if remaining:
+            return httpx.Response(
+                THROTTLED,
+                json={"detail": "Too many failed attempts"},
+                headers={"Retry-After": str(remaining.pop(0))},
+            )
+        body: dict = json.loads(request.content)
+        outcomes[key] = httpx.Response(ACCEPTED, json={"seat": body["seat"], "status": "used"})
+        return outcomes[key]
+
+    return httpx.MockTransport(handle)
+
+
+async def test_throttled_scan_waits_retry_after_and_runs_again() -> None:
+    """Test a 429 is retried with the same key after Retry-After and is not a replay."""
+    seen: list[httpx.Request] = []
+
+    async with GateClient(
+        "http://api", backoff_seconds=0.001, seed=1, transport=throttling_api(seen, [1])
+    ) as client:
+        started_at: float = time.perf_counter()
+        result = await client.scan(scan())
+        waited: float = time.perf_counter() - started_at
+
+    assert result.accepted
+    assert result.attempts == 2  # noqa: PLR2004
+    assert not result.replayed
+    assert waited >= 1
+    assert seen[0].headers["Idempotency-Key"] == seen[1].headers["Idempotency-Key"]
+
+
+async def test_long_retry_after_is_returned_to_the_lane() -> None:
+    """Test a throttle longer than the backoff limit is not waited out."""
+    seen: list[httpx.Request] = []
+
+    async with GateClient(
+        "http://api", max_backoff_seconds=2.0, transport=throttling_api(seen, [30])
+    ) as client:
+        result = await client.scan(scan())
+
+    assert result.status_code == THROTTLED
+    assert result.attempts == len(seen) == 1
+
+
+async def test_unreachable_api_gives_up_after_max_attempts() -> None:
+    """Test connection errors end in a result without a status code."""
+    attempts: list[httpx.Request] = []
+
+    def refuse(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    async with GateClient(
+        "http://api", max_attempts=3, backoff_seconds=0.001, transport=httpx.MockTransport(refuse)
+    ) as client:
+        result = await client.scan(scan())
+
+    assert result.status_code is None
+    assert result.detail == "ConnectError"
+    assert len(attempts) == result.attempts == 3  # noqa: PLR2004
+
+
+async def test_full_queue_pushes_back_on_the_lane() -> None:
+    """Test scans beyond the queue and in flight limits are refused, not buffered."""
+    seen: list[httpx.Request] = []
+    transport, _ = recording_server(seen)
+
+    async with GateClient(
+        "http://api", queue_size=2, max_in_flight=1, linger_seconds=0, transport=transport
+    ) as client:
+        submitted = [client.submit_nowait(scan(f"A{i}")) for i in range(2)]
+        await asyncio.sleep(0)  # the dispatcher takes the first scan in flight
+        submitted.append(client.submit_nowait(scan("A2")))
+        with pytest.raises(GateBackpressureError):
+            for i in range(3, SCANS):
+                submitted.append(client.submit_nowait(scan(f"A{i}")))
+        assert client.saturated
+        results = await asyncio.gather(*submitted)
+
+    assert all(result.accepted for result in results)
+    assert not client.saturated
+
+
+def test_local_code_helpers_follow_the_api_rule() -> None:
+    """Test codes generated for a seed verify and others don't."""
+    client = GateClient("http://api")
+    code: str = client.generate_code(SEED_BASE64)
+
+    assert client.verify_code(SEED_BASE64, code)
+    assert not client.verify_code(SEED_BASE64, f"{(int(code) + 1) % 1_000_000:06d}")
+    assert (
+        GateScan.from_seed("A1", "G1", SEED_BASE64).totp_code
+        == TOTPGenerator(SEED_BASE64).generate_code()
+    )
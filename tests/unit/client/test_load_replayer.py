@@ -0,0 +1,140 @@
+import asyncio
+import json
+from base64 import b64encode
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.client.latency_recorder import LatencyRecorder
+from src.client.load_replayer import LoadReplayer, parse_mix
+from src.client.ticket_export import ExportedTicket, load_ticket_export
+
+SEED_BASE64: str = b64encode(b"test_secret_key_").decode("utf-8")
+SERVICE_SECONDS: float = 0.05
+ARRIVALS: list[float] = [0.0, 0.001, 0.002, 0.003]
+ACCEPTED: str = "202"
+REJECTED: str = "400"
+
+
+@pytest.fixture
+def tickets() -> list[ExportedTicket]:
+    """Two registered and two unregistered exported tickets of the same gate."""
+    return [
+        ExportedTicket(seat="A1", gate="G1", seed=SEED_BASE64),
+        ExportedTicket(seat="A2", gate="G1", seed=SEED_BASE64, username="ana"),
+        ExportedTicket(seat="B1", gate="G1", seed=SEED_BASE64, registered=False),
+        ExportedTicket(seat="B2", gate="G1", seed=SEED_BASE64, registered=False),
+    ]
+
+
+def serial_server(seen: list[dict]) -> httpx.MockTransport:
+    # one request at a time, later arrivals queue behind the slow ones
+    lock = asyncio.Lock()
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        async with lock:
+            await asyncio.sleep(SERVICE_SECONDS)
+        body: dict = json.loads(request.content)
+        seen.append({"path": request.url.path, **body})
+        return httpx.Response(202 if request.url.path.endswith("/tickets") else 400)
+
+    return httpx.MockTransport(handle)
+
+
+async def test_latency_is_measured_from_the_scheduled_time(
+    tickets: list[ExportedTicket],
+) -> None:
+    """Test that queued requests are charged their wait, not only the service time."""
+    seen: list[dict] = []
+    replayer = LoadReplayer(
+        "http://api",
+        tickets,
+        {"attend_invalid": 1.0},
+        seed=1,
+        transport=serial_server(seen),
+    )
+
+    report: dict = await replayer.run(ARRIVALS)
+
+    summary: dict = report["operations"]["attend_invalid"]
+    assert summary["count"] == len(ARRIVALS)
+    assert summary["outcomes"] == {REJECTED: len(ARRIVALS)}
+    assert summary["response_time_ms"]["max"] >= len(ARRIVALS) * SERVICE_SECONDS * 1000 * 0.9
+    assert summary["service_time_ms"]["p50"] <= summary["response_time_ms"]["p50"]
+    assert {request["path"] for request in seen} == {"/api/users/attendance"}
+
+
+async def test_registrations_take_the_unregistered_exported_tickets(
+    tickets: list[ExportedTicket],
+) -> None:
+    """Test that registrations are sent for existing unowned tickets only."""
+    seen: list[dict] = []
+    replayer = LoadReplayer(
+        "http://api",
+        tickets,
+        {"register": 1.0},
+        username="loadtest",
+        seed=1,
+        transport=serial_server(seen),
+    )
+
+    report: dict = await replayer.run(ARRIVALS[:2])
+
+    assert report["operations"]["register"]["outcomes"] == {ACCEPTED: 2}
+    assert sorted(request["seat"] for request in seen) == ["B1", "B2"]
+    assert {request["path"] for request in seen} == {"/api/users/loadtest/tickets"}
+
+
+def test_mix_needs_matching_tickets_in_the_export(tickets: list[ExportedTicket]) -> None:
+    """Test that an export without unregistered tickets can't feed registrations."""
+    registered: list[ExportedTicket] = [ticket for ticket in tickets if ticket.registered]
+
+    with pytest.raises(ValueError, match="unregistered"):
+        LoadReplayer("http://api", registered, {"register": 1.0})
+
+
+def test_load_ticket_export_requires_seat_gate_and_seed(tmp_path: Path) -> None:
+    """Test that the export is read by header and incomplete rows are refused."""
+    export: Path = tmp_path / "tickets.csv"
+    export.write_text(f"seat,gate,seed\nA1,G1,{SEED_BASE64}\n")
+    assert load_ticket_export(export) == [ExportedTicket(seat="A1", gate="G1", seed=SEED_BASE64)]
+
+    export.write_text("seat,gate,seed\nA1,G1,\n")
+    with pytest.raises(ValueError, match="Line 2"):
+        load_ticket_export(export)
+
+
+def test_load_ticket_export_reads_the_registered_column(tmp_path: Path) -> None:
+    """Test that psql booleans mark which tickets are still unowned."""
+    export: Path = tmp_path / "tickets.csv"
+    export.write_text(
+        f"seat,gate,seed,username,registered\nA1,G1,{SEED_BASE64},ana,t\nB1,G1,{SEED_BASE64},,f\n"
+    )
+
+    assert [ticket.registered for ticket in load_ticket_export(export)] == [True, False]
+
+    export.write_text(f"seat,gate,seed,registered\nA1,G1,{SEED_BASE64},maybe\n")
+    with pytest.raises(ValueError, match="registered"):
+        load_ticket_export(export)
+
+
+def test_parse_mix_rejects_unknown_operations() -> None:
+    """Test that the mix only accepts the replayed operations."""
+    assert parse_mix("attend_valid=3,register=1") == {"attend_valid": 3.0, "register": 1.0}
+    with pytest.raises(ValueError, match="Unknown operation"):
+        parse_mix("login=1")
+
+
+def test_recorder_reports_nearest_rank_percentiles() -> None:
+    """Test that the distribution uses nearest rank percentiles in milliseconds."""
+    recorder = LatencyRecorder()
+    for latency_ms in range(1, 101):
+        recorder.record(due_at=0.0, sent_at=0.0, completed_at=latency_ms / 1000, outcome="202")
+
+    summary: dict = recorder.summary()
+
+    assert summary["response_time_ms"]["p50"] == pytest.approx(50.0)
+    assert summary["response_time_ms"]["p99"] == pytest.approx(99.0)
+    assert summary["response_time_ms"]["max"] == pytest.approx(100.0)
+    assert summary["outcomes"] == {"202": 100}
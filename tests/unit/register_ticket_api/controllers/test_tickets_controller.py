@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.register_ticket_api.controllers import TicketsController
+from src.register_ticket_api.entities import Ticket
+from src.register_ticket_api.exceptions import TooManyAttemptsException
+from src.register_ticket_api.infraestructure import InMemoryIdempotencyStore
+from src.register_ticket_api.services import IdempotencyService, TicketService
+
+ACCEPTED_STATUS_CODE: int = 202
+THROTTLED_STATUS_CODE: int = 429
+RETRY_AFTER_SECONDS: float = 30.0
+ATTENDANCE: dict[str, str] = {"seat": "A1", "gate": "G1", "totp_code": "123456"}
+
+
+@pytest.fixture
+def mock_ticket_service() -> AsyncMock:
+    """Create a mock TicketService."""
+    return AsyncMock(spec=TicketService)
+
+
+@pytest.fixture
+def client(mock_ticket_service: AsyncMock) -> httpx.AsyncClient:
+    """Create a client for the tickets routes with an in-memory idempotency store."""
+    controller = TicketsController(
+        ticket_service=mock_ticket_service,
+        idempotency_service=IdempotencyService(
+            store=InMemoryIdempotencyStore(max_entries=10, ttl_seconds=60)
+        ),
+    )
+    app = FastAPI()
+    app.include_router(controller.router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+
+
+async def test_throttled_keyed_scan_is_not_replayed(
+    client: httpx.AsyncClient, mock_ticket_service: AsyncMock
+) -> None:
+    """Test a keyed 429 keeps its Retry-After and the retry with that key runs again."""
+    used_ticket = Ticket(id=uuid4(), seat="A1", gate="G1", status="used")
+    mock_ticket_service.log_attendance.side_effect = [
+        TooManyAttemptsException(RETRY_AFTER_SECONDS),
+        used_ticket,
+    ]
+    headers: dict[str, str] = {"Idempotency-Key": "scan-1"}
+
+    async with client:
+        throttled = await client.post("/api/users/attendance", json=ATTENDANCE, headers=headers)
+        retried = await client.post("/api/users/attendance", json=ATTENDANCE, headers=headers)
+
+    assert throttled.status_code == THROTTLED_STATUS_CODE
+    assert throttled.headers["Retry-After"] == str(int(RETRY_AFTER_SECONDS))
+    assert retried.status_code == ACCEPTED_STATUS_CODE
+    assert retried.json()["status"] == "used"
+    assert "Idempotent-Replayed" not in retried.headers
+    assert mock_ticket_service.log_attendance.await_count == 2  # noqa: PLR2004
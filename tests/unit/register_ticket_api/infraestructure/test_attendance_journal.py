@@ -0,0 +1,91 @@
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import AttendanceConflict, JournaledAttendance
+from src.register_ticket_api.infraestructure import AttendanceJournal
+
+USED_AT: datetime = datetime(2024, 1, 1, 18, 30, 15, 123456)
+
+
+def make_attendance() -> JournaledAttendance:
+    return JournaledAttendance(ticket_id=uuid4(), seat="A1", gate="G1", used_at=USED_AT)
+
+
+@pytest.fixture
+def journal(tmp_path: Path) -> AttendanceJournal:
+    """Create a journal in a temporary directory."""
+    return AttendanceJournal(str(tmp_path))
+
+
+async def test_claim_pending_returns_entries_and_deletes_segments(
+    journal: AttendanceJournal, tmp_path: Path
+) -> None:
+    """Test that replayed segments are removed from disk."""
+    attendances: list[JournaledAttendance] = [make_attendance(), make_attendance()]
+    for attendance in attendances:
+        await journal.append(attendance)
+    assert journal.has_pending()
+
+    with journal.claim_pending() as pending:
+        assert pending == attendances
+
+    assert not journal.has_pending()
+    assert list(tmp_path.glob(AttendanceJournal.SEGMENT_GLOB)) == []
+
+
+async def test_claim_pending_keeps_segments_when_replay_fails(
+    journal: AttendanceJournal,
+) -> None:
+    """Test that a failed replay leaves the entries for the next attempt."""
+    attendance: JournaledAttendance = make_attendance()
+    await journal.append(attendance)
+
+    with pytest.raises(RuntimeError), journal.claim_pending():
+        raise RuntimeError("database down")
+
+    with journal.claim_pending() as pending:
+        assert pending == [attendance]
+
+
+async def test_claim_pending_skips_segments_being_written(tmp_path: Path) -> None:
+    """Test that the active segment of another worker is not replayed."""
+    writer = AttendanceJournal(str(tmp_path))
+    replayer = AttendanceJournal(str(tmp_path))
+    await writer.append(make_attendance())
+
+    with replayer.claim_pending() as pending:
+        assert pending == []
+
+    writer.close()
+    with replayer.claim_pending() as pending:
+        assert len(pending) == 1
+
+
+async def test_claim_pending_skips_torn_lines(journal: AttendanceJournal, tmp_path: Path) -> None:
+    """Test that a line cut by a crash does not block the replay."""
+    attendance: JournaledAttendance = make_attendance()
+    await journal.append(attendance)
+    journal.close()
+    segment: Path = next(tmp_path.glob(AttendanceJournal.SEGMENT_GLOB))
+    with segment.open("a", encoding="utf-8") as segment_file:
+        segment_file.write('{"ticket_id": "')
+
+    with journal.claim_pending() as pending:
+        assert pending == [attendance]
+
+
+async def test_record_conflicts_appends_to_conflicts_file(
+    journal: AttendanceJournal, tmp_path: Path
+) -> None:
+    """Test that conflicts are kept on disk for review."""
+    conflict = AttendanceConflict(
+        ticket_id=uuid4(), seat="A1", gate="G1", journaled_used_at=USED_AT, status="used"
+    )
+
+    await journal.record_conflicts([conflict])
+
+    lines: list[str] = (tmp_path / AttendanceJournal.CONFLICTS_FILE).read_text().splitlines()
+    assert [AttendanceConflict.model_validate_json(line) for line in lines] == [conflict]
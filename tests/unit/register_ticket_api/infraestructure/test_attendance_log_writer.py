@@ -0,0 +1,97 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.register_ticket_api.entities import AttendanceEvent
+from src.register_ticket_api.exceptions import DbOperationException
+from src.register_ticket_api.infraestructure import AttendanceLogWriter, FanOutEventSink
+from src.register_ticket_api.interfaces import IAttendanceEventSink, IAttendanceLogRepository
+
+BATCH_SIZE: int = 2
+QUEUE_SIZE: int = 3
+RETENTION_DAYS: int = 30
+
+
+def make_event(seat: str) -> AttendanceEvent:
+    return AttendanceEvent(
+        timestamp=datetime.now(),
+        seat=seat,
+        gate="G1",
+        device_id="gate-1-a",
+        outcome="accepted",
+        latency_ms=2.0,
+    )
+
+
+@pytest.fixture
+def mock_attendance_log_repo() -> AsyncMock:
+    """Mock attendance log repository."""
+    return AsyncMock(spec=IAttendanceLogRepository)
+
+
+@pytest.fixture
+def writer(mock_attendance_log_repo: AsyncMock) -> AttendanceLogWriter:
+    """Create a writer with tiny batches and a small queue."""
+    return AttendanceLogWriter(
+        attendance_log_repo=mock_attendance_log_repo,
+        max_queue_size=QUEUE_SIZE,
+        batch_size=BATCH_SIZE,
+        retention_days=RETENTION_DAYS,
+    )
+
+
+async def test_flush_writes_events_in_batches(
+    writer: AttendanceLogWriter, mock_attendance_log_repo: AsyncMock
+) -> None:
+    """Test that queued events are copied in batches of the configured size."""
+    events: list[AttendanceEvent] = [make_event(seat) for seat in ("A1", "A2", "A3")]
+    for event in events:
+        writer.emit(event)
+
+    await writer.flush()
+
+    assert [call.args[0] for call in mock_attendance_log_repo.add_events.await_args_list] == [
+        events[:BATCH_SIZE],
+        events[BATCH_SIZE:],
+    ]
+    assert writer.pending() == 0
+
+
+async def test_flush_maintains_partitions_once_a_day(
+    writer: AttendanceLogWriter, mock_attendance_log_repo: AsyncMock
+) -> None:
+    """Test that partitions are created ahead and expired days dropped once per day."""
+    await writer.flush()
+    await writer.flush()
+
+    mock_attendance_log_repo.ensure_partitions.assert_awaited_once()
+    mock_attendance_log_repo.drop_partitions_before.assert_awaited_once_with(
+        date.today() - timedelta(days=RETENTION_DAYS)
+    )
+
+
+async def test_flush_requeues_on_failure_and_drops_overflow(
+    writer: AttendanceLogWriter, mock_attendance_log_repo: AsyncMock
+) -> None:
+    """Test that a failed COPY keeps the rows and a full queue drops new ones."""
+    for seat in ("A1", "A2", "A3", "A4"):
+        writer.emit(make_event(seat))
+    mock_attendance_log_repo.add_events.side_effect = DbOperationException(OSError("down"))
+
+    await writer.flush()
+
+    assert writer.pending() == QUEUE_SIZE
+    assert writer.dropped == 1
+
+
+def test_fan_out_event_sink_isolates_failing_sinks() -> None:
+    """Test that every sink gets the event even if one of them fails."""
+    failing_sink = MagicMock(spec=IAttendanceEventSink)
+    failing_sink.emit.side_effect = RuntimeError("boom")
+    healthy_sink = MagicMock(spec=IAttendanceEventSink)
+    event: AttendanceEvent = make_event("A1")
+
+    FanOutEventSink([failing_sink, healthy_sink]).emit(event)
+
+    healthy_sink.emit.assert_called_once_with(event)
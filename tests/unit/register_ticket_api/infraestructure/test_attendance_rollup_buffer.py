@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.register_ticket_api.exceptions import DbOperationException
+from src.register_ticket_api.infraestructure import AttendanceRollupBuffer
+from src.register_ticket_api.interfaces import IStatsRepository
+
+MINUTE: datetime = datetime(2024, 1, 1, 18, 30)
+
+
+@pytest.fixture
+def mock_stats_repo() -> AsyncMock:
+    """Mock stats repository."""
+    return AsyncMock(spec=IStatsRepository)
+
+
+@pytest.fixture
+def rollup_buffer(mock_stats_repo: AsyncMock) -> AttendanceRollupBuffer:
+    """Create a rollup buffer with a mocked repository."""
+    return AttendanceRollupBuffer(stats_repo=mock_stats_repo, flush_interval_seconds=1)
+
+
+def test_record_entry_groups_by_gate_and_minute(rollup_buffer: AttendanceRollupBuffer) -> None:
+    """Test that entries are counted per gate and truncated minute."""
+    rollup_buffer.record_entry("G1", MINUTE.replace(second=5))
+    rollup_buffer.record_entry("G1", MINUTE.replace(second=59))
+    rollup_buffer.record_entry("G2", MINUTE.replace(second=1))
+
+    assert rollup_buffer.pending_entries() == {("G1", MINUTE): 2, ("G2", MINUTE): 1}
+
+
+async def test_flush_sends_pending_entries_once(
+    rollup_buffer: AttendanceRollupBuffer, mock_stats_repo: AsyncMock
+) -> None:
+    """Test that a flush writes the deltas and clears them."""
+    rollup_buffer.record_entry("G1", MINUTE)
+
+    await rollup_buffer.flush()
+    await rollup_buffer.flush()
+
+    mock_stats_repo.add_gate_minute_entries.assert_awaited_once_with({("G1", MINUTE): 1})
+    assert rollup_buffer.pending_entries() == {}
+
+
+async def test_flush_keeps_entries_when_database_fails(
+    rollup_buffer: AttendanceRollupBuffer, mock_stats_repo: AsyncMock
+) -> None:
+    """Test that failed flushes are retried with the entries recorded meanwhile."""
+    mock_stats_repo.add_gate_minute_entries.side_effect = DbOperationException(Exception("down"))
+    rollup_buffer.record_entry("G1", MINUTE)
+
+    await rollup_buffer.flush()
+    rollup_buffer.record_entry("G1", MINUTE)
+
+    assert rollup_buffer.pending_entries() == {("G1", MINUTE): 2}
+
+
+async def test_stop_flushes_remaining_entries(
+    rollup_buffer: AttendanceRollupBuffer, mock_stats_repo: AsyncMock
+) -> None:
+    """Test that stopping the buffer doesn't lose recorded entries."""
+    rollup_buffer.start()
+    rollup_buffer.record_entry("G1", MINUTE)
+
+    await rollup_buffer.stop()
+
+    mock_stats_repo.add_gate_minute_entries.assert_awaited_once_with({("G1", MINUTE): 1})
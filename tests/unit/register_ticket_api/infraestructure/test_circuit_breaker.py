@@ -0,0 +1,94 @@
+import pytest
+
+from src.register_ticket_api.exceptions import CircuitOpenException
+from src.register_ticket_api.infraestructure import CircuitBreaker
+
+OPEN_SECONDS: float = 5.0
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Create a manually advanced clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock: FakeClock) -> CircuitBreaker:
+    """Create a breaker that trips at 50% failures over 4 calls."""
+    return CircuitBreaker(
+        failure_rate_threshold=0.5,
+        minimum_calls=4,
+        window_size=4,
+        open_seconds=OPEN_SECONDS,
+        clock=clock,
+    )
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_opens_when_failure_rate_reached(breaker: CircuitBreaker) -> None:
+    """Test that the breaker trips only after the minimum calls and fails fast."""
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenException):
+        breaker.before_call()
+
+
+def test_breaker_lets_a_single_probe_through(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    """Test that half open admits one probe and closes when it succeeds."""
+    trip(breaker)
+    clock.now += OPEN_SECONDS
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenException):
+        breaker.before_call()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_breaker_reopens_when_probe_fails(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    """Test that a failed probe opens the breaker for another full period."""
+    trip(breaker)
+    clock.now += OPEN_SECONDS
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenException) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after_seconds == OPEN_SECONDS
+
+
+def test_breaker_abandoned_probe_frees_the_slot(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    """Test that a cancelled probe lets the next caller probe."""
+    trip(breaker)
+    clock.now += OPEN_SECONDS
+    breaker.before_call()
+
+    breaker.abandon_call()
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
@@ -0,0 +1,47 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from src.register_ticket_api.infraestructure import CronSchedule
+
+NOW = datetime(2026, 10, 19, 12, 34, 56, tzinfo=UTC)  # a Monday
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("*/15 * * * *", datetime(2026, 10, 19, 12, 45, tzinfo=UTC)),
+        ("30 17 * * *", datetime(2026, 10, 19, 17, 30, tzinfo=UTC)),
+        ("0 0 1 * *", datetime(2026, 11, 1, tzinfo=UTC)),
+        ("0 9 * * 1-5", datetime(2026, 10, 20, 9, tzinfo=UTC)),
+        ("0 0 29 2 *", datetime(2028, 2, 29, tzinfo=UTC)),
+    ],
+)
+def test_next_after_finds_the_next_matching_minute(expression: str, expected: datetime) -> None:
+    """Test the next run is the first matching minute after now."""
+    assert CronSchedule(expression).next_after(NOW) == expected
+
+
+def test_day_of_month_or_day_of_week_matches() -> None:
+    """Test restricting both days fires on either, as cron does."""
+    assert CronSchedule("0 0 13 * 5").next_after(NOW) == datetime(2026, 10, 23, tzinfo=UTC)
+
+
+def test_expression_is_evaluated_in_its_timezone() -> None:
+    """Test the wall time of the schedule is the one of its timezone."""
+    next_run: datetime = CronSchedule("30 17 * * *", timezone="America/Bogota").next_after(NOW)
+
+    assert next_run.astimezone(UTC) == datetime(2026, 10, 19, 22, 30, tzinfo=UTC)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "a * * * *"])
+def test_invalid_expression_is_rejected(expression: str) -> None:
+    """Test malformed expressions fail when the job is added."""
+    with pytest.raises(ValueError, match="cron"):
+        CronSchedule(expression)
+
+
+def test_expression_that_never_matches_is_rejected() -> None:
+    """Test an impossible date gives up instead of looping forever."""
+    with pytest.raises(ValueError, match="never matches"):
+        CronSchedule("0 0 30 2 *").next_after(NOW)
@@ -0,0 +1,18 @@
+from collections.abc import AsyncIterator
+
+from src.register_ticket_api.infraestructure import iter_csv_rows
+
+
+async def as_chunks(chunks: list[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_rows_split_across_chunks_are_joined() -> None:
+    """Test that lines and multi-byte characters cut between chunks are parsed whole."""
+    body: bytes = 'username,password\r\nsantiago,"Añ0,x!"\nlast,row'.encode()
+    chunks: list[bytes] = [body[i : i + 3] for i in range(0, len(body), 3)]
+
+    rows = [row async for row in iter_csv_rows(as_chunks(chunks))]
+
+    assert rows == [["username", "password"], ["santiago", "Añ0,x!"], ["last", "row"]]
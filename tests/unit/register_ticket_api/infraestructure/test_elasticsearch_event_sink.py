@@ -0,0 +1,141 @@
+import json
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from elasticsearch import Elasticsearch
+
+from src.register_ticket_api.entities import AttendanceEvent
+from src.register_ticket_api.infraestructure import ElasticsearchEventSink
+
+INDEX: str = "attendance-events"
+QUEUE_SIZE: int = 2
+
+
+class StandInElasticsearch(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), BulkHandler)
+        self.bulk_documents: list[dict] = []
+        self.available: bool = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class BulkHandler(BaseHTTPRequestHandler):
+    server: StandInElasticsearch
+
+    def do_POST(self) -> None:
+        body: bytes = self.rfile.read(int(self.headers["Content-Length"]))
+        if not self.server.available:
+            self.__reply(503, {"error": "unavailable"})
+            return
+        lines: list[dict] = [json.loads(line) for line in body.splitlines() if line]
+        documents: list[dict] = lines[1::2]
+        self.server.bulk_documents.extend(documents)
+        self.__reply(
+            200,
+            {
+                "errors": False,
+                "items": [{"create": {"_index": INDEX, "status": 201}} for _ in documents],
+            },
+        )
+
+    do_PUT = do_POST
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def __reply(self, status: int, payload: dict) -> None:
+        encoded: bytes = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+@pytest.fixture
+def stand_in() -> Iterator[StandInElasticsearch]:
+    """Run a local HTTP server answering the bulk API."""
+    server = StandInElasticsearch()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_sink(
+    stand_in: StandInElasticsearch, spill_dir: Path | None = None
+) -> ElasticsearchEventSink:
+    return ElasticsearchEventSink(
+        Elasticsearch(stand_in.url, max_retries=0, request_timeout=2),
+        INDEX,
+        max_queue_size=QUEUE_SIZE,
+        batch_size=QUEUE_SIZE,
+        spill_dir=str(spill_dir) if spill_dir else None,
+    )
+
+
+def make_event(seat: str) -> AttendanceEvent:
+    return AttendanceEvent(
+        timestamp=datetime(2024, 1, 1, 18, 30),
+        seat=seat,
+        gate="G1",
+        outcome="rejected",
+        reason="Invalid TOTP ticket code.",
+        latency_ms=3.5,
+    )
+
+
+async def test_flush_ships_events_with_bulk_api(stand_in: StandInElasticsearch) -> None:
+    """Test that queued events reach the bulk endpoint and leave the queue."""
+    sink = make_sink(stand_in)
+    sink.emit(make_event("A1"))
+    sink.emit(make_event("A2"))
+
+    await sink.flush()
+
+    assert [document["seat"] for document in stand_in.bulk_documents] == ["A1", "A2"]
+    assert stand_in.bulk_documents[0]["outcome"] == "rejected"
+    assert sink.pending() == 0
+
+
+async def test_emit_drops_when_full_without_spill_dir(stand_in: StandInElasticsearch) -> None:
+    """Test that a full queue drops events instead of blocking."""
+    sink = make_sink(stand_in)
+    for seat in ("A1", "A2", "A3"):
+        sink.emit(make_event(seat))
+
+    assert sink.pending() == QUEUE_SIZE
+    assert sink.dropped == 1
+
+
+async def test_spilled_events_are_shipped_when_elasticsearch_recovers(
+    stand_in: StandInElasticsearch, tmp_path: Path
+) -> None:
+    """Test that overflow survives an outage on disk and is shipped afterwards."""
+    sink = make_sink(stand_in, spill_dir=tmp_path)
+    stand_in.available = False
+    for seat in ("A1", "A2", "A3"):
+        sink.emit(make_event(seat))
+
+    await sink.flush()
+
+    assert sink.pending() == QUEUE_SIZE
+    assert len(list(tmp_path.glob(ElasticsearchEventSink.SPILL_GLOB))) == 1
+
+    stand_in.available = True
+    await sink.flush()
+
+    assert sorted(document["seat"] for document in stand_in.bulk_documents) == ["A1", "A2", "A3"]
+    assert list(tmp_path.glob(ElasticsearchEventSink.SPILL_GLOB)) == []
+    assert sink.dropped == 0
@@ -0,0 +1,117 @@
+import os
+from base64 import b64encode
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import Ticket, TicketChange
+from src.register_ticket_api.infraestructure import (
+    GateSnapshot,
+    TicketCache,
+    write_gate_snapshot,
+)
+
+SEED: str = b64encode(os.urandom(20)).decode("ascii")
+USED_AT: datetime = datetime(2024, 1, 1, 18, 30)
+TICKET_COUNT: int = 50
+SECOND_GENERATION: int = 2
+
+
+def make_ticket(seat: str, gate: str = "G1", status: str = "valid") -> Ticket:
+    return Ticket(id=uuid4(), user_id=uuid4(), seat=seat, gate=gate, seed=SEED, status=status)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path: Path) -> Path:
+    """Path of the snapshot shared by the workers of a host."""
+    return tmp_path / "gate.snapshot"
+
+
+def test_snapshot_finds_every_ticket_by_seat_and_gate(snapshot_path: Path) -> None:
+    """Test the sorted keys find each ticket and nothing else."""
+    tickets: list[Ticket] = [
+        make_ticket(f"S{index}", gate=f"G{index % 3}") for index in range(TICKET_COUNT)
+    ]
+
+    generation: int = write_gate_snapshot(snapshot_path, reversed(tickets))
+    snapshot = GateSnapshot(snapshot_path)
+
+    assert generation == snapshot.generation == 1
+    assert len(snapshot) == TICKET_COUNT
+    for ticket in tickets:
+        assert snapshot.get(ticket.seat, ticket.gate) == ticket
+    assert snapshot.get("S1", "G2") is None
+    assert snapshot.get("S1", "GATE-NAME-TOO-LONG") is None
+
+
+def test_snapshot_merge_replaces_and_drops_entries(snapshot_path: Path) -> None:
+    """Test an incremental publish bumps the generation and keeps untouched entries."""
+    kept, revoked, moved = make_ticket("A1"), make_ticket("A2"), make_ticket("A3")
+    write_gate_snapshot(snapshot_path, [kept, revoked, moved])
+    base = GateSnapshot(snapshot_path)
+    reassigned: Ticket = moved.model_copy(update={"user_id": uuid4()})
+
+    write_gate_snapshot(
+        snapshot_path,
+        [revoked.model_copy(update={"status": "revoked"}), reassigned],
+        base=base,
+    )
+    snapshot = GateSnapshot(snapshot_path)
+
+    assert snapshot.generation == base.generation + 1
+    assert snapshot.get("A1", "G1") == kept
+    assert snapshot.get("A2", "G1") is None
+    assert snapshot.get("A3", "G1") == reassigned
+    assert base.get("A2", "G1") == revoked
+
+
+def test_snapshot_rejects_other_files(snapshot_path: Path) -> None:
+    """Test a file that is not a snapshot is never mapped as one."""
+    snapshot_path.write_bytes(b"not a gate snapshot at all, just text")
+
+    with pytest.raises(ValueError, match="gate snapshot"):
+        GateSnapshot(snapshot_path)
+
+
+def test_only_one_worker_publishes_the_snapshot(snapshot_path: Path) -> None:
+    """Test the lock file elects a single publisher and others map its snapshot."""
+    publisher = TicketCache(snapshot_path=str(snapshot_path))
+    reader = TicketCache(snapshot_path=str(snapshot_path))
+    ticket: Ticket = make_ticket("A1")
+
+    assert publisher.owns_snapshot()
+    assert not reader.owns_snapshot()
+    publisher.replace_all([ticket])
+    reader.reload_snapshot()
+
+    assert reader.get("A1", "G1") == ticket
+    assert len(reader) == 1
+    publisher.close()
+    assert reader.owns_snapshot()
+    reader.close()
+
+
+def test_local_changes_survive_a_new_generation(snapshot_path: Path) -> None:
+    """Test a scan or revocation seen by this worker outlives the remap."""
+    publisher = TicketCache(snapshot_path=str(snapshot_path))
+    reader = TicketCache(snapshot_path=str(snapshot_path))
+    scanned, revoked, other = make_ticket("A1"), make_ticket("A2"), make_ticket("A3")
+    publisher.owns_snapshot()
+    publisher.replace_all([scanned, revoked, other])
+    reader.reload_snapshot()
+
+    reader.mark_used("A1", "G1", USED_AT)
+    reader.apply_changes(
+        [TicketChange(ticket_id=revoked.id, seat="A2", gate="G1", status="revoked")]
+    )
+    publisher.merge([other.model_copy(update={"status": "revoked"})])
+    reader.reload_snapshot()
+
+    assert reader.snapshot_generation == publisher.snapshot_generation == SECOND_GENERATION
+    assert reader.get("A1", "G1").status == "used"
+    assert reader.get("A2", "G1").status == "revoked"
+    assert reader.get("A3", "G1") is None
+    publisher.close()
+    reader.close()
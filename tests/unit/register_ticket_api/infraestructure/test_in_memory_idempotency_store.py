@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.register_ticket_api.entities import IdempotencyRecord
+from src.register_ticket_api.infraestructure import InMemoryIdempotencyStore
+from src.register_ticket_api.interfaces import IIdempotencyStore
+
+TTL_SECONDS: float = 60
+MAX_ENTRIES: int = 2
+MONOTONIC_PATH: str = "register_ticket_api.infraestructure.in_memory_idempotency_store.time"
+
+
+@pytest.fixture
+def sample_record() -> IdempotencyRecord:
+    """Create a stored accepted response."""
+    return IdempotencyRecord(request_fingerprint="abc", status_code=202, body={"seat": "A1"})
+
+
+@pytest.fixture
+def store() -> InMemoryIdempotencyStore:
+    """Create an in-memory store without shared backend."""
+    return InMemoryIdempotencyStore(max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS)
+
+
+async def test_get_returns_saved_record(
+    store: InMemoryIdempotencyStore, sample_record: IdempotencyRecord
+) -> None:
+    """Test that a saved record is returned for the same key."""
+    await store.save("key", sample_record)
+
+    assert await store.get("key") == sample_record
+    assert await store.get("other-key") is None
+
+
+async def test_get_ignores_expired_record(
+    store: InMemoryIdempotencyStore, sample_record: IdempotencyRecord
+) -> None:
+    """Test that records are forgotten once their ttl elapsed."""
+    with patch(MONOTONIC_PATH) as mock_time:
+        mock_time.monotonic.return_value = 0
+        await store.save("key", sample_record)
+
+        mock_time.monotonic.return_value = TTL_SECONDS + 1
+        assert await store.get("key") is None
+    assert len(store) == 0
+
+
+async def test_save_evicts_least_recently_saved_when_full(
+    store: InMemoryIdempotencyStore, sample_record: IdempotencyRecord
+) -> None:
+    """Test that memory stays bounded by max_entries."""
+    for key in ("first", "second", "third"):
+        await store.save(key, sample_record)
+
+    assert len(store) == MAX_ENTRIES
+    assert await store.get("first") is None
+    assert await store.get("third") == sample_record
+
+
+async def test_purge_expired_removes_only_expired_records(
+    store: InMemoryIdempotencyStore, sample_record: IdempotencyRecord
+) -> None:
+    """Test that purging keeps records still inside their ttl."""
+    with patch(MONOTONIC_PATH) as mock_time:
+        mock_time.monotonic.return_value = 0
+        await store.save("old", sample_record)
+        mock_time.monotonic.return_value = TTL_SECONDS / 2
+        await store.save("new", sample_record)
+
+        mock_time.monotonic.return_value = TTL_SECONDS + 1
+        purged: int = await store.purge_expired()
+
+    assert purged == 1
+    assert len(store) == 1
+
+
+async def test_get_reads_through_shared_store(sample_record: IdempotencyRecord) -> None:
+    """Test that records saved by other workers are found in the shared store."""
+    shared_store = AsyncMock(spec=IIdempotencyStore)
+    shared_store.get.return_value = sample_record
+    store = InMemoryIdempotencyStore(
+        max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS, shared_store=shared_store
+    )
+
+    assert await store.get("key") == sample_record
+    assert await store.get("key") == sample_record
+    shared_store.get.assert_awaited_once_with("key")
+
+
+async def test_save_writes_to_shared_store(sample_record: IdempotencyRecord) -> None:
+    """Test that saved records are shared with other workers."""
+    shared_store = AsyncMock(spec=IIdempotencyStore)
+    store = InMemoryIdempotencyStore(
+        max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS, shared_store=shared_store
+    )
+
+    await store.save("key", sample_record)
+
+    shared_store.save.assert_awaited_once_with("key", sample_record)
@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.register_ticket_api.exceptions import AppValidationException, DbOperationException
+from src.register_ticket_api.infraestructure import JobScheduler, PostgreSQLDbContext
+
+INTERVAL_SECONDS: float = 0.01
+WAIT_SECONDS: float = 1.0
+RUNS_UNTIL_RETRIED: int = 2
+
+
+def lock_db_context(acquired: bool) -> MagicMock:
+    conn = MagicMock()
+    conn.is_closed.return_value = False
+    conn.fetchval = AsyncMock(return_value=acquired)
+    conn.execute = AsyncMock()
+    conn.close = AsyncMock()
+    db_context = MagicMock(spec=PostgreSQLDbContext)
+    db_context.create_dedicated_connection = AsyncMock(return_value=conn)
+    return db_context
+
+
+async def test_interval_job_keeps_running_after_a_failure() -> None:
+    """Test a failing run is retried on the next tick."""
+    retried = asyncio.Event()
+    runs: list[int] = []
+
+    async def purge() -> None:
+        runs.append(len(runs))
+        if len(runs) == 1:
+            raise DbOperationException(Exception("DB down"))
+        retried.set()
+
+    scheduler = JobScheduler()
+    scheduler.every("purge", purge, interval_seconds=INTERVAL_SECONDS)
+    scheduler.start()
+    await asyncio.wait_for(retried.wait(), timeout=WAIT_SECONDS)
+    await scheduler.stop()
+
+    assert len(runs) >= RUNS_UNTIL_RETRIED
+    assert scheduler.stats()[0].failures == 1
+
+
+async def test_run_now_swallows_job_errors_and_records_them() -> None:
+    """Test a job error is logged and counted, not raised to the lifespan."""
+    job = AsyncMock(side_effect=DbOperationException(Exception("DB down")))
+    scheduler = JobScheduler()
+    scheduler.every("purge", job, interval_seconds=INTERVAL_SECONDS)
+
+    job_stats = await scheduler.run_now("purge")
+
+    job.assert_awaited_once()
+    assert (job_stats.runs, job_stats.failures, job_stats.last_outcome) == (1, 1, "failed")
+    assert job_stats.last_duration_ms is not None
+
+
+async def test_slow_job_times_out() -> None:
+    """Test a run past its timeout is cancelled and counted."""
+
+    async def hang() -> None:
+        await asyncio.sleep(WAIT_SECONDS)
+
+    scheduler = JobScheduler()
+    scheduler.every("hang", hang, interval_seconds=WAIT_SECONDS, timeout_seconds=INTERVAL_SECONDS)
+
+    job_stats = await scheduler.run_now("hang")
+
+    assert (job_stats.timeouts, job_stats.last_outcome) == (1, "timed_out")
+
+
+async def test_exclusive_job_is_skipped_without_its_lock() -> None:
+    """Test only the worker holding the advisory lock runs an exclusive job."""
+    job = AsyncMock()
+    scheduler = JobScheduler(db_context=lock_db_context(acquired=False))
+    scheduler.every("archive", job, interval_seconds=INTERVAL_SECONDS, exclusive=True)
+
+    job_stats = await scheduler.run_now("archive")
+
+    job.assert_not_awaited()
+    assert (job_stats.skipped, job_stats.last_outcome) == (1, "skipped")
+
+
+async def test_exclusive_job_keeps_its_lock_between_runs() -> None:
+    """Test the lock is taken once and only checked on later runs."""
+    job = AsyncMock()
+    db_context = lock_db_context(acquired=True)
+    scheduler = JobScheduler(db_context=db_context)
+    scheduler.every("archive", job, interval_seconds=INTERVAL_SECONDS, exclusive=True)
+
+    await scheduler.run_now("archive")
+    await scheduler.run_now("archive")
+    await scheduler.stop()
+
+    conn = await db_context.create_dedicated_connection()
+    conn.fetchval.assert_awaited_once()
+    conn.close.assert_awaited_once()
+    assert job.await_count == RUNS_UNTIL_RETRIED
+
+
+def test_exclusive_job_needs_a_database() -> None:
+    """Test exclusive jobs can't be added without somewhere to lock."""
+    with pytest.raises(ValueError, match="needs a database"):
+        JobScheduler().every("archive", AsyncMock(), INTERVAL_SECONDS, exclusive=True)
+
+
+async def test_run_now_rejects_unknown_jobs() -> None:
+    """Test a manual run of a missing job is a validation error."""
+    with pytest.raises(AppValidationException):
+        await JobScheduler().run_now("missing")
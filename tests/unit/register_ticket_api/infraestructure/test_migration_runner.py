@@ -0,0 +1,138 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.register_ticket_api.entities import Migration
+from src.register_ticket_api.infraestructure import DEFAULT_MIGRATIONS_DIR, MigrationRunner
+
+CREATE_TABLE_SQL: str = "CREATE TABLE t (id INT);\n"
+CONCURRENT_INDEX_SQL: str = (
+    "-- migrate:no-transaction\n"
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_t;\n"
+    "CREATE INDEX CONCURRENTLY idx_t\n"
+    "    ON t (id);\n"
+)
+BATCHED_BACKFILL_SQL: str = (
+    "-- migrate:no-transaction\n"
+    "DO $$\n"
+    "BEGIN\n"
+    "    UPDATE t SET id = 0 WHERE id IS NULL;\n"
+    "    COMMIT;\n"
+    "END\n"
+    "$$;\n"
+    "ALTER TABLE t VALIDATE CONSTRAINT t_id_not_null;\n"
+)
+
+
+@pytest.fixture
+def migrations_dir(tmp_path: Path) -> Path:
+    """Create a directory with a transactional and a non transactional migration."""
+    (tmp_path / "V0002__t_index.sql").write_text(CONCURRENT_INDEX_SQL)
+    (tmp_path / "V0001__create_t.sql").write_text(CREATE_TABLE_SQL)
+    return tmp_path
+
+
+@pytest.fixture
+def mock_conn() -> AsyncMock:
+    """Mock a dedicated connection on a database without applied migrations."""
+    conn = AsyncMock()
+    conn.transaction = MagicMock(return_value=AsyncMock())
+    conn.fetchval.return_value = False
+    return conn
+
+
+@pytest.fixture
+def runner(migrations_dir: Path, mock_conn: AsyncMock) -> MigrationRunner:
+    """Create a runner over the temporary migrations."""
+    db_context = AsyncMock()
+    db_context.create_dedicated_connection.return_value = mock_conn
+    return MigrationRunner(db_context, migrations_dir=migrations_dir)
+
+
+def executed_sql(mock_conn: AsyncMock) -> list[str]:
+    return [call.args[0] for call in mock_conn.execute.await_args_list]
+
+
+def test_load_migrations_orders_by_version(runner: MigrationRunner) -> None:
+    """Test that migrations are sorted and the no-transaction directive is detected."""
+    migrations: list[Migration] = runner.load_migrations()
+
+    assert [(m.version, m.name, m.transactional) for m in migrations] == [
+        (1, "create_t", True),
+        (2, "t_index", False),
+    ]
+
+
+@pytest.mark.parametrize("file_name", ["0003_bad.sql", "V0001__duplicated.sql"])
+def test_load_migrations_rejects_bad_files(
+    runner: MigrationRunner, migrations_dir: Path, file_name: str
+) -> None:
+    """Test that misnamed or duplicated migrations stop the runner."""
+    (migrations_dir / file_name).write_text(CREATE_TABLE_SQL)
+
+    with pytest.raises(ValueError, match=r"Migration|Duplicated"):
+        runner.load_migrations()
+
+
+def test_shipped_migrations_are_contiguous() -> None:
+    """Test that the packaged migrations load and index builds don't lock writes."""
+    migrations: list[Migration] = MigrationRunner(
+        AsyncMock(), migrations_dir=DEFAULT_MIGRATIONS_DIR
+    ).load_migrations()
+
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1))
+    for migration in migrations:
+        if "ON tickets (" in migration.sql:
+            assert not migration.transactional
+            assert "CONCURRENTLY" in migration.sql
+
+
+async def test_apply_runs_pending_migrations_under_advisory_lock(
+    runner: MigrationRunner, mock_conn: AsyncMock
+) -> None:
+    """Test that concurrent index steps run one statement at a time outside a transaction."""
+    applied: list[Migration] = await runner.apply()
+
+    assert [m.version for m in applied] == [1, 2]
+    statements: list[str] = executed_sql(mock_conn)
+    assert statements[0] == "SELECT pg_advisory_lock($1)"
+    assert statements[-1] == "SELECT pg_advisory_unlock($1)"
+    assert CREATE_TABLE_SQL in statements
+    assert "DROP INDEX CONCURRENTLY IF EXISTS idx_t;" in statements[4]
+    assert statements[5] == "CREATE INDEX CONCURRENTLY idx_t\n    ON t (id);"
+    mock_conn.transaction.assert_called_once()
+    mock_conn.close.assert_awaited_once()
+
+
+async def test_apply_skips_applied_and_rejects_edited_migrations(
+    runner: MigrationRunner, mock_conn: AsyncMock
+) -> None:
+    """Test that applied migrations are skipped and edited ones are refused."""
+    migrations: list[Migration] = runner.load_migrations()
+    mock_conn.fetchval.return_value = True
+    mock_conn.fetch.return_value = [{"version": 1, "checksum": migrations[0].checksum}]
+
+    applied: list[Migration] = await runner.apply()
+
+    assert [m.version for m in applied] == [2]
+
+    mock_conn.fetch.return_value = [{"version": 1, "checksum": "0" * 64}]
+    with pytest.raises(ValueError, match="changed after being applied"):
+        await runner.apply()
+    assert executed_sql(mock_conn)[-1] == "SELECT pg_advisory_unlock($1)"
+
+
+async def test_apply_keeps_do_blocks_in_one_statement(
+    runner: MigrationRunner, migrations_dir: Path, mock_conn: AsyncMock
+) -> None:
+    """Test that a batched backfill block is sent whole, not split on its semicolons."""
+    (migrations_dir / "V0003__backfill_t.sql").write_text(BATCHED_BACKFILL_SQL)
+
+    await runner.apply()
+
+    statements: list[str] = executed_sql(mock_conn)
+    assert statements[-4].endswith(
+        "DO $$\nBEGIN\n    UPDATE t SET id = 0 WHERE id IS NULL;\n    COMMIT;\nEND\n$$;"
+    )
+    assert statements[-3] == "ALTER TABLE t VALIDATE CONSTRAINT t_id_not_null;"
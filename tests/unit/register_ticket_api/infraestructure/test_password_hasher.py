@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from src.register_ticket_api.infraestructure import PasswordHasher
+
+TEST_PASSWORD: str = "Secr3t!pass"  # noqa: S105
+CPU_COUNT: int = 8
+WEB_WORKERS: int = 4
+
+
+@pytest.fixture
+def password_hasher() -> PasswordHasher:
+    """Create a hasher with a single worker process."""
+    hasher = PasswordHasher(max_workers=1, chunk_size=2)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_hash_many_keeps_order_and_salts_each_password(
+    password_hasher: PasswordHasher,
+) -> None:
+    """Test that hashes come back in order and are salted per password."""
+    passwords: list[str] = [TEST_PASSWORD, "other", TEST_PASSWORD]
+
+    hashes = await password_hasher.hash_many(passwords)
+
+    assert len(hashes) == len(passwords)
+    assert hashes[0] != hashes[2]
+    for password, password_hash in zip(passwords, hashes, strict=True):
+        assert password_hash.startswith("scrypt$")
+        assert await password_hasher.verify(password, password_hash)
+
+
+async def test_verify_rejects_wrong_or_unknown_hashes(password_hasher: PasswordHasher) -> None:
+    """Test that a wrong password or a non scrypt hash doesn't verify."""
+    password_hash = await password_hasher.hash(TEST_PASSWORD)
+
+    assert not await password_hasher.verify("wrong", password_hash)
+    assert not await password_hasher.verify(TEST_PASSWORD, TEST_PASSWORD)
+
+
+def test_default_pool_splits_cores_between_web_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the web workers' hash pools together get one process per core."""
+    monkeypatch.setattr(os, "cpu_count", lambda: CPU_COUNT)
+    monkeypatch.setenv("WEB_CONCURRENCY", str(WEB_WORKERS))
+    assert PasswordHasher().max_workers == CPU_COUNT // WEB_WORKERS
+
+    monkeypatch.setenv("WEB_CONCURRENCY", str(CPU_COUNT * 2))
+    assert PasswordHasher().max_workers == 1
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import pytest
+
+from src.register_ticket_api.infraestructure import RecentScanCache, SqliteRecentScanStore
+
+SEAT: str = "A1"
+GATE: str = "G1"
+CODE: str = "123456"
+USED_TTL_SECONDS: float = 600.0
+CODE_TTL_SECONDS: float = 60.0
+MAX_ENTRIES: int = 2
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Controllable monotonic clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def recent_scans(clock: FakeClock) -> RecentScanCache:
+    """Create a local recent scan cache."""
+    return RecentScanCache(
+        max_entries=MAX_ENTRIES,
+        used_ttl_seconds=USED_TTL_SECONDS,
+        rejected_code_ttl_seconds=CODE_TTL_SECONDS,
+        clock=clock,
+    )
+
+
+async def test_used_ticket_is_rejected_until_its_window_ends(
+    recent_scans: RecentScanCache, clock: FakeClock
+) -> None:
+    """Test that any code for a just used ticket is rejected within the window."""
+    await recent_scans.remember_used_ticket(SEAT, GATE)
+
+    assert await recent_scans.get_rejection(SEAT, GATE, "000000") == "Invalid ticket"
+    clock.now = USED_TTL_SECONDS
+    assert await recent_scans.get_rejection(SEAT, GATE, "000000") is None
+    assert len(recent_scans) == 0
+
+
+async def test_rejected_code_only_blocks_the_same_code(
+    recent_scans: RecentScanCache, clock: FakeClock
+) -> None:
+    """Test that a rejected TOTP code is answered from memory, other codes go through."""
+    await recent_scans.remember_rejected_code(SEAT, GATE, CODE)
+
+    assert await recent_scans.get_rejection(SEAT, GATE, CODE) == "Invalid TOTP ticket code."
+    assert await recent_scans.get_rejection(SEAT, GATE, "654321") is None
+    clock.now = CODE_TTL_SECONDS
+    assert await recent_scans.get_rejection(SEAT, GATE, CODE) is None
+
+
+async def test_oldest_entries_are_evicted(recent_scans: RecentScanCache) -> None:
+    """Test that the cache never holds more than its maximum entries."""
+    for seat in ("A1", "A2", "A3"):
+        await recent_scans.remember_used_ticket(seat, GATE)
+
+    assert len(recent_scans) == MAX_ENTRIES
+    assert await recent_scans.get_rejection("A1", GATE, CODE) is None
+
+
+async def test_workers_share_scans_through_the_local_store(tmp_path: Path) -> None:
+    """Test that a scan remembered by one worker is rejected by another one."""
+    path: Path = tmp_path / "recent_scans.sqlite3"
+    worker_a = RecentScanCache(max_entries=10, shared_store=SqliteRecentScanStore(path))
+    store_b = SqliteRecentScanStore(path)
+    worker_b = RecentScanCache(max_entries=10, shared_store=store_b)
+
+    await worker_a.remember_used_ticket(SEAT, GATE)
+
+    assert await worker_b.get_rejection(SEAT, GATE, CODE) == "Invalid ticket"
+    assert await store_b.find(["missing"]) is None
+    store_b.close()
+
+
+async def test_unusable_store_falls_back_to_local_scans(tmp_path: Path) -> None:
+    """Test that a store that can't be opened doesn't fail scans, the worker keeps its own."""
+    recent_scans = RecentScanCache(max_entries=10, shared_store=SqliteRecentScanStore(tmp_path))
+
+    await recent_scans.remember_used_ticket(SEAT, GATE)
+
+    assert await recent_scans.get_rejection(SEAT, GATE, CODE) == "Invalid ticket"
+    assert await recent_scans.get_rejection("A2", GATE, CODE) is None
@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+import pytest
+from starlette.types import Message, Receive, Scope, Send
+
+from src.register_ticket_api.exceptions import DeadlineExceededException
+from src.register_ticket_api.infraestructure import (
+    CircuitBreaker,
+    PostgreSQLDbContext,
+    RequestDeadlineMiddleware,
+    query_timeout,
+    start_request_deadline,
+    stop_request_deadline,
+)
+
+POOL_TIMEOUT_SECONDS: float = 5.0
+REQUEST_TIMEOUT_SECONDS: float = 1.0
+SHORT_TIMEOUT_MS: float = 20.0
+GATEWAY_TIMEOUT: int = 504
+OK: int = 200
+
+
+def http_scope(path: str = "/api/users/attendance", headers: list | None = None) -> Scope:
+    return {"type": "http", "method": "POST", "path": path, "headers": headers or []}
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.sent: list[Message] = []
+        self.gone = asyncio.Event()
+
+    async def receive(self) -> Message:
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: Message) -> None:
+        self.sent.append(message)
+
+
+def test_query_timeout_outside_request_uses_default() -> None:
+    """Test background queries keep the pool timeouts."""
+    assert query_timeout() is None
+    assert query_timeout(POOL_TIMEOUT_SECONDS) == POOL_TIMEOUT_SECONDS
+
+
+def test_query_timeout_is_capped_by_request_deadline() -> None:
+    """Test a query never outlives the request that issued it."""
+    token = start_request_deadline(REQUEST_TIMEOUT_SECONDS)
+    try:
+        timeout: float | None = query_timeout(POOL_TIMEOUT_SECONDS)
+        assert timeout is not None
+        assert timeout < POOL_TIMEOUT_SECONDS
+    finally:
+        stop_request_deadline(token)
+    assert query_timeout() is None
+
+
+def test_query_timeout_raises_once_deadline_passed() -> None:
+    """Test no query is started after the deadline."""
+    token = start_request_deadline(0)
+    try:
+        with pytest.raises(DeadlineExceededException):
+            query_timeout()
+    finally:
+        stop_request_deadline(token)
+
+
+async def test_expired_deadline_is_not_a_database_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a request out of time neither retries nor counts against the breaker."""
+    monkeypatch.setenv("DB_RETRY_ATTEMPTS", "3")
+    circuit_breaker = CircuitBreaker(minimum_calls=1)
+    db_context = PostgreSQLDbContext(circuit_breaker=circuit_breaker)
+    token = start_request_deadline(0)
+    try:
+        with pytest.raises(DeadlineExceededException):
+            await db_context.get_connection()
+    finally:
+        stop_request_deadline(token)
+
+    assert circuit_breaker.state == "closed"
+
+
+async def test_middleware_answers_504_and_cancels_slow_request() -> None:
+    """Test a request past its deadline is cancelled and answered with 504."""
+    cancelled = asyncio.Event()
+
+    async def slow_app(scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    client = FakeClient()
+    middleware = RequestDeadlineMiddleware(
+        slow_app, route_timeouts_ms={"/api/users/attendance": SHORT_TIMEOUT_MS}
+    )
+
+    await middleware(http_scope(), client.receive, client.send)
+
+    assert cancelled.is_set()
+    assert client.sent[0]["status"] == GATEWAY_TIMEOUT
+    assert json.loads(client.sent[1]["body"]) == {"detail": "Request deadline exceeded"}
+
+
+async def test_middleware_only_exempts_routes_by_path() -> None:
+    """Test a client header can't lift the deadline, only a route pattern can."""
+    seen: list[float | None] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        seen.append(query_timeout())
+        await send({"type": "http.response.start", "status": OK, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    client = FakeClient()
+    middleware = RequestDeadlineMiddleware(
+        app, route_timeouts_ms={"/api/users/{username}/tickets/events": 0}
+    )
+    stream_headers: list = [(b"accept", b"text/event-stream")]
+
+    await middleware(http_scope(headers=stream_headers), client.receive, client.send)
+    await middleware(
+        http_scope("/api/users/ana/tickets/events", stream_headers), client.receive, client.send
+    )
+
+    assert seen[0] is not None
+    assert seen[1] is None
+
+
+async def test_middleware_header_overrides_route_timeout() -> None:
+    """Test the client deadline header wins over the route default."""
+    seen: list[float | None] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        seen.append(query_timeout())
+        await send({"type": "http.response.start", "status": OK, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    client = FakeClient()
+    middleware = RequestDeadlineMiddleware(app, route_timeouts_ms={"/api/users/attendance": 0})
+
+    await middleware(
+        http_scope(headers=[(b"x-request-timeout-ms", b"50")]), client.receive, client.send
+    )
+
+    assert seen[0] is not None
+    assert seen[0] < REQUEST_TIMEOUT_SECONDS
+    assert client.sent[0]["status"] == OK
+
+
+async def test_middleware_cancels_request_when_client_disconnects() -> None:
+    """Test in-flight work stops as soon as the gate hangs up."""
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow_app(scope: Scope, receive: Receive, send: Send) -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    client = FakeClient()
+    middleware = RequestDeadlineMiddleware(slow_app)
+    request = asyncio.create_task(middleware(http_scope(), client.receive, client.send))
+    await started.wait()
+
+    client.gone.set()
+    await asyncio.wait_for(request, timeout=REQUEST_TIMEOUT_SECONDS)
+
+    assert cancelled.is_set()
+    assert client.sent == []
@@ -0,0 +1,53 @@
+import pytest
+
+from src.register_ticket_api.infraestructure import PostgreSQLDbContext, ShardedDbContext
+
+PRIMARY_DATABASE: str = "event_access"
+
+
+@pytest.fixture
+def primary(monkeypatch: pytest.MonkeyPatch) -> PostgreSQLDbContext:
+    monkeypatch.setenv("DB_NAME", PRIMARY_DATABASE)
+    return PostgreSQLDbContext()
+
+
+def test_from_config_reuses_the_primary_pool(primary: PostgreSQLDbContext) -> None:
+    """Test the shard on the primary database shares its context."""
+    shards = ShardedDbContext.from_config(
+        f"main={PRIMARY_DATABASE}, east=event_access_east", primary
+    )
+
+    assert shards.shard_names == ["main", "east"]
+    assert shards.context("main") is primary
+    assert shards.context("east").database == "event_access_east"
+    assert shards.shard_map.default_shard == "main"
+
+
+def test_gates_follow_the_shard_map(primary: PostgreSQLDbContext) -> None:
+    """Test assigned gates route to their shard and the rest to the default."""
+    shards = ShardedDbContext.from_config(
+        f"main={PRIMARY_DATABASE},east=event_access_east", primary
+    )
+
+    shards.apply_assignments({"G2": "east"})
+
+    assert shards.for_gate("G2") is shards.context("east")
+    assert shards.for_gate("G1") is primary
+    assert len(shards.contexts()) == len(shards.shard_names)
+
+
+def test_map_pointing_to_unknown_shards_is_rejected(primary: PostgreSQLDbContext) -> None:
+    """Test a refresh can't route gates to a shard this worker doesn't know."""
+    shards = ShardedDbContext.from_config(f"main={PRIMARY_DATABASE}", primary)
+
+    with pytest.raises(ValueError, match="unknown shards west"):
+        shards.apply_assignments({"G2": "west"})
+
+    assert shards.shard_map.assignments == {}
+
+
+@pytest.mark.parametrize("shards_config", ["", "main", "=event_access"])
+def test_invalid_config_is_rejected(primary: PostgreSQLDbContext, shards_config: str) -> None:
+    """Test malformed DB_SHARDS fails at startup."""
+    with pytest.raises(ValueError, match="shard"):
+        ShardedDbContext.from_config(shards_config, primary)
@@ -0,0 +1,98 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import TicketChange
+from src.register_ticket_api.infraestructure import TicketChangeBus, TicketChangeFeed
+
+TEST_GATE: str = "G1"
+OTHER_GATE: str = "G2"
+
+
+def make_change(gate: str = TEST_GATE) -> TicketChange:
+    return TicketChange(ticket_id=uuid4(), seat="A1", gate=gate, status="revoked")
+
+
+@pytest.fixture
+def change_feed() -> TicketChangeFeed:
+    """Create a small change feed."""
+    return TicketChangeFeed(max_changes=3)
+
+
+async def test_wait_for_changes_returns_changes_of_the_gate(
+    change_feed: TicketChangeFeed,
+) -> None:
+    """Test that only the gate changes after the cursor are returned."""
+    cursor: str = change_feed.current_cursor()
+    change: TicketChange = make_change()
+    change_feed.append([change, make_change(OTHER_GATE)])
+
+    page = await change_feed.wait_for_changes(TEST_GATE, cursor, timeout_seconds=0)
+
+    assert page.changes == [change]
+    assert page.reset is False
+    assert page.cursor == change_feed.current_cursor()
+
+
+async def test_wait_for_changes_wakes_up_on_append(change_feed: TicketChangeFeed) -> None:
+    """Test that a waiting device gets a change appended while it waits."""
+    cursor: str = change_feed.current_cursor()
+    change: TicketChange = make_change()
+
+    waiter = asyncio.create_task(change_feed.wait_for_changes(TEST_GATE, cursor, 5))
+    await asyncio.sleep(0)
+    change_feed.append([change])
+    page = await asyncio.wait_for(waiter, timeout=1)
+
+    assert page.changes == [change]
+
+
+async def test_wait_for_changes_times_out_empty(change_feed: TicketChangeFeed) -> None:
+    """Test that the long poll ends empty when nothing changes."""
+    cursor: str = change_feed.current_cursor()
+    change_feed.append([make_change(OTHER_GATE)])
+
+    page = await change_feed.wait_for_changes(TEST_GATE, cursor, timeout_seconds=0.01)
+
+    assert page.changes == []
+    assert page.reset is False
+
+
+@pytest.mark.parametrize("cursor", [None, "", "other-epoch:0", "garbage"])
+async def test_wait_for_changes_resets_unknown_cursor(
+    change_feed: TicketChangeFeed, cursor: str | None
+) -> None:
+    """Test that cursors from another process ask the device to resync."""
+    page = await change_feed.wait_for_changes(TEST_GATE, cursor, timeout_seconds=0)
+
+    assert page.reset is True
+    assert page.cursor == change_feed.current_cursor()
+
+
+async def test_wait_for_changes_resets_evicted_cursor(change_feed: TicketChangeFeed) -> None:
+    """Test that a cursor older than the buffer asks the device to resync."""
+    cursor: str = change_feed.current_cursor()
+    change_feed.append([make_change() for _ in range(4)])
+
+    page = await change_feed.wait_for_changes(TEST_GATE, cursor, timeout_seconds=0)
+
+    assert page.reset is True
+
+
+def test_bus_publishes_to_subscribers_and_survives_failures() -> None:
+    """Test that a failing subscriber does not stop the others."""
+    bus = TicketChangeBus()
+    received: list[TicketChange] = []
+
+    def failing_handler(changes: list[TicketChange]) -> None:
+        raise RuntimeError("boom")
+
+    bus.subscribe(failing_handler)
+    unsubscribe = bus.subscribe(received.extend)
+    change: TicketChange = make_change()
+    bus.publish([change])
+    unsubscribe()
+    bus.publish([make_change()])
+
+    assert received == [change]
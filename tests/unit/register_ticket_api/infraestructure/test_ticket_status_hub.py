@@ -0,0 +1,68 @@
+import asyncio
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import TicketChange
+from src.register_ticket_api.infraestructure import TicketStatusHub
+
+MAX_PENDING: int = 2
+WAIT_SECONDS: float = 1.0
+
+
+def make_change(user_id: UUID | None, status: str = "used") -> TicketChange:
+    return TicketChange(ticket_id=uuid4(), user_id=user_id, seat="A1", gate="G1", status=status)
+
+
+@pytest.fixture
+def hub() -> TicketStatusHub:
+    """Hub with a tiny per-subscriber buffer."""
+    return TicketStatusHub(max_pending_per_subscriber=MAX_PENDING)
+
+
+async def test_changes_reach_only_the_owner(hub: TicketStatusHub) -> None:
+    """Test a change is delivered to the subscriptions of its user only."""
+    owner, other = uuid4(), uuid4()
+    owner_subscription = hub.subscribe(owner)
+    other_subscription = hub.subscribe(other)
+    change = make_change(owner)
+
+    hub.publish([change, make_change(None, status="valid")])
+
+    assert await owner_subscription.next_batch() == ([change], False)
+    waiting = asyncio.create_task(other_subscription.next_batch())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    waiting.cancel()
+
+
+async def test_slow_subscriber_drops_oldest_and_resyncs(hub: TicketStatusHub) -> None:
+    """Test a full buffer keeps the newest changes and flags the loss."""
+    user_id = uuid4()
+    subscription = hub.subscribe(user_id)
+    changes = [make_change(user_id) for _ in range(MAX_PENDING + 1)]
+
+    hub.publish(changes)
+
+    assert await subscription.next_batch() == (changes[1:], True)
+
+
+async def test_heartbeat_wakes_idle_subscribers(hub: TicketStatusHub) -> None:
+    """Test a heartbeat returns an empty batch to a waiting subscriber."""
+    subscription = hub.subscribe(uuid4())
+    waiting = asyncio.create_task(subscription.next_batch())
+    await asyncio.sleep(0)
+
+    hub.heartbeat()
+
+    assert await asyncio.wait_for(waiting, timeout=WAIT_SECONDS) == ([], False)
+
+
+async def test_closed_subscription_is_forgotten(hub: TicketStatusHub) -> None:
+    """Test closing twice is harmless and leaves no subscriber behind."""
+    subscription = hub.subscribe(uuid4())
+
+    subscription.close()
+    subscription.close()
+
+    assert hub.subscriber_count == 0
@@ -0,0 +1,59 @@
+from base64 import b64encode
+from collections.abc import Callable
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import Ticket
+from src.register_ticket_api.exceptions import AppValidationException
+from src.register_ticket_api.infraestructure import TicketTokenCodec
+
+OLD_KEY: bytes = b"o" * 32
+NEW_KEY: bytes = b"n" * 32
+SEED: str = b64encode(b"test_secret_key_").decode()
+
+
+@pytest.fixture
+def ticket() -> Ticket:
+    """Create a registered ticket."""
+    return Ticket(id=uuid4(), user_id=uuid4(), seat="A1", gate="G1", seed=SEED)
+
+
+def test_verify_returns_the_issued_claims(ticket: Ticket) -> None:
+    """Test that a token round-trips the ticket identity and seed without exposing it."""
+    codec = TicketTokenCodec({"k1": OLD_KEY})
+
+    token = codec.issue(ticket)
+    claims = codec.verify(token)
+
+    assert SEED not in token
+    assert (claims.ticket_id, claims.user_id, claims.seat, claims.gate, claims.seed) == (
+        ticket.id,
+        ticket.user_id,
+        ticket.seat,
+        ticket.gate,
+        SEED,
+    )
+    assert claims.kid == "k1"
+
+
+def test_rotated_keys_keep_verifying_old_tokens(ticket: Ticket) -> None:
+    """Test that tokens of a retired-but-configured key still verify after rotation."""
+    old_token = TicketTokenCodec({"k1": OLD_KEY}).issue(ticket)
+    rotated = TicketTokenCodec.from_config(
+        f"k1:{b64encode(OLD_KEY).decode()},k2:{b64encode(NEW_KEY).decode()}", active_kid="k2"
+    )
+
+    assert rotated.verify(old_token).kid == "k1"
+    assert rotated.verify(rotated.issue(ticket)).kid == "k2"
+    with pytest.raises(AppValidationException):
+        TicketTokenCodec({"k2": NEW_KEY}).verify(old_token)
+
+
+@pytest.mark.parametrize("tamper", [lambda t: t[:-2] + "AA", lambda t: t.replace(".", ".x", 1)])
+def test_tampered_tokens_are_rejected(ticket: Ticket, tamper: Callable[[str], str]) -> None:
+    """Test that any change to the payload or signature invalidates the token."""
+    codec = TicketTokenCodec({"k1": OLD_KEY})
+
+    with pytest.raises(AppValidationException, match="Invalid ticket token"):
+        codec.verify(tamper(codec.issue(ticket)))
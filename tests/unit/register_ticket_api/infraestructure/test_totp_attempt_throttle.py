@@ -0,0 +1,69 @@
+import pytest
+
+from src.register_ticket_api.exceptions import TooManyAttemptsException
+from src.register_ticket_api.infraestructure import TotpAttemptThrottle
+
+MAX_FAILURES: int = 3
+WINDOW_SECONDS: float = 60.0
+TICKET_KEY: str = "ticket:G1:A1"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Controllable monotonic clock."""
+    return FakeClock()
+
+
+@pytest.fixture
+def throttle(clock: FakeClock) -> TotpAttemptThrottle:
+    """Create a small throttle."""
+    return TotpAttemptThrottle(
+        max_failures=MAX_FAILURES, window_seconds=WINDOW_SECONDS, width=1024, clock=clock
+    )
+
+
+def test_key_is_throttled_after_max_failures(throttle: TotpAttemptThrottle) -> None:
+    """Test that the key is rejected once it reaches the failure limit, others are not."""
+    for _ in range(MAX_FAILURES - 1):
+        throttle.record_failure([TICKET_KEY])
+    throttle.check([TICKET_KEY])
+
+    throttle.record_failure([TICKET_KEY])
+
+    with pytest.raises(TooManyAttemptsException) as exc_info:
+        throttle.check(["client:10.0.0.1", TICKET_KEY])
+    assert exc_info.value.retry_after_seconds == WINDOW_SECONDS
+    throttle.check(["ticket:G1:A2"])
+
+
+def test_failures_fade_out_with_the_sliding_window(
+    throttle: TotpAttemptThrottle, clock: FakeClock
+) -> None:
+    """Test that failures of the previous window still count partially, then expire."""
+    for _ in range(MAX_FAILURES + 1):
+        throttle.record_failure([TICKET_KEY])
+
+    clock.now = WINDOW_SECONDS * 1.1
+    with pytest.raises(TooManyAttemptsException):
+        throttle.check([TICKET_KEY])
+    clock.now = WINDOW_SECONDS * 1.5
+    throttle.check([TICKET_KEY])
+    clock.now = WINDOW_SECONDS * 3
+    throttle.check([TICKET_KEY])
+
+
+def test_many_unique_keys_dont_throttle_a_fresh_key() -> None:
+    """Test that an attack cycling through keys doesn't spill over to other keys."""
+    throttle = TotpAttemptThrottle(max_failures=MAX_FAILURES)
+    for attempt in range(5000):
+        throttle.record_failure([f"client:attacker-{attempt}"])
+
+    throttle.check(["client:legit"])
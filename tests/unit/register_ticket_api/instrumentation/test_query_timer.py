@@ -0,0 +1,53 @@
+from uuid import uuid4
+
+from loguru import logger
+
+from src.register_ticket_api.instrumentation import (
+    DEFAULT_SLOW_QUERY_THRESHOLD_MS,
+    configure_slow_query_log,
+    describe_param_shapes,
+    start_request_timings,
+    stop_request_timings,
+    timed_query,
+)
+
+
+def test_describe_param_shapes_hides_values() -> None:
+    """Test that only parameter types and sizes are described."""
+    ticket_id = uuid4()
+
+    shapes: list[str] = describe_param_shapes(("A12", ticket_id, [ticket_id, ticket_id], 3))
+
+    assert shapes == ["str(len=3)", "UUID", "list[2]", "int"]
+    assert "A12" not in "".join(shapes)
+
+
+def test_timed_query_records_statement_span() -> None:
+    """Test that each query is recorded as a db_<statement> span."""
+    timings, token = start_request_timings()
+    try:
+        with timed_query("get_by_ticket_details", ("A1", "G1")):
+            pass
+    finally:
+        stop_request_timings(token)
+
+    assert "db_get_by_ticket_details" in timings.spans()
+
+
+def test_timed_query_logs_slow_queries_without_values() -> None:
+    """Test that queries over the threshold are written to the slow query log."""
+    messages: list[str] = []
+    sink_id: int = logger.add(
+        messages.append, filter=lambda record: record["extra"].get("slow_query", False)
+    )
+    configure_slow_query_log(threshold_ms=0)
+    try:
+        with timed_query("get_by_username", ("secret_user",)):
+            pass
+    finally:
+        configure_slow_query_log(threshold_ms=DEFAULT_SLOW_QUERY_THRESHOLD_MS)
+        logger.remove(sink_id)
+
+    assert len(messages) == 1
+    assert "Slow query get_by_username" in messages[0]
+    assert "secret_user" not in messages[0]
@@ -0,0 +1,38 @@
+from src.register_ticket_api.instrumentation import (
+    RequestTimings,
+    current_timings,
+    start_request_timings,
+    stop_request_timings,
+    timed_span,
+)
+
+
+def test_to_header_aggregates_repeated_spans() -> None:
+    """Test that repeated spans are summed and counted in the Server-Timing header."""
+    timings = RequestTimings()
+    timings.add("db_acquire", 1.5)
+    timings.add("db_acquire", 0.5)
+    timings.add("totp_verify", 0.25)
+
+    assert timings.to_header() == 'db_acquire;dur=2.00;desc="x2", totp_verify;dur=0.25'
+
+
+def test_timed_span_records_into_current_request() -> None:
+    """Test that spans are recorded while request timings are active."""
+    timings, token = start_request_timings()
+    try:
+        with timed_span("totp_verify"):
+            pass
+    finally:
+        stop_request_timings(token)
+
+    assert "totp_verify" in timings.spans()
+    assert current_timings() is None
+
+
+def test_timed_span_without_request_is_noop() -> None:
+    """Test that spans outside of a timed request are ignored."""
+    with timed_span("totp_verify"):
+        pass
+
+    assert current_timings() is None
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from src.register_ticket_api.exceptions import (
+    AppValidationException,
+    ProfilingInProgressException,
+)
+from src.register_ticket_api.instrumentation import RuntimeProfiler
+
+WINDOW_SECONDS: float = 0.2
+SPIN_SECONDS: float = 0.01
+KEPT_ALLOCATIONS: int = 10_000
+
+
+def spin_on_the_loop() -> None:
+    started_at: float = time.perf_counter()
+    while time.perf_counter() - started_at < SPIN_SECONDS:
+        pass
+
+
+async def keep_the_loop_busy(window: asyncio.Task) -> None:
+    while not window.done():
+        spin_on_the_loop()
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def profiler() -> RuntimeProfiler:
+    """Profiler sampling every millisecond."""
+    profiler = RuntimeProfiler(max_seconds=1.0, sample_interval_seconds=0.001)
+    yield profiler
+    profiler.stop_memory_tracing()
+
+
+async def test_sampler_returns_collapsed_stacks_of_the_loop(profiler: RuntimeProfiler) -> None:
+    """Test that code running on the event loop shows up as collapsed stacks."""
+    window = asyncio.create_task(profiler.profile_cpu(WINDOW_SECONDS, focus="spin_on_the_loop"))
+    await keep_the_loop_busy(window)
+
+    lines: list[str] = (await window).splitlines()
+
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.endswith("test_runtime_profiler.py:spin_on_the_loop")
+    assert int(count) > 0
+
+
+async def test_cprofile_window_returns_pstats(profiler: RuntimeProfiler) -> None:
+    """Test that the cProfile mode reports the calls made during the window."""
+    window = asyncio.create_task(
+        profiler.profile_cpu(WINDOW_SECONDS, mode="cprofile", focus="spin_on_the_loop")
+    )
+    await keep_the_loop_busy(window)
+
+    report: str = await window
+
+    assert "cumulative" in report
+    assert "spin_on_the_loop" in report
+
+
+async def test_only_one_cpu_window_at_a_time(profiler: RuntimeProfiler) -> None:
+    """Test that a second window is refused while one is open and limits are enforced."""
+    window = asyncio.create_task(profiler.profile_cpu(WINDOW_SECONDS))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ProfilingInProgressException):
+        await profiler.profile_cpu(WINDOW_SECONDS)
+    await window
+    with pytest.raises(AppValidationException):
+        await profiler.profile_cpu(seconds=2.0)
+
+
+def test_memory_growth_points_at_the_allocating_line(profiler: RuntimeProfiler) -> None:
+    """Test that allocations kept since the baseline are reported by line."""
+    with pytest.raises(AppValidationException):
+        profiler.memory_growth()
+    profiler.start_memory_tracing()
+    kept: list[str] = [f"allocation {i}" for i in range(KEPT_ALLOCATIONS)]
+
+    growth = profiler.memory_growth(limit=5)
+    profiler.stop_memory_tracing()
+
+    assert "test_runtime_profiler.py" in growth[0].location
+    assert growth[0].size_diff_bytes > 0
+    assert growth[0].count_diff >= len(kept)
+    assert not profiler.memory_tracing
@@ -1,10 +1,18 @@
+from datetime import datetime
 from unittest.mock import ANY, AsyncMock
 from uuid import uuid4
 
+import asyncpg
 import pytest
 
-from src.register_ticket_api.entities import Ticket, User
-from src.register_ticket_api.exceptions import DbOperationException
+from src.register_ticket_api.entities import JournaledAttendance, Ticket, User
+from src.register_ticket_api.exceptions import DbOperationException, DeadlineExceededException
+from src.register_ticket_api.infraestructure import (
+    ShardedDbContext,
+    ShardMap,
+    start_request_deadline,
+    stop_request_deadline,
+)
 from src.register_ticket_api.repositories.ticket_repository import TicketRepository
 
 
@@ -53,6 +61,7 @@ async def test_register_ticket_calls_stored_procedure(
         "CALL sp_register_ticket_to_user($1, $2)",
         sample_ticket.id,
         sample_user.id,
+        timeout=None,
     )
     assert result is True
 
@@ -67,11 +76,26 @@ async def test_mark_ticket_as_used_calls_function(
     result = await ticket_repository.mark_ticket_as_used(sample_ticket.id)
 
     mock_conn.fetchval.assert_awaited_once_with(
-        "SELECT fn_mark_ticket_as_used($1)", sample_ticket.id
+        "SELECT fn_mark_ticket_as_used($1)", sample_ticket.id, timeout=None
     )
     assert result is True
 
 
+async def test_mark_ticket_as_used_returns_false_when_function_rejects_ticket(
+    mock_db_context: AsyncMock, ticket_repository: TicketRepository, sample_ticket: Ticket
+) -> None:
+    mock_conn = AsyncMock()
+    mock_conn.fetchval.side_effect = asyncpg.exceptions.RaiseError(
+        f"Ticket {sample_ticket.id} no existe o ya fue usado"
+    )
+    mock_db_context.get_connection.return_value = mock_conn
+
+    result = await ticket_repository.mark_ticket_as_used(sample_ticket.id)
+
+    assert result is False
+    mock_db_context.release_connection.assert_awaited_once_with(mock_conn)
+
+
 async def test_get_by_ticket_details_returns_ticket(
     mock_db_context: AsyncMock, sample_ticket: Ticket, ticket_repository: TicketRepository
 ) -> None:
@@ -83,7 +107,9 @@ async def test_get_by_ticket_details_returns_ticket(
         seat=sample_ticket.seat, gate=sample_ticket.gate
     )
 
-    mock_conn.fetchrow.assert_awaited_once_with(ANY, sample_ticket.seat, sample_ticket.gate)
+    mock_conn.fetchrow.assert_awaited_once_with(
+        ANY, sample_ticket.seat, sample_ticket.gate, timeout=None
+    )
     assert isinstance(ticket, Ticket)
     assert ticket.seat == sample_ticket.seat
     assert ticket.gate == sample_ticket.gate
@@ -111,3 +137,163 @@ async def test_get_by_ticket_details_raises_db_operation_exception(
 
     with pytest.raises(DbOperationException):
         await ticket_repository.get_by_ticket_details("A1", "G1")
+
+
+async def test_get_by_ticket_details_releases_connection_on_error(
+    mock_db_context: AsyncMock, ticket_repository: TicketRepository
+) -> None:
+    mock_conn = AsyncMock()
+    mock_db_context.get_connection.return_value = mock_conn
+    mock_conn.fetchrow.side_effect = Exception("DB error")
+
+    with pytest.raises(DbOperationException):
+        await ticket_repository.get_by_ticket_details("A1", "G1")
+
+    mock_db_context.release_connection.assert_awaited_once_with(mock_conn)
+
+
+async def test_get_by_ticket_details_lets_deadline_through(
+    mock_db_context: AsyncMock, ticket_repository: TicketRepository
+) -> None:
+    mock_conn = AsyncMock()
+    mock_db_context.get_connection.return_value = mock_conn
+    token = start_request_deadline(0)
+
+    try:
+        with pytest.raises(DeadlineExceededException):
+            await ticket_repository.get_by_ticket_details("A1", "G1")
+    finally:
+        stop_request_deadline(token)
+
+    mock_conn.fetchrow.assert_not_awaited()
+    mock_db_context.release_connection.assert_awaited_once_with(mock_conn)
+
+
+async def test_get_user_ticket_excludes_seed(
+    mock_db_context: AsyncMock, sample_ticket: Ticket, ticket_repository: TicketRepository
+) -> None:
+    mock_conn = AsyncMock()
+    mock_db_context.get_connection.return_value = mock_conn
+    mock_conn.fetchrow.return_value = sample_ticket.model_dump(exclude={"seed"}) | {"version": 3}
+
+    ticket: Ticket | None = await ticket_repository.get_user_ticket(sample_ticket.id, "test")
+
+    assert ticket is not None
+    assert ticket.seed is None
+    assert ticket.version == mock_conn.fetchrow.return_value["version"]
+    assert "seed" not in mock_conn.fetchrow.call_args[0][0]
+    mock_db_context.release_connection.assert_awaited_once_with(mock_conn)
+
+
+async def test_get_user_ticket_version_only_reads_version(
+    mock_db_context: AsyncMock, sample_ticket: Ticket, ticket_repository: TicketRepository
+) -> None:
+    mock_conn = AsyncMock()
+    mock_db_context.get_connection.return_value = mock_conn
+    mock_conn.fetchval.return_value = 3
+
+    version: int | None = await ticket_repository.get_user_ticket_version(sample_ticket.id, "test")
+
+    assert version == mock_conn.fetchval.return_value
+    mock_conn.fetchval.assert_awaited_once_with(ANY, sample_ticket.id, "test", timeout=None)
+    mock_conn.fetchrow.assert_not_awaited()
+
+
+async def test_list_by_user_uses_keyset_condition(
+    mock_db_context: AsyncMock, ticket_repository: TicketRepository
+) -> None:
+    mock_conn = AsyncMock()
+    mock_conn.fetch.return_value = []
+    mock_db_context.get_connection.return_value = mock_conn
+    user_id, last_ticket_id = uuid4(), uuid4()
+    last_created_at: datetime = datetime(2024, 1, 1, 12, 0)
+
+    result = await ticket_repository.list_by_user(
+        user_id, 21, after=(last_created_at, last_ticket_id), status="used"
+    )
+
+    query: str = mock_conn.fetch.await_args.args[0]
+    assert "(t.created_at, t.ticket_id) < ($2, $3)" in query
+    assert "t.status = $4" in query
+    assert "LIMIT $5" in query
+    assert "seed" not in query
+    assert mock_conn.fetch.await_args.args[1:] == (
+        user_id,
+        last_created_at,
+        last_ticket_id,
+        "used",
+        21,
+    )
+    assert result == []
+    mock_db_context.release_connection.assert_awaited_once_with(mock_conn)
+
+
+def shard_context(rows: list[dict]) -> AsyncMock:
+    db_context = AsyncMock()
+    db_context.get_connection.return_value.fetch.return_value = rows
+    db_context.get_connection.return_value.fetchrow.return_value = None
+    return db_context
+
+
+async def test_gate_keyed_calls_go_to_the_gate_shard(mock_db_context: AsyncMock) -> None:
+    """Test a ticket lookup only reaches the shard its gate is mapped to."""
+    east = shard_context([])
+    shards = ShardedDbContext({"main": mock_db_context, "east": east}, ShardMap("main"))
+    shards.apply_assignments({"G2": "east"})
+    repository = TicketRepository(db_context=mock_db_context, shards=shards)
+
+    await repository.get_by_ticket_details("A1", "G2")
+
+    east.get_connection.return_value.fetchrow.assert_awaited_once()
+    mock_db_context.get_connection.assert_not_awaited()
+
+
+async def test_list_by_user_merges_the_pages_of_every_shard() -> None:
+    """Test cross-shard pages come back newest first and cut to the limit."""
+    user_id = uuid4()
+
+    def row(gate: str, day: int) -> dict:
+        return Ticket(
+            id=uuid4(), user_id=user_id, seat="A1", gate=gate, created_at=datetime(2024, 1, day)
+        ).model_dump()
+
+    main = shard_context([row("G1", 3), row("G1", 1)])
+    east = shard_context([row("G2", 4), row("G2", 2)])
+    shards = ShardedDbContext({"main": main, "east": east}, ShardMap("main"))
+    repository = TicketRepository(db_context=main, shards=shards)
+
+    tickets: list[Ticket] = await repository.list_by_user(user_id, limit=3)
+
+    assert [ticket.created_at.day for ticket in tickets if ticket.created_at] == [4, 3, 2]
+
+
+async def test_replay_sends_each_shard_only_its_gates() -> None:
+    """Test a shard never sees journaled tickets it doesn't hold."""
+    main, east = shard_context([]), shard_context([])
+    shards = ShardedDbContext({"main": main, "east": east}, ShardMap("main", {"G2": "east"}))
+    repository = TicketRepository(db_context=main, shards=shards)
+    journaled: list[JournaledAttendance] = [
+        JournaledAttendance(ticket_id=uuid4(), seat="A1", gate=gate, used_at=datetime(2024, 1, 1))
+        for gate in ("G1", "G2", "G2")
+    ]
+
+    await repository.replay_attendance(journaled)
+
+    east_ids: list = east.get_connection.return_value.fetch.await_args.args[1]
+    main_ids: list = main.get_connection.return_value.fetch.await_args.args[1]
+    assert east_ids == [attendance.ticket_id for attendance in journaled[1:]]
+    assert main_ids == [journaled[0].ticket_id]
+
+
+async def test_fan_out_fails_when_a_shard_fails() -> None:
+    """Test a cross-shard call is not answered with part of the shards."""
+    main = shard_context([])
+    east = AsyncMock()
+    east.get_connection.side_effect = OSError("shard down")
+    shards = ShardedDbContext({"main": main, "east": east}, ShardMap("main"))
+    repository = TicketRepository(db_context=main, shards=shards)
+
+    with pytest.raises(DbOperationException):
+        await repository.revoke_tickets([uuid4()])
+
+    main.release_connection.assert_awaited_once()
@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
 
 import pytest
@@ -143,3 +143,25 @@ async def test_create_user_no_rows_affected(
     assert result is False
     mock_db_context.get_connection.assert_called_once()
     mock_db_connection.execute.assert_called_once()
+
+
+async def test_upsert_users_copies_into_staging_table(
+    user_repository: UserRepository,
+    mock_db_context: AsyncMock,
+    mock_db_connection: AsyncMock,
+) -> None:
+    """Test that users are COPYed to the staging table and upserted in one transaction."""
+    users: list[tuple[str, str]] = [(TEST_USERNAME, "scrypt$hash")]
+    mock_db_connection.transaction = MagicMock()
+    mock_db_connection.fetchrow.return_value = {"created": 1, "updated": 0}
+    mock_db_context.get_connection.return_value = mock_db_connection
+
+    result = await user_repository.upsert_users(users)
+
+    assert result == (1, 0)
+    mock_db_connection.transaction.assert_called_once()
+    mock_db_connection.copy_records_to_table.assert_awaited_once_with(
+        "users_import", records=users, columns=("username", "password_hash"), timeout=None
+    )
+    assert "ON CONFLICT (username)" in mock_db_connection.fetchrow.call_args[0][0]
+    mock_db_context.release_connection.assert_awaited_once_with(mock_db_connection)
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import AttendanceConflict, JournaledAttendance, Ticket
+from src.register_ticket_api.exceptions import DbOperationException
+from src.register_ticket_api.infraestructure import AttendanceJournal, TicketCache
+from src.register_ticket_api.interfaces import ITicketRepository
+from src.register_ticket_api.services import DegradedAttendanceService
+
+TEST_SEAT: str = "A1"
+TEST_GATE: str = "G1"
+USED_AT: datetime = datetime(2024, 1, 1, 18, 30)
+
+
+@pytest.fixture
+def sample_ticket() -> Ticket:
+    """Create a registered ticket as cached from the database."""
+    return Ticket(id=uuid4(), user_id=uuid4(), seat=TEST_SEAT, gate=TEST_GATE, seed="c2VlZA==")
+
+
+@pytest.fixture
+def mock_ticket_repo() -> AsyncMock:
+    """Mock ticket repository."""
+    return AsyncMock(spec=ITicketRepository)
+
+
+@pytest.fixture
+def journal(tmp_path: Path) -> AttendanceJournal:
+    """Create a journal in a temporary directory."""
+    return AttendanceJournal(str(tmp_path))
+
+
+@pytest.fixture
+def degraded_attendance(
+    mock_ticket_repo: AsyncMock, journal: AttendanceJournal
+) -> DegradedAttendanceService:
+    """Create the degraded mode service with small replay batches."""
+    return DegradedAttendanceService(
+        ticket_repo=mock_ticket_repo,
+        ticket_cache=TicketCache(),
+        journal=journal,
+        replay_batch_size=2,
+    )
+
+
+async def test_journal_attendance_marks_cached_ticket_as_used(
+    degraded_attendance: DegradedAttendanceService,
+    journal: AttendanceJournal,
+    sample_ticket: Ticket,
+) -> None:
+    """Test that an offline scan is persisted and blocks a second scan."""
+    degraded_attendance.remember(sample_ticket)
+
+    used_ticket: Ticket = await degraded_attendance.journal_attendance(sample_ticket)
+
+    assert used_ticket.status == "used"
+    cached: Ticket | None = degraded_attendance.get_cached_ticket(TEST_SEAT, TEST_GATE)
+    assert cached is not None
+    assert cached.status == "used"
+    with journal.claim_pending() as pending:
+        assert [attendance.ticket_id for attendance in pending] == [sample_ticket.id]
+
+
+async def test_replay_batches_and_reports_conflicts(
+    degraded_attendance: DegradedAttendanceService,
+    journal: AttendanceJournal,
+    mock_ticket_repo: AsyncMock,
+) -> None:
+    """Test that replay sends unique tickets in batches and reports double uses."""
+    attendances: list[JournaledAttendance] = [
+        JournaledAttendance(ticket_id=uuid4(), seat=f"A{i}", gate=TEST_GATE, used_at=USED_AT)
+        for i in range(3)
+    ]
+    duplicated: JournaledAttendance = attendances[0].model_copy(
+        update={"used_at": USED_AT.replace(minute=31)}
+    )
+    for attendance in [*attendances, duplicated]:
+        await journal.append(attendance)
+    db_conflict = AttendanceConflict(
+        ticket_id=attendances[2].ticket_id,
+        seat="A2",
+        gate=TEST_GATE,
+        journaled_used_at=USED_AT,
+        status="revoked",
+    )
+    mock_ticket_repo.replay_attendance.side_effect = [[], [db_conflict]]
+
+    conflicts: list[AttendanceConflict] = await degraded_attendance.replay()
+
+    assert [call.args[0] for call in mock_ticket_repo.replay_attendance.await_args_list] == [
+        attendances[:2],
+        attendances[2:],
+    ]
+    assert [conflict.ticket_id for conflict in conflicts] == [
+        attendances[0].ticket_id,
+        attendances[2].ticket_id,
+    ]
+    assert not journal.has_pending()
+
+
+async def test_replay_keeps_journal_when_database_is_down(
+    degraded_attendance: DegradedAttendanceService,
+    journal: AttendanceJournal,
+    mock_ticket_repo: AsyncMock,
+    sample_ticket: Ticket,
+) -> None:
+    """Test that a failed replay is retried later with the same entries."""
+    await degraded_attendance.journal_attendance(sample_ticket)
+    mock_ticket_repo.replay_attendance.side_effect = DbOperationException(OSError("down"))
+
+    with pytest.raises(DbOperationException):
+        await degraded_attendance.replay()
+
+    assert journal.has_pending()
+
+
+async def test_refresh_cache_skipped_while_journal_pending(
+    degraded_attendance: DegradedAttendanceService,
+    mock_ticket_repo: AsyncMock,
+    sample_ticket: Ticket,
+) -> None:
+    """Test that the cache is not reloaded over scans the database does not know yet."""
+    await degraded_attendance.journal_attendance(sample_ticket)
+
+    await degraded_attendance.refresh_cache()
+
+    mock_ticket_repo.list_scannable_tickets.assert_not_awaited()
+
+
+async def test_refresh_cache_only_reloads_changed_tickets(
+    degraded_attendance: DegradedAttendanceService,
+    mock_ticket_repo: AsyncMock,
+    sample_ticket: Ticket,
+) -> None:
+    """Test that after the first load only updated tickets are read and merged."""
+    loaded: Ticket = sample_ticket.model_copy(update={"updated_at": USED_AT})
+    revoked: Ticket = loaded.model_copy(
+        update={"status": "revoked", "updated_at": USED_AT + timedelta(minutes=5)}
+    )
+    mock_ticket_repo.list_scannable_tickets.side_effect = [[loaded], [revoked]]
+
+    await degraded_attendance.refresh_cache()
+    assert degraded_attendance.get_cached_ticket(TEST_SEAT, TEST_GATE) == loaded
+    await degraded_attendance.refresh_cache()
+
+    first_call, second_call = mock_ticket_repo.list_scannable_tickets.await_args_list
+    assert first_call.args == (None,)
+    assert second_call.args[0] < USED_AT
+    assert degraded_attendance.get_cached_ticket(TEST_SEAT, TEST_GATE) is None
+
+
+async def test_refresh_cache_only_maps_snapshot_published_by_another_worker(
+    mock_ticket_repo: AsyncMock, journal: AttendanceJournal, tmp_path: Path
+) -> None:
+    """Test workers not holding the snapshot lock leave the database alone."""
+    snapshot_path: str = str(tmp_path / "gate.snapshot")
+    publisher = TicketCache(snapshot_path=snapshot_path)
+    assert publisher.owns_snapshot()
+    degraded_attendance = DegradedAttendanceService(
+        ticket_repo=mock_ticket_repo,
+        ticket_cache=TicketCache(snapshot_path=snapshot_path),
+        journal=journal,
+    )
+
+    await degraded_attendance.refresh_cache()
+
+    mock_ticket_repo.list_scannable_tickets.assert_not_awaited()
+    publisher.close()
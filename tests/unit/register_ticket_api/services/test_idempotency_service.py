@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.register_ticket_api.entities import IdempotencyRecord
+from src.register_ticket_api.exceptions import AppValidationException, DbOperationException
+from src.register_ticket_api.infraestructure import InMemoryIdempotencyStore
+from src.register_ticket_api.interfaces import IIdempotencyStore
+from src.register_ticket_api.services import IdempotencyService
+
+FINGERPRINT: str = IdempotencyService.fingerprint("A1", "G1", "123456")
+ACCEPTED_STATUS_CODE: int = 202
+REJECTED_STATUS_CODE: int = 400
+ERROR_STATUS_CODE: int = 500
+
+
+@pytest.fixture
+def idempotency_service() -> IdempotencyService:
+    """Create an IdempotencyService backed by an in-memory store."""
+    return IdempotencyService(store=InMemoryIdempotencyStore(max_entries=10, ttl_seconds=60))
+
+
+def make_operation(status_code: int) -> AsyncMock:
+    return AsyncMock(
+        return_value=IdempotencyRecord(
+            request_fingerprint=FINGERPRINT, status_code=status_code, body={"detail": "x"}
+        )
+    )
+
+
+async def test_execute_runs_operation_once_and_replays(
+    idempotency_service: IdempotencyService,
+) -> None:
+    """Test that a retry replays the first outcome without running the operation."""
+    operation: AsyncMock = make_operation(ACCEPTED_STATUS_CODE)
+
+    first, first_replayed = await idempotency_service.execute("key", FINGERPRINT, operation)
+    second, second_replayed = await idempotency_service.execute("key", FINGERPRINT, operation)
+
+    assert first == second
+    assert first_replayed is False
+    assert second_replayed is True
+    operation.assert_awaited_once()
+
+
+async def test_execute_replays_rejections(idempotency_service: IdempotencyService) -> None:
+    """Test that rejected requests are also replayed."""
+    operation: AsyncMock = make_operation(REJECTED_STATUS_CODE)
+
+    await idempotency_service.execute("key", FINGERPRINT, operation)
+    record, replayed = await idempotency_service.execute("key", FINGERPRINT, operation)
+
+    assert record.status_code == REJECTED_STATUS_CODE
+    assert replayed is True
+    operation.assert_awaited_once()
+
+
+async def test_execute_does_not_store_server_errors(
+    idempotency_service: IdempotencyService,
+) -> None:
+    """Test that server errors are retried instead of replayed."""
+    operation: AsyncMock = make_operation(ERROR_STATUS_CODE)
+
+    await idempotency_service.execute("key", FINGERPRINT, operation)
+    _, replayed = await idempotency_service.execute("key", FINGERPRINT, operation)
+
+    assert replayed is False
+    assert operation.await_count == 2  # noqa: PLR2004
+
+
+async def test_execute_rejects_key_reused_for_other_request(
+    idempotency_service: IdempotencyService,
+) -> None:
+    """Test that a key can't replay the response of a different request."""
+    await idempotency_service.execute("key", FINGERPRINT, make_operation(ACCEPTED_STATUS_CODE))
+
+    with pytest.raises(AppValidationException, match="already used for another request"):
+        await idempotency_service.execute(
+            "key", "other-fingerprint", make_operation(ACCEPTED_STATUS_CODE)
+        )
+
+
+async def test_execute_rejects_empty_key(idempotency_service: IdempotencyService) -> None:
+    """Test that empty keys are rejected."""
+    with pytest.raises(AppValidationException, match="Idempotency key must have"):
+        await idempotency_service.execute("", FINGERPRINT, make_operation(ACCEPTED_STATUS_CODE))
+
+
+async def test_execute_coalesces_concurrent_retries(
+    idempotency_service: IdempotencyService,
+) -> None:
+    """Test that a retry arriving while the first attempt runs waits for its outcome."""
+    release = asyncio.Event()
+    calls: list[int] = []
+
+    async def slow_operation() -> IdempotencyRecord:
+        calls.append(1)
+        await release.wait()
+        return IdempotencyRecord(request_fingerprint=FINGERPRINT, status_code=202)
+
+    first = asyncio.create_task(idempotency_service.execute("key", FINGERPRINT, slow_operation))
+    second = asyncio.create_task(idempotency_service.execute("key", FINGERPRINT, slow_operation))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(first, second)
+
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results] == [False, True]
+
+
+async def test_execute_survives_store_failures() -> None:
+    """Test that a failing shared store doesn't fail the request."""
+    store = AsyncMock(spec=IIdempotencyStore)
+    store.get.side_effect = DbOperationException(Exception("down"))
+    store.save.side_effect = DbOperationException(Exception("down"))
+    idempotency_service = IdempotencyService(store=store)
+
+    record, replayed = await idempotency_service.execute(
+        "key", FINGERPRINT, make_operation(ACCEPTED_STATUS_CODE)
+    )
+
+    assert record.status_code == ACCEPTED_STATUS_CODE
+    assert replayed is False
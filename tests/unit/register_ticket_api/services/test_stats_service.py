@@ -0,0 +1,50 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.register_ticket_api.entities import GateStats
+from src.register_ticket_api.exceptions import AppValidationException
+from src.register_ticket_api.interfaces import IStatsRepository
+from src.register_ticket_api.services import StatsService
+
+
+@pytest.fixture
+def sample_stats() -> list[GateStats]:
+    """Create rollup stats for one gate."""
+    return [GateStats(gate="G1", issued=10, revoked=0, used=4, percent_used=40.0)]
+
+
+@pytest.fixture
+def mock_stats_repo(sample_stats: list[GateStats]) -> AsyncMock:
+    """Mock stats repository."""
+    stats_repo = AsyncMock(spec=IStatsRepository)
+    stats_repo.get_gate_stats.return_value = sample_stats
+    return stats_repo
+
+
+async def test_get_gate_stats_reads_rollups(
+    mock_stats_repo: AsyncMock, sample_stats: list[GateStats]
+) -> None:
+    """Test that gate stats come from the rollup repository."""
+    stats_service = StatsService(stats_repo=mock_stats_repo)
+
+    assert await stats_service.get_gate_stats(window_minutes=15) == sample_stats
+    mock_stats_repo.get_gate_stats.assert_awaited_once()
+
+
+async def test_get_gate_stats_caches_between_refreshes(mock_stats_repo: AsyncMock) -> None:
+    """Test that dashboards refreshing within the ttl share one database read."""
+    stats_service = StatsService(stats_repo=mock_stats_repo, cache_ttl_seconds=60)
+
+    for _ in range(5):
+        await stats_service.get_gate_stats(window_minutes=15)
+
+    mock_stats_repo.get_gate_stats.assert_awaited_once()
+
+
+async def test_get_gate_stats_rejects_invalid_window(mock_stats_repo: AsyncMock) -> None:
+    """Test that the window must be a positive number of minutes."""
+    stats_service = StatsService(stats_repo=mock_stats_repo)
+
+    with pytest.raises(AppValidationException, match="Window must be between"):
+        await stats_service.get_gate_stats(window_minutes=0)
@@ -1,13 +1,30 @@
 from base64 import b64encode
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
+import asyncpg
 import pytest
 
-from src.register_ticket_api.entities import AttendanceLog, Ticket, User
-from src.register_ticket_api.exceptions import AppValidationException, DbOperationException
+from src.register_ticket_api.entities import AttendanceLog, Ticket, TicketChange, User
+from src.register_ticket_api.exceptions import (
+    AppValidationException,
+    CircuitOpenException,
+    DbOperationException,
+    InvalidCredentialsException,
+    InvalidTotpCodeException,
+    TooManyAttemptsException,
+)
+from src.register_ticket_api.infraestructure import (
+    AttendanceRollupBuffer,
+    RecentScanCache,
+    TicketStatusHub,
+    TicketTokenCodec,
+    TotpAttemptThrottle,
+)
+from src.register_ticket_api.interfaces import IAttendanceEventSink
 from src.register_ticket_api.repositories import TicketRepository, UserRepository
-from src.register_ticket_api.services import TicketService
+from src.register_ticket_api.services import DegradedAttendanceService, TicketService
 
 # Test data constants
 VALID_SEED_BYTES: bytes = b"test_secret_key_"
@@ -15,6 +32,8 @@ VALID_SEED_BASE64: str = b64encode(VALID_SEED_BYTES).decode("utf-8")
 TEST_SEAT: str = "A1"
 TEST_GATE: str = "G1"
 TOTP_INTERVAL: int = 60
+VENUE_ADDRESS: str = "10.0.0.1"
+LOOKUPS_BY_OTHER_GATE: int = 2
 
 
 @pytest.fixture
@@ -227,7 +246,9 @@ async def test_log_attendance_success(
         mock_totp_instance.verify.assert_called_once_with(
             sample_attendance_log.totp_code, valid_window=0
         )
-        mock_ticket_repo.mark_ticket_as_used.assert_called_once_with(sample_registered_ticket.id)
+        mock_ticket_repo.mark_ticket_as_used.assert_called_once_with(
+            sample_registered_ticket.id, gate=sample_registered_ticket.gate
+        )
 
 
 async def test_log_attendance_ticket_not_found(
@@ -372,3 +393,482 @@ async def test_log_attendance_ticket_already_used(
 
     with pytest.raises(AppValidationException, match="Invalid ticket"):
         await ticket_service.log_attendance(sample_attendance_log)
+
+
+async def test_log_attendance_records_gate_rollup(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that successful attendance is counted in the gate rollups."""
+    used_ticket = sample_registered_ticket.model_copy()
+    used_ticket.status = "used"
+    used_ticket.used_at = datetime(2024, 1, 1, 18, 30, 12)
+    rollup_buffer = MagicMock(spec=AttendanceRollupBuffer)
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, rollup_buffer=rollup_buffer
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        mock_ticket_repo.get_by_ticket_details.side_effect = [sample_registered_ticket, used_ticket]
+        mock_ticket_repo.mark_ticket_as_used.return_value = True
+
+        await ticket_service.log_attendance(sample_attendance_log)
+
+    rollup_buffer.record_entry.assert_called_once_with(used_ticket.gate, used_ticket.used_at)
+
+
+async def test_revoke_tickets_splits_revoked_and_not_revoked(
+    ticket_service: TicketService, mock_ticket_repo: AsyncMock
+) -> None:
+    """Test that duplicated ids are revoked once and misses are reported."""
+    revoked_id, missing_id = uuid4(), uuid4()
+    mock_ticket_repo.revoke_tickets.return_value = [
+        TicketChange(ticket_id=revoked_id, seat=TEST_SEAT, gate=TEST_GATE, status="revoked")
+    ]
+
+    result = await ticket_service.revoke_tickets([revoked_id, missing_id, revoked_id])
+
+    mock_ticket_repo.revoke_tickets.assert_awaited_once_with([revoked_id, missing_id])
+    assert result.revoked == [revoked_id]
+    assert result.not_revoked == [missing_id]
+
+
+async def test_revoke_tickets_rejects_empty_and_oversized_batches(
+    ticket_service: TicketService, mock_ticket_repo: AsyncMock
+) -> None:
+    """Test that empty or too large batches never reach the database."""
+    with pytest.raises(AppValidationException):
+        await ticket_service.revoke_tickets([])
+    with (
+        patch.object(TicketService, "MAX_REVOCATION_BATCH", 1),
+        pytest.raises(AppValidationException),
+    ):
+        await ticket_service.revoke_tickets([uuid4(), uuid4()])
+
+    mock_ticket_repo.revoke_tickets.assert_not_awaited()
+
+
+def make_listed_ticket(user: User, created_at: datetime) -> Ticket:
+    return Ticket(
+        id=uuid4(), user_id=user.id, seat=TEST_SEAT, gate=TEST_GATE, created_at=created_at
+    )
+
+
+async def test_list_user_tickets_returns_cursor_for_next_page(
+    ticket_service: TicketService,
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_user: User,
+) -> None:
+    """Test that an extra row yields a cursor that resumes after the last ticket."""
+    tickets: list[Ticket] = [
+        make_listed_ticket(sample_user, datetime(2024, 1, 1, 12, minute)) for minute in (3, 2, 1)
+    ]
+    mock_user_repo.get_by_username.return_value = sample_user
+    mock_ticket_repo.list_by_user.return_value = tickets
+
+    page = await ticket_service.list_user_tickets(sample_user.username, limit=2, status="valid")
+
+    mock_ticket_repo.list_by_user.assert_awaited_once_with(
+        sample_user.id, 3, after=None, status="valid"
+    )
+    assert page.tickets == tickets[:2]
+    assert page.next_cursor is not None
+
+    mock_ticket_repo.list_by_user.return_value = tickets[2:]
+    next_page = await ticket_service.list_user_tickets(
+        sample_user.username, limit=2, cursor=page.next_cursor
+    )
+
+    assert mock_ticket_repo.list_by_user.await_args.kwargs["after"] == (
+        tickets[1].created_at,
+        tickets[1].id,
+    )
+    assert next_page.tickets == tickets[2:]
+    assert next_page.next_cursor is None
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm9waXBl"])
+async def test_list_user_tickets_rejects_invalid_cursor(
+    ticket_service: TicketService, mock_ticket_repo: AsyncMock, cursor: str
+) -> None:
+    """Test that tampered cursors are rejected before touching the database."""
+    with pytest.raises(AppValidationException, match="Invalid cursor"):
+        await ticket_service.list_user_tickets("test_user", limit=10, cursor=cursor)
+
+    mock_ticket_repo.list_by_user.assert_not_awaited()
+
+
+async def test_list_user_tickets_user_not_found(
+    ticket_service: TicketService, mock_user_repo: AsyncMock
+) -> None:
+    """Test listing tickets of an unknown user."""
+    mock_user_repo.get_by_username.return_value = None
+
+    with pytest.raises(AppValidationException, match="does not exist"):
+        await ticket_service.list_user_tickets("ghost", limit=10)
+
+
+async def test_subscribe_to_ticket_changes_requires_password(
+    mock_user_repo: AsyncMock, mock_ticket_repo: AsyncMock, sample_user: User
+) -> None:
+    """Test only the owner of the tickets can follow their changes."""
+    status_hub = TicketStatusHub()
+    password_hasher = AsyncMock()
+    password_hasher.verify.side_effect = lambda password, _hash: password == "right"  # noqa: S105
+    mock_user_repo.get_by_username.return_value = sample_user
+    service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        status_hub=status_hub,
+        password_hasher=password_hasher,
+    )
+
+    with pytest.raises(InvalidCredentialsException):
+        await service.subscribe_to_ticket_changes(sample_user.username, "wrong")
+    subscription = await service.subscribe_to_ticket_changes(sample_user.username, "right")
+
+    assert subscription.user_id == sample_user.id
+    assert status_hub.subscriber_count == 1
+
+
+async def test_log_attendance_falls_back_to_degraded_mode(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that a database failure validates against the cache and journals the scan."""
+    degraded_attendance = AsyncMock(spec=DegradedAttendanceService)
+    degraded_attendance.get_cached_ticket = MagicMock(return_value=sample_registered_ticket)
+    used_ticket: Ticket = sample_registered_ticket.model_copy(update={"status": "used"})
+    degraded_attendance.journal_attendance.return_value = used_ticket
+    mock_ticket_repo.get_by_ticket_details.side_effect = DbOperationException(OSError("down"))
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        degraded_attendance=degraded_attendance,
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        result: Ticket = await ticket_service.log_attendance(sample_attendance_log)
+
+    assert result == used_ticket
+    degraded_attendance.journal_attendance.assert_awaited_once_with(sample_registered_ticket)
+    mock_ticket_repo.mark_ticket_as_used.assert_not_awaited()
+
+
+async def test_log_attendance_without_degraded_mode_raises_db_error(
+    ticket_service: TicketService,
+    mock_ticket_repo: AsyncMock,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that database failures propagate when degraded mode is disabled."""
+    mock_ticket_repo.get_by_ticket_details.side_effect = DbOperationException(OSError("down"))
+
+    with pytest.raises(DbOperationException):
+        await ticket_service.log_attendance(sample_attendance_log)
+
+
+async def test_log_attendance_emits_rejected_event(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that a rejected scan is reported to the event sink with its reason."""
+    event_sink = MagicMock(spec=IAttendanceEventSink)
+    mock_ticket_repo.get_by_ticket_details.return_value = None
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, event_sink=event_sink
+    )
+
+    with pytest.raises(AppValidationException):
+        await ticket_service.log_attendance(sample_attendance_log)
+
+    event = event_sink.emit.call_args.args[0]
+    assert event.outcome == "rejected"
+    assert event.reason == "Ticket does not exist"
+    assert event.gate == sample_attendance_log.gate
+    assert event.latency_ms >= 0
+
+
+async def test_log_attendance_emits_accepted_event(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that an accepted scan is reported with the ticket id."""
+    event_sink = MagicMock(spec=IAttendanceEventSink)
+    used_ticket: Ticket = sample_registered_ticket.model_copy(update={"status": "used"})
+    mock_ticket_repo.get_by_ticket_details.side_effect = [sample_registered_ticket, used_ticket]
+    mock_ticket_repo.mark_ticket_as_used.return_value = True
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, event_sink=event_sink
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        await ticket_service.log_attendance(sample_attendance_log)
+
+    event = event_sink.emit.call_args.args[0]
+    assert event.outcome == "accepted"
+    assert event.ticket_id == sample_registered_ticket.id
+
+
+# ==================== Tests for ticket tokens ====================
+
+TOKEN_KEYS: dict[str, bytes] = {"k1": b"k" * 32}
+
+
+async def test_log_attendance_with_token_skips_ticket_lookup(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that a signed token is verified in memory and only the used flag is written."""
+    codec = TicketTokenCodec(TOKEN_KEYS)
+    mock_ticket_repo.mark_ticket_as_used.return_value = True
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, ticket_token_codec=codec
+    )
+    attendance: AttendanceLog = sample_attendance_log.model_copy(
+        update={"token": codec.issue(sample_registered_ticket)}
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        result = await ticket_service.log_attendance(attendance)
+
+    assert result.id == sample_registered_ticket.id
+    assert result.status == "used"
+    mock_ticket_repo.get_by_ticket_details.assert_not_called()
+    mock_ticket_repo.mark_ticket_as_used.assert_awaited_once_with(
+        sample_registered_ticket.id, gate=sample_registered_ticket.gate
+    )
+
+
+async def test_token_scan_of_used_ticket_is_rejected_not_journaled(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test the error the mark function raises for a used ticket never reaches the journal."""
+    codec = TicketTokenCodec(TOKEN_KEYS)
+    degraded_attendance = AsyncMock(spec=DegradedAttendanceService)
+    mock_ticket_repo.mark_ticket_as_used.side_effect = DbOperationException(
+        asyncpg.exceptions.RaiseError(
+            f"Ticket {sample_registered_ticket.id} no existe o ya fue usado"
+        )
+    )
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        ticket_token_codec=codec,
+        degraded_attendance=degraded_attendance,
+    )
+    attendance: AttendanceLog = sample_attendance_log.model_copy(
+        update={"token": codec.issue(sample_registered_ticket)}
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        with pytest.raises(AppValidationException, match="Error marking attendance"):
+            await ticket_service.log_attendance(attendance)
+
+    degraded_attendance.journal_attendance.assert_not_awaited()
+
+
+async def test_token_scan_is_journaled_when_circuit_is_open(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test an unavailable database still journals the token scan."""
+    codec = TicketTokenCodec(TOKEN_KEYS)
+    degraded_attendance = AsyncMock(spec=DegradedAttendanceService)
+    used_ticket: Ticket = sample_registered_ticket.model_copy(update={"status": "used"})
+    degraded_attendance.journal_attendance.return_value = used_ticket
+    mock_ticket_repo.mark_ticket_as_used.side_effect = DbOperationException(
+        CircuitOpenException(1.0)
+    )
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        ticket_token_codec=codec,
+        degraded_attendance=degraded_attendance,
+    )
+    attendance: AttendanceLog = sample_attendance_log.model_copy(
+        update={"token": codec.issue(sample_registered_ticket)}
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        result: Ticket = await ticket_service.log_attendance(attendance)
+
+    assert result == used_ticket
+    degraded_attendance.journal_attendance.assert_awaited_once()
+
+
+async def test_log_attendance_rejects_token_of_another_seat(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+) -> None:
+    """Test that a valid token can't be used to enter through another seat or gate."""
+    codec = TicketTokenCodec(TOKEN_KEYS)
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, ticket_token_codec=codec
+    )
+    attendance = AttendanceLog(
+        seat="B2", gate=TEST_GATE, totp_code="123456", token=codec.issue(sample_registered_ticket)
+    )
+
+    with pytest.raises(AppValidationException, match="does not match"):
+        await ticket_service.log_attendance(attendance)
+
+    mock_ticket_repo.mark_ticket_as_used.assert_not_called()
+
+
+async def test_register_ticket_returns_signed_token(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_user: User,
+    sample_ticket: Ticket,
+    sample_registered_ticket: Ticket,
+) -> None:
+    """Test that a registered ticket comes back with a token carrying its seed."""
+    codec = TicketTokenCodec(TOKEN_KEYS)
+    mock_user_repo.get_by_username.return_value = sample_user
+    mock_ticket_repo.get_by_ticket_details.side_effect = [sample_ticket, sample_registered_ticket]
+    mock_ticket_repo.register_ticket.return_value = True
+    ticket_service = TicketService(
+        user_repo=mock_user_repo, ticket_repo=mock_ticket_repo, ticket_token_codec=codec
+    )
+
+    result = await ticket_service.register_ticket(sample_user.username, sample_ticket)
+
+    assert result.token is not None
+    assert codec.verify(result.token).seed == VALID_SEED_BASE64
+
+
+# ==================== Tests for recent scans ====================
+
+
+async def test_rescan_of_used_ticket_is_rejected_without_lookup(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that a double tap is rejected from memory after the first scan succeeds."""
+    used_ticket: Ticket = sample_registered_ticket.model_copy(update={"status": "used"})
+    mock_ticket_repo.get_by_ticket_details.side_effect = [sample_registered_ticket, used_ticket]
+    mock_ticket_repo.mark_ticket_as_used.return_value = True
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        recent_scans=RecentScanCache(max_entries=10),
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = True
+        await ticket_service.log_attendance(sample_attendance_log)
+        mock_ticket_repo.reset_mock()
+        mock_totp_class.reset_mock()
+        with pytest.raises(AppValidationException, match="Invalid ticket"):
+            await ticket_service.log_attendance(sample_attendance_log)
+
+    mock_ticket_repo.get_by_ticket_details.assert_not_awaited()
+    mock_totp_class.assert_not_called()
+
+
+async def test_repeated_invalid_code_skips_totp_check(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that retrying a rejected TOTP code is answered without a lookup."""
+    mock_ticket_repo.get_by_ticket_details.return_value = sample_registered_ticket
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        recent_scans=RecentScanCache(max_entries=10),
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = False
+        for _ in range(2):
+            with pytest.raises(AppValidationException, match="Invalid TOTP"):
+                await ticket_service.log_attendance(sample_attendance_log)
+
+    mock_ticket_repo.get_by_ticket_details.assert_awaited_once()
+
+
+# ==================== Tests for TOTP throttling ====================
+
+
+async def test_guessing_device_is_throttled_before_lookup(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that once a device fails too many codes it is rejected without a lookup."""
+    mock_ticket_repo.get_by_ticket_details.return_value = sample_registered_ticket
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        attempt_throttle=TotpAttemptThrottle(max_failures=1, width=64),
+    )
+    attendance: AttendanceLog = sample_attendance_log.model_copy(update={"device_id": "gate-7"})
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = False
+        with pytest.raises(InvalidTotpCodeException):
+            await ticket_service.log_attendance(attendance, client_id=VENUE_ADDRESS)
+        with pytest.raises(TooManyAttemptsException):
+            await ticket_service.log_attendance(
+                attendance.model_copy(update={"seat": "B2"}), client_id=VENUE_ADDRESS
+            )
+        with pytest.raises(InvalidTotpCodeException):
+            await ticket_service.log_attendance(
+                attendance.model_copy(update={"seat": "B2", "device_id": "gate-8"}),
+                client_id=VENUE_ADDRESS,
+            )
+
+    assert mock_ticket_repo.get_by_ticket_details.await_count == LOOKUPS_BY_OTHER_GATE
+
+
+async def test_anonymous_client_gets_a_higher_limit(
+    mock_user_repo: AsyncMock,
+    mock_ticket_repo: AsyncMock,
+    sample_registered_ticket: Ticket,
+    sample_attendance_log: AttendanceLog,
+) -> None:
+    """Test that an address is only throttled for scans without a device, past a higher limit."""
+    mock_ticket_repo.get_by_ticket_details.return_value = sample_registered_ticket
+    ticket_service = TicketService(
+        user_repo=mock_user_repo,
+        ticket_repo=mock_ticket_repo,
+        attempt_throttle=TotpAttemptThrottle(max_failures=1, width=4096),
+    )
+
+    with patch("src.register_ticket_api.services.ticket_service.pyotp.TOTP") as mock_totp_class:
+        mock_totp_class.return_value.verify.return_value = False
+        for seat in range(TicketService.ANONYMOUS_CLIENT_FAILURE_FACTOR):
+            with pytest.raises(InvalidTotpCodeException):
+                await ticket_service.log_attendance(
+                    sample_attendance_log.model_copy(update={"seat": f"S{seat}"}),
+                    client_id=VENUE_ADDRESS,
+                )
+        with pytest.raises(TooManyAttemptsException):
+            await ticket_service.log_attendance(sample_attendance_log, client_id=VENUE_ADDRESS)
@@ -0,0 +1,98 @@
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from src.register_ticket_api.entities import User
+from src.register_ticket_api.exceptions import AppValidationException
+from src.register_ticket_api.infraestructure import PasswordHasher
+from src.register_ticket_api.interfaces import IUserRepository
+from src.register_ticket_api.services import UserService
+
+TEST_USERNAME: str = "new_user"
+TEST_PASSWORD: str = "Secr3t!pass"  # noqa: S105
+WEAK_PASSWORD: str = "secr3t!pass"  # noqa: S105
+TEST_PASSWORD_HASH: str = "scrypt$hash"  # noqa: S105
+IMPORT_BATCH_SIZE: int = 2
+
+
+@pytest.fixture
+def mock_user_repo() -> AsyncMock:
+    """Mock user repository."""
+    repo = AsyncMock(spec=IUserRepository)
+    repo.upsert_users.side_effect = lambda users: (len(users), 0)
+    return repo
+
+
+@pytest.fixture
+def mock_password_hasher() -> AsyncMock:
+    """Mock password hasher returning a fixed hash per password."""
+    hasher = AsyncMock(spec=PasswordHasher)
+    hasher.hash.return_value = TEST_PASSWORD_HASH
+    hasher.hash_many.side_effect = lambda passwords: [f"hash:{p}" for p in passwords]
+    return hasher
+
+
+@pytest.fixture
+def user_service(mock_user_repo: AsyncMock, mock_password_hasher: AsyncMock) -> UserService:
+    """Create a user service with mocked dependencies."""
+    return UserService(
+        user_repo=mock_user_repo,
+        password_hasher=mock_password_hasher,
+        import_batch_size=IMPORT_BATCH_SIZE,
+    )
+
+
+async def as_rows(rows: list[list[str]]) -> AsyncIterator[list[str]]:
+    for row in rows:
+        yield row
+
+
+async def test_create_user_stores_password_hash(
+    user_service: UserService, mock_user_repo: AsyncMock
+) -> None:
+    """Test that the repository receives the hash instead of the password."""
+    created_user = User(id=uuid4(), username=TEST_USERNAME, password=TEST_PASSWORD_HASH)
+    mock_user_repo.get_by_username.side_effect = [None, created_user]
+    mock_user_repo.create_user.return_value = True
+
+    result = await user_service.create_user(User(username=TEST_USERNAME, password=TEST_PASSWORD))
+
+    assert result == created_user
+    stored: User = mock_user_repo.create_user.await_args.args[0]
+    assert stored.password == TEST_PASSWORD_HASH
+
+
+async def test_create_user_reports_the_failed_password_rule(user_service: UserService) -> None:
+    """Test that a weak password is rejected with the rule it breaks."""
+    with pytest.raises(AppValidationException, match="mayúscula"):
+        await user_service.create_user(User(username=TEST_USERNAME, password=WEAK_PASSWORD))
+
+
+async def test_import_users_validates_and_upserts_in_batches(
+    user_service: UserService, mock_user_repo: AsyncMock
+) -> None:
+    """Test that valid rows are hashed and upserted per batch and invalid rows reported."""
+    rows: list[list[str]] = [
+        ["username", "password"],
+        ["user_a", TEST_PASSWORD],
+        ["x", TEST_PASSWORD],
+        ["user_b", TEST_PASSWORD],
+        ["user_c"],
+        [],
+        ["user_d", TEST_PASSWORD],
+    ]
+
+    result = await user_service.import_users(as_rows(rows))
+
+    assert mock_user_repo.upsert_users.await_args_list[0].args[0] == [
+        ("user_a", f"hash:{TEST_PASSWORD}"),
+        ("user_b", f"hash:{TEST_PASSWORD}"),
+    ]
+    assert mock_user_repo.upsert_users.await_args_list[1].args[0] == [
+        ("user_d", f"hash:{TEST_PASSWORD}")
+    ]
+    assert (result.received, result.created, result.rejected) == (5, 3, 2)
+    assert result.errors[0].startswith("line 3: ")
+    assert result.errors[1] == "line 5: expected username,password"
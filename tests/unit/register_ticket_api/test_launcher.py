@@ -0,0 +1,44 @@
+import pytest
+
+from src.register_ticket_api.launcher import (
+    DEDICATED_CONNECTIONS_PER_WORKER,
+    MIGRATION_CONNECTIONS,
+    compute_pool_max_size,
+)
+
+MAX_CONNECTIONS: int = 100
+RESERVED_CONNECTIONS: int = 10
+
+
+def total_connections(pool_max_size: int, workers: int) -> int:
+    return workers * (pool_max_size + DEDICATED_CONNECTIONS_PER_WORKER) + MIGRATION_CONNECTIONS
+
+
+def test_compute_pool_max_size_divides_budget_between_workers() -> None:
+    """Test that every worker gets an equal share of the non reserved connections."""
+    workers: int = 4
+
+    pool_max_size: int = compute_pool_max_size(MAX_CONNECTIONS, RESERVED_CONNECTIONS, workers)
+
+    assert pool_max_size > 0
+    assert total_connections(pool_max_size, workers) <= MAX_CONNECTIONS - RESERVED_CONNECTIONS
+    assert total_connections(pool_max_size + 1, workers) > MAX_CONNECTIONS - RESERVED_CONNECTIONS
+
+
+def test_compute_pool_max_size_single_worker_uses_whole_budget() -> None:
+    """Test that a single worker can use every non reserved connection."""
+    pool_max_size: int = compute_pool_max_size(MAX_CONNECTIONS, RESERVED_CONNECTIONS, 1)
+
+    assert total_connections(pool_max_size, 1) == MAX_CONNECTIONS - RESERVED_CONNECTIONS
+
+
+def test_compute_pool_max_size_rejects_too_many_workers() -> None:
+    """Test that workers can't be started without at least one connection each."""
+    with pytest.raises(ValueError, match="Not enough database connections"):
+        compute_pool_max_size(MAX_CONNECTIONS, RESERVED_CONNECTIONS, MAX_CONNECTIONS)
+
+
+def test_compute_pool_max_size_rejects_zero_workers() -> None:
+    """Test that at least one worker is required."""
+    with pytest.raises(ValueError, match="Workers must be at least 1"):
+        compute_pool_max_size(MAX_CONNECTIONS, RESERVED_CONNECTIONS, 0)
@@ -0,0 +1,64 @@
+import pytest
+
+from src.simulation.gate_simulator import GateSimulator, SimulationConfig, worst_wait_ms
+from src.simulation.service_time import ServiceProfile, ServiceTime
+
+ATTENDEES: int = 60_000
+GATES: dict[str, int] = {"north": 20_000, "south": 25_000, "east": 15_000}
+SMALL_GATE: dict[str, int] = {"main": 600}
+SCAN_TIME: ServiceTime = ServiceTime.parse("p0=1500,p50=2500,p99=8000")
+FAST_API: ServiceProfile = ServiceProfile(ServiceTime.constant(1.0), ServiceTime.constant(1.0))
+
+
+def config(**changes: object) -> SimulationConfig:
+    settings: dict = {
+        "gates": SMALL_GATE,
+        "lanes_per_gate": 4,
+        "workers": 2,
+        "pool_size": 5,
+        "scan_time": SCAN_TIME,
+        "profile": FAST_API,
+        "ingress_seconds": 600.0,
+    }
+    settings.update(changes)
+    return SimulationConfig(**settings)
+
+
+def test_full_ingress_lets_every_attendee_in() -> None:
+    """Test a 60k attendee ingress runs to the end with one request per attendee."""
+    result: dict = GateSimulator(
+        config(gates=GATES, lanes_per_gate=32, ingress_seconds=3600.0), seed=1
+    ).run()
+
+    assert result["api"]["requests"] == ATTENDEES
+    assert {name: gate["attendees"] for name, gate in result["gates"].items()} == GATES
+
+
+def test_more_lanes_shorten_the_wait() -> None:
+    """Test the queue model answers to capacity the way a gate does."""
+    short_staffed: dict = GateSimulator(config(lanes_per_gate=2), seed=3).run()
+    staffed: dict = GateSimulator(config(lanes_per_gate=8), seed=3).run()
+
+    assert worst_wait_ms(staffed) < worst_wait_ms(short_staffed)
+    assert staffed["gates"]["main"]["longest_line"] < short_staffed["gates"]["main"]["longest_line"]
+    assert 0 < staffed["gates"]["main"]["lane_utilization"] <= 1
+
+
+def test_small_pool_makes_requests_wait_for_connections() -> None:
+    """Test slow round trips on a one connection pool show up as pool waits."""
+    slow_database = ServiceProfile(
+        ServiceTime.constant(1.0), ServiceTime.constant(200.0), db_round_trips=2
+    )
+
+    result: dict = GateSimulator(
+        config(lanes_per_gate=16, workers=1, pool_size=1, profile=slow_database), seed=5
+    ).run()
+
+    assert result["api"]["pool_wait_ms"]["p99"] > 0
+    assert result["api"]["response_time_ms"]["max"] > 400  # noqa: PLR2004
+
+
+def test_invalid_capacity_is_rejected() -> None:
+    """Test a configuration without lanes can't be simulated."""
+    with pytest.raises(ValueError, match="at least 1"):
+        GateSimulator(config(lanes_per_gate=0))
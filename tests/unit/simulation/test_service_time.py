@@ -0,0 +1,64 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from src.simulation.service_time import ServiceProfile, ServiceTime
+
+SAMPLES: int = 10_000
+MEDIAN_MS: float = 2.0
+SLOWEST_MS: float = 10.0
+TOLERANCE: float = 0.05
+
+
+@pytest.fixture
+def rng() -> random.Random:
+    """Seeded generator so the samples repeat."""
+    return random.Random(7)  # noqa: S311
+
+
+def test_samples_follow_the_given_percentiles(rng: random.Random) -> None:
+    """Test inverse transform sampling keeps the median and never exceeds the slowest."""
+    service_time = ServiceTime.parse(f"p0=1,p50={MEDIAN_MS},max={SLOWEST_MS}")
+
+    samples_ms: list[float] = sorted(service_time.sample(rng) * 1000 for _ in range(SAMPLES))
+
+    assert samples_ms[SAMPLES // 2] == pytest.approx(MEDIAN_MS, rel=TOLERANCE)
+    assert samples_ms[-1] <= SLOWEST_MS
+
+
+def test_constant_and_decreasing_specs(rng: random.Random) -> None:
+    """Test a bare number is a constant and decreasing percentiles are rejected."""
+    assert ServiceTime.parse("2.5").sample(rng) == pytest.approx(0.0025)
+    with pytest.raises(ValueError, match="must not decrease"):
+        ServiceTime.parse("p50=5,p99=1")
+
+
+def test_service_time_from_load_replayer_report(tmp_path: Path, rng: random.Random) -> None:
+    """Test the measured service times of an operation are read from a report."""
+    report: Path = tmp_path / "load_report.json"
+    report.write_text(
+        json.dumps({"operations": {"attend_valid": {"service_time_ms": {"p50": 3.0, "max": 3.0}}}})
+    )
+
+    service_time = ServiceTime.parse(f"{report}:attend_valid")
+
+    assert service_time.sample(rng) == pytest.approx(0.003)
+    with pytest.raises(ValueError, match="register"):
+        ServiceTime.parse(f"{report}:register")
+
+
+def test_profile_from_server_timing_splits_api_and_database(rng: random.Random) -> None:
+    """Test round trips and event loop time are taken apart from Server-Timing headers."""
+    profile = ServiceProfile.from_server_timing(
+        [
+            "db_acquire;dur=0.50, db_get_by_ticket_details;dur=2.00, "
+            'db_mark_used;dur=2.00;desc="x2", app;dur=6.50',
+            "app;dur=1.00, encode;dur=0.10",
+        ]
+    )
+
+    assert profile.db_round_trips == pytest.approx(1.5)
+    assert profile.api.sample(rng) == pytest.approx(0.001, abs=0.0015)
+    assert profile.db_round_trip.sample(rng) == pytest.approx(0.0015, abs=0.0005)